@@ -0,0 +1,41 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Detect that the current process was forked.
+
+Objects holding per-process state, such as threads, locks or random
+buffers, keep the marker returned by :func:`get_fork_marker` and compare it
+with the current one before using that state. The marker changes in the
+child process after :func:`os.fork`.
+"""
+
+import os
+
+# Incremented in the child process after os.fork.
+_fork_generation = 0
+
+
+def _after_fork_in_child():
+    global _fork_generation
+    _fork_generation += 1
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+    def get_fork_marker():
+        """Return a value that changes in the child process after a fork."""
+        return _fork_generation
+else:  # pragma: NO COVER
+    get_fork_marker = os.getpid
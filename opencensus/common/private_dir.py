@@ -0,0 +1,99 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Directories only accessible by the current user.
+
+Transports keeping spans in files or sockets on the local host put them in
+such a directory, so that other local users can neither read the spans nor
+plant files or sockets for the process to read from.
+"""
+
+import errno
+import getpass
+import os
+import stat
+import tempfile
+
+
+def get_default_private_dir(name):
+    """Return the path of a directory of the current user in the temporary
+    directory, such as ``/tmp/opencensus-1000``.
+
+    :type name: str
+    :param name: The prefix of the directory name.
+
+    :rtype: str
+    :returns: The path of the directory, which may not exist yet.
+    """
+    if hasattr(os, 'getuid'):
+        user = os.getuid()
+    else:  # pragma: NO COVER
+        user = getpass.getuser()
+    return os.path.join(
+        tempfile.gettempdir(), '{}-{}'.format(name, user))
+
+
+def check_private_dir(path):
+    """Check that a directory is owned by the current user and not
+    accessible by other users.
+
+    :type path: str
+    :param path: The path of the directory.
+
+    :raises: ValueError if the directory is not private, or OSError if it
+             does not exist.
+    """
+    # Do not follow a symlink, it could point anywhere.
+    st = os.lstat(path)
+
+    if not stat.S_ISDIR(st.st_mode):
+        raise ValueError('{} is not a directory'.format(path))
+
+    if not hasattr(os, 'getuid'):  # pragma: NO COVER
+        return
+
+    if st.st_uid != os.getuid():
+        raise ValueError(
+            '{} is not owned by the current user'.format(path))
+
+    if st.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise ValueError(
+            '{} is accessible by other users, its mode must be 0700'.format(
+                path))
+
+
+def ensure_private_dir(path):
+    """Create a directory only accessible by the current user, or check that
+    an existing one is.
+
+    :type path: str
+    :param path: The path of the directory. Missing parent directories are
+                 created with the default permissions.
+
+    :raises: ValueError if the directory exists and is not private.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(parent)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    try:
+        os.mkdir(path, 0o700)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    check_private_dir(path)
@@ -0,0 +1,140 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pluggable storage for the per-request execution context.
+
+The trace and stats execution contexts store the current tracer, span and
+attributes through one of the backends in this module:
+
+* :class:`ContextVarsRuntimeContext` keeps the values in
+  :mod:`contextvars`, so every asyncio task (and every thread) sees its own
+  values even when many tasks run on one event loop. It is the default when
+  :mod:`contextvars` is available.
+* :class:`ThreadLocalRuntimeContext` keeps the values in a
+  :class:`threading.local`. It is the fallback on Python versions without
+  :mod:`contextvars`, and is greenlet-local under gevent monkey patching.
+
+To select a backend explicitly, call :func:`set_runtime_context` before any
+tracer is created, values stored in the previous backend are not carried
+over.
+"""
+
+import threading
+
+try:
+    import contextvars
+except ImportError:  # pragma: NO COVER
+    contextvars = None
+
+_MISSING = object()
+
+
+class ThreadLocalRuntimeContext(object):
+    """Runtime context backend storing values in a ``threading.local``."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, key, default=None):
+        """Return the value stored for ``key``, or ``default`` if unset."""
+        return getattr(self._local, key, default)
+
+    def set(self, key, value):
+        """Store ``value`` for ``key`` in the current thread."""
+        setattr(self._local, key, value)
+
+    def clear(self, prefix=''):
+        """Remove the values of the current thread whose key starts with
+        ``prefix``.
+        """
+        values = self._local.__dict__
+        for key in [key for key in values if key.startswith(prefix)]:
+            del values[key]
+
+
+class ContextVarsRuntimeContext(object):
+    """Runtime context backend storing values in ``contextvars``.
+
+    One :class:`contextvars.ContextVar` is created per key on first use.
+    Asyncio copies the context into each new task, so values set inside a
+    task are never seen by concurrently running tasks.
+    """
+
+    def __init__(self):
+        self._vars = {}
+        self._lock = threading.Lock()
+
+    def _get_var(self, key):
+        var = self._vars.get(key)
+
+        if var is None:
+            with self._lock:
+                var = self._vars.get(key)
+                if var is None:
+                    var = contextvars.ContextVar(key, default=_MISSING)
+                    self._vars[key] = var
+
+        return var
+
+    def get(self, key, default=None):
+        """Return the value stored for ``key``, or ``default`` if unset."""
+        var = self._vars.get(key)
+
+        if var is None:
+            return default
+
+        value = var.get()
+
+        if value is _MISSING:
+            return default
+
+        return value
+
+    def set(self, key, value):
+        """Store ``value`` for ``key`` in the current context."""
+        self._get_var(key).set(value)
+
+    def clear(self, prefix=''):
+        """Unset the values of the current context whose key starts with
+        ``prefix``.
+        """
+        for key, var in list(self._vars.items()):
+            if key.startswith(prefix):
+                var.set(_MISSING)
+
+
+def _create_default_runtime_context():
+    if contextvars is not None:
+        return ContextVarsRuntimeContext()
+    return ThreadLocalRuntimeContext()  # pragma: NO COVER
+
+
+_runtime_context = _create_default_runtime_context()
+
+
+def get_runtime_context():
+    """Return the backend used to store the execution context."""
+    return _runtime_context
+
+
+def set_runtime_context(runtime_context):
+    """Replace the backend used to store the execution context.
+
+    :type runtime_context: :class:`ThreadLocalRuntimeContext` or
+                           :class:`ContextVarsRuntimeContext`
+    :param runtime_context: An object implementing ``get``, ``set`` and
+                            ``clear``.
+    """
+    global _runtime_context
+    _runtime_context = runtime_context
@@ -58,6 +58,12 @@ class BaseAggregation(object):
         """The buckets of the current aggregation"""
         return self._buckets
 
+    def new_aggregation_data(self):
+        """Creates empty aggregation data for one set of tag values, which
+        :class:`~opencensus.stats.view_data.ViewData` records the samples
+        into, so that the aggregation itself is never modified"""
+        raise NotImplementedError
+
 
 class SumAggregation(BaseAggregation):
     """Sum Aggregation escribes that data collected and aggregated with this
@@ -81,6 +87,10 @@ class SumAggregation(BaseAggregation):
         """The sum of the current aggregation"""
         return self._sum
 
+    def new_aggregation_data(self):
+        """Creates empty aggregation data for one set of tag values"""
+        return aggregation_data.SumAggregationDataFloat(sum_data=0.0)
+
 
 class CountAggregation(BaseAggregation):
     """Describes that the data collected and aggregated with this method will
@@ -103,6 +113,10 @@ class CountAggregation(BaseAggregation):
         """The count of the current aggregation"""
         return self._count
 
+    def new_aggregation_data(self):
+        """Creates empty aggregation data for one set of tag values"""
+        return aggregation_data.CountAggregationData(0)
+
 
 class DistributionAggregation(BaseAggregation):
     """Distribution Aggregation indicates that the desired aggregation is a
@@ -138,3 +152,15 @@ class DistributionAggregation(BaseAggregation):
     def distribution(self):
         """The distribution of the current aggregation"""
         return self._distribution
+
+    def new_aggregation_data(self):
+        """Creates empty aggregation data for one set of tag values"""
+        boundaries = self._boundaries.boundaries
+        return aggregation_data.DistributionAggregationData(
+            mean_data=0.0,
+            count_data=0,
+            min_=float('inf'),
+            max_=float('-inf'),
+            sum_of_sqd_deviations=0.0,
+            counts_per_bucket=[0] * max(len(boundaries), 1),
+            bounds=boundaries)
@@ -12,18 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import threading
+from opencensus.common import runtime_context
 
-_thread_local = threading.local()
+_NAMESPACE = 'opencensus.stats.'
+_MEASURE_TO_VIEW_MAP_KEY = _NAMESPACE + 'measure_to_view_map'
 
 
 def get_measure_to_view_map():
-    return getattr(_thread_local, 'measure_to_view_map', {})
+    return runtime_context.get_runtime_context().get(
+        _MEASURE_TO_VIEW_MAP_KEY, {})
 
 
 def set_measure_to_view_map(measure_to_view_map):
-    setattr(_thread_local, 'measure_to_view_map', measure_to_view_map)
+    runtime_context.get_runtime_context().set(
+        _MEASURE_TO_VIEW_MAP_KEY, measure_to_view_map)
 
 
 def clear():
-    _thread_local.__dict__.clear()
+    runtime_context.get_runtime_context().clear(_NAMESPACE)
@@ -104,5 +104,6 @@ class ViewData(object):
         tuple_vals = tuple(tag_values)
         for val in tuple_vals:
             if val not in self.tag_value_aggregation_map:
-                self.tag_value_aggregation_map[val] = self.view.aggregation
-            self.tag_value_aggregation_map.get(val).add(value)
+                self.tag_value_aggregation_map[val] = \
+                    self.view.aggregation.new_aggregation_data()
+            self.tag_value_aggregation_map.get(val).add_sample(value)
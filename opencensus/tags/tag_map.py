@@ -75,6 +75,10 @@ class TagMap(object):
         if key in self._map:
             self._map[key] = value
 
+    def items(self):
+        """The (key, value) pairs of the map, like :meth:`dict.items`"""
+        return self._map.items()
+
     def tag_key_exists(self, key):
         """ Checking if the tag key exists in the map
 
@@ -12,34 +12,46 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import threading
-
+from opencensus.common import runtime_context
 from opencensus.trace.tracers import noop_tracer
 
-_thread_local = threading.local()
+_NAMESPACE = 'opencensus.trace.'
+_TRACER_KEY = _NAMESPACE + 'tracer'
+_ATTRS_KEY = _NAMESPACE + 'attrs'
+_CURRENT_SPAN_KEY = _NAMESPACE + 'current_span'
 
 
 def get_opencensus_tracer():
-    """Get the opencensus tracer from thread local."""
-    return getattr(_thread_local, 'tracer', noop_tracer.NoopTracer())
+    """Get the opencensus tracer from the execution context, or the shared
+    no-op tracer if none is set.
+    """
+    tracer = runtime_context.get_runtime_context().get(_TRACER_KEY)
+
+    if tracer is None:
+        return noop_tracer.NOOP_TRACER
+
+    return tracer
 
 
 def set_opencensus_tracer(tracer):
-    """Add the tracer to thread local."""
-    setattr(_thread_local, 'tracer', tracer)
+    """Add the tracer to the execution context."""
+    runtime_context.get_runtime_context().set(_TRACER_KEY, tracer)
 
 
 def set_opencensus_attr(attr_key, attr_value):
-    # If there is no attrs, initialize it to empty dict.
-    attrs = getattr(_thread_local, 'attrs', {})
+    context = runtime_context.get_runtime_context()
+
+    # Copy rather than mutate, the dict may be shared with the context of
+    # the task or thread this one was started from.
+    attrs = dict(context.get(_ATTRS_KEY) or {})
 
     attrs[attr_key] = attr_value
 
-    setattr(_thread_local, 'attrs', attrs)
+    context.set(_ATTRS_KEY, attrs)
 
 
 def get_opencensus_attr(attr_key):
-    attrs = getattr(_thread_local, 'attrs', None)
+    attrs = runtime_context.get_runtime_context().get(_ATTRS_KEY)
 
     if attrs is not None:
         return attrs.get(attr_key)
@@ -48,13 +60,13 @@ def get_opencensus_attr(attr_key):
 
 
 def get_current_span():
-    return getattr(_thread_local, 'current_span', None)
+    return runtime_context.get_runtime_context().get(_CURRENT_SPAN_KEY)
 
 
 def set_current_span(current_span):
-    setattr(_thread_local, 'current_span', current_span)
+    runtime_context.get_runtime_context().set(_CURRENT_SPAN_KEY, current_span)
 
 
 def clear():
-    """Clear the thread local, used in test."""
-    _thread_local.__dict__.clear()
+    """Clear the execution context, used in test."""
+    runtime_context.get_runtime_context().clear(_NAMESPACE)
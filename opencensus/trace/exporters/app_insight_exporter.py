@@ -15,17 +15,24 @@
 """Export the trace spans to a local file."""
 
 import json
+import logging
 
-from opencensus.trace import span_data
+from opencensus.trace import utils
 from opencensus.trace.exporters import base
 from opencensus.trace.exporters.transports import sync
-from datetime import datetime
 import urllib3
-import copy
+
+log = logging.getLogger(__name__)
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 DEFAULT_ENDPOINT = 'https://dc.services.visualstudio.com/v2/track'
 
+# The envelopes of a batch, one JSON object per line.
+BATCH_HEADERS = {
+    'Content-Type': 'application/x-json-stream',
+    'Content-Encoding': 'gzip',
+}
+
 class Envelope(object):
     _ikey = ""
     _time = ""
@@ -156,8 +163,9 @@ class AppInsightExporter(base.Exporter):
     :param transport: Class for creating new transport objects. It should
                       extend from the base :class:`.Transport` type and
                       implement :meth:`.Transport.export`. Defaults to
-                      :class:`.SyncTransport`. The other option is
-                      :class:`.BackgroundThreadTransport`.
+                      :class:`.SyncTransport`. The other options are
+                      :class:`.BackgroundThreadTransport` and, in asyncio
+                      applications, :class:`.AsyncTransport`.
 
     :type endpoint: str
     :param endpoint: the endpoint where the data is pushed to
@@ -172,7 +180,6 @@ class AppInsightExporter(base.Exporter):
         self.endpoint = endpoint
 
         self.http = urllib3.PoolManager()
-        self._envelope = None
 
     def emit(self, span_datas):
         """
@@ -180,46 +187,74 @@ class AppInsightExporter(base.Exporter):
             `~opencensus.trace.span_data.SpanData`
         :param list of opencensus.trace.span_data.SpanData span_datas:
             SpanData tuples to emit
+
+        :rtype: bool
+        :returns: False if the spans could not be sent.
         """
-        self._envelope = Envelope(self.instrumentation_key)
+        if not span_datas:
+            return True
         lis = self.convertToAppInsightFormat(span_datas)
-        
-        for item in lis:
-            self.sendToEndpoint(item)
+
+        return self.sendToEndpoint(lis)
+
+    def emit_async(self, span_datas):
+        """Send the spans on the running asyncio event loop, for
+        :class:`.AsyncTransport`.
+
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param list of opencensus.trace.span_data.SpanData span_datas:
+            SpanData tuples to emit
+
+        :rtype: coroutine
+        :returns: Coroutine of the request sending the spans, resolving to
+                  False if they could not be sent, or None without spans.
+        """
+        from opencensus.trace.exporters.transports import async_transport
+
+        if not span_datas:
+            return None
+        lis = self.convertToAppInsightFormat(span_datas)
+
+        return async_transport.post(
+            self.endpoint,
+            self.encodeBatch(lis),
+            headers=BATCH_HEADERS,
+            success_status_codes=range(200, 300))
 
     def convertToAppInsightFormat(self,span_datas):
         converted_jsons = []
         i = 0
-        for span_data in span_datas:
+        for span in span_datas:
 
-            cur_req = copy.deepcopy(self._envelope)
+            cur_req = Envelope(self.instrumentation_key)
             # time
-            cur_req.SetEnvelopeTime(span_data.start_time)
+            cur_req.SetEnvelopeTime(span.start_time)
 
             # tags
-            trace_id = span_data.context.trace_id if span_data.context is not None \
+            trace_id = span.context.trace_id if span.context is not None \
             else ""
-            parent_id = span_data.parent_span_id
+            parent_id = span.parent_span_id
             cur_req.SetEnvelopeTags(str(parent_id), str(trace_id))
 
             # data values
-            _id = span_data.span_id
-            _duration = self.getDuration(span_data)
+            _id = span.span_id
+            _duration = self.getDuration(span)
 
-            _type = self.getType(span_data)
+            _type = self.getType(span)
             if (_type == "RequestData"):
-                data = RequestData(span_data.span_id,
+                data = RequestData(span.span_id,
                     _duration,
-                    self.getStatusCode(span_data,_type)
+                    self.getStatusCode(span,_type)
                 )
                 cur_req.SetEnvelopeName(_type)
                 cur_req.SetEnvelopeData(data)
             else:
-                data = RemoteDependencyData(span_data.span_id,
+                data = RemoteDependencyData(span.span_id,
                     _duration,
-                    self.getStatusCode(span_data,_type),
-                    self.getTargetData(span_data),
-                    self.getDependencyType(span_data)
+                    self.getStatusCode(span,_type),
+                    self.getTargetData(span),
+                    self.getDependencyType(span)
                 )
                 cur_req.SetEnvelopeName(_type)
                 cur_req.SetEnvelopeData(data)
@@ -229,14 +264,38 @@ class AppInsightExporter(base.Exporter):
 
         return converted_jsons
         
-    def sendToEndpoint(self,data):
+    def encodeBatch(self, envelopes):
+        """Encode envelopes as a gzip compressed request body, with one
+        JSON envelope per line.
 
-        encoded_data = json.dumps(data)
-        r = self.http.request('POST',
-            self.endpoint,
-            body=encoded_data,
-            headers={'Content-Type': 'application/json'}
-        )
+        :type envelopes: list of dict
+        :param envelopes: The envelopes, as returned by
+                          :meth:`convertToAppInsightFormat`.
+
+        :rtype: bytes
+        """
+        return utils.gzip_compress('\n'.join(
+            json.dumps(envelope, separators=(',', ':'))
+            for envelope in envelopes).encode('utf-8'))
+
+    def sendToEndpoint(self, envelopes):
+        """Send envelopes in one request, returning True if they were
+        accepted.
+        """
+        try:
+            r = self.http.request(
+                'POST',
+                self.endpoint,
+                body=self.encodeBatch(envelopes),
+                headers=BATCH_HEADERS)
+        except urllib3.exceptions.HTTPError as e:
+            log.error('Failed to send spans: %s', e)
+            return False
+
+        if r.status >= 300:
+            log.error('Failed to send spans, HTTP status code: %s', r.status)
+            return False
+        return True
 
     def getType(self,span_data):
         if span_data.attributes.get("/http/method"):
@@ -259,12 +318,10 @@ class AppInsightExporter(base.Exporter):
         return ""
 
     def getDuration(self,span_data):
-        st_dt_obj = datetime.strptime(span_data.start_time,"%Y-%m-%dT%H:%M:%S.%fZ")
-        end_dt_obj = datetime.strptime(span_data.end_time,"%Y-%m-%dT%H:%M:%S.%fz")
-        diff = end_dt_obj - st_dt_obj
+        diff_ns = span_data.end_time_ns - span_data.start_time_ns
         # sending duration in microseconds because AI expects that
         # AI will convert this to miliseonds before population its database
-        return str(int(diff.total_seconds() * 1000000))[:6]
+        return str(diff_ns // utils.NANOS_PER_MICROSECOND)[:6]
 
     def export(self, span_datas):
         """
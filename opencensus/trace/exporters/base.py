@@ -27,6 +27,11 @@ class Exporter(object):
             `~opencensus.trace.span_data.SpanData`
         :param list of opencensus.trace.span_data.SpanData span_datas:
             SpanData tuples to emit
+
+        :rtype: bool
+        :returns: False if the spans could not be sent, so that transports
+                  can keep them and try again. Exporters that do not report
+                  failures return None.
         """
         raise NotImplementedError
 
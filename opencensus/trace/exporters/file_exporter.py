@@ -14,17 +14,53 @@
 
 """Export the trace spans to a local file."""
 
+import atexit
 import json
+import os
+import threading
+import time
+import weakref
 
+from opencensus.common import fork
 from opencensus.trace import span_data
 from opencensus.trace.exporters import base
 from opencensus.trace.exporters.transports import sync
 
 DEFAULT_FILENAME = 'opencensus-traces.json'
 
+# Bytes of traces kept in memory before they are written to the file.
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Seconds traces are kept in memory at most.
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+def _flush_exporter(exporter_ref):
+    """Flush the exporter, unless it has been garbage collected."""
+    exporter = exporter_ref()
+    if exporter is not None:
+        exporter._flush_on_timer()
+
+
+def _close_exporter_at_exit(exporter_ref):
+    """Close the exporter at exit, unless it has been garbage collected."""
+    exporter = exporter_ref()
+    if exporter is not None:
+        exporter._close_at_exit()
+
 
 class FileExporter(base.Exporter):
-    """
+    """Appends the traces to a local file, one JSON trace per line.
+
+    The file is kept open between batches. Traces are buffered in memory
+    and written when the buffer holds ``buffer_size`` bytes, or at the
+    latest ``flush_interval`` seconds after they were buffered, by a timer
+    thread. The buffer is also written by :meth:`flush`, :meth:`close` and
+    at exit, after the transport has submitted its pending spans. Traces
+    emitted after that are written right away.
+
     :type file_name: str
     :param file_name: The name of the output file.
 
@@ -36,17 +72,160 @@ class FileExporter(base.Exporter):
                       :class:`.BackgroundThreadTransport`.
 
     :type file_mode: str
-    :param file_mode: The file mode to open the output file with.
-                      Defaults to w+
+    :param file_mode: The file mode to open the output file with when the
+                      exporter first writes to it. Defaults to ``a``, to
+                      append to the file. ``w`` truncates it once.
+
+    :type buffer_size: int
+    :param buffer_size: (Optional) The bytes of traces buffered before they
+                        are written. 0 writes every batch.
+
+    :type flush_interval: float
+    :param flush_interval: (Optional) The seconds after which the buffer is
+                           written, even if not full.
 
+    :type max_bytes: int
+    :param max_bytes: (Optional) The size at which the file is rotated:
+                      renamed with a ``.1`` suffix, the older files to
+                      ``.2`` and so on. 0, the default, never rotates.
+
+    :type backup_count: int
+    :param backup_count: (Optional) The number of rotated files kept. With
+                         0 the file is truncated when it reaches
+                         ``max_bytes``.
     """
 
     def __init__(self, file_name=DEFAULT_FILENAME,
                  transport=sync.SyncTransport,
-                 file_mode='w+'):
+                 file_mode='a',
+                 buffer_size=DEFAULT_BUFFER_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_bytes=0,
+                 backup_count=0):
+        # Registered first so that it runs after the exit handlers of the
+        # transport, which flush it. The weak reference lets the exporter
+        # be garbage collected.
+        atexit.register(_close_exporter_at_exit, weakref.ref(self))
+
         self.file_name = file_name
         self.transport = transport(self)
         self.file_mode = file_mode
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+        self._file_size = 0
+        self._file_fork_marker = None
+        self._opened = False
+        self._pending = []
+        self._pending_size = 0
+        self._last_flush = _monotonic()
+        self._flush_timer = None
+        self._exited = False
+        self._lock = threading.RLock()
+
+    def _get_file(self):
+        """The open output file. A forked child process opens it again,
+        without the traces its parent had buffered.
+        """
+        fork_marker = fork.get_fork_marker()
+        if self._file is not None and self._file_fork_marker != fork_marker:
+            self._file = None
+            self._pending = []
+            self._pending_size = 0
+            # The timer thread of the parent does not run in the child.
+            self._flush_timer = None
+
+        if self._file is None:
+            # Only the first open may truncate the file.
+            mode = 'ab' if self._opened or 'w' not in self.file_mode \
+                else 'wb'
+            self._file = open(self.file_name, mode)
+            self._file.seek(0, os.SEEK_END)
+            self._file_size = self._file.tell()
+            self._file_fork_marker = fork_marker
+            self._opened = True
+        return self._file
+
+    def _rotate(self):
+        """Move the file to its first backup, or truncate it without
+        backups, and open a new one.
+        """
+        self._file.close()
+        self._file = None
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = '{}.{}'.format(self.file_name, index)
+                if os.path.exists(source):
+                    _rename(source, '{}.{}'.format(self.file_name, index + 1))
+            _rename(self.file_name, self.file_name + '.1')
+        else:
+            open(self.file_name, 'wb').close()
+        return self._get_file()
+
+    def _write_pending(self):
+        file = self._get_file()
+        chunk = []
+        for line in self._pending:
+            if self.max_bytes and self._file_size and \
+                    self._file_size + len(line) > self.max_bytes:
+                file.write(b''.join(chunk))
+                chunk = []
+                file = self._rotate()
+            chunk.append(line)
+            self._file_size += len(line)
+        file.write(b''.join(chunk))
+        file.flush()
+        self._pending = []
+        self._pending_size = 0
+        self._last_flush = _monotonic()
+
+    def _start_flush_timer(self):
+        """Write the buffer after the flush interval, if nothing else has
+        written it by then.
+        """
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(
+                self.flush_interval, _flush_exporter,
+                args=(weakref.ref(self),))
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _cancel_flush_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._flush_timer = None
+            if self._pending:
+                self._write_pending()
+
+    def flush(self):
+        """Write the buffered traces to the file."""
+        with self._lock:
+            self._cancel_flush_timer()
+            if self._pending:
+                self._write_pending()
+
+    def close(self):
+        """Write the buffered traces and close the file. The next batch
+        opens it again, to append.
+        """
+        with self._lock:
+            self._cancel_flush_timer()
+            if self._pending:
+                self._write_pending()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _close_at_exit(self):
+        with self._lock:
+            self._exited = True
+            self.close()
 
     def emit(self, span_datas):
         """
@@ -55,12 +234,25 @@ class FileExporter(base.Exporter):
         :param list of opencensus.trace.span_data.SpanData span_datas:
             SpanData tuples to emit
         """
-        with open(self.file_name, self.file_mode) as file:
-            # convert to the legacy trace json for easier refactoring
-            # TODO: refactor this to use the span data directly
-            legacy_trace_json = span_data.format_legacy_trace_json(span_datas)
-            trace_str = json.dumps(legacy_trace_json)
-            file.write(trace_str)
+        # convert to the legacy trace json for easier refactoring
+        # TODO: refactor this to use the span data directly
+        # One line per trace, the spans may come from several traces.
+        lines = [
+            (json.dumps(legacy_trace_json) + '\n').encode('utf-8')
+            for legacy_trace_json
+            in span_data.format_legacy_trace_jsons(span_datas)]
+
+        with self._lock:
+            self._get_file()
+            self._pending.extend(lines)
+            self._pending_size += sum(len(line) for line in lines)
+            if self._pending and (
+                    self._exited or
+                    self._pending_size >= self.buffer_size or
+                    _monotonic() - self._last_flush >= self.flush_interval):
+                self._write_pending()
+            if self._pending:
+                self._start_flush_timer()
 
     def export(self, span_datas):
         """
@@ -70,3 +262,10 @@ class FileExporter(base.Exporter):
             SpanData tuples to export
         """
         self.transport.export(span_datas)
+
+
+def _rename(source, destination):
+    """os.replace, which Python 2 does not have."""
+    if os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
@@ -0,0 +1,531 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Encode SpanData tuples to the Thrift messages of Jaeger.
+
+The encoders write a ``Batch`` straight from the SpanData tuples, without
+the objects of :mod:`~opencensus.trace.exporters.gen.jaeger.jaeger` and the
+generic Thrift protocols. :class:`CompactEncoder` writes the ``emitBatch``
+message of the agent in the compact protocol, :class:`BinaryEncoder` the
+``submitBatches`` message of the collector in the binary protocol. The bytes
+are the ones the generated code writes for the spans returned by
+:meth:`.JaegerExporter.translate_to_jaeger`.
+
+See: https://github.com/apache/thrift/tree/master/doc/specs
+"""
+
+import binascii
+import logging
+import struct
+
+import six
+
+from opencensus.trace import link as link_module
+from opencensus.trace import utils
+from opencensus.trace.exporters.gen.jaeger import jaeger
+
+log = logging.getLogger(__name__)
+
+_INT64 = struct.Struct('>q')
+
+# Thrift types, as numbered by the binary protocol.
+_BOOL = 2
+_I32 = 8
+_I64 = 10
+_STRING = 11
+_STRUCT = 12
+_LIST = 15
+
+_TRUE = b'\x01'
+_FALSE = b'\x00'
+_STOP = b'\x00'
+
+# The most tag keys whose encoding is kept.
+_MAX_CACHED_TAG_KEYS = 1024
+
+_REF_TYPES = {
+    link_module.Type.CHILD_LINKED_SPAN: jaeger.SpanRefType.CHILD_OF,
+    link_module.Type.PARENT_LINKED_SPAN: jaeger.SpanRefType.FOLLOWS_FROM,
+}
+
+
+def convert_hex_str_to_int(val):
+    """Convert hexadecimal formatted ids to signed int64"""
+    if val is None:
+        return None
+
+    if len(val) == 16:
+        # Span IDs, in a single step.
+        return _INT64.unpack(binascii.unhexlify(val))[0]
+
+    hex_num = int(val, 16)
+    #  ensure it fits into 64-bit
+    if hex_num > 0x7FFFFFFFFFFFFFFF:
+        hex_num -= 0x10000000000000000
+
+    assert -9223372036854775808 <= hex_num <= 9223372036854775807
+    return hex_num
+
+
+def get_trace_words(trace_id, trace_words=None):
+    """Convert a trace ID to the high and low words of the Jaeger span.
+
+    :type trace_id: str
+    :param trace_id: The hexadecimal trace ID.
+
+    :type trace_words: dict
+    :param trace_words: (Optional) The words of the trace IDs converted so
+                        far, updated with this one.
+
+    :rtype: tuple
+    :returns: The high and low words.
+    """
+    if trace_words is not None:
+        words = trace_words.get(trace_id)
+        if words is not None:
+            return words
+
+    words = (convert_hex_str_to_int(trace_id[0:8]),
+             convert_hex_str_to_int(trace_id[8:16]))
+    if trace_words is not None:
+        trace_words[trace_id] = words
+    return words
+
+
+def _utf8(value):
+    if isinstance(value, six.text_type):
+        return value.encode(utils.UTF8)
+    return value
+
+
+def _varint(value):
+    """Encode a non-negative integer as a varint."""
+    if value < 0x80:
+        return _BYTES[value]
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+# Field and list headers, and most varints, are a single byte.
+_BYTES = [bytes(bytearray([value])) for value in range(0x100)]
+
+
+class _Encoder(object):
+    """Walks the spans as :meth:`.JaegerExporter.translate_to_jaeger` does,
+    leaving the encoding of the values and structs to the subclasses.
+
+    :type service_name: str
+    :param service_name: The service name of the process.
+    """
+
+    def __init__(self, service_name):
+        self._process = self._struct(
+            [(1, _STRING, self._string(service_name))])
+        # Tags encoded up to their value, by key and type. Attribute keys
+        # are mostly the same from span to span.
+        self._tag_prefixes = {}
+
+    def _i32(self, value):
+        raise NotImplementedError
+
+    def _i64(self, value):
+        raise NotImplementedError
+
+    def _string(self, value):
+        raise NotImplementedError
+
+    def _list(self, structs):
+        """Encode a list of encoded structs."""
+        raise NotImplementedError
+
+    def _struct(self, fields):
+        """Encode a struct from its (field ID, type, encoded value) fields,
+        in the order of their IDs.
+        """
+        raise NotImplementedError
+
+    def _tag_prefix(self, key, tag_type, field_id, field_type, value=b''):
+        """Encode a Tag up to its value, or with the given value."""
+        cache_key = (key, tag_type, value)
+        prefix = self._tag_prefixes.get(cache_key)
+        if prefix is None:
+            if len(self._tag_prefixes) >= _MAX_CACHED_TAG_KEYS:
+                self._tag_prefixes.clear()
+            prefix = self._struct([
+                (1, _STRING, self._string(key)),
+                (2, _I32, self._i32(tag_type)),
+                (field_id, field_type, value),
+            ])[:-1]
+            self._tag_prefixes[cache_key] = prefix
+        return prefix
+
+    def _tag(self, key, value):
+        """Encode a span attribute as a Tag, or return None if its type
+        cannot be represented.
+        """
+        if isinstance(value, bool):
+            return self._tag_prefix(
+                key, jaeger.TagType.BOOL, 5, _BOOL,
+                _TRUE if value else _FALSE) + _STOP
+        if isinstance(value, str):
+            return self._tag_prefix(
+                key, jaeger.TagType.STRING, 3, _STRING) + \
+                self._string(value) + _STOP
+        if isinstance(value, int):
+            return self._tag_prefix(
+                key, jaeger.TagType.LONG, 6, _I64) + \
+                self._i64(value) + _STOP
+        log.warning('Could not serialize attribute %s:%s to tag', key, value)
+        return None
+
+    def _tags(self, attributes):
+        tags = []
+        if attributes:
+            for key, value in attributes.items():
+                tag = self._tag(key, value)
+                if tag is not None:
+                    tags.append(tag)
+        return tags
+
+    def _string_tag(self, key, value):
+        fields = [
+            (1, _STRING, self._string(key)),
+            (2, _I32, self._i32(jaeger.TagType.STRING)),
+        ]
+        if value is not None:
+            fields.append((3, _STRING, self._string(value)))
+        return self._struct(fields)
+
+    def _refs(self, links, trace_words):
+        refs = []
+        for link in links:
+            trace_id_high, trace_id_low = get_trace_words(
+                link.trace_id, trace_words)
+            fields = []
+            ref_type = _REF_TYPES.get(link.type)
+            if ref_type is not None:
+                fields.append((1, _I32, self._i32(ref_type)))
+            fields.append((2, _I64, self._i64(trace_id_low)))
+            fields.append((3, _I64, self._i64(trace_id_high)))
+            span_id = convert_hex_str_to_int(link.span_id)
+            if span_id is not None:
+                fields.append((4, _I64, self._i64(span_id)))
+            refs.append(self._struct(fields))
+        return refs
+
+    def _logs(self, time_events):
+        logs = []
+        for time_event in time_events:
+            annotation = time_event.annotation
+            if annotation is None:
+                continue
+            tags = self._tags(annotation.attributes)
+            tags.append(self._string_tag('message', annotation.description))
+            timestamp = time_event.timestamp_ns // utils.NANOS_PER_MICROSECOND
+            logs.append(self._struct([
+                (1, _I64, self._i64(timestamp)),
+                (2, _LIST, self._list(tags)),
+            ]))
+        return logs
+
+    def encode_span(self, span_data, trace_id, trace_words=None):
+        """Encode one span as a Span struct.
+
+        :type span_data: :class:`~opencensus.trace.span_data.SpanData`
+        :param span_data: The span to encode.
+
+        :type trace_id: str
+        :param trace_id: The trace ID of the span.
+
+        :type trace_words: dict
+        :param trace_words: (Optional) The words of the trace IDs converted
+                            so far, updated with the ones of this span.
+
+        :rtype: bytes
+        """
+        i64 = self._i64
+        trace_id_high, trace_id_low = get_trace_words(trace_id, trace_words)
+        fields = [
+            (1, _I64, i64(trace_id_low)),
+            (2, _I64, i64(trace_id_high)),
+        ]
+
+        span_id = convert_hex_str_to_int(span_data.span_id)
+        if span_id is not None:
+            fields.append((3, _I64, i64(span_id)))
+
+        parent_span_id = span_data.parent_span_id
+        fields.append((4, _I64, i64(
+            convert_hex_str_to_int(parent_span_id) if parent_span_id else 0)))
+
+        if span_data.name is not None:
+            fields.append((5, _STRING, self._string(span_data.name)))
+
+        if span_data.links is not None:
+            fields.append((6, _LIST, self._list(
+                self._refs(span_data.links, trace_words))))
+
+        context = span_data.context
+        if context is not None:
+            fields.append((7, _I32, self._i32(
+                int(context.trace_options.trace_options_byte))))
+
+        start_time_ns = span_data.start_time_ns
+        fields.append((8, _I64, i64(
+            start_time_ns // utils.NANOS_PER_MICROSECOND)))
+        fields.append((9, _I64, i64(
+            (span_data.end_time_ns - start_time_ns) //
+            utils.NANOS_PER_MICROSECOND)))
+
+        status = span_data.status
+        if span_data.attributes is not None or status is not None:
+            tags = self._tags(span_data.attributes)
+            if status is not None:
+                tags.append(self._tag_prefix(
+                    'status.code', jaeger.TagType.LONG, 6, _I64) +
+                    i64(status.code) + _STOP)
+                tags.append(
+                    self._string_tag('status.message', status.message))
+            fields.append((10, _LIST, self._list(tags)))
+
+        if span_data.time_events is not None:
+            fields.append((11, _LIST, self._list(
+                self._logs(span_data.time_events))))
+
+        return self._struct(fields)
+
+    def encode_spans(self, span_datas):
+        """Encode spans as Span structs.
+
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param list of opencensus.trace.span_data.SpanData span_datas:
+            SpanData tuples to encode
+
+        :rtype: list of bytes
+        """
+        spans = []
+        trace_id = None
+        trace_words = {}
+        for span_data in span_datas:
+            # A span without a context is kept in the trace of the span
+            # before it.
+            if span_data.context is not None:
+                trace_id = span_data.context.trace_id
+            spans.append(self.encode_span(span_data, trace_id, trace_words))
+        return spans
+
+    def encode_batch(self, spans):
+        """Encode a Batch struct of encoded spans.
+
+        :type spans: list of bytes
+        :param spans: The encoded Span structs.
+
+        :rtype: bytes
+        """
+        return self._struct([
+            (1, _STRUCT, self._process),
+            (2, _LIST, self._list(spans)),
+        ])
+
+    def encode_message(self, spans):
+        """Encode the message sending a Batch of encoded spans.
+
+        :type spans: list of bytes
+        :param spans: The encoded Span structs.
+
+        :rtype: bytes
+        """
+        raise NotImplementedError
+
+    def encode(self, span_datas):
+        """Encode spans as the message sending them in a Batch.
+
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param list of opencensus.trace.span_data.SpanData span_datas:
+            SpanData tuples to encode
+
+        :rtype: bytes
+        """
+        return self.encode_message(self.encode_spans(span_datas))
+
+
+# The types of the compact protocol.
+_COMPACT_TYPES = {
+    _I32: 5,
+    _I64: 6,
+    _STRING: 8,
+    _STRUCT: 12,
+    _LIST: 9,
+}
+_COMPACT_TRUE = 1
+_COMPACT_FALSE = 2
+
+# The protocol ID, the version and ONEWAY type, and the sequence ID 0 of
+# the message.
+_COMPACT_MESSAGE_HEADER = b'\x82\x81\x00'
+
+
+class CompactEncoder(_Encoder):
+    """Encodes spans as the ``emitBatch`` message of the Jaeger agent, in
+    the Thrift compact protocol.
+
+    :type service_name: str
+    :param service_name: The service name of the process.
+    """
+
+    def __init__(self, service_name):
+        super(CompactEncoder, self).__init__(service_name)
+        # The size of a message without its spans. The size of a list of
+        # more than 14 spans takes up to five more bytes.
+        self.message_overhead = len(self.encode_message([])) + 5
+
+    def _i32(self, value):
+        return _varint((value << 1) ^ (value >> 31))
+
+    def _i64(self, value):
+        return _varint((value << 1) ^ (value >> 63))
+
+    def _string(self, value):
+        value = _utf8(value)
+        return _varint(len(value)) + value
+
+    def _list(self, structs):
+        size = len(structs)
+        if size <= 14:
+            header = _BYTES[size << 4 | _COMPACT_TYPES[_STRUCT]]
+        else:
+            header = b'\xfc' + _varint(size)
+        return header + b''.join(structs)
+
+    def _struct(self, fields):
+        out = []
+        last_id = 0
+        for field_id, field_type, value in fields:
+            if field_type == _BOOL:
+                out.append(_BYTES[(field_id - last_id) << 4 | (
+                    _COMPACT_TRUE if value == _TRUE else _COMPACT_FALSE)])
+            else:
+                out.append(_BYTES[
+                    (field_id - last_id) << 4 | _COMPACT_TYPES[field_type]])
+                out.append(value)
+            last_id = field_id
+        out.append(_STOP)
+        return b''.join(out)
+
+    def encode_message(self, spans):
+        # emitBatch_args, with the batch as field 1.
+        return (_COMPACT_MESSAGE_HEADER + self._string('emitBatch') +
+                self._struct([(1, _STRUCT, self.encode_batch(spans))]))
+
+    def encode_packets(self, span_datas, max_packet_size):
+        """Encode spans as ``emitBatch`` messages of at most
+        ``max_packet_size`` bytes each. A span that does not fit in a
+        message on its own is left out.
+
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param list of opencensus.trace.span_data.SpanData span_datas:
+            SpanData tuples to encode
+
+        :type max_packet_size: int
+        :param max_packet_size: The maximum size of a message.
+
+        :rtype: tuple
+        :returns: The messages, and the number of spans left out.
+        """
+        spans = self.encode_spans(span_datas)
+        size = sum(len(span) for span in spans)
+        if size + self.message_overhead <= max_packet_size:
+            return [self.encode_message(spans)], 0
+
+        packets = []
+        packet_spans = []
+        size = self.message_overhead
+        dropped = 0
+        for span in spans:
+            if self.message_overhead + len(span) > max_packet_size:
+                dropped += 1
+                continue
+
+            if size + len(span) > max_packet_size:
+                packets.append(self.encode_message(packet_spans))
+                packet_spans = []
+                size = self.message_overhead
+
+            packet_spans.append(span)
+            size += len(span)
+
+        if packet_spans:
+            packets.append(self.encode_message(packet_spans))
+        return packets, dropped
+
+
+_I32_STRUCT = struct.Struct('>i')
+
+# The version, and the CALL type of the message.
+_BINARY_MESSAGE_HEADER = struct.pack('>I', 0x80010001)
+
+
+class BinaryEncoder(_Encoder):
+    """Encodes spans as the ``submitBatches`` message of the Jaeger
+    collector, in the Thrift binary protocol.
+
+    :type service_name: str
+    :param service_name: The service name of the process.
+    """
+
+    def __init__(self, service_name):
+        # The field headers of each type and ID.
+        self._field_headers = {}
+        super(BinaryEncoder, self).__init__(service_name)
+
+    def _i32(self, value):
+        return _I32_STRUCT.pack(value)
+
+    def _i64(self, value):
+        return _INT64.pack(value)
+
+    def _string(self, value):
+        value = _utf8(value)
+        return _I32_STRUCT.pack(len(value)) + value
+
+    def _list(self, structs):
+        return (struct.pack('>bi', _STRUCT, len(structs)) +
+                b''.join(structs))
+
+    def _struct(self, fields):
+        out = []
+        field_headers = self._field_headers
+        for field_id, field_type, value in fields:
+            header = field_headers.get((field_id, field_type))
+            if header is None:
+                header = field_headers[(field_id, field_type)] = \
+                    struct.pack('>bh', field_type, field_id)
+            out.append(header)
+            out.append(value)
+        out.append(_STOP)
+        return b''.join(out)
+
+    def encode_message(self, spans):
+        # submitBatches_args, with a list of one batch as field 1.
+        return (_BINARY_MESSAGE_HEADER + self._string('submitBatches') +
+                self._i32(0) +
+                self._struct([(1, _LIST, self._list(
+                    [self.encode_batch(spans)]))]))
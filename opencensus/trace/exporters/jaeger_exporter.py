@@ -14,16 +14,23 @@
 
 """Export the spans data to Jaeger."""
 
-import calendar
-import datetime
+import base64
+import collections
 import logging
 import socket
+import threading
 
+from six.moves import http_client
+from six.moves import urllib
 from thrift.protocol import TBinaryProtocol, TCompactProtocol
-from thrift.transport import THttpClient, TTransport
+from thrift.transport import TTransport
 
+from opencensus.common import fork
 from opencensus.trace import link as link_module
+from opencensus.trace import utils
 from opencensus.trace.exporters import base
+from opencensus.trace.exporters import jaeger_encoder
+from opencensus.trace.exporters import telemetry
 from opencensus.trace.exporters.gen.jaeger import agent, jaeger
 from opencensus.trace.exporters.transports import sync
 
@@ -31,11 +38,26 @@ DEFAULT_HOST_NAME = 'localhost'
 DEFAULT_AGENT_PORT = 6831
 DEFAULT_ENDPOINT = '/api/traces?format=jaeger.thrift'
 
-ISO_DATETIME_REGEX = '%Y-%m-%dT%H:%M:%S.%fZ'
 UDP_PACKET_MAX_LENGTH = 65000
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 10.0  # Seconds
+
+# The compact protocol writes the size of a short list in the byte of its
+# header, and the size of a longer one in a varint of up to five more bytes.
+_MAX_LIST_SIZE_GROWTH = 5
+
+# The destinations of the spans, and how many batches sent to only some of
+# them are remembered, so that a retry skips the others.
+_COLLECTOR = 'collector'
+_AGENT = 'agent'
+_MAX_PARTIALLY_SENT_BATCHES = 16
+
 logging = logging.getLogger(__name__)
 
+_get_trace_words = jaeger_encoder.get_trace_words
+_convert_hex_str_to_int = jaeger_encoder.convert_hex_str_to_int
+
 
 class JaegerExporter(base.Exporter):
     """Exports the spans to Jaeger.
@@ -72,8 +94,9 @@ class JaegerExporter(base.Exporter):
     :param transport: Class for creating new transport objects. It should
                       extend from the base :class:`.Transport` type and
                       implement :meth:`.Transport.export`. Defaults to
-                      :class:`.SyncTransport`. The other option is
-                      :class:`.BackgroundThreadTransport`.
+                      :class:`.SyncTransport`. The other options are
+                      :class:`.BackgroundThreadTransport` and, in asyncio
+                      applications, :class:`.AsyncTransport`.
     """
 
     def __init__(
@@ -99,6 +122,13 @@ class JaegerExporter(base.Exporter):
         self.password = password
         self._agent_client = None
         self._collector = None
+        # id of a batch to the batch and the destinations it was sent to.
+        self._partially_sent = collections.OrderedDict()
+        self._partially_sent_lock = threading.Lock()
+        # The agent takes the compact protocol, the collector the binary
+        # one.
+        self.compact_encoder = jaeger_encoder.CompactEncoder(service_name)
+        self.binary_encoder = jaeger_encoder.BinaryEncoder(service_name)
 
     @property
     def agent_client(self):
@@ -136,16 +166,75 @@ class JaegerExporter(base.Exporter):
             `~opencensus.trace.span_data.SpanData`
         :param span_datas:
             SpanData tuples to emit
+
+        :rtype: bool
+        :returns: False if the spans could not be sent to the collector or
+                  the agent. When the same batch is emitted again, for
+                  example by :class:`.RetryTransport`, it is only sent to
+                  the destinations that failed.
         """
-        jaeger_spans = self.translate_to_jaeger(span_datas)
+        with self._partially_sent_lock:
+            batch, sent_to = self._partially_sent.pop(
+                id(span_datas), (None, ()))
+        sent_to = set(sent_to) if batch is span_datas else set()
+
+        destinations = {_AGENT}
+        collector = self.collector
+        if collector is not None:
+            destinations.add(_COLLECTOR)
+            if _COLLECTOR not in sent_to and collector.submit(
+                    self.binary_encoder.encode(span_datas)):
+                sent_to.add(_COLLECTOR)
+
+        if _AGENT not in sent_to and self.agent_client.send(
+                self._encode_packets(span_datas)):
+            sent_to.add(_AGENT)
+
+        if sent_to == destinations:
+            return True
+
+        if sent_to:
+            with self._partially_sent_lock:
+                self._partially_sent[id(span_datas)] = (span_datas, sent_to)
+                while len(self._partially_sent) > \
+                        _MAX_PARTIALLY_SENT_BATCHES:
+                    self._partially_sent.popitem(last=False)
+        return False
+
+    def emit_async(self, span_datas):
+        """Send the spans on the running asyncio event loop, for
+        :class:`.AsyncTransport`. Requires Python 3.5.
+
+        Sending to the agent is a non-blocking UDP write, only the request
+        to the collector is awaited.
 
-        batch = jaeger.Batch(
-            spans=jaeger_spans,
-            process=jaeger.Process(serviceName=self.service_name))
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param span_datas:
+            SpanData tuples to emit
 
+        :rtype: coroutine
+        :returns: Coroutine sending the spans to the collector, resolving
+                  to False if they could not be sent, or None without a
+                  collector.
+        """
+        self.agent_client.send(self._encode_packets(span_datas))
         if self.collector is not None:
-            self.collector.export(batch)
-        self.agent_client.export(batch)
+            return self.collector.submit_async(
+                self.binary_encoder.encode(span_datas))
+        return None
+
+    def _encode_packets(self, span_datas):
+        """Encode the spans as the packets to send to the agent."""
+        agent_client = self.agent_client
+        packets, dropped = self.compact_encoder.encode_packets(
+            span_datas, agent_client.max_packet_size)
+        if dropped:
+            logging.warning(
+                'Dropped %s spans exceeding the max UDP packet size %s',
+                dropped, agent_client.max_packet_size)
+            telemetry.record_dropped(self, dropped)
+        return packets
 
     def export(self, span_datas):
         """Export the trace. Send trace to transport, and transport will call
@@ -162,33 +251,34 @@ class JaegerExporter(base.Exporter):
     def translate_to_jaeger(self, span_datas):
         """Translate the spans to Jaeger format.
 
+        :meth:`emit` encodes the spans directly with :attr:`compact_encoder`
+        and :attr:`binary_encoder` instead, this returns the same spans as
+        Thrift objects.
+
         :type span_datas: list of :class:
             `~opencensus.trace.span_data.SpanData`
         :param span_datas:
             SpanData tuples to emit
         """
 
-        top_span = span_datas[0]
-
-        trace_id = top_span.context.trace_id if top_span.context is not None \
-            else None
-
         jaeger_spans = []
+        trace_id = None
+        # The high and low words of each trace ID, converted once for all
+        # the spans and links of the trace.
+        trace_words = {}
 
         for span in span_datas:
-            start_datetime = datetime.datetime.strptime(
-                span.start_time, ISO_DATETIME_REGEX)
-            start_microsec = calendar.timegm(start_datetime.timetuple()) \
-                * 1e6 \
-                + start_datetime.microsecond
+            # The spans may come from several traces. A span without a
+            # context is kept in the trace of the span before it.
+            if span.context is not None:
+                trace_id = span.context.trace_id
 
-            end_datetime = datetime.datetime.strptime(
-                span.end_time, ISO_DATETIME_REGEX)
-            end_microsec = calendar.timegm(end_datetime.timetuple()) \
-                * 1e6 \
-                + end_datetime.microsecond
+            trace_id_high, trace_id_low = _get_trace_words(
+                trace_id, trace_words)
 
-            duration_microsec = end_microsec - start_microsec
+            start_microsec = span.start_time_ns // utils.NANOS_PER_MICROSECOND
+            duration_microsec = (span.end_time_ns - span.start_time_ns) \
+                // utils.NANOS_PER_MICROSECOND
 
             tags = _extract_tags(span.attributes)
 
@@ -204,7 +294,7 @@ class JaegerExporter(base.Exporter):
                     vType=jaeger.TagType.STRING,
                     vStr=status.message))
 
-            refs = _extract_refs_from_span(span)
+            refs = _extract_refs_from_span(span, trace_words)
             logs = _extract_logs_from_span(span)
 
             context = span.context
@@ -216,34 +306,36 @@ class JaegerExporter(base.Exporter):
             parent_span_id = span.parent_span_id
 
             jaeger_span = jaeger.Span(
-                traceIdHigh=_convert_hex_str_to_int(trace_id[0:8]),
-                traceIdLow=_convert_hex_str_to_int(trace_id[8:16]),
+                traceIdHigh=trace_id_high,
+                traceIdLow=trace_id_low,
                 spanId=_convert_hex_str_to_int(span_id),
                 operationName=span.name,
-                startTime=int(round(start_microsec)),
-                duration=int(round(duration_microsec)),
+                startTime=start_microsec,
+                duration=duration_microsec,
                 tags=tags,
                 logs=logs,
                 references=refs,
                 flags=flags,
-                parentSpanId=_convert_hex_str_to_int(parent_span_id or '0'))
+                parentSpanId=_convert_hex_str_to_int(parent_span_id)
+                if parent_span_id else 0)
 
             jaeger_spans.append(jaeger_span)
 
         return jaeger_spans
 
 
-def _extract_refs_from_span(span):
+def _extract_refs_from_span(span, trace_words=None):
     if span.links is None:
         return None
 
     refs = []
     for link in span.links:
-        trace_id = link.trace_id
+        trace_id_high, trace_id_low = _get_trace_words(
+            link.trace_id, trace_words)
         refs.append(jaeger.SpanRef(
             refType=_convert_reftype_to_jaeger_reftype(link.type),
-            traceIdHigh=_convert_hex_str_to_int(trace_id[0:8]),
-            traceIdLow=_convert_hex_str_to_int(trace_id[8:16]),
+            traceIdHigh=trace_id_high,
+            traceIdLow=trace_id_low,
             spanId=_convert_hex_str_to_int(link.span_id)))
     return refs
 
@@ -257,20 +349,6 @@ def _convert_reftype_to_jaeger_reftype(ref):
     return None
 
 
-def _convert_hex_str_to_int(val):
-    """Convert hexadecimal formatted ids to signed int64"""
-    if val is None:
-        return None
-
-    hex_num = int(val, 16)
-    #  ensure it fits into 64-bit
-    if hex_num > 0x7FFFFFFFFFFFFFFF:
-        hex_num -= 0x10000000000000000
-
-    assert -9223372036854775808 <= hex_num <= 9223372036854775807
-    return hex_num
-
-
 def _extract_logs_from_span(span):
     if span.time_events is None:
         return None
@@ -278,6 +356,9 @@ def _extract_logs_from_span(span):
     logs = []
     for time_event in span.time_events:
         annotation = time_event.annotation
+        # Jaeger logs have no equivalent of message events.
+        if annotation is None:
+            continue
         fields = _extract_tags(annotation.attributes)
 
         fields.append(jaeger.Tag(
@@ -285,9 +366,7 @@ def _extract_logs_from_span(span):
             vType=jaeger.TagType.STRING,
             vStr=annotation.description))
 
-        event_time = datetime.datetime.strptime(
-            time_event.timestamp, ISO_DATETIME_REGEX)
-        timestamp = calendar.timegm(event_time.timetuple()) * 1000
+        timestamp = time_event.timestamp_ns // utils.NANOS_PER_MICROSECOND
 
         logs.append(jaeger.Log(timestamp=timestamp, fields=fields))
     return logs
@@ -327,9 +406,143 @@ def _convert_attribute_to_tag(key, attr):
     return None
 
 
+class _KeepAliveClient(object):
+    """Sends POST requests to a URL over keep-alive connections.
+
+    Replaces :class:`thrift.transport.THttpClient.THttpClient`, which opens
+    a new connection for each request. Up to ``pool_size`` idle connections
+    are kept, and a connection the server closed while idle is replaced.
+    Like THttpClient, it goes through the proxy set in the environment.
+
+    :type url: str
+    :param url: The URL to post to.
+
+    :type pool_size: int
+    :param pool_size: The maximum number of idle connections kept.
+
+    :type timeout: float
+    :param timeout: Seconds to wait for the server.
+    """
+
+    def __init__(self, url, pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT):
+        parsed = urllib.parse.urlparse(url)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._connection_class = http_client.HTTPSConnection \
+            if parsed.scheme == 'https' else http_client.HTTPConnection
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._path = urllib.parse.urlunparse(('', '') + parsed[2:])
+        self._tunnel = None
+        self._proxy_headers = {}
+
+        proxy = urllib.request.getproxies().get(parsed.scheme)
+        if proxy and not urllib.request.proxy_bypass(parsed.hostname):
+            proxy = urllib.parse.urlparse(proxy)
+            if parsed.scheme == 'https':
+                self._tunnel = (self._host, self._port)
+            else:
+                # The proxy gets the whole URL.
+                self._path = url
+            self._host = proxy.hostname
+            self._port = proxy.port
+            if proxy.username:
+                credentials = '{}:{}'.format(
+                    urllib.parse.unquote(proxy.username),
+                    urllib.parse.unquote(proxy.password or ''))
+                self._proxy_headers['Proxy-Authorization'] = \
+                    'Basic {}'.format(base64.b64encode(
+                        credentials.encode()).decode('ascii'))
+
+        self._connections = []
+        self._fork_marker = fork.get_fork_marker()
+        self._lock = threading.Lock()
+
+    def _new_connection(self):
+        connection = self._connection_class(
+            self._host, self._port, timeout=self.timeout)
+        if self._tunnel is not None:
+            connection.set_tunnel(*self._tunnel, headers=self._proxy_headers)
+        return connection
+
+    def _get_connection(self):
+        """Get an idle connection, or a new one.
+
+        :rtype: tuple
+        :returns: The connection, and True if it was idle.
+        """
+        with self._lock:
+            fork_marker = fork.get_fork_marker()
+            if self._fork_marker != fork_marker:
+                # The sockets belong to the parent process.
+                self._connections = []
+                self._fork_marker = fork_marker
+            if self._connections:
+                return self._connections.pop(), True
+        return self._new_connection(), False
+
+    def _release(self, connection):
+        with self._lock:
+            if len(self._connections) < self.pool_size:
+                self._connections.append(connection)
+                return
+        connection.close()
+
+    def _request(self, connection, body, headers):
+        if self._tunnel is None:
+            headers = dict(headers, **self._proxy_headers)
+        connection.request('POST', self._path, body, headers)
+        response = connection.getresponse()
+        response.read()
+        return response
+
+    def post(self, body, headers):
+        """Send a POST request.
+
+        :type body: bytes
+        :param body: The body of the request.
+
+        :type headers: dict
+        :param headers: The headers of the request.
+
+        :rtype: :class:`http.client.HTTPResponse`
+        :returns: The response, already read.
+        """
+        connection, idle = self._get_connection()
+        try:
+            try:
+                response = self._request(connection, body, headers)
+            except (http_client.HTTPException, socket.error):
+                if not idle:
+                    raise
+                # The server closed the idle connection.
+                connection.close()
+                connection = self._new_connection()
+                response = self._request(connection, body, headers)
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        return response
+
+    def close(self):
+        """Close the idle connections."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+
 class Collector(base.Exporter):
     """Submits collected spans to Thrift HTTP server.
 
+    The connections to the server are kept alive between batches.
+
     :type thrift_url: str
     :param thrift_url: URL of the Jaeger HTTP Thrift.
 
@@ -337,6 +550,11 @@ class Collector(base.Exporter):
     :param auth: (Optional) Auth tupple that contains username and
                 password for Basic Auth.
 
+    :type client: :class:`type`
+    :param client: Class for creating the client encoding the batches. It
+                   should implement ``send_submitBatches``. Defaults to
+                   :class:`~opencensus.trace.exporters.gen.jaeger.Client`.
+
     :type transport: :class:`type`
     :param transport: Class for creating new transport objects. It should
                       extend from the base :class:`.Transport` type and
@@ -344,9 +562,13 @@ class Collector(base.Exporter):
                       :class:`.SyncTransport`. The other option is
                       :class:`.BackgroundThreadTransport`.
 
-    :type http_transport: :class:`type`
-    :param http_transport: Class for creating new client for Thrift
-                           HTTP server.
+    :type pool_size: int
+    :param pool_size: (Optional) The maximum number of keep-alive
+                      connections to the server. Set it to the number of
+                      threads calling :meth:`emit` concurrently.
+
+    :type timeout: float
+    :param timeout: (Optional) Seconds to wait for the server.
     """
 
     def __init__(
@@ -355,13 +577,20 @@ class Collector(base.Exporter):
             auth=None,
             client=jaeger.Client,
             transport=sync.SyncTransport,
-            http_transport=THttpClient.THttpClient):
+            pool_size=DEFAULT_POOL_SIZE,
+            timeout=DEFAULT_TIMEOUT):
         self.transport = transport(self)
         self.thrift_url = thrift_url
         self.auth = auth
-        self.http_transport = http_transport(uri_or_host=thrift_url)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.buffer = TTransport.TMemoryBuffer()
         self.client = client(
-            iprot=TBinaryProtocol.TBinaryProtocol(trans=self.http_transport))
+            iprot=TBinaryProtocol.TBinaryProtocol(trans=self.buffer))
+        self._lock = threading.Lock()
+        self.http_client = _KeepAliveClient(thrift_url, pool_size, timeout)
+
+        self.headers = {'Content-Type': 'application/x-thrift'}
 
         # set basic auth header
         if auth is not None:
@@ -369,29 +598,90 @@ class Collector(base.Exporter):
             auth_header = '{}:{}'.format(*auth)
             decoded = base64.b64encode(auth_header.encode()).decode('ascii')
             basic_auth = dict(Authorization='Basic {}'.format(decoded))
-            self.http_transport.setCustomHeaders(basic_auth)
+            self.headers.update(basic_auth)
+
+    def _encode(self, batch):
+        """Encode a ``submitBatches`` message with the client.
+
+        :rtype: bytes
+        """
+        with self._lock:
+            self.client._seqid = 0
+            #  truncate and reset the position of BytesIO object
+            self.buffer._buffer.truncate(0)
+            self.buffer._buffer.seek(0)
+            self.client.send_submitBatches([batch])
+            return self.buffer.getvalue()
 
     def emit(self, batch):
         """Submits batches to Thrift HTTP Server through Binary Protocol.
 
         :type batch: :class: `~opencensus.trace.exporters.gen.jaeger.Batch`
         :param batch: Object to emit Jaeger spans.
+
+        :rtype: bool
+        :returns: True if the collector accepted the batch.
+        """
+        try:
+            body = self._encode(batch)
+        except Exception as e:  # pragma: NO COVER
+            logging.error(getattr(e, 'message', e))
+            return False
+        return self.submit(body)
+
+    def submit(self, body):
+        """Post an encoded ``submitBatches`` message to the server.
+
+        :type body: bytes
+        :param body: The message, in the binary protocol.
+
+        :rtype: bool
+        :returns: True if the collector accepted the message.
         """
         try:
-            self.client.submitBatches([batch])
-            # it will call http_transport.flush() and
-            # status code and message will be updated
-            code = self.http_transport.code
-            msg = self.http_transport.message
+            response = self.http_client.post(body, self.headers)
+            code = response.status
             if code >= 300 or code < 200:
                 logging.error("Traces cannot be uploaded;\
-                        HTTP status code: {}, message {}".format(code, msg))
+                        HTTP status code: {}, message {}".format(
+                    code, response.reason))
+                return False
+            return True
         except Exception as e:  # pragma: NO COVER
             logging.error(getattr(e, 'message', e))
+            return False
 
-        finally:
-            if self.http_transport.isOpen():
-                self.http_transport.close()
+    def emit_async(self, batch):
+        """Submits batches to Thrift HTTP Server on the running asyncio event
+        loop, for :class:`.AsyncTransport`. Requires Python 3.5.
+
+        :type batch: :class: `~opencensus.trace.exporters.gen.jaeger.Batch`
+        :param batch: Object to emit Jaeger spans.
+
+        :rtype: coroutine
+        :returns: Coroutine sending the batch, resolving to False if it
+                  could not be sent.
+        """
+        return self.submit_async(self._encode(batch))
+
+    def submit_async(self, body):
+        """Post an encoded ``submitBatches`` message to the server on the
+        running asyncio event loop. Requires Python 3.5.
+
+        :type body: bytes
+        :param body: The message, in the binary protocol.
+
+        :rtype: coroutine
+        :returns: Coroutine sending the message, resolving to False if it
+                  could not be sent.
+        """
+        from opencensus.trace.exporters.transports import async_transport
+
+        return async_transport.post(
+            self.thrift_url,
+            body,
+            headers=self.headers,
+            success_status_codes=range(200, 300))
 
     def export(self, batch):
         """
@@ -404,6 +694,9 @@ class Collector(base.Exporter):
 class AgentClientUDP(base.Exporter):
     """Implement a UDP client to agent.
 
+    A batch that does not fit in a UDP packet is split into several
+    packets. The client keeps a single socket open between batches.
+
     :type host_name: str
     :param host_name: (Optional) The host name of the Jaeger server.
 
@@ -438,35 +731,133 @@ class AgentClientUDP(base.Exporter):
         self.address = (host_name, port)
         self.max_packet_size = max_packet_size
         self.buffer = TTransport.TMemoryBuffer()
-        self.client = client(
-            iprot=TCompactProtocol.TCompactProtocol(trans=self.buffer))
+        self.protocol = TCompactProtocol.TCompactProtocol(trans=self.buffer)
+        self.client = client(iprot=self.protocol)
+        self._socket = None
+        self._socket_fork_marker = None
+        self._lock = threading.Lock()
 
-    def emit(self, batch):
+    @property
+    def udp_socket(self):
+        """The socket sending packets to the agent, kept open between
+        batches. A forked child process gets a new one.
+        """
+        fork_marker = fork.get_fork_marker()
+        if self._socket is None or self._socket_fork_marker != fork_marker:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket_fork_marker = fork_marker
+        return self._socket
+
+    def close(self):
+        """Close the socket. The next batch opens a new one."""
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _encode(self, batch):
+        """Encode an ``emitBatch`` message with the client.
+
+        :rtype: bytes
         """
+        self.client._seqid = 0
+        #  truncate and reset the position of BytesIO object
+        self.buffer._buffer.truncate(0)
+        self.buffer._buffer.seek(0)
+        self.client.emitBatch(batch)
+        return self.buffer.getvalue()
+
+    def _split(self, batch):
+        """Split the spans of a batch too large for a packet into batches
+        that fit, encoding each span once to measure it. Spans too large
+        for a packet on their own are dropped.
+
         :type batch: :class: `~opencensus.trace.exporters.gen.jaeger.Batch`
-        :param batch: Object to emit Jaeger spans.
+        :param batch: The batch to split.
+
+        :rtype: list of :class: `~opencensus.trace.exporters.gen.jaeger.Batch`
         """
-        udp_socket = None
-        try:
-            self.client._seqid = 0
-            #  truncate and reset the position of BytesIO object
+        # Everything but the spans, with room for the size of the list of
+        # spans to grow.
+        overhead = len(self._encode(jaeger.Batch(
+            process=batch.process, spans=[]))) + _MAX_LIST_SIZE_GROWTH
+
+        batches = []
+        spans = []
+        size = overhead
+        dropped = 0
+        for span in batch.spans or ():
             self.buffer._buffer.truncate(0)
             self.buffer._buffer.seek(0)
-            self.client.emitBatch(batch)
-            buff = self.buffer.getvalue()
-            if len(buff) > self.max_packet_size:
-                logging.warn('Data exceeds the max UDP packet size; size {},\
-                        max {}'.format(len(buff), self.max_packet_size))
-            else:
-                udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                udp_socket.sendto(buff, self.address)
+            span.write(self.protocol)
+            span_size = len(self.buffer.getvalue())
 
-        except Exception as e:  # pragma: NO COVER
-            logging.error(getattr(e, 'message', e))
+            if overhead + span_size > self.max_packet_size:
+                dropped += 1
+                continue
 
-        finally:
-            if udp_socket is not None:
-                udp_socket.close()
+            if size + span_size > self.max_packet_size:
+                batches.append(
+                    jaeger.Batch(process=batch.process, spans=spans))
+                spans = []
+                size = overhead
+
+            spans.append(span)
+            size += span_size
+
+        if spans:
+            batches.append(jaeger.Batch(process=batch.process, spans=spans))
+
+        if dropped:
+            logging.warning(
+                'Dropped %s spans exceeding the max UDP packet size %s',
+                dropped, self.max_packet_size)
+            telemetry.record_dropped(self, dropped)
+        return batches
+
+    def emit(self, batch):
+        """
+        :type batch: :class: `~opencensus.trace.exporters.gen.jaeger.Batch`
+        :param batch: Object to emit Jaeger spans.
+
+        :rtype: bool
+        :returns: False if the batch could not be sent. A span larger than
+                  ``max_packet_size`` on its own is dropped and not reported
+                  as a failure, since sending it again cannot succeed.
+        """
+        with self._lock:
+            try:
+                packet = self._encode(batch)
+                if len(packet) <= self.max_packet_size:
+                    packets = [packet]
+                else:
+                    packets = [self._encode(chunk)
+                               for chunk in self._split(batch)]
+            except Exception as e:  # pragma: NO COVER
+                logging.error(getattr(e, 'message', e))
+                return False
+        return self.send(packets)
+
+    def send(self, packets):
+        """Send encoded ``emitBatch`` messages to the agent.
+
+        :type packets: list of bytes
+        :param packets: The messages, in the compact protocol, each at most
+                        ``max_packet_size`` bytes.
+
+        :rtype: bool
+        :returns: False if the packets could not be sent.
+        """
+        with self._lock:
+            try:
+                udp_socket = self.udp_socket
+                for packet in packets:
+                    udp_socket.sendto(packet, self.address)
+                return True
+
+            except Exception as e:  # pragma: NO COVER
+                logging.error(getattr(e, 'message', e))
+                self.close()
+                return False
 
     def export(self, batch):
         """
@@ -73,8 +73,10 @@ class LoggingExporter(base.Exporter):
         """
         # convert to the legacy trace json for easier refactoring
         # TODO: refactor this to use the span data directly
-        legacy_trace_json = span_data.format_legacy_trace_json(span_datas)
-        self.logger.info(legacy_trace_json)
+        # One record per trace, the spans may come from several traces.
+        for legacy_trace_json in span_data.format_legacy_trace_jsons(
+                span_datas):
+            self.logger.info(legacy_trace_json)
 
     def export(self, span_datas):
         """
@@ -13,9 +13,13 @@
 # limitations under the License.
 
 import os
+import threading
+from multiprocessing import pool as pool_module
 
 from google.cloud.trace.client import Client
+import six
 
+from opencensus.common import fork
 from opencensus.trace import attributes_helper
 from opencensus.trace import span_data
 from opencensus.trace.attributes import Attributes
@@ -28,6 +32,21 @@ VERSION = '0.1.5'
 # Agent
 AGENT = 'opencensus-python [{}]'.format(VERSION)
 
+# The most spans sent in one batch_write_spans request.
+DEFAULT_MAX_SPANS_PER_REQUEST = 1000
+
+# The most bytes of spans, as JSON, sent in one batch_write_spans request.
+# Below the default 4 MiB limit of gRPC messages, the protobuf encoding of
+# the spans is smaller than their JSON.
+DEFAULT_MAX_REQUEST_BYTES = 3 * 1024 * 1024
+
+# The most batch_write_spans requests sent in parallel for a batch.
+DEFAULT_MAX_WORKERS = 4
+
+# The most bytes a number, boolean or null takes in JSON, for estimating
+# the size of spans.
+_MAX_SCALAR_JSON_BYTES = 24
+
 # Environment variable set in App Engine when vm:true is set.
 _APPENGINE_FLEXIBLE_ENV_VM = 'GAE_APPENGINE_HOSTNAME'
 
@@ -62,17 +81,44 @@ def _update_attr_map(span, attrs):
     span['attributes']['attributeMap'] = attr_map
 
 
-def set_attributes(trace):
-    """Automatically set attributes for Google Cloud environment."""
+def set_attributes(trace, default_attributes=None):
+    """Automatically set attributes for Google Cloud environment.
+
+    :type trace: dict
+    :param trace: Trace dictionary
+
+    :type default_attributes: dict
+    :param default_attributes: (Optional) The attribute map to set, as
+                               returned by :func:`get_default_attributes`.
+                               Read from the environment if not given.
+    """
+    if default_attributes is None:
+        default_attributes = get_default_attributes()
+
     spans = trace.get('spans')
     for span in spans:
         if span.get('attributes') is None:
             span['attributes'] = {}
 
-        if is_gae_environment():
-            set_gae_attributes(span)
+        _update_attr_map(span, default_attributes)
+
+
+def get_default_attributes():
+    """Get the attributes set on every span: the GAE environment ones, and
+    the common ones.
 
-        set_common_attributes(span)
+    :rtype: dict
+    :returns: The attribute map, in the Stackdriver format.
+    """
+    attrs = {}
+    if is_gae_environment():
+        for env_var, attribute_key in GAE_ATTRIBUTES.items():
+            attribute_value = os.environ.get(env_var)
+            if attribute_value is not None:
+                attrs[attribute_key] = attribute_value
+
+    attrs[attributes_helper.COMMON_ATTRIBUTES.get('AGENT')] = AGENT
+    return Attributes(attrs).format_attributes_json().get('attributeMap')
 
 
 def set_common_attributes(span):
@@ -108,6 +154,26 @@ def is_gae_environment():
         return True
 
 
+def _estimate_json_size(value):
+    """Estimate the size in bytes of a value encoded as compact JSON,
+    without encoding it.
+
+    The estimate is not lower than the size of the encoding, except for
+    strings with characters that JSON escapes.
+    """
+    if isinstance(value, six.string_types):
+        return len(value) + 2
+    if isinstance(value, dict):
+        # Braces, and quotes, colon and comma per item.
+        return 2 + sum(len(key) + 4 + _estimate_json_size(item)
+                       for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(_estimate_json_size(item) + 1 for item in value)
+    if value is None or isinstance(value, (bool, int, float)):
+        return _MAX_SCALAR_JSON_BYTES
+    return len(str(value)) + 2
+
+
 class StackdriverExporter(base.Exporter):
     """A exporter that send traces and trace spans to Google Cloud Stackdriver
     Trace.
@@ -124,9 +190,26 @@ class StackdriverExporter(base.Exporter):
                       implement :meth:`.Transport.export`. Defaults to
                       :class:`.SyncTransport`. The other option is
                       :class:`.BackgroundThreadTransport`.
+
+    :type max_spans_per_request: int
+    :param max_spans_per_request: (Optional) The most spans sent in one
+                                  ``batch_write_spans`` request. Larger
+                                  batches are split.
+
+    :type max_request_bytes: int
+    :param max_request_bytes: (Optional) The most bytes of spans, measured
+                              as JSON, sent in one request. Larger batches
+                              are split.
+
+    :type max_workers: int
+    :param max_workers: (Optional) The most requests of a split batch sent
+                        in parallel.
     """
     def __init__(self, client=None, project_id=None,
-                 transport=sync.SyncTransport):
+                 transport=sync.SyncTransport,
+                 max_spans_per_request=DEFAULT_MAX_SPANS_PER_REQUEST,
+                 max_request_bytes=DEFAULT_MAX_REQUEST_BYTES,
+                 max_workers=DEFAULT_MAX_WORKERS):
         # The client will handle the case when project_id is None
         if client is None:
             client = Client(project=project_id)
@@ -134,22 +217,96 @@ class StackdriverExporter(base.Exporter):
         self.client = client
         self.project_id = client.project
         self.transport = transport(self)
+        self.max_spans_per_request = max_spans_per_request
+        self.max_request_bytes = max_request_bytes
+        self.max_workers = max_workers
+        # The environment does not change while the process runs.
+        self.default_attributes = get_default_attributes()
+        self._pool = None
+        self._pool_fork_marker = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """The threads sending the requests of a split batch, started on
+        first use. A forked child process gets new ones.
+        """
+        with self._pool_lock:
+            fork_marker = fork.get_fork_marker()
+            if self._pool is None or self._pool_fork_marker != fork_marker:
+                self._pool = pool_module.ThreadPool(self.max_workers)
+                self._pool_fork_marker = fork_marker
+            return self._pool
+
+    def close(self):
+        """Stop the threads sending requests, if started."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    def _split(self, spans):
+        """Split spans into lists within :attr:`max_spans_per_request` and
+        :attr:`max_request_bytes`. A span larger than
+        :attr:`max_request_bytes` on its own is sent alone.
+
+        The sizes of the spans are estimated with
+        :func:`_estimate_json_size` rather than encoded.
+
+        :type spans: list of dict
+        :param spans: Spans in the Stackdriver format.
+
+        :rtype: list of list of dict
+        """
+        if not spans:
+            return []
+        if len(spans) <= self.max_spans_per_request and \
+                _estimate_json_size(spans) <= self.max_request_bytes:
+            return [spans]
+
+        chunks = []
+        chunk = []
+        size = 0
+        for span in spans:
+            span_size = _estimate_json_size(span)
+            if chunk and (len(chunk) >= self.max_spans_per_request or
+                          size + span_size > self.max_request_bytes):
+                chunks.append(chunk)
+                chunk = []
+                size = 0
+            chunk.append(span)
+            size += span_size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _write_spans(self, spans):
+        self.client.batch_write_spans(
+            'projects/{}'.format(self.project_id), {'spans': spans})
 
     def emit(self, span_datas):
-        """
+        """Send the spans in ``batch_write_spans`` requests, in parallel
+        when the batch is split. Raises the error of a failed request, after
+        all of them are done.
+
         :type span_datas: list of :class:
             `~opencensus.trace.span_data.SpanData`
         :param list of opencensus.trace.span_data.SpanData span_datas:
             SpanData tuples to emit
         """
-        name = 'projects/{}'.format(self.project_id)
-
         # convert to the legacy trace json for easier refactoring
         # TODO: refactor this to use the span data directly
-        trace = span_data.format_legacy_trace_json(span_datas)
+        # The spans may come from several traces, all sent in one request.
+        spans_list = []
+        for trace in span_data.format_legacy_trace_jsons(span_datas):
+            spans_list.extend(
+                self.translate_to_stackdriver(trace).get('spans'))
 
-        stackdriver_spans = self.translate_to_stackdriver(trace)
-        self.client.batch_write_spans(name, stackdriver_spans)
+        chunks = self._split(spans_list)
+        if len(chunks) <= 1:
+            self._write_spans(spans_list)
+        else:
+            self.pool.map(self._write_spans, chunks)
 
     def export(self, span_datas):
         """
@@ -172,7 +329,7 @@ class StackdriverExporter(base.Exporter):
         :rtype: dict
         :returns: Spans in Google Cloud StackDriver Trace format.
         """
-        set_attributes(trace)
+        set_attributes(trace, self.default_attributes)
         spans_json = trace.get('spans')
         trace_id = trace.get('traceId')
         spans_list = []
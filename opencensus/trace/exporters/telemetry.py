@@ -0,0 +1,300 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Stats about the trace exporters themselves.
+
+Nothing is recorded until :func:`register_views` is called, for example::
+
+    stats = stats_module.Stats()
+    telemetry.register_views(stats.view_manager)
+    ...
+    view_data = stats.view_manager.get_view(
+        telemetry.EXPORT_LATENCY_VIEW.name)
+
+Transports call the exporters through :func:`emit`, which records the
+latency and size of each batch and the number of spans sent or failed.
+Exporters awaited by the asyncio transport are recorded with
+:func:`record_emit`. Spans a transport drops before they reach the
+exporter, for example when its queue is full, are recorded with
+:func:`record_dropped`, and the number of spans waiting in its queue with
+:func:`record_queue_depth`.
+
+The stats package has no last value aggregation, so the queue depth is
+recorded into a distribution each time a batch is taken off the queue,
+rather than as a gauge.
+"""
+
+import threading
+import time
+
+from opencensus.stats import aggregation as aggregation_module
+from opencensus.stats import measure as measure_module
+from opencensus.stats import measurement_map as measurement_map_module
+from opencensus.stats import view as view_module
+from opencensus.tags import tag_key as tag_key_module
+
+EXPORTER_KEY = tag_key_module.TagKey('opencensus_exporter')
+CIRCUIT_STATE_KEY = tag_key_module.TagKey('opencensus_circuit_state')
+
+EXPORT_LATENCY_MEASURE = measure_module.MeasureFloat(
+    'opencensus.io/exporter/latency',
+    'Time taken by an exporter to send a batch of spans',
+    'ms')
+EXPORT_BATCH_SIZE_MEASURE = measure_module.MeasureInt(
+    'opencensus.io/exporter/batch_size',
+    'Number of spans in a batch sent by an exporter',
+    '1')
+SPANS_EXPORTED_MEASURE = measure_module.MeasureInt(
+    'opencensus.io/exporter/spans_exported',
+    'Number of spans sent by an exporter',
+    '1')
+SPANS_FAILED_MEASURE = measure_module.MeasureInt(
+    'opencensus.io/exporter/spans_failed',
+    'Number of spans an exporter failed to send',
+    '1')
+SPANS_DROPPED_MEASURE = measure_module.MeasureInt(
+    'opencensus.io/exporter/spans_dropped',
+    'Number of spans dropped by a transport before reaching the exporter',
+    '1')
+EXPORT_RETRIES_MEASURE = measure_module.MeasureInt(
+    'opencensus.io/exporter/retries',
+    'Number of times a batch of spans was sent again after a failure',
+    '1')
+QUEUE_DEPTH_MEASURE = measure_module.MeasureInt(
+    'opencensus.io/exporter/queue_depth',
+    'Number of spans waiting in the queue of a transport',
+    '1')
+CIRCUIT_BREAKER_TRANSITIONS_MEASURE = measure_module.MeasureInt(
+    'opencensus.io/exporter/circuit_breaker_transitions',
+    'Number of state changes of the circuit breakers around exporters',
+    '1')
+
+LATENCY_BOUNDARIES = [
+    0.0, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0,
+    2000.0, 5000.0, 10000.0]
+BATCH_SIZE_BOUNDARIES = [0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+QUEUE_DEPTH_BOUNDARIES = [
+    0, 1, 16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384]
+
+EXPORT_LATENCY_VIEW = view_module.View(
+    'opencensus.io/exporter/latency',
+    'Distribution of the time taken to send a batch by exporter',
+    [EXPORTER_KEY],
+    EXPORT_LATENCY_MEASURE,
+    aggregation_module.DistributionAggregation(LATENCY_BOUNDARIES))
+EXPORT_BATCH_SIZE_VIEW = view_module.View(
+    'opencensus.io/exporter/batch_size',
+    'Distribution of the number of spans per batch by exporter',
+    [EXPORTER_KEY],
+    EXPORT_BATCH_SIZE_MEASURE,
+    aggregation_module.DistributionAggregation(BATCH_SIZE_BOUNDARIES))
+SPANS_EXPORTED_VIEW = view_module.View(
+    'opencensus.io/exporter/spans_exported',
+    'Number of spans sent by exporter',
+    [EXPORTER_KEY],
+    SPANS_EXPORTED_MEASURE,
+    aggregation_module.SumAggregation())
+SPANS_FAILED_VIEW = view_module.View(
+    'opencensus.io/exporter/spans_failed',
+    'Number of spans that could not be sent by exporter',
+    [EXPORTER_KEY],
+    SPANS_FAILED_MEASURE,
+    aggregation_module.SumAggregation())
+SPANS_DROPPED_VIEW = view_module.View(
+    'opencensus.io/exporter/spans_dropped',
+    'Number of spans dropped before reaching the exporter, by exporter',
+    [EXPORTER_KEY],
+    SPANS_DROPPED_MEASURE,
+    aggregation_module.SumAggregation())
+QUEUE_DEPTH_VIEW = view_module.View(
+    'opencensus.io/exporter/queue_depth',
+    'Distribution of the spans queued when a batch is taken, by exporter',
+    [EXPORTER_KEY],
+    QUEUE_DEPTH_MEASURE,
+    aggregation_module.DistributionAggregation(QUEUE_DEPTH_BOUNDARIES))
+EXPORT_RETRIES_VIEW = view_module.View(
+    'opencensus.io/exporter/retries',
+    'Number of export retries by exporter',
+    [EXPORTER_KEY],
+    EXPORT_RETRIES_MEASURE,
+    aggregation_module.CountAggregation())
+CIRCUIT_BREAKER_TRANSITIONS_VIEW = view_module.View(
+    'opencensus.io/exporter/circuit_breaker_transitions',
+    'Number of circuit breaker state changes by exporter and new state',
+    [EXPORTER_KEY, CIRCUIT_STATE_KEY],
+    CIRCUIT_BREAKER_TRANSITIONS_MEASURE,
+    aggregation_module.CountAggregation())
+
+VIEWS = (
+    EXPORT_LATENCY_VIEW,
+    EXPORT_BATCH_SIZE_VIEW,
+    SPANS_EXPORTED_VIEW,
+    SPANS_FAILED_VIEW,
+    SPANS_DROPPED_VIEW,
+    QUEUE_DEPTH_VIEW,
+    EXPORT_RETRIES_VIEW,
+    CIRCUIT_BREAKER_TRANSITIONS_VIEW,
+)
+
+# The view map of the view manager passed to register_views. Exporters
+# record from background threads, which do not share the runtime context
+# of the thread registering the views.
+_measure_to_view_map = None
+_lock = threading.Lock()
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+def register_views(view_manager):
+    """Register the exporter views and start recording to them.
+
+    :type view_manager: :class:`~opencensus.stats.view_manager.ViewManager`
+    :param view_manager: The view manager to register the views with.
+    """
+    global _measure_to_view_map
+
+    for view in VIEWS:
+        view_manager.register_view(view)
+    _measure_to_view_map = view_manager.measure_to_view_map
+
+
+def unregister_views():
+    """Stop recording exporter stats."""
+    global _measure_to_view_map
+    _measure_to_view_map = None
+
+
+def is_recording():
+    """Returns True if exporter stats are recorded."""
+    return _measure_to_view_map is not None
+
+
+def record(measurements, tags):
+    """Record measurements if the views are registered.
+
+    :type measurements: dict
+    :param measurements: Map of :class:`~opencensus.stats.measure.MeasureInt`
+                         or :class:`~opencensus.stats.measure.MeasureFloat`
+                         to the measured value.
+
+    :type tags: dict
+    :param tags: Map of :class:`~opencensus.tags.tag_key.TagKey` to the
+                 tag value.
+    """
+    measure_to_view_map = _measure_to_view_map
+    if measure_to_view_map is None:
+        return
+
+    measurement_map = measurement_map_module.MeasurementMap(
+        measure_to_view_map)
+    for measure, value in measurements.items():
+        if isinstance(measure, measure_module.MeasureFloat):
+            measurement_map.measure_float_put(measure, value)
+        else:
+            measurement_map.measure_int_put(measure, value)
+
+    with _lock:
+        measurement_map.record(tags)
+
+
+def get_exporter_name(exporter):
+    """The name tagging the stats of an exporter.
+
+    Exporters wrapping another exporter set ``exporter_name`` to the name
+    of the wrapped one.
+    """
+    return getattr(exporter, 'exporter_name', None) or \
+        type(exporter).__name__
+
+
+def record_dropped(exporter, num_spans):
+    """Record spans dropped by a transport of the exporter.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter the spans were meant for.
+
+    :type num_spans: int
+    :param num_spans: The number of spans dropped.
+    """
+    if num_spans and is_recording():
+        record({SPANS_DROPPED_MEASURE: num_spans},
+               {EXPORTER_KEY: get_exporter_name(exporter)})
+
+
+def emit(exporter, span_datas):
+    """Call ``emit`` on the exporter, recording its latency, the size of the
+    batch and the number of spans sent or failed.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter to call.
+
+    :type span_datas: list of :class:
+        `~opencensus.trace.span_data.SpanData`
+    :param span_datas: SpanData tuples to emit
+
+    :returns: The result of ``emit``. Exceptions are recorded as a failure
+              and raised again.
+    """
+    if not is_recording():
+        return exporter.emit(span_datas)
+
+    sent = False
+    start = _monotonic()
+    try:
+        result = exporter.emit(span_datas)
+        sent = result is not False
+        return result
+    finally:
+        record_emit(exporter, len(span_datas), sent, _monotonic() - start)
+
+
+def record_emit(exporter, num_spans, sent, latency):
+    """Record a batch sent by the exporter, for transports that do not call
+    it through :func:`emit`.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter that sent the batch.
+
+    :type num_spans: int
+    :param num_spans: The number of spans in the batch.
+
+    :type sent: bool
+    :param sent: False if the batch could not be sent.
+
+    :type latency: float
+    :param latency: The seconds taken to send the batch.
+    """
+    if not is_recording():
+        return
+
+    spans_measure = SPANS_EXPORTED_MEASURE if sent else SPANS_FAILED_MEASURE
+    record({EXPORT_LATENCY_MEASURE: latency * 1000.0,
+            EXPORT_BATCH_SIZE_MEASURE: num_spans,
+            spans_measure: num_spans},
+           {EXPORTER_KEY: get_exporter_name(exporter)})
+
+
+def record_queue_depth(exporter, num_spans):
+    """Record the number of spans waiting in the queue of a transport of
+    the exporter.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter the spans are queued for.
+
+    :type num_spans: int
+    :param num_spans: The number of queued spans.
+    """
+    if is_recording():
+        record({QUEUE_DEPTH_MEASURE: num_spans},
+               {EXPORTER_KEY: get_exporter_name(exporter)})
@@ -0,0 +1,391 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Export spans from an asyncio event loop without blocking it.
+
+Requires Python 3.5 or later. For example::
+
+    exporter = ZipkinExporter(service_name='app', transport=AsyncTransport)
+
+    async def handler(request):
+        with tracer.span(name='handler'):
+            ...
+
+    # Before the loop stops
+    await exporter.transport.flush_async()
+"""
+
+import asyncio
+import logging
+import ssl
+
+from six.moves.urllib import parse
+
+from opencensus.trace.exporters import telemetry
+from opencensus.trace.exporters.transports import base
+
+log = logging.getLogger(__name__)
+
+_DEFAULT_MAX_BATCH_SIZE = 512  # Spans
+_DEFAULT_MAX_LATENCY = 1.0  # Seconds
+_DEFAULT_MAX_QUEUE_SIZE = 2048  # Spans
+_DEFAULT_HTTP_TIMEOUT = 10.0  # Seconds
+_FLUSH = object()
+
+SUCCESS_STATUS_CODES = (200, 202)
+
+
+def _get_running_loop():
+    """Return the event loop running in the current thread, or None."""
+    try:
+        return asyncio.get_running_loop()
+    except AttributeError:  # pragma: NO COVER
+        # Python < 3.7
+        return asyncio._get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class _SpanQueue(object):
+    """A queue of lists of SpanData tuples, bounded by the total number of
+    spans rather than the number of lists.
+
+    The lists and the marker items share one unbounded
+    :class:`asyncio.Queue`, so a marker can always be queued, and ``put``
+    enforces the bound on the spans itself. It waits while the queue holds
+    ``max_spans`` spans or more, so a list can take the queue over the bound
+    by at most its own length.
+
+    :type max_spans: int
+    :param max_spans: The maximum number of queued spans, or 0 for no limit.
+    """
+
+    def __init__(self, max_spans=0):
+        self.max_spans = max_spans
+        self.num_spans = 0
+        self._items = asyncio.Queue()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    def qsize(self):
+        """The number of queued lists and markers."""
+        return self._items.qsize()
+
+    def full(self):
+        return 0 < self.max_spans <= self.num_spans
+
+    def put_nowait(self, span_datas):
+        """Put a list of spans, regardless of the bound."""
+        self._items.put_nowait(span_datas)
+        self.num_spans += len(span_datas)
+        if self.full():
+            self._not_full.clear()
+
+    async def put(self, span_datas):
+        """Put a list of spans, waiting while the queue is full."""
+        while self.full():
+            await self._not_full.wait()
+        self.put_nowait(span_datas)
+
+    def put_marker(self, item):
+        """Put a marker item, even if the queue is full."""
+        self._items.put_nowait(item)
+
+    def _took(self, item):
+        if item is not _FLUSH:
+            self.num_spans -= len(item)
+            if not self.full():
+                self._not_full.set()
+        return item
+
+    def get_nowait(self):
+        return self._took(self._items.get_nowait())
+
+    async def get(self):
+        return self._took(await self._items.get())
+
+    def task_done(self):
+        self._items.task_done()
+
+    async def join(self):
+        await self._items.join()
+
+    def fits(self, num_spans):
+        """Returns True if ``num_spans`` more spans are within the bound."""
+        return not self.max_spans or \
+            self.num_spans + num_spans <= self.max_spans
+
+
+class AsyncTransport(base.Transport):
+    """Transport batching spans on the running asyncio event loop.
+
+    Batches are exported by a task of the loop, as soon as they hold
+    ``max_batch_size`` spans or ``max_latency`` seconds after their first
+    span was queued. Exporters with an ``emit_async`` method returning an
+    awaitable, or None when there is nothing to wait for, are awaited on the
+    loop, and the batch counts as failed if it raises or resolves to False.
+    The ``emit`` method of other exporters runs in the default executor of
+    the loop.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter sending the batches.
+
+    :type max_batch_size: int
+    :param max_batch_size: The number of spans at which a batch is exported.
+
+    :type max_queue_size: int
+    :param max_queue_size: The maximum number of spans waiting to be
+                           exported, or 0 for no limit. :meth:`export`
+                           drops the spans over the limit and counts them in
+                           ``dropped_spans``, :meth:`export_async` waits for
+                           room instead.
+
+    :type max_latency: float
+    :param max_latency: The maximum number of seconds spans wait in a batch
+                        before it is exported.
+    """
+
+    def __init__(self, exporter,
+                 max_batch_size=_DEFAULT_MAX_BATCH_SIZE,
+                 max_queue_size=_DEFAULT_MAX_QUEUE_SIZE,
+                 max_latency=_DEFAULT_MAX_LATENCY):
+        self.exporter = exporter
+        self.dropped_spans = 0
+        self._max_batch_size = max_batch_size
+        self._max_queue_size = max_queue_size
+        self._max_latency = max_latency
+        self._loop = None
+        self._queue = None
+        self._task = None
+
+    @property
+    def queue_depth(self):
+        """The number of spans waiting to be exported."""
+        return self._queue.num_spans if self._queue is not None else 0
+
+    def _get_queue(self, loop):
+        """Return the queue of the running loop, starting the export task
+        on first use in each loop.
+        """
+        if loop is not self._loop or self._task.done():
+            self._loop = loop
+            self._queue = _SpanQueue(self._max_queue_size)
+            self._task = asyncio.ensure_future(self._run(), loop=loop)
+        return self._queue
+
+    def export(self, span_datas):
+        """Queue the spans to be exported by the loop, without blocking.
+
+        Must be called from the thread running the event loop. If the loop
+        is not running, the spans are emitted right away.
+        """
+        loop = _get_running_loop()
+        if loop is None:
+            self.exporter.emit(span_datas)
+            return
+
+        queue = self._get_queue(loop)
+        if not queue.fits(len(span_datas)):
+            self.dropped_spans += len(span_datas)
+            telemetry.record_dropped(self.exporter, len(span_datas))
+            return
+        queue.put_nowait(span_datas)
+
+    async def export_async(self, span_datas):
+        """Queue the spans to be exported, waiting while the queue is full."""
+        await self._get_queue(_get_running_loop()).put(span_datas)
+
+    async def flush_async(self):
+        """Export the pending spans and wait until they have been sent."""
+        if self._queue is None:
+            return
+        self._queue.put_marker(_FLUSH)
+        await self._queue.join()
+
+    def flush(self):
+        """Submit any pending spans.
+
+        From a coroutine, use :meth:`flush_async` to wait for the spans to
+        be sent. This only ends the current batch while the loop runs.
+        """
+        if self._loop is None or self._loop.is_closed():
+            return
+        if self._loop.is_running():
+            self._queue.put_marker(_FLUSH)
+        else:
+            self._loop.run_until_complete(self.flush_async())
+
+    async def close(self):
+        """Export the pending spans and stop the export task."""
+        if self._task is None:
+            return
+        await self.flush_async()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._loop = self._queue = self._task = None
+
+    async def _next_item(self, queue, deadline):
+        """Get the next item, waiting no longer than the deadline.
+
+        :rtype: object
+        :returns: The item, or None if the deadline passed first.
+        """
+        if deadline is None:
+            return await queue.get()
+
+        timeout = deadline - _get_running_loop().time()
+        if timeout <= 0:
+            return None
+
+        try:
+            return await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _emit(self, span_datas):
+        loop = _get_running_loop()
+        emit_async = getattr(self.exporter, 'emit_async', None)
+        if emit_async is None:
+            try:
+                await loop.run_in_executor(
+                    None, telemetry.emit, self.exporter, span_datas)
+            except Exception:
+                log.exception('Failed to export spans.')
+            return
+
+        # Recorded like telemetry.emit records the other exporters.
+        sent = False
+        start = loop.time()
+        try:
+            result = emit_async(span_datas)
+            if result is not None:
+                result = await result
+            sent = result is not False
+        except Exception:
+            log.exception('Failed to export spans.')
+        finally:
+            telemetry.record_emit(
+                self.exporter, len(span_datas), sent, loop.time() - start)
+
+    async def _run(self):
+        """Pull spans off the queue and export them in batches."""
+        loop = _get_running_loop()
+        queue = self._queue
+        batch = []
+        num_items = 0
+        deadline = None
+
+        while True:
+            item = await self._next_item(queue, deadline)
+
+            if item is not None and item is not _FLUSH:
+                if not num_items:
+                    deadline = loop.time() + self._max_latency
+                batch.extend(item)
+                num_items += 1
+                if len(batch) < self._max_batch_size:
+                    continue
+            elif item is _FLUSH:
+                num_items += 1
+
+            if batch:
+                telemetry.record_queue_depth(self.exporter, queue.num_spans)
+                await self._emit(batch)
+
+            for _ in range(num_items):
+                queue.task_done()
+
+            batch = []
+            num_items = 0
+            deadline = None
+
+
+async def post(url, body, headers=None, timeout=_DEFAULT_HTTP_TIMEOUT,
+               success_status_codes=SUCCESS_STATUS_CODES):
+    """Send an HTTP POST request on the running event loop.
+
+    A new connection is used for each request. Failures are logged rather
+    than raised, like the ``emit`` methods of the exporters.
+
+    :type url: str
+    :param url: The http or https URL to post to.
+
+    :type body: bytes or str
+    :param body: The request body, str is encoded as UTF-8.
+
+    :type headers: dict
+    :param headers: (Optional) Additional request headers.
+
+    :type timeout: float
+    :param timeout: (Optional) The maximum number of seconds for the whole
+                    request.
+
+    :type success_status_codes: tuple
+    :param success_status_codes: (Optional) The status codes of a
+                                 successful response.
+
+    :rtype: bool
+    :returns: True if the request succeeded, False otherwise, like the
+              ``emit`` methods of the exporters.
+    """
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+
+    try:
+        status = await asyncio.wait_for(
+            _post(url, body, headers or {}), timeout)
+    except Exception as e:
+        log.error('Failed to send spans to %s: %s', url, e)
+        return False
+
+    if status not in success_status_codes:
+        log.error('Failed to send spans to %s, HTTP status code: %s',
+                  url, status)
+        return False
+    return True
+
+
+async def _post(url, body, headers):
+    parts = parse.urlsplit(url)
+    secure = parts.scheme == 'https'
+    port = parts.port or (443 if secure else 80)
+    path = parts.path or '/'
+    if parts.query:
+        path = '{}?{}'.format(path, parts.query)
+
+    ssl_context = ssl.create_default_context() if secure else None
+    reader, writer = await asyncio.open_connection(
+        parts.hostname, port, ssl=ssl_context)
+
+    try:
+        lines = [
+            'POST {} HTTP/1.1'.format(path),
+            'Host: {}'.format(parts.netloc),
+            'Content-Length: {}'.format(len(body)),
+            'Connection: close',
+        ]
+        lines.extend(
+            '{}: {}'.format(name, value) for name, value in headers.items())
+        head = '\r\n'.join(lines) + '\r\n\r\n'
+
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
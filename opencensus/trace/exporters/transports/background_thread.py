@@ -13,24 +13,225 @@
 # limitations under the License.
 
 import atexit
+import os
 import threading
 import time
 
 from six.moves import queue
 from six.moves import range
 
+from opencensus.common import fork
+from opencensus.trace.exporters import telemetry
 from opencensus.trace.exporters.transports import base
 
 _DEFAULT_GRACE_PERIOD = 5.0  # Seconds
-_DEFAULT_MAX_BATCH_SIZE = 10
-_WAIT_PERIOD = 1.0  # Seconds
+_DEFAULT_MAX_BATCH_SIZE = 512  # Spans
+_DEFAULT_MAX_LATENCY = 1.0  # Seconds
+_DEFAULT_MAX_QUEUE_SIZE = 2048  # Spans
+_DEFAULT_BLOCK_TIMEOUT = 0.1  # Seconds
 _WORKER_THREAD_NAME = 'opencensus.trace.Worker'
 _WORKER_TERMINATOR = object()
+_WORKER_FLUSH = object()
+
+# Rough per-item sizes used to estimate the encoded size of a batch.
+_SPAN_OVERHEAD_BYTES = 200
+_TIME_EVENT_OVERHEAD_BYTES = 50
+_LINK_OVERHEAD_BYTES = 50
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+# Serializes rebuilding workers in a forked child. It is recreated after a
+# fork, since a thread of the parent may have held it.
+_fork_lock = threading.Lock()
+
+
+def _reinit_fork_lock():
+    global _fork_lock
+    _fork_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_fork_lock)
+
+
+class OverflowPolicy(object):
+    """What to do with spans exported while the queue is full.
+
+    Attributes:
+      DROP_NEWEST (int): Drop the spans being exported.
+      DROP_OLDEST (int): Drop the oldest queued batches to make room.
+      BLOCK (int): Block the caller until there is room, or until the block
+                   timeout expires, then drop the spans being exported.
+    """
+    DROP_NEWEST = 0
+    DROP_OLDEST = 1
+    BLOCK = 2
+
+
+def _is_spans(item):
+    return item is not _WORKER_TERMINATOR and item is not _WORKER_FLUSH
+
+
+def _estimate_span_size(span_data):
+    """Estimate the encoded size in bytes of a SpanData tuple, without
+    encoding it.
+    """
+    size = _SPAN_OVERHEAD_BYTES + len(span_data.name or '')
+
+    for key, value in (span_data.attributes or {}).items():
+        size += len(key) + len(str(value))
+
+    size += _TIME_EVENT_OVERHEAD_BYTES * len(span_data.time_events or ())
+    size += _LINK_OVERHEAD_BYTES * len(span_data.links or ())
+
+    return size
+
+
+def _get_shard(span_datas, num_shards):
+    """Return the export thread for the spans of one ``enqueue`` call, from
+    the trace ID of their first span, so that all the parts of a trace are
+    exported by the same thread, in order.
+    """
+    for span_data in span_datas:
+        if span_data.context is None:
+            break
+        try:
+            return int(span_data.context.trace_id, 16) % num_shards
+        except (TypeError, ValueError):
+            break
+    return 0
+
+
+class _Batch(object):
+    """Spans taken off the queue and not yet exported."""
+
+    def __init__(self):
+        self.items = []
+        self.span_datas = []
+        self.num_items = 0
+        self.num_bytes = 0
+        self.deadline = None
+
+
+class _SpanQueue(queue.Queue):
+    """A queue of lists of SpanData tuples bounded by the total number of
+    spans rather than by the number of lists.
+
+    A list with more spans than the limit, such as a very long trace, is
+    only accepted while no other spans are queued.
+
+    :type max_spans: int
+    :param max_spans: The maximum number of queued spans, or 0 for no limit.
+    """
+    def __init__(self, max_spans=0):
+        # The bound is checked in put_spans, the base class is unbounded.
+        queue.Queue.__init__(self, 0)
+        self.max_spans = max_spans
+        self.num_spans = 0
+        self.dropped_spans = 0
+
+    def _put(self, item):
+        if _is_spans(item):
+            self.num_spans += len(item)
+        self.queue.append(item)
+
+    def _get(self):
+        item = self.queue.popleft()
+        if _is_spans(item):
+            self.num_spans -= len(item)
+        return item
+
+    def _fits(self, num_spans):
+        return not self.max_spans or not self.num_spans or \
+            self.num_spans + num_spans <= self.max_spans
+
+    def _drop_oldest(self):
+        """Remove the oldest list of spans, returning the number of spans
+        removed. Must be called with the mutex held.
+        """
+        for index, item in enumerate(self.queue):
+            if _is_spans(item):
+                del self.queue[index]
+                self.num_spans -= len(item)
+                # The item will never be handed to a consumer, so mark it
+                # done here to keep join() working.
+                self.unfinished_tasks -= 1
+                if not self.unfinished_tasks:
+                    self.all_tasks_done.notify_all()
+                return len(item)
+        return 0
+
+    def put_spans(self, span_datas, policy=OverflowPolicy.DROP_NEWEST,
+                  timeout=_DEFAULT_BLOCK_TIMEOUT):
+        """Put a list of SpanData tuples in the queue, applying the overflow
+        policy if it does not fit.
+
+        :rtype: int
+        :returns: The number of spans dropped, also added to
+                  ``dropped_spans``.
+        """
+        num_spans = len(span_datas)
+
+        with self.not_full:
+            dropped = self._make_room(num_spans, policy, timeout)
+
+            if dropped is None:
+                self.dropped_spans += num_spans
+                return num_spans
+
+            self._put(span_datas)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+            self.dropped_spans += dropped
+            return dropped
+
+    def _make_room(self, num_spans, policy, timeout):
+        """Apply the overflow policy until ``num_spans`` more spans fit.
+        Must be called with the mutex held.
+
+        :rtype: int
+        :returns: The number of queued spans dropped to make room, or None
+                  if the new spans must be dropped instead.
+        """
+        dropped = 0
+
+        if policy == OverflowPolicy.DROP_OLDEST:
+            while not self._fits(num_spans):
+                dropped += self._drop_oldest()
+        elif policy == OverflowPolicy.BLOCK:
+            deadline = _monotonic() + timeout
+            while not self._fits(num_spans):
+                remaining = deadline - _monotonic()
+                if remaining <= 0:
+                    return None
+                self.not_full.wait(remaining)
+        elif not self._fits(num_spans):
+            return None
+
+        return dropped
 
 
 class _Worker(object):
     """A background thread that exports batches of spans.
 
+    A batch is exported as soon as it holds ``max_batch_size`` spans, its
+    estimated size reaches ``max_batch_bytes``, or ``max_latency`` seconds
+    have passed since its first spans were taken off the queue, whichever
+    comes first. The spans of one ``enqueue`` call, usually a trace, are
+    always exported in the same batch.
+
+    With more than one export thread, the background thread splits the
+    batches by trace ID and hands each part to the export thread of its
+    traces, so that the threads call the exporter in parallel while the
+    parts of a trace flushed separately are still exported in order.
+    Otherwise it calls the exporter itself.
+
+    The threads, queues and lock do not survive :func:`os.fork`. In the
+    child process they are rebuilt on the next ``enqueue`` or ``flush``, and
+    the threads are restarted if they were running. Spans queued before the
+    fork are left to the parent process, so that they are not exported
+    twice.
+
     :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
     :param exporter: Instances of Exporter objects. Defaults to
                     :class:`.PrintExporter`. The rest options are
@@ -42,41 +243,207 @@ class _Worker(object):
                          be submitted when the process is shutting down.
 
     :type max_batch_size: int
-    :param max_batch_size: The maximum number of items to send at a time
-                           in the background thread.
+    :param max_batch_size: The number of spans at which a batch is
+                           exported.
+
+    :type max_queue_size: int
+    :param max_queue_size: The maximum number of spans waiting to be
+                           exported, or 0 for no limit. Spans exported in a
+                           single call are queued together, even over the
+                           limit, if no other spans are waiting.
+
+    :type overflow_policy: int
+    :param overflow_policy: What to do with spans exported while the queue
+                            is full, one of :class:`OverflowPolicy`.
+
+    :type block_timeout: float
+    :param block_timeout: With :attr:`OverflowPolicy.BLOCK`, the maximum
+                          number of seconds to wait for room in the queue.
+
+    :type max_batch_bytes: int
+    :param max_batch_bytes: (Optional) The estimated size in bytes at which
+                            a batch is exported.
+
+    :type max_latency: float
+    :param max_latency: The maximum number of seconds spans wait in a batch
+                        before it is exported.
+
+    :type name: str
+    :param name: (Optional) The name of the background thread.
+
+    :type num_export_threads: int
+    :param num_export_threads: (Optional) The number of threads calling the
+                               exporter concurrently.
     """
     def __init__(self, exporter, grace_period=_DEFAULT_GRACE_PERIOD,
-                 max_batch_size=_DEFAULT_MAX_BATCH_SIZE):
+                 max_batch_size=_DEFAULT_MAX_BATCH_SIZE,
+                 max_queue_size=_DEFAULT_MAX_QUEUE_SIZE,
+                 overflow_policy=OverflowPolicy.DROP_NEWEST,
+                 block_timeout=_DEFAULT_BLOCK_TIMEOUT,
+                 max_batch_bytes=None,
+                 max_latency=_DEFAULT_MAX_LATENCY,
+                 name=_WORKER_THREAD_NAME,
+                 num_export_threads=1):
         self.exporter = exporter
+        self.name = name
+        self._num_export_threads = num_export_threads
         self._grace_period = grace_period
         self._max_batch_size = max_batch_size
-        self._queue = queue.Queue(0)
+        self._max_batch_bytes = max_batch_bytes
+        self._max_latency = max_latency
+        self._overflow_policy = overflow_policy
+        self._block_timeout = block_timeout
+        self._max_queue_size = max_queue_size
+        self._queue = _SpanQueue(max_queue_size)
+        self._batches = self._make_batch_queues()
         self._lock = threading.Lock()
         self._thread = None
+        self._export_threads = []
+        self._atexit_registered = False
+        self._fork_marker = fork.get_fork_marker()
+
+    def _check_fork(self):
+        """Rebuild the queue, lock and thread in a forked child process."""
+        if self._fork_marker == fork.get_fork_marker():
+            return
+
+        with _fork_lock:
+            if self._fork_marker == fork.get_fork_marker():
+                return
+
+            # The parent thread does not exist here, and its queue or lock
+            # may have been held at the time of the fork.
+            restart = self._thread is not None
+            self._queue = _SpanQueue(self._max_queue_size)
+            self._batches = self._make_batch_queues()
+            self._lock = threading.Lock()
+            self._thread = None
+            self._export_threads = []
+            self._fork_marker = fork.get_fork_marker()
+
+        if restart:
+            self.start()
+
+    def _make_batch_queues(self):
+        """Return the queues of batches of each export thread, or None if
+        the background thread exports the batches itself.
+        """
+        if self._num_export_threads <= 1:
+            return None
+        # At most one batch waits for each export thread, once they are busy
+        # the spans wait in the span queue, where the overflow policy
+        # applies.
+        return [queue.Queue(1) for _ in range(self._num_export_threads)]
+
+    @property
+    def dropped_spans(self):
+        """The number of spans dropped because the queue was full."""
+        return self._queue.dropped_spans
+
+    @property
+    def queue_depth(self):
+        """The number of spans waiting to be exported."""
+        return self._queue.num_spans
 
     @property
     def is_alive(self):
         """Returns True is the background thread is running."""
         return self._thread is not None and self._thread.is_alive()
 
-    def _get_items(self):
-        """Get multiple items from a Queue.
+    def _get_item(self, batch):
+        """Get the next item from the queue, waiting no longer than the
+        deadline of the batch. Does not mark the item as done.
+
+        :rtype: object
+        :returns: The item, or None if the deadline passed first.
+        """
+        if batch.deadline is None:
+            return self._queue.get()
+
+        timeout = batch.deadline - _monotonic()
+
+        if timeout <= 0:
+            return None
+
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
 
-        Gets at least one (blocking) and at most ``max_items`` items
-        (non-blocking) from a given Queue. Does not mark the items as done.
+    def _add_to_batch(self, batch, span_datas):
+        """Add spans to the batch.
 
-        :rtype: Sequence
-        :returns: A sequence of items retrieved from the queue.
+        :rtype: bool
+        :returns: True if the batch is full and should be exported.
         """
-        items = [self._queue.get()]
+        if not batch.num_items:
+            batch.deadline = _monotonic() + self._max_latency
+
+        batch.items.append(span_datas)
+        batch.span_datas.extend(span_datas)
+        batch.num_items += 1
+
+        if len(batch.span_datas) >= self._max_batch_size:
+            return True
+
+        if self._max_batch_bytes is not None:
+            for span_data in span_datas:
+                batch.num_bytes += _estimate_span_size(span_data)
+            return batch.num_bytes >= self._max_batch_bytes
+
+        return False
 
-        while len(items) < self._max_batch_size:
-            try:
-                items.append(self._queue.get_nowait())
-            except queue.Empty:
+    def _export_batch(self, batch):
+        """Export the spans of the batch, or hand it to the export threads,
+        and mark its items as done once exported.
+        """
+        if self._batches is None or not batch.num_items:
+            self._emit_batch(batch)
+            return
+
+        shards = {}
+        for span_datas in batch.items:
+            shard = _get_shard(span_datas, len(self._batches))
+            part = shards.get(shard)
+            if part is None:
+                part = shards[shard] = _Batch()
+            part.span_datas.extend(span_datas)
+            part.num_items += 1
+
+        for shard, part in shards.items():
+            self._batches[shard].put(part)
+
+    def _emit_batch(self, batch):
+        """Export the spans of the batch and mark its items as done."""
+        if batch.span_datas:
+            telemetry.record_queue_depth(self.exporter, self._queue.num_spans)
+            telemetry.emit(self.exporter, batch.span_datas)
+
+        for _ in range(batch.num_items):
+            self._queue.task_done()
+
+    def _export_thread_main(self, batches):
+        """The entry point for the export threads."""
+        while True:
+            batch = batches.get()
+
+            if batch is _WORKER_TERMINATOR:
                 break
 
-        return items
+            self._emit_batch(batch)
+
+    def _stop_export_threads(self):
+        """Stop the export threads once they exported the batches handed
+        to them.
+        """
+        if not self._export_threads:
+            return
+
+        for batches in self._batches:
+            batches.put(_WORKER_TERMINATOR)
+
+        for thread in self._export_threads:
+            thread.join()
 
     def _thread_main(self):
         """The entry point for the worker thread.
@@ -86,31 +453,28 @@ class _Worker(object):
         """
         print('Background thread started.')
 
-        quit_ = False
+        batch = _Batch()
 
         while True:
-            items = self._get_items()
-            span_datas = []
+            item = self._get_item(batch)
 
-            for item in items:
-                if item is _WORKER_TERMINATOR:
-                    quit_ = True
-                    # Continue processing items, don't break, try to process
-                    # all items we got back before quitting.
-                else:
-                    span_datas.extend(item)
+            if item is None:
+                # The oldest spans of the batch waited long enough.
+                self._export_batch(batch)
+                batch = _Batch()
+            elif item is _WORKER_TERMINATOR or item is _WORKER_FLUSH:
+                self._export_batch(batch)
+                batch = _Batch()
 
-            if span_datas:
-                self.exporter.emit(span_datas)
+                if item is _WORKER_TERMINATOR:
+                    self._stop_export_threads()
+                    self._queue.task_done()
+                    break
 
-            for _ in range(len(items)):
                 self._queue.task_done()
-
-            # Wait for a while before next export
-            time.sleep(_WAIT_PERIOD)
-
-            if quit_:
-                break
+            elif self._add_to_batch(batch, item):
+                self._export_batch(batch)
+                batch = _Batch()
 
         print('Background thread exited.')
 
@@ -125,10 +489,25 @@ class _Worker(object):
                 return
 
             self._thread = threading.Thread(
-                target=self._thread_main, name=_WORKER_THREAD_NAME)
+                target=self._thread_main, name=self.name)
             self._thread.daemon = True
             self._thread.start()
-            atexit.register(self._export_pending_spans)
+
+            if self._batches is not None:
+                self._export_threads = [
+                    threading.Thread(
+                        target=self._export_thread_main,
+                        args=(batches,),
+                        name='{}-{}'.format(self.name, index))
+                    for index, batches in enumerate(self._batches)]
+                for thread in self._export_threads:
+                    thread.daemon = True
+                    thread.start()
+
+            # The handler is inherited by forked children, register it once.
+            if not self._atexit_registered:
+                atexit.register(self._export_pending_spans)
+                self._atexit_registered = True
 
     def stop(self):
         """Signals the background thread to stop.
@@ -175,16 +554,32 @@ class _Worker(object):
             print('Failed to send pending spans.')
 
     def enqueue(self, span_datas):
-        """Queues span_datas to be written by the background thread."""
-        self._queue.put_nowait(span_datas)
+        """Queues span_datas to be written by the background thread.
+
+        If the queue is full, spans are dropped according to the overflow
+        policy and counted in ``dropped_spans``.
+        """
+        self._check_fork()
+        dropped = self._queue.put_spans(
+            span_datas, self._overflow_policy, self._block_timeout)
+        telemetry.record_dropped(self.exporter, dropped)
 
     def flush(self):
-        """Submit any pending spans."""
+        """Submit any pending spans, without waiting for the batch
+        deadline.
+        """
+        self._check_fork()
+        if self.is_alive:
+            self._queue.put_nowait(_WORKER_FLUSH)
         self._queue.join()
 
 
 class BackgroundThreadTransport(base.Transport):
-    """Asynchronous transport that uses a background thread.
+    """Asynchronous transport that uses background threads.
+
+    With more than one worker, the workers take batches from the same
+    queue and call the exporter in parallel. The spans of one ``export``
+    call, usually a trace, are always exported in the same batch.
 
     :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
     :param exporter: Instances of Exporter objects. Defaults to
@@ -197,16 +592,64 @@ class BackgroundThreadTransport(base.Transport):
                          be submitted when the process is shutting down.
 
     :type max_batch_size: int
-    :param max_batch_size: The maximum number of items to send at a time
-                           in the background thread.
+    :param max_batch_size: The number of spans at which a batch is exported
+                           by the background thread.
+
+    :type max_queue_size: int
+    :param max_queue_size: The maximum number of spans waiting to be
+                           exported, or 0 for no limit. Spans exported in a
+                           single call are queued together, even over the
+                           limit, if no other spans are waiting.
+
+    :type overflow_policy: int
+    :param overflow_policy: What to do with spans exported while the queue
+                            is full, one of :class:`OverflowPolicy`. Defaults
+                            to dropping the new spans.
+
+    :type block_timeout: float
+    :param block_timeout: With :attr:`OverflowPolicy.BLOCK`, the maximum
+                          number of seconds ``export`` waits for room in the
+                          queue before dropping the spans.
+
+    :type max_batch_bytes: int
+    :param max_batch_bytes: (Optional) The estimated size in bytes at which
+                            a batch is exported.
+
+    :type max_latency: float
+    :param max_latency: The maximum number of seconds spans wait in a batch
+                        before it is exported.
+
+    :type num_workers: int
+    :param num_workers: The number of threads calling the exporter
+                        concurrently. The exporter must be thread safe if
+                        this is more than one.
     """
 
     def __init__(self, exporter, grace_period=_DEFAULT_GRACE_PERIOD,
-                 max_batch_size=_DEFAULT_MAX_BATCH_SIZE):
+                 max_batch_size=_DEFAULT_MAX_BATCH_SIZE,
+                 max_queue_size=_DEFAULT_MAX_QUEUE_SIZE,
+                 overflow_policy=OverflowPolicy.DROP_NEWEST,
+                 block_timeout=_DEFAULT_BLOCK_TIMEOUT,
+                 max_batch_bytes=None,
+                 max_latency=_DEFAULT_MAX_LATENCY,
+                 num_workers=1):
         self.exporter = exporter
-        self.worker = _Worker(exporter, grace_period, max_batch_size)
+        self.worker = _Worker(
+            exporter, grace_period, max_batch_size, max_queue_size,
+            overflow_policy, block_timeout, max_batch_bytes, max_latency,
+            num_export_threads=num_workers)
         self.worker.start()
 
+    @property
+    def dropped_spans(self):
+        """The number of spans dropped because the queue was full."""
+        return self.worker.dropped_spans
+
+    @property
+    def queue_depth(self):
+        """The number of spans waiting to be exported."""
+        return self.worker.queue_depth
+
     def export(self, span_datas):
         """Put the trace to be exported into queue."""
         self.worker.enqueue(span_datas)
@@ -0,0 +1,317 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Retry failed exports and stop calling a backend that keeps failing.
+
+:class:`RetryTransport` wraps another transport, by default a
+:class:`.BackgroundThreadTransport`, for example::
+
+    exporter = ZipkinExporter(service_name='app', transport=RetryTransport)
+
+The backoff sleeps in the thread calling the exporter, so wrapping a
+:class:`.SyncTransport` would block the application threads ending spans.
+
+A batch is retried when the exporter returns False from ``emit`` or raises
+one of the ``retryable_exceptions``, with exponential backoff and full
+jitter, until the retry budget is spent. After ``failure_threshold`` batches
+in a row could not be sent, the circuit breaker opens and batches are
+dropped without calling the exporter for ``reset_timeout`` seconds. Then a
+single batch is let through: the circuit closes again if it is sent, and
+reopens otherwise.
+
+State changes and retries are recorded in the views of
+:mod:`opencensus.trace.exporters.telemetry`.
+"""
+
+import logging
+import random
+import socket
+import threading
+import time
+
+from opencensus.trace.exporters import base as base_exporter
+from opencensus.trace.exporters import telemetry
+from opencensus.trace.exporters.transports import background_thread
+from opencensus.trace.exporters.transports import base
+
+log = logging.getLogger(__name__)
+
+_DEFAULT_RETRY_BUDGET = 10.0  # Seconds
+_DEFAULT_INITIAL_BACKOFF = 0.1  # Seconds
+_DEFAULT_MAX_BACKOFF = 5.0  # Seconds
+_DEFAULT_BACKOFF_MULTIPLIER = 2.0
+_DEFAULT_FAILURE_THRESHOLD = 5  # Batches
+_DEFAULT_RESET_TIMEOUT = 30.0  # Seconds
+
+# Network errors. requests and urllib3 exceptions derive from IOError.
+DEFAULT_RETRYABLE_EXCEPTIONS = (IOError, OSError, socket.error)
+
+_monotonic = getattr(time, 'monotonic', time.time)
+_sleep = time.sleep
+
+
+class CircuitState(object):
+    """The states of a :class:`CircuitBreaker`.
+
+    Attributes:
+      CLOSED (str): Batches are sent.
+      OPEN (str): Batches are dropped without calling the exporter.
+      HALF_OPEN (str): One batch is sent to probe the backend.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class RetryPolicy(object):
+    """Exponential backoff with full jitter, within a time budget.
+
+    :type budget: float
+    :param budget: The maximum number of seconds spent on one batch,
+                   including the time spent sending it.
+
+    :type initial_backoff: float
+    :param initial_backoff: The upper bound in seconds of the first random
+                            backoff.
+
+    :type max_backoff: float
+    :param max_backoff: The maximum upper bound in seconds of a backoff.
+
+    :type multiplier: float
+    :param multiplier: The factor by which the upper bound grows after each
+                       retry.
+
+    :type retryable_exceptions: tuple
+    :param retryable_exceptions: The exceptions raised by ``emit`` that are
+                                 retried. Other exceptions are logged and the
+                                 batch is dropped.
+    """
+
+    def __init__(self, budget=_DEFAULT_RETRY_BUDGET,
+                 initial_backoff=_DEFAULT_INITIAL_BACKOFF,
+                 max_backoff=_DEFAULT_MAX_BACKOFF,
+                 multiplier=_DEFAULT_BACKOFF_MULTIPLIER,
+                 retryable_exceptions=DEFAULT_RETRYABLE_EXCEPTIONS):
+        self.budget = budget
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.retryable_exceptions = retryable_exceptions
+
+    def backoffs(self):
+        """Generate the random number of seconds to wait before each retry.
+        """
+        bound = self.initial_backoff
+        while True:
+            yield random.uniform(0, bound)
+            bound = min(bound * self.multiplier, self.max_backoff)
+
+
+class CircuitBreaker(object):
+    """Tracks consecutive export failures to stop calling a dead backend.
+
+    :type failure_threshold: int
+    :param failure_threshold: The number of batches in a row that could not
+                              be sent after which the circuit opens.
+
+    :type reset_timeout: float
+    :param reset_timeout: The number of seconds the circuit stays open
+                          before a batch is let through.
+
+    :type name: str
+    :param name: (Optional) The name of the exporter, used to tag stats.
+    """
+
+    def __init__(self, failure_threshold=_DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=_DEFAULT_RESET_TIMEOUT, name=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """The current :class:`CircuitState`."""
+        return self._state
+
+    def _set_state(self, state):
+        if state == self._state:
+            return
+
+        log.info('Circuit breaker of %s changed from %s to %s.',
+                 self.name, self._state, state)
+        self._state = state
+        telemetry.record(
+            {telemetry.CIRCUIT_BREAKER_TRANSITIONS_MEASURE: 1},
+            {telemetry.EXPORTER_KEY: self.name,
+             telemetry.CIRCUIT_STATE_KEY: state})
+
+    def allow_request(self):
+        """Returns True if a batch may be sent now."""
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return True
+
+            if self._state == CircuitState.OPEN and \
+                    _monotonic() - self._opened_at >= self.reset_timeout:
+                # Let a single batch through.
+                self._set_state(CircuitState.HALF_OPEN)
+                return True
+
+            return False
+
+    def record_success(self):
+        """Record that a batch was sent."""
+        with self._lock:
+            self._failures = 0
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self):
+        """Record that a batch could not be sent."""
+        with self._lock:
+            self._failures += 1
+            if self._state == CircuitState.HALF_OPEN or \
+                    self._failures >= self.failure_threshold:
+                self._opened_at = _monotonic()
+                self._set_state(CircuitState.OPEN)
+
+
+class RetryingExporter(base_exporter.Exporter):
+    """Calls the ``emit`` method of another exporter, with retries and a
+    circuit breaker.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter to call.
+
+    :type retry_policy: :class:`RetryPolicy`
+    :param retry_policy: (Optional) When and how long to retry.
+
+    :type circuit_breaker: :class:`CircuitBreaker`
+    :param circuit_breaker: (Optional) The circuit breaker of the exporter.
+    """
+
+    def __init__(self, exporter, retry_policy=None, circuit_breaker=None):
+        self.exporter = exporter
+        # Transports calling this exporter record stats under this name.
+        self.exporter_name = telemetry.get_exporter_name(exporter)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            name=self.exporter_name)
+        self.dropped_spans = 0
+
+    def _emit_once(self, span_datas):
+        """Call the exporter once.
+
+        :rtype: bool
+        :returns: True if sent, False if it may be retried, None if it
+                  failed for good.
+        """
+        try:
+            return self.exporter.emit(span_datas) is not False
+        except self.retry_policy.retryable_exceptions:
+            log.warning('Failed to export spans.', exc_info=True)
+            return False
+        except Exception:
+            log.exception('Failed to export spans, not retrying.')
+            return None
+
+    def emit(self, span_datas):
+        """Send the spans, retrying failures within the retry budget.
+
+        :rtype: bool
+        :returns: True if the spans were sent.
+        """
+        if not self.circuit_breaker.allow_request():
+            self.dropped_spans += len(span_datas)
+            return False
+
+        deadline = _monotonic() + self.retry_policy.budget
+        backoffs = self.retry_policy.backoffs()
+
+        while True:
+            sent = self._emit_once(span_datas)
+
+            if sent:
+                self.circuit_breaker.record_success()
+                return True
+
+            if sent is None:
+                # Not a failure of the backend.
+                self.dropped_spans += len(span_datas)
+                return False
+
+            backoff = next(backoffs)
+            if _monotonic() + backoff > deadline or \
+                    not self.circuit_breaker.allow_request():
+                break
+
+            telemetry.record(
+                {telemetry.EXPORT_RETRIES_MEASURE: 1},
+                {telemetry.EXPORTER_KEY: self.exporter_name})
+            _sleep(backoff)
+
+        self.circuit_breaker.record_failure()
+        self.dropped_spans += len(span_datas)
+        return False
+
+    def export(self, span_datas):
+        self.exporter.export(span_datas)
+
+
+class RetryTransport(base.Transport):
+    """Transport adding retries and a circuit breaker to another transport.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter owning this transport.
+
+    :type transport: :class:`type`
+    :param transport: Class for creating the wrapped transport, which calls
+                      the exporter through a :class:`RetryingExporter`.
+                      Defaults to :class:`.BackgroundThreadTransport`, so
+                      that the retries do not block the application.
+
+    :type retry_policy: :class:`RetryPolicy`
+    :param retry_policy: (Optional) When and how long to retry.
+
+    :type circuit_breaker: :class:`CircuitBreaker`
+    :param circuit_breaker: (Optional) The circuit breaker of the exporter.
+                            By default each exporter has its own.
+    """
+
+    def __init__(self, exporter,
+                 transport=background_thread.BackgroundThreadTransport,
+                 retry_policy=None, circuit_breaker=None):
+        self.exporter = exporter
+        self.retrying_exporter = RetryingExporter(
+            exporter, retry_policy, circuit_breaker)
+        self.transport = transport(self.retrying_exporter)
+
+    @property
+    def circuit_breaker(self):
+        """The circuit breaker of the exporter."""
+        return self.retrying_exporter.circuit_breaker
+
+    @property
+    def dropped_spans(self):
+        """The number of spans that could not be sent."""
+        return self.retrying_exporter.dropped_spans
+
+    def export(self, span_datas):
+        self.transport.export(span_datas)
+
+    def flush(self):
+        self.transport.flush()
@@ -0,0 +1,453 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Spool spans to local disk, so that they survive an outage of the
+tracing backend.
+
+Exported batches are appended to segment files in the spool directory. A
+background thread sends them in order and records its position in a small
+memory-mapped index file, so that a restarted process resumes where the
+previous one stopped. While the exporter fails, the same batch is retried
+every ``retry_interval`` seconds, and new batches wait on disk rather than
+in memory. When the spool grows over ``max_disk_bytes``, the oldest segments
+are deleted and their spans counted in ``dropped_spans``.
+
+An exporter signals a failure by raising an exception or by returning False
+from ``emit``. Any other result, including the None returned by exporters
+that raise on failure, means the batch was sent.
+
+The spool directory must be only accessible by the current user, and is
+locked by the process using it.
+"""
+
+import errno
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: NO COVER
+    fcntl = None
+
+from opencensus.common import private_dir
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import telemetry
+from opencensus.trace.exporters.transports import base
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIRECTORY = private_dir.get_default_private_dir(
+    'opencensus-spool')
+DEFAULT_MAX_SEGMENT_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+
+_DEFAULT_RETRY_INTERVAL = 5.0  # Seconds
+_SPOOL_THREAD_NAME = 'opencensus.trace.Spool'
+_SEGMENT_SUFFIX = '.seg'
+_INDEX_FILE_NAME = 'index'
+_LOCK_FILE_NAME = 'lock'
+
+# Each batch is stored as the length of the UTF-8 JSON list of SpanData
+# tuples, as formatted by span_data.format_span_data_json, and its number
+# of spans, followed by the JSON list.
+_HEADER = struct.Struct('!II')
+
+# The index holds the segment number and offset of the first batch that
+# has not been sent.
+_INDEX = struct.Struct('!QQ')
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+def _encode_record(span_datas):
+    payload = json.dumps(
+        [span_data_module.format_span_data_json(span_data)
+         for span_data in span_datas],
+        separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(len(payload), len(span_datas)) + payload
+
+
+def _decode_payload(payload):
+    return [
+        span_data_module.parse_span_data_json(span_data_json)
+        for span_data_json in json.loads(payload.decode('utf-8'))]
+
+
+def _lock_directory(directory):
+    """Lock a spool directory for the current process.
+
+    :rtype: file
+    :returns: The open lock file, closing it releases the lock.
+
+    :raises: ValueError if another process holds the lock.
+    """
+    lock_file = open(os.path.join(directory, _LOCK_FILE_NAME), 'ab')
+    if fcntl is None:  # pragma: NO COVER
+        return lock_file
+
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except (IOError, OSError) as e:
+        lock_file.close()
+        if e.errno not in (errno.EAGAIN, errno.EACCES):
+            raise
+        raise ValueError(
+            'The spool directory {} is used by another process'.format(
+                directory))
+    return lock_file
+
+
+class SpoolTransport(base.Transport):
+    """Transport writing spans to rotating segment files on local disk,
+    sent by a background thread.
+
+    Only one process may use a spool directory at a time, give each
+    worker process of a pre-fork server its own directory.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter sending the spooled spans.
+
+    :type directory: str
+    :param directory: (Optional) The spool directory, created only
+                      accessible by the current user if missing, and which
+                      must be otherwise. Defaults to
+                      :data:`DEFAULT_SPOOL_DIRECTORY`.
+
+    :type max_segment_bytes: int
+    :param max_segment_bytes: The size in bytes at which a new segment file
+                              is started.
+
+    :type max_disk_bytes: int
+    :param max_disk_bytes: The maximum total size in bytes of the segment
+                           files. Over this, the oldest segments are deleted.
+
+    :type retry_interval: float
+    :param retry_interval: The number of seconds to wait before sending a
+                           batch again after a failure.
+
+    :raises: ValueError if the directory is accessible by other users or
+             used by another process.
+    """
+
+    def __init__(self, exporter, directory=None,
+                 max_segment_bytes=DEFAULT_MAX_SEGMENT_BYTES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+                 retry_interval=_DEFAULT_RETRY_INTERVAL):
+        self.exporter = exporter
+        self.directory = directory or DEFAULT_SPOOL_DIRECTORY
+        self.dropped_spans = 0
+        self._max_segment_bytes = max_segment_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._retry_interval = retry_interval
+        self._condition = threading.Condition(threading.Lock())
+        self._failures = 0
+        self._retry_now = False
+        self._stopped = False
+        self._write_failed = False
+
+        self._open()
+
+        self._thread = threading.Thread(
+            target=self._thread_main, name=_SPOOL_THREAD_NAME)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _segment_path(self, segment):
+        return os.path.join(
+            self.directory, '{:020d}{}'.format(segment, _SEGMENT_SUFFIX))
+
+    def _open(self):
+        """Load the segments and index left by a previous process and start
+        a new segment for writing.
+        """
+        # Other users can neither read the spans nor plant segment files.
+        private_dir.ensure_private_dir(self.directory)
+        self._lock_file = _lock_directory(self.directory)
+
+        index_path = os.path.join(self.directory, _INDEX_FILE_NAME)
+        with open(index_path, 'ab') as index_file:
+            if index_file.tell() < _INDEX.size:
+                index_file.write(b'\x00' * (_INDEX.size - index_file.tell()))
+        self._index_file = open(index_path, 'r+b')
+        self._index = mmap.mmap(self._index_file.fileno(), _INDEX.size)
+        read_segment, read_offset = _INDEX.unpack(self._index[:])
+
+        # Segment number to size in bytes.
+        self._segments = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(_SEGMENT_SUFFIX):
+                continue
+            segment = int(name[:-len(_SEGMENT_SUFFIX)])
+            path = self._segment_path(segment)
+            if segment < read_segment:
+                # Sent before the previous process stopped.
+                os.unlink(path)
+            else:
+                self._segments[segment] = os.path.getsize(path)
+        self._disk_bytes = sum(self._segments.values())
+
+        self._write_segment = max(
+            [read_segment] + list(self._segments)) + 1
+        self._write_file = open(
+            self._segment_path(self._write_segment), 'ab')
+        self._segments[self._write_segment] = 0
+
+        first_segment = min(self._segments)
+        if first_segment != read_segment:
+            read_offset = 0
+        self._set_read_position(first_segment, read_offset)
+        self._read_file = None
+        self._read_file_segment = None
+
+    def _set_read_position(self, segment, offset):
+        self._read_segment = segment
+        self._read_offset = offset
+        self._index[:] = _INDEX.pack(segment, offset)
+
+    @property
+    def disk_bytes(self):
+        """The total size in bytes of the segment files."""
+        return self._disk_bytes
+
+    def _has_unsent(self):
+        return (self._read_segment != self._write_segment or
+                self._read_offset < self._segments[self._write_segment])
+
+    def _next_segment(self, segment):
+        return min(other for other in self._segments if other > segment)
+
+    def _remove_segment(self, segment):
+        """Delete a segment file, which must not be the write segment."""
+        self._disk_bytes -= self._segments.pop(segment)
+        try:
+            os.unlink(self._segment_path(segment))
+        except OSError as e:  # pragma: NO COVER
+            if e.errno != errno.ENOENT:
+                raise
+
+    def _count_spans(self, segment, offset):
+        """Count the spans of a segment from an offset, reading the record
+        headers only.
+        """
+        num_spans = 0
+        with open(self._segment_path(segment), 'rb') as segment_file:
+            segment_file.seek(offset)
+            while True:
+                header = segment_file.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return num_spans
+                length, record_spans = _HEADER.unpack(header)
+                num_spans += record_spans
+                segment_file.seek(length, os.SEEK_CUR)
+
+    def _evict(self):
+        """Delete the oldest segments while the spool is over its size."""
+        while (self._disk_bytes > self._max_disk_bytes and
+               self._read_segment != self._write_segment):
+            segment = self._read_segment
+            self._drop(self._count_spans(segment, self._read_offset))
+            self._set_read_position(self._next_segment(segment), 0)
+            self._remove_segment(segment)
+
+    def export(self, span_datas):
+        """Append the spans to the current segment file. Spans that cannot
+        be encoded or written are logged and counted in ``dropped_spans``.
+        """
+        try:
+            record = _encode_record(span_datas)
+        except Exception:
+            log.exception('Failed to encode spans for the spool.')
+            with self._condition:
+                self._drop(len(span_datas))
+            return
+
+        with self._condition:
+            try:
+                self._write_record(record)
+            except Exception:
+                log.exception('Failed to write spans to the spool.')
+                self._drop(len(span_datas))
+
+    def _drop(self, num_spans):
+        self.dropped_spans += num_spans
+        telemetry.record_dropped(self.exporter, num_spans)
+
+    def _start_write_segment(self):
+        self._write_file.close()
+        self._write_segment += 1
+        self._segments[self._write_segment] = 0
+        self._write_file = open(
+            self._segment_path(self._write_segment), 'ab')
+
+    def _write_record(self, record):
+        """Append a record to the current segment file, starting a new one
+        if it is full or a write to it failed.
+        """
+        write_size = self._segments[self._write_segment]
+        if self._write_failed or (
+                write_size and
+                write_size + len(record) > self._max_segment_bytes):
+            self._start_write_segment()
+            self._write_failed = False
+
+        try:
+            self._write_file.write(record)
+            self._write_file.flush()
+        except Exception:
+            # The record may be partly written. The next one starts a new
+            # segment, so that the reader skips to it.
+            self._write_failed = True
+            raise
+        self._segments[self._write_segment] += len(record)
+        self._disk_bytes += len(record)
+
+        self._evict()
+        self._condition.notify_all()
+
+    def _read_record(self, segment, offset):
+        """Read the batch at an offset of a segment file.
+
+        :rtype: tuple
+        :returns: The SpanData tuples, or None if they could not be decoded,
+                  the number of spans and the size of the record, or None if
+                  the record is incomplete.
+        """
+        if self._read_file_segment != segment:
+            if self._read_file is not None:
+                self._read_file.close()
+            self._read_file = open(self._segment_path(segment), 'rb')
+            self._read_file_segment = segment
+
+        self._read_file.seek(offset)
+        header = self._read_file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return None
+
+        length, num_spans = _HEADER.unpack(header)
+        payload = self._read_file.read(length)
+        if len(payload) < length:
+            return None
+
+        try:
+            span_datas = _decode_payload(payload)
+        except Exception:
+            log.exception('Failed to decode spooled spans.')
+            span_datas = None
+
+        return span_datas, num_spans, _HEADER.size + length
+
+    def _emit(self, span_datas):
+        """Send the spans, returning True on success."""
+        try:
+            return telemetry.emit(self.exporter, span_datas) is not False
+        except Exception:
+            log.exception('Failed to export spooled spans.')
+            return False
+
+    def _wait_for_retry(self):
+        """Wait for the retry interval, a flush or a stop."""
+        self._failures += 1
+        self._retry_now = False
+        self._condition.notify_all()
+
+        deadline = _monotonic() + self._retry_interval
+        while not (self._retry_now or self._stopped):
+            timeout = deadline - _monotonic()
+            if timeout <= 0:
+                return
+            # Also woken up by exports, which do not end the wait.
+            self._condition.wait(timeout)
+
+    def _thread_main(self):
+        """Send the spooled batches in order."""
+        while True:
+            with self._condition:
+                while not self._stopped and not self._has_unsent():
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                segment = self._read_segment
+                offset = self._read_offset
+                is_write_segment = segment == self._write_segment
+
+            record = self._read_record(segment, offset)
+
+            if record is None:
+                with self._condition:
+                    if is_write_segment:
+                        # The writer has not finished the record yet.
+                        self._condition.wait(0.1)
+                    elif (segment, offset) == (self._read_segment,
+                                               self._read_offset):
+                        # The end of the segment, or a record cut short
+                        # when a previous process stopped.
+                        self._set_read_position(
+                            self._next_segment(segment), 0)
+                        self._remove_segment(segment)
+                        self._condition.notify_all()
+                continue
+
+            span_datas, num_spans, size = record
+            sent = span_datas is None or self._emit(span_datas)
+
+            with self._condition:
+                if (segment, offset) != (self._read_segment,
+                                         self._read_offset):
+                    # The segment was evicted while sending.
+                    continue
+
+                if span_datas is None:
+                    self.dropped_spans += num_spans
+
+                if sent:
+                    self._set_read_position(segment, offset + size)
+                    self._condition.notify_all()
+                else:
+                    self._wait_for_retry()
+
+    def flush(self):
+        """Send the spooled spans now, and wait until they have all been
+        sent or a send failed.
+        """
+        with self._condition:
+            failures = self._failures
+            self._retry_now = True
+            self._condition.notify_all()
+            while self._has_unsent() and self._failures == failures and \
+                    not self._stopped:
+                self._condition.wait()
+
+    def close(self):
+        """Stop the background thread and close the spool files. The unsent
+        spans stay on disk for the next process.
+        """
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify_all()
+
+        self._thread.join()
+
+        self._write_file.close()
+        if self._read_file is not None:
+            self._read_file.close()
+        self._index.close()
+        self._index_file.close()
+        self._lock_file.close()
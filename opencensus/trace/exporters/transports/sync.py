@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from opencensus.trace.exporters import telemetry
 from opencensus.trace.exporters.transports import base
 
 
@@ -20,4 +21,4 @@ class SyncTransport(base.Transport):
         self.exporter = exporter
 
     def export(self, span_datas):
-        self.exporter.emit(span_datas)
+        telemetry.emit(self.exporter, span_datas)
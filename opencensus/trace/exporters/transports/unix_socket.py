@@ -0,0 +1,364 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Ship spans from the worker processes of a pre-fork server to a single
+local aggregator process over a Unix domain socket.
+
+The aggregator batches the spans of all the workers and runs the real
+exporter, so that there is one set of exporter connections and one export
+queue per host instead of one per worker. For example with gunicorn::
+
+    # gunicorn.conf.py
+    def on_starting(server):
+        aggregator = SpanAggregator(ZipkinExporter(service_name='app'))
+        aggregator.start()
+
+    # In the application, running in the worker processes
+    exporter = ZipkinExporter(service_name='app',
+                              transport=UnixSocketTransport)
+
+Batches are sent as JSON. The socket is created in a directory only
+accessible by the current user, so the worker processes must run as the
+same user as the aggregator.
+"""
+
+import errno
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+
+from six.moves import socketserver
+
+from opencensus.common import fork
+from opencensus.common import private_dir
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import telemetry
+from opencensus.trace.exporters.transports import background_thread
+from opencensus.trace.exporters.transports import base
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = os.path.join(
+    private_dir.get_default_private_dir('opencensus'), 'spans.sock')
+
+_DEFAULT_SEND_TIMEOUT = 0.1  # Seconds
+_POLL_INTERVAL = 0.1  # Seconds, how quickly stop() takes effect
+_AGGREGATOR_THREAD_NAME = 'opencensus.trace.SpanAggregator'
+
+# Each batch is sent as a 4 byte big endian length followed by a UTF-8
+# JSON list of SpanData tuples, as formatted by
+# span_data.format_span_data_json.
+_HEADER = struct.Struct('!I')
+_MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+
+def encode_span_datas(span_datas):
+    """Encode a list of SpanData tuples into a length prefixed frame.
+
+    :type span_datas: list of :class:`~opencensus.trace.span_data.SpanData`
+    :param span_datas: SpanData tuples to encode.
+
+    :rtype: bytes
+    :returns: The encoded frame.
+    """
+    payload = json.dumps(
+        [span_data_module.format_span_data_json(span_data)
+         for span_data in span_datas],
+        separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(len(payload)) + payload
+
+
+def decode_span_datas(payload):
+    """Decode the payload of a frame into a list of SpanData tuples.
+
+    :type payload: bytes
+    :param payload: The frame without its length prefix.
+
+    :rtype: list of :class:`~opencensus.trace.span_data.SpanData`
+    :returns: The decoded SpanData tuples.
+    """
+    return [
+        span_data_module.parse_span_data_json(span_data_json)
+        for span_data_json in json.loads(payload.decode('utf-8'))]
+
+
+class UnixSocketTransport(base.Transport):
+    """Transport sending spans to a :class:`SpanAggregator` listening on a
+    Unix domain socket.
+
+    Each process opens its own connection, also after a fork. If the
+    aggregator is not reachable, or does not read fast enough, the spans
+    are dropped and counted in ``dropped_spans``, and the connection is
+    retried on the next export.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter owning this transport. It does not emit
+                     anything itself, the aggregator runs its own exporter.
+
+    :type path: str
+    :param path: (Optional) The path of the aggregator socket, in a
+                 directory only accessible by the current user. Defaults to
+                 :data:`DEFAULT_SOCKET_PATH`.
+
+    :type timeout: float
+    :param timeout: (Optional) The maximum number of seconds to block while
+                    connecting or sending a batch.
+    """
+
+    def __init__(self, exporter, path=None, timeout=_DEFAULT_SEND_TIMEOUT):
+        self.exporter = exporter
+        self.path = path or DEFAULT_SOCKET_PATH
+        self.timeout = timeout
+        self.dropped_spans = 0
+        self._reset()
+
+    def _reset(self):
+        """Forget the connection and lock, which may have been inherited
+        from the parent process.
+        """
+        self._fork_marker = fork.get_fork_marker()
+        self._lock = threading.Lock()
+        self._socket = None
+        self._warned = False
+
+    def _connect(self):
+        if self._socket is None:
+            # Do not send spans to a socket another user could have created.
+            private_dir.check_private_dir(os.path.dirname(self.path))
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except Exception:
+                sock.close()
+                raise
+            self._socket = sock
+            self._warned = False
+        return self._socket
+
+    def _close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def export(self, span_datas):
+        """Send the SpanData tuples to the aggregator."""
+        if self._fork_marker != fork.get_fork_marker():
+            self._reset()
+
+        try:
+            frame = encode_span_datas(span_datas)
+        except Exception:
+            log.exception('Failed to encode spans for the aggregator.')
+            with self._lock:
+                self._drop(span_datas)
+            return
+
+        with self._lock:
+            try:
+                self._connect().sendall(frame)
+            except (socket.error, OSError, ValueError) as e:
+                # A partial write leaves the stream unusable, start over
+                # with a new connection next time.
+                self._close()
+                self._drop(span_datas)
+                if not self._warned:
+                    self._warned = True
+                    log.warning(
+                        'Failed to send spans to the aggregator at %s: %s',
+                        self.path, e)
+
+    def _drop(self, span_datas):
+        self.dropped_spans += len(span_datas)
+        telemetry.record_dropped(self.exporter, len(span_datas))
+
+    def close(self):
+        """Close the connection to the aggregator."""
+        with self._lock:
+            self._close()
+
+
+class _SpanStreamHandler(socketserver.StreamRequestHandler):
+    """Reads the frames sent by one worker process."""
+
+    def setup(self):
+        socketserver.StreamRequestHandler.setup(self)
+        with self.server.connections_lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self):
+        with self.server.connections_lock:
+            self.server.connections.discard(self.connection)
+        socketserver.StreamRequestHandler.finish(self)
+
+    def handle(self):
+        transport = self.server.aggregator.transport
+
+        while True:
+            header = self.rfile.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+
+            length, = _HEADER.unpack(header)
+            if length > _MAX_FRAME_SIZE:
+                log.warning('Span batch of %d bytes is too large.', length)
+                return
+
+            payload = self.rfile.read(length)
+            if len(payload) < length:
+                return
+
+            try:
+                span_datas = decode_span_datas(payload)
+            except Exception:
+                log.exception('Failed to decode span batch.')
+                return
+
+            transport.export(span_datas)
+
+
+class _UnixStreamServer(socketserver.ThreadingMixIn,
+                        socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, handler_class):
+        socketserver.UnixStreamServer.__init__(self, path, handler_class)
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+    def close_connections(self):
+        """Close the connections of the worker processes, so that they
+        reconnect to the next aggregator.
+        """
+        with self.connections_lock:
+            connections = list(self.connections)
+
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except (socket.error, OSError):  # pragma: NO COVER
+                pass
+
+
+class SpanAggregator(object):
+    """Receives spans from :class:`UnixSocketTransport` in other processes
+    and exports them with one exporter.
+
+    :type exporter: :class:`~opencensus.trace.exporters.base.Exporter`
+    :param exporter: The exporter whose ``emit`` method is called with the
+                     batched spans.
+
+    :type path: str
+    :param path: (Optional) The path of the socket to listen on. Its
+                 directory is created only accessible by the current user
+                 if missing, and must be otherwise. Defaults to
+                 :data:`DEFAULT_SOCKET_PATH`.
+
+    :type transport: :class:`type`
+    :param transport: Class for creating the transport that batches the
+                      received spans and calls the exporter. Defaults to
+                      :class:`.BackgroundThreadTransport`.
+    """
+
+    def __init__(self, exporter, path=None,
+                 transport=background_thread.BackgroundThreadTransport):
+        self.exporter = exporter
+        self.path = path or DEFAULT_SOCKET_PATH
+        self.transport = transport(exporter)
+        self._server = None
+        self._thread = None
+
+    def _remove_stale_socket(self):
+        """Remove the socket file left by a previous aggregator, refusing to
+        take over the socket of one that is still running.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except (socket.error, OSError) as e:
+            if e.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+                raise
+        else:
+            raise ValueError(
+                'An aggregator is already listening on {}'.format(self.path))
+        finally:
+            sock.close()
+
+        try:
+            os.unlink(self.path)
+        except OSError as e:  # pragma: NO COVER
+            if e.errno != errno.ENOENT:
+                raise
+
+    def _create_server(self):
+        # Other users can neither connect to the socket nor replace it.
+        private_dir.ensure_private_dir(os.path.dirname(self.path))
+        self._remove_stale_socket()
+        server = _UnixStreamServer(self.path, _SpanStreamHandler)
+        server.aggregator = self
+        return server
+
+    def start(self):
+        """Listen on the socket in a background thread."""
+        if self._server is not None:
+            return
+
+        self._server = self._create_server()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(_POLL_INTERVAL,),
+            name=_AGGREGATOR_THREAD_NAME)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def serve_forever(self):
+        """Listen on the socket in the current thread, for a dedicated
+        aggregator process.
+        """
+        self._server = self._create_server()
+        try:
+            self._server.serve_forever(_POLL_INTERVAL)
+        finally:
+            self._close()
+
+    def stop(self):
+        """Stop listening and submit the pending spans."""
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+
+        # Without a background thread, serve_forever cleans up on return.
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._close()
+
+    def _close(self):
+        self._server.server_close()
+        self._server.close_connections()
+        self._server = None
+
+        try:
+            os.unlink(self.path)
+        except OSError as e:  # pragma: NO COVER
+            if e.errno != errno.ENOENT:
+                raise
+
+        self.transport.flush()
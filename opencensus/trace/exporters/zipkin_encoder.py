@@ -0,0 +1,294 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Encode SpanData tuples to the Zipkin v2 wire formats.
+
+The encoders write the request body straight from the SpanData tuples,
+without building a dictionary per span first. :class:`JsonEncoder` writes
+the JSON list of spans, :class:`ProtobufEncoder` the ``ListOfSpans`` message
+of ``zipkin.proto3``, without depending on the protobuf package.
+
+See: https://github.com/openzipkin/zipkin-api
+"""
+
+import binascii
+import json
+import logging
+import socket
+import struct
+from json import encoder as json_encoder
+
+import six
+
+from opencensus.trace import utils
+
+log = logging.getLogger(__name__)
+
+# Quotes and escapes a string for JSON, in C when available.
+_quote = json_encoder.encode_basestring_ascii
+
+# OpenCensus span kinds to the names of the JSON API and the values of the
+# Span.Kind enum of the proto.
+_JSON_SPAN_KINDS = {1: 'SERVER', 2: 'CLIENT'}
+_PROTO_SPAN_KINDS = {1: 2, 2: 1}
+
+
+def _truncate(value):
+    """Same as ``utils.check_str_length(value)[0]``, without decoding the
+    strings that fit, which is nearly all of them.
+    """
+    if len(value.encode(utils.UTF8)) <= utils.MAX_LENGTH:
+        return value
+    return utils.check_str_length(value)[0]
+
+
+def _iter_tags(attributes):
+    """Generate the (key, value) string pairs of Zipkin tags from span
+    attributes, skipping the values Zipkin cannot represent.
+    """
+    if not attributes:
+        return
+    for key, value in attributes.items():
+        if isinstance(value, (int, bool)):
+            value = str(value)
+        elif isinstance(value, six.string_types):
+            value = _truncate(value)
+        else:
+            log.warning('Could not serialize tag %s', key)
+            continue
+        yield _truncate(key), value
+
+
+def _get_trace_id(span_data):
+    context = span_data.context
+    return context.trace_id if context is not None else None
+
+
+class JsonEncoder(object):
+    """Encodes spans as the JSON list of the Zipkin v2 API.
+
+    :type local_endpoint: dict
+    :param local_endpoint: The ``localEndpoint`` of every span.
+    """
+
+    content_type = 'application/json'
+
+    def __init__(self, local_endpoint):
+        # The same for every span, encoded once.
+        self._local_endpoint = ','.join(
+            '{}:{}'.format(_quote(key), json.dumps(value))
+            for key, value in local_endpoint.items())
+
+    def encode_span(self, span_data):
+        """Encode one span as a JSON object.
+
+        :rtype: str
+        """
+        trace_id = _get_trace_id(span_data)
+        start_time_ns = span_data.start_time_ns
+        parts = [
+            '{"traceId":',
+            _quote(trace_id) if trace_id is not None else 'null',
+            ',"id":', _quote(str(span_data.span_id)),
+            ',"name":', _quote(_truncate(span_data.name)),
+            ',"timestamp":',
+            str(start_time_ns // utils.NANOS_PER_MICROSECOND),
+            ',"duration":',
+            str((span_data.end_time_ns - start_time_ns) //
+                utils.NANOS_PER_MICROSECOND),
+            ',"localEndpoint":{', self._local_endpoint,
+            '},"tags":{',
+            ','.join(_quote(key) + ':' + _quote(value)
+                     for key, value in _iter_tags(span_data.attributes)),
+            '}',
+        ]
+
+        kind = _JSON_SPAN_KINDS.get(span_data.span_kind)
+        if kind is not None:
+            parts.append(',"kind":"' + kind + '"')
+
+        if span_data.parent_span_id is not None:
+            parts.append(',"parentId":')
+            parts.append(_quote(str(span_data.parent_span_id)))
+
+        parts.append('}')
+        return ''.join(parts)
+
+    def encode(self, span_datas):
+        """Encode spans as the body of a request to the Zipkin v2 API.
+
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param list of opencensus.trace.span_data.SpanData span_datas:
+            SpanData tuples to encode
+
+        :rtype: bytes
+        """
+        return ('[' + ','.join(self.encode_span(span_data)
+                               for span_data in span_datas) +
+                ']').encode(utils.UTF8)
+
+
+def _varint(value):
+    """Encode a non-negative integer as a protobuf varint."""
+    if value < 0x80:
+        return _SMALL_VARINTS[value]
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _key(field_number, wire_type):
+    return _varint(field_number << 3 | wire_type)
+
+
+# Most lengths and keys fit in one byte.
+_SMALL_VARINTS = [bytes(bytearray([value])) for value in range(0x80)]
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+
+# Span fields.
+_TRACE_ID = _key(1, _LENGTH_DELIMITED)
+_PARENT_ID = _key(2, _LENGTH_DELIMITED)
+_ID = _key(3, _LENGTH_DELIMITED)
+_KIND = _key(4, _VARINT)
+_NAME = _key(5, _LENGTH_DELIMITED)
+_TIMESTAMP = _key(6, _FIXED64)
+_DURATION = _key(7, _VARINT)
+_LOCAL_ENDPOINT = _key(8, _LENGTH_DELIMITED)
+_TAGS = _key(11, _LENGTH_DELIMITED)
+
+# Endpoint fields.
+_SERVICE_NAME = _key(1, _LENGTH_DELIMITED)
+_IPV4 = _key(2, _LENGTH_DELIMITED)
+_IPV6 = _key(3, _LENGTH_DELIMITED)
+_PORT = _key(4, _VARINT)
+
+# ListOfSpans.spans, and the key and value of a map entry.
+_SPANS = _key(1, _LENGTH_DELIMITED)
+_MAP_KEY = _key(1, _LENGTH_DELIMITED)
+_MAP_VALUE = _key(2, _LENGTH_DELIMITED)
+
+_FIXED64_STRUCT = struct.Struct('<Q')
+
+# Trace and span IDs have a fixed length: 16 and 8 bytes.
+_TRACE_ID_PREFIX = _TRACE_ID + _varint(16)
+_PARENT_ID_PREFIX = _PARENT_ID + _varint(8)
+_ID_PREFIX = _ID + _varint(8)
+
+
+def _length_delimited(key, data):
+    return key + _varint(len(data)) + data
+
+
+def _string(key, value):
+    return _length_delimited(key, value.encode(utils.UTF8))
+
+
+class ProtobufEncoder(object):
+    """Encodes spans as the ``ListOfSpans`` protobuf message of the Zipkin
+    v2 API. Fields with their default value are left out, as protobuf
+    encoders do.
+
+    :type local_endpoint: dict
+    :param local_endpoint: The ``localEndpoint`` of every span, with the
+                           keys of the JSON API.
+    """
+
+    content_type = 'application/x-protobuf'
+
+    def __init__(self, local_endpoint):
+        endpoint = b''
+        if local_endpoint.get('serviceName'):
+            endpoint += _string(_SERVICE_NAME, local_endpoint['serviceName'])
+        if local_endpoint.get('ipv4'):
+            endpoint += _length_delimited(
+                _IPV4, socket.inet_aton(local_endpoint['ipv4']))
+        if local_endpoint.get('ipv6'):
+            endpoint += _length_delimited(_IPV6, socket.inet_pton(
+                socket.AF_INET6, local_endpoint['ipv6']))
+        if local_endpoint.get('port'):
+            endpoint += _PORT + _varint(local_endpoint['port'])
+        # The same for every span, encoded once.
+        self._local_endpoint = _length_delimited(_LOCAL_ENDPOINT, endpoint)
+
+    def encode_span(self, span_data):
+        """Encode one span as a ``Span`` message.
+
+        :rtype: bytes
+        """
+        parts = []
+        append = parts.append
+
+        trace_id = _get_trace_id(span_data)
+        if trace_id:
+            append(_TRACE_ID_PREFIX)
+            append(binascii.unhexlify(trace_id))
+
+        if span_data.parent_span_id is not None:
+            append(_PARENT_ID_PREFIX)
+            append(binascii.unhexlify(span_data.parent_span_id))
+
+        append(_ID_PREFIX)
+        append(binascii.unhexlify(span_data.span_id))
+
+        kind = _PROTO_SPAN_KINDS.get(span_data.span_kind)
+        if kind is not None:
+            append(_KIND)
+            append(_varint(kind))
+
+        name = _truncate(span_data.name)
+        if name:
+            append(_string(_NAME, name))
+
+        start_time_ns = span_data.start_time_ns
+        timestamp = start_time_ns // utils.NANOS_PER_MICROSECOND
+        if timestamp:
+            append(_TIMESTAMP)
+            append(_FIXED64_STRUCT.pack(timestamp))
+
+        duration = (span_data.end_time_ns - start_time_ns) // \
+            utils.NANOS_PER_MICROSECOND
+        # The duration is unsigned, a span ending before it started is
+        # sent without one, the same as a span of zero duration.
+        if duration > 0:
+            append(_DURATION)
+            append(_varint(duration))
+
+        append(self._local_endpoint)
+
+        for key, value in _iter_tags(span_data.attributes):
+            append(_length_delimited(
+                _TAGS, _string(_MAP_KEY, key) + _string(_MAP_VALUE, value)))
+
+        return b''.join(parts)
+
+    def encode(self, span_datas):
+        """Encode spans as the body of a request to the Zipkin v2 API.
+
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param list of opencensus.trace.span_data.SpanData span_datas:
+            SpanData tuples to encode
+
+        :rtype: bytes
+        """
+        return b''.join(
+            _length_delimited(_SPANS, self.encode_span(span_data))
+            for span_data in span_datas)
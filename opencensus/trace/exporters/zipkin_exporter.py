@@ -14,15 +14,16 @@
 
 """Export the spans data to Zipkin Collector."""
 
-import calendar
-import datetime
-import json
 import logging
 
 import requests
+from requests import adapters
+import six
 
-from opencensus.trace import span_data
+from opencensus.common import fork
+from opencensus.trace import utils
 from opencensus.trace.exporters import base
+from opencensus.trace.exporters import zipkin_encoder
 from opencensus.trace.exporters.transports import sync
 
 DEFAULT_ENDPOINT = '/api/v2/spans'
@@ -30,7 +31,17 @@ DEFAULT_HOST_NAME = 'localhost'
 DEFAULT_PORT = 9411
 ZIPKIN_HEADERS = {'Content-Type': 'application/json'}
 
-ISO_DATETIME_REGEX = '%Y-%m-%dT%H:%M:%S.%fZ'
+ENCODING_JSON = 'json'
+ENCODING_PROTO = 'proto'
+
+_ENCODERS = {
+    ENCODING_JSON: zipkin_encoder.JsonEncoder,
+    ENCODING_PROTO: zipkin_encoder.ProtobufEncoder,
+}
+
+DEFAULT_POOL_SIZE = 10
+# Seconds to connect, and to wait for the response.
+DEFAULT_TIMEOUT = (5.0, 10.0)
 
 SPAN_KIND_MAP = {
     0: None,  # span kind unspecified
@@ -59,12 +70,33 @@ class ZipkinExporter(base.Exporter):
     :type end_point: str
     :param end_point: (Optional) The path for the span exporting endpoint.
 
+    :type pool_size: int
+    :param pool_size: (Optional) The maximum number of keep-alive
+                      connections to the Zipkin server. Set it to the number
+                      of threads calling :meth:`emit` concurrently.
+
+    :type timeout: float or tuple
+    :param timeout: (Optional) The number of seconds to wait for the
+                    connection and for the response, as accepted by
+                    ``requests``: a single number, or a (connect, read)
+                    tuple.
+
+    :type gzip: bool
+    :param gzip: (Optional) Compress the request bodies with gzip. The
+                 Zipkin server must accept ``Content-Encoding: gzip``.
+
+    :type encoding: str
+    :param encoding: (Optional) The format of the request bodies,
+                     :data:`ENCODING_JSON` or :data:`ENCODING_PROTO` for the
+                     ``ListOfSpans`` protobuf message.
+
     :type transport: :class:`type`
     :param transport: Class for creating new transport objects. It should
                       extend from the base :class:`.Transport` type and
                       implement :meth:`.Transport.export`. Defaults to
-                      :class:`.SyncTransport`. The other option is
-                      :class:`.BackgroundThreadTransport`.
+                      :class:`.SyncTransport`. The other options are
+                      :class:`.BackgroundThreadTransport` and, in asyncio
+                      applications, :class:`.AsyncTransport`.
     """
 
     def __init__(
@@ -75,7 +107,11 @@ class ZipkinExporter(base.Exporter):
             endpoint=DEFAULT_ENDPOINT,
             transport=sync.SyncTransport,
             ipv4=None,
-            ipv6=None):
+            ipv6=None,
+            pool_size=DEFAULT_POOL_SIZE,
+            timeout=DEFAULT_TIMEOUT,
+            gzip=False,
+            encoding=ENCODING_JSON):
         self.service_name = service_name
         self.host_name = host_name
         self.port = port
@@ -84,6 +120,53 @@ class ZipkinExporter(base.Exporter):
         self.transport = transport(self)
         self.ipv4 = ipv4
         self.ipv6 = ipv6
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.gzip = gzip
+        self.encoding = encoding
+        self.encoder = _ENCODERS[encoding](self._get_local_endpoint())
+        self._session = None
+        self._session_fork_marker = None
+
+    @property
+    def session(self):
+        """The :class:`requests.Session` keeping the connections to the
+        Zipkin server alive between batches. A forked child process gets a
+        new one, rather than sharing the sockets of its parent.
+        """
+        fork_marker = fork.get_fork_marker()
+        if self._session is None or self._session_fork_marker != fork_marker:
+            session = requests.Session()
+            adapter = adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+            self._session_fork_marker = fork_marker
+        return self._session
+
+    def _get_local_endpoint(self):
+        local_endpoint = {
+            'serviceName': self.service_name,
+            'port': self.port,
+        }
+
+        if self.ipv4 is not None:
+            local_endpoint['ipv4'] = self.ipv4
+
+        if self.ipv6 is not None:
+            local_endpoint['ipv6'] = self.ipv6
+
+        return local_endpoint
+
+    def _encode(self, span_datas):
+        """Encode SpanData tuples to a request body and its headers."""
+        body = self.encoder.encode(span_datas)
+        headers = {'Content-Type': self.encoder.content_type}
+        if self.gzip:
+            body = utils.gzip_compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        return body, headers
 
     @property
     def get_url(self):
@@ -99,86 +182,98 @@ class ZipkinExporter(base.Exporter):
             `~opencensus.trace.span_data.SpanData`
         :param list of opencensus.trace.span_data.SpanData span_datas:
             SpanData tuples to emit
-        """
-        # convert to the legacy trace json for easier refactoring
-        # TODO: refactor this to use the span data directly
-        trace = span_data.format_legacy_trace_json(span_datas)
-
-        trace_id = trace.get('traceId')
-        spans = trace.get('spans')
 
+        :rtype: bool
+        :returns: True if the Zipkin server accepted the spans.
+        """
         try:
-            zipkin_spans = self.translate_to_zipkin(trace_id, spans)
-            result = requests.post(
+            body, headers = self._encode(span_datas)
+            result = self.session.post(
                 url=self.url,
-                data=json.dumps(zipkin_spans),
-                headers=ZIPKIN_HEADERS)
+                data=body,
+                headers=headers,
+                timeout=self.timeout)
 
             if result.status_code not in SUCCESS_STATUS_CODE:
                 logging.error(
-                    "Failed to send spans to Zipkin server! Spans are {}"
-                    .format(zipkin_spans))
+                    "Failed to send {} spans to Zipkin server! HTTP status "
+                    "code: {}".format(len(span_datas), result.status_code))
+                return False
         except Exception as e:  # pragma: NO COVER
             logging.error(getattr(e, 'message', e))
+            return False
+
+        return True
+
+    def emit_async(self, span_datas):
+        """Send SpanData tuples to Zipkin server on the running asyncio
+        event loop, for :class:`.AsyncTransport`. Requires Python 3.5.
+
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param list of opencensus.trace.span_data.SpanData span_datas:
+            SpanData tuples to emit
+
+        :rtype: coroutine
+        :returns: Coroutine sending the spans, resolving to False if they
+                  could not be sent.
+        """
+        from opencensus.trace.exporters.transports import async_transport
+
+        body, headers = self._encode(span_datas)
+        return async_transport.post(
+            self.url,
+            body,
+            headers=headers,
+            success_status_codes=SUCCESS_STATUS_CODE)
 
     def export(self, span_datas):
         self.transport.export(span_datas)
 
-    def translate_to_zipkin(self, trace_id, spans):
+    def translate_to_zipkin(self, span_datas):
         """Translate the opencensus spans to zipkin spans.
 
-        :type trace_id: str
-        :param trace_id: Trace ID.
+        :meth:`emit` encodes the spans directly with :attr:`encoder`
+        instead, this returns the same spans as dictionaries.
 
-        :type spans: list
-        :param spans: List of spans to be exported.
+        :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+        :param span_datas:
+            SpanData tuples to emit
 
         :rtype: list
         :returns: List of zipkin format spans.
         """
-        local_endpoint = {
-            'serviceName': self.service_name,
-            'port': self.port,
-        }
-
-        if self.ipv4 is not None:
-            local_endpoint['ipv4'] = self.ipv4
+        if not span_datas:
+            return []
 
-        if self.ipv6 is not None:
-            local_endpoint['ipv6'] = self.ipv6
+        local_endpoint = self._get_local_endpoint()
 
         zipkin_spans = []
 
-        for span in spans:
+        for span in span_datas:
+            # The spans may come from several traces.
+            trace_id = span.context.trace_id if span.context is not None \
+                else None
+
             # Timestamp in zipkin spans is int of microseconds.
-            start_datetime = datetime.datetime.strptime(
-                span.get('startTime'),
-                ISO_DATETIME_REGEX)
-            start_timestamp_ms = calendar.timegm(
-                start_datetime.timetuple()) * 1000 * 1000 \
-                + start_datetime.microsecond
-
-            end_datetime = datetime.datetime.strptime(
-                span.get('endTime'),
-                ISO_DATETIME_REGEX)
-            end_timestamp_ms = calendar.timegm(
-                end_datetime.timetuple()) * 1000 * 1000 \
-                + end_datetime.microsecond
-
-            duration_ms = end_timestamp_ms - start_timestamp_ms
+            start_timestamp_us = span.start_time_ns \
+                // utils.NANOS_PER_MICROSECOND
+            duration_us = (span.end_time_ns - span.start_time_ns) \
+                // utils.NANOS_PER_MICROSECOND
 
             zipkin_span = {
                 'traceId': trace_id,
-                'id': str(span.get('spanId')),
-                'name': span.get('displayName', {}).get('value'),
-                'timestamp': int(round(start_timestamp_ms)),
-                'duration': int(round(duration_ms)),
+                'id': str(span.span_id),
+                'name': utils.check_str_length(span.name)[0],
+                'timestamp': start_timestamp_us,
+                'duration': duration_us,
                 'localEndpoint': local_endpoint,
-                'tags': _extract_tags_from_span(span),
+                'tags': _extract_tags_from_span(span.attributes),
             }
 
-            span_kind = span.get('kind')
-            parent_span_id = span.get('parentSpanId')
+            span_kind = span.span_kind
+            parent_span_id = span.parent_span_id
 
             if span_kind is not None:
                 kind = SPAN_KIND_MAP.get(span_kind)
@@ -195,20 +290,17 @@ class ZipkinExporter(base.Exporter):
         return zipkin_spans
 
 
-def _extract_tags_from_span(span):
+def _extract_tags_from_span(attr):
+    if attr is None:
+        return {}
     tags = {}
-    for attribute_key, attribute_value in span.get(
-            'attributes', {}).get('attributeMap', {}).items():
-        if not isinstance(attribute_value, dict):
-            continue
-        if attribute_value.get('string_value') is not None:
-            value = attribute_value.get('string_value').get('value')
-        elif attribute_value.get('int_value') is not None:
-            value = str(attribute_value.get('int_value'))
-        elif attribute_value.get('bool_value') is not None:
-            value = str(attribute_value.get('bool_value'))
+    for attribute_key, attribute_value in attr.items():
+        if isinstance(attribute_value, (int, bool)):
+            value = str(attribute_value)
+        elif isinstance(attribute_value, six.string_types):
+            value = utils.check_str_length(attribute_value)[0]
         else:
             logging.warn('Could not serialize tag {}'.format(attribute_key))
             continue
-        tags[attribute_key] = value
+        tags[utils.check_str_length(attribute_key)[0]] = value
     return tags
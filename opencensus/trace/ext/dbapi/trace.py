@@ -53,6 +53,9 @@ def wrap_cursor(cursor_func):
 def trace_cursor_query(query_func):
     def call(query, *args, **kwargs):
         _tracer = execution_context.get_opencensus_tracer()
+        if not _tracer.is_recording:
+            return query_func(query, *args, **kwargs)
+
         _span = _tracer.start_span()
         _span.name = 'mysql.query'
         _tracer.add_attribute_to_current_span('mysql/query', query)
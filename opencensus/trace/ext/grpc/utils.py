@@ -1,6 +1,5 @@
-from datetime import datetime
-
 from opencensus.trace import time_event
+from opencensus.trace import utils
 from opencensus.trace import execution_context
 
 
@@ -10,7 +9,7 @@ def add_message_event(proto_message, span, message_event_type, message_id=1):
     """
     span.add_time_event(
         time_event=time_event.TimeEvent(
-            datetime.utcnow(),
+            utils.time_ns(),
             message_event=time_event.MessageEvent(
                 message_id,
                 type=message_event_type,
@@ -59,6 +59,10 @@ def wrap_httplib_request(request_func):
     """
     def call(self, method, url, body, headers, *args, **kwargs):
         _tracer = execution_context.get_opencensus_tracer()
+        if not _tracer.is_recording:
+            return request_func(
+                self, method, url, body, headers, *args, **kwargs)
+
         _span = _tracer.start_span()
         _span.name = '[httplib]{}'.format(request_func.__name__)
 
@@ -90,6 +94,9 @@ def wrap_httplib_response(response_func):
     """
     def call(self, *args, **kwargs):
         _tracer = execution_context.get_opencensus_tracer()
+        if not _tracer.is_recording:
+            return response_func(self, *args, **kwargs)
+
         current_span_id = execution_context.get_opencensus_attr(
             'httplib/current_span_id')
 
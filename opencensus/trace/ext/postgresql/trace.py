@@ -29,6 +29,10 @@ CONN_WRAP_METHOD = 'connect'
 CURSOR_WRAP_METHOD = 'cursor'
 QUERY_WRAP_METHODS = ['execute', 'executemany']
 
+SPAN_NAME = '{}.query'.format(MODULE_NAME)
+QUERY_ATTR = '{}/query'.format(MODULE_NAME)
+CURSOR_METHOD_ATTR = '{}/cursor/method/name'.format(MODULE_NAME)
+
 
 def trace_integration(tracer=None):
     """Wrap the mysql connector to trace it."""
@@ -48,23 +52,19 @@ def connect(*args, **kwargs):
 def trace_cursor_query(query_func):
     def call(query, *args, **kwargs):
         _tracer = execution_context.get_opencensus_tracer()
-        if _tracer is not None:
-            # Note that although get_opencensus_tracer() returns a NoopTracer
-            # if no thread local has been set, set_opencensus_tracer() does NOT
-            # protect against setting None to the thread local - be defensive
-            # here
-            _span = _tracer.start_span()
-            _span.name = '{}.query'.format(MODULE_NAME)
-            _tracer.add_attribute_to_current_span(
-                '{}/query'.format(MODULE_NAME), query)
-            _tracer.add_attribute_to_current_span(
-                '{}/cursor/method/name'.format(MODULE_NAME),
-                query_func.__name__)
+        # Be defensive against a tracer explicitly set to None.
+        if _tracer is None or not _tracer.is_recording:
+            return query_func(query, *args, **kwargs)
+
+        _span = _tracer.start_span()
+        _span.name = SPAN_NAME
+        _tracer.add_attribute_to_current_span(QUERY_ATTR, query)
+        _tracer.add_attribute_to_current_span(
+            CURSOR_METHOD_ATTR, query_func.__name__)
 
         result = query_func(query, *args, **kwargs)
 
-        if _tracer is not None:
-            _tracer.end_span()
+        _tracer.end_span()
         return result
 
     return call
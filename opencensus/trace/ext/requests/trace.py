@@ -48,6 +48,9 @@ def wrap_requests(requests_func):
     """Wrap the requests function to trace it."""
     def call(url, *args, **kwargs):
         _tracer = execution_context.get_opencensus_tracer()
+        if not _tracer.is_recording:
+            return requests_func(url, *args, **kwargs)
+
         _span = _tracer.start_span()
         _span.name = '[requests]{}'.format(requests_func.__name__)
 
@@ -68,9 +71,12 @@ def wrap_requests(requests_func):
 
 def wrap_session_request(wrapped, instance, args, kwargs):
     """Wrap the session function to trace it."""
+    _tracer = execution_context.get_opencensus_tracer()
+    if not _tracer.is_recording:
+        return wrapped(*args, **kwargs)
+
     method = kwargs.get('method') or args[0]
     url = kwargs.get('url') or args[1]
-    _tracer = execution_context.get_opencensus_tracer()
     _span = _tracer.start_span()
     _span.name = '[requests]{}'.format(method)
 
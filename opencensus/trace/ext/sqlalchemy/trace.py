@@ -24,6 +24,11 @@ log = logging.getLogger(__name__)
 
 MODULE_NAME = 'sqlalchemy'
 
+SPAN_NAME = '{}.query'.format(MODULE_NAME)
+QUERY_ATTR = '{}/query'.format(MODULE_NAME)
+QUERY_PARAMETERS_ATTR = '{}/query/parameters'.format(MODULE_NAME)
+CURSOR_METHOD_ATTR = '{}/cursor/method/name'.format(MODULE_NAME)
+
 
 def trace_integration(tracer=None):
     """Integrate with SQLAlchemy to trace it using event listener.
@@ -54,28 +59,28 @@ def _before_cursor_execute(conn, cursor, statement, parameters,
     See: http://docs.sqlalchemy.org/en/latest/core/events.html#sqlalchemy.
          events.ConnectionEvents.before_cursor_execute
     """
+    _tracer = execution_context.get_opencensus_tracer()
+    if not _tracer.is_recording:
+        return
+
     # Find out the func name
     if executemany:
         query_func = 'executemany'
     else:
         query_func = 'execute'
 
-    _tracer = execution_context.get_opencensus_tracer()
     _span = _tracer.start_span()
-    _span.name = '{}.query'.format(MODULE_NAME)
+    _span.name = SPAN_NAME
 
     # Set query statement attribute
-    _tracer.add_attribute_to_current_span(
-        '{}/query'.format(MODULE_NAME), statement)
+    _tracer.add_attribute_to_current_span(QUERY_ATTR, statement)
 
     # Set query parameters attribute
     _tracer.add_attribute_to_current_span(
-        '{}/query/parameters'.format(MODULE_NAME), str(parameters))
+        QUERY_PARAMETERS_ATTR, str(parameters))
 
     # Set query function attribute
-    _tracer.add_attribute_to_current_span(
-        '{}/cursor/method/name'.format(MODULE_NAME),
-        query_func)
+    _tracer.add_attribute_to_current_span(CURSOR_METHOD_ATTR, query_func)
 
 
 def _after_cursor_execute(conn, cursor, statement, parameters,
@@ -87,4 +92,5 @@ def _after_cursor_execute(conn, cursor, statement, parameters,
          events.ConnectionEvents.after_cursor_execute
     """
     _tracer = execution_context.get_opencensus_tracer()
-    _tracer.end_span()
+    if _tracer.is_recording:
+        _tracer.end_span()
@@ -0,0 +1,113 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Generate random trace and span IDs from pooled blocks of random bytes."""
+
+import binascii
+import os
+import threading
+
+from opencensus.common import fork
+
+# Number of random bytes drawn from the OS on each refill. 4096 bytes are
+# enough for 512 span IDs or 256 trace IDs.
+DEFAULT_BLOCK_SIZE = 4096
+
+SPAN_ID_LENGTH = 16
+TRACE_ID_LENGTH = 32
+
+_INVALID_SPAN_ID = '0' * SPAN_ID_LENGTH
+_INVALID_TRACE_ID = '0' * TRACE_ID_LENGTH
+
+# Buffers inherited from the parent process are discarded after os.fork,
+# instead of handing out the same IDs twice.
+_get_fork_marker = fork.get_fork_marker
+
+
+class RandomIdGenerator(object):
+    """Hands out random hex IDs from a per-thread buffer.
+
+    Random bytes are drawn from :func:`os.urandom` in blocks of
+    ``block_size`` bytes and hex encoded once per block, so generating an ID
+    is a string slice rather than a syscall. Each thread has its own buffer,
+    and the buffers are refilled in a forked child process.
+
+    :type block_size: int
+    :param block_size: (Optional) Number of random bytes drawn per refill.
+    """
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        self._local = threading.local()
+
+    def _refill(self):
+        local = self._local
+        local.buffer = str(
+            binascii.hexlify(os.urandom(self.block_size)).decode('ascii'))
+        local.offset = 0
+        local.fork_marker = _get_fork_marker()
+
+    def _take(self, length):
+        """Take ``length`` hex digits from the current thread's buffer."""
+        local = self._local
+        offset = getattr(local, 'offset', None)
+
+        if offset is None or \
+                offset + length > len(local.buffer) or \
+                local.fork_marker != _get_fork_marker():
+            self._refill()
+            offset = 0
+
+        local.offset = offset + length
+        return local.buffer[offset:offset + length]
+
+    def generate_span_id(self):
+        """Return a random 16 character hex span ID, never all zeros.
+
+        :rtype: str
+        :returns: 16 digit randomly generated hex span id.
+        """
+        span_id = self._take(SPAN_ID_LENGTH)
+        while span_id == _INVALID_SPAN_ID:
+            span_id = self._take(SPAN_ID_LENGTH)
+        return span_id
+
+    def generate_trace_id(self):
+        """Return a random 32 character hex trace ID, never all zeros.
+
+        :rtype: str
+        :returns: 32 digit randomly generated hex trace id.
+        """
+        trace_id = self._take(TRACE_ID_LENGTH)
+        while trace_id == _INVALID_TRACE_ID:
+            trace_id = self._take(TRACE_ID_LENGTH)
+        return trace_id
+
+
+_default_generator = RandomIdGenerator()
+
+
+def get_id_generator():
+    """Return the ID generator used for new spans and trace contexts."""
+    return _default_generator
+
+
+def set_id_generator(generator):
+    """Replace the ID generator used for new spans and trace contexts.
+
+    :type generator: :class:`~opencensus.trace.id_generator.RandomIdGenerator`
+    :param generator: An object implementing ``generate_span_id`` and
+                      ``generate_trace_id``.
+    """
+    global _default_generator
+    _default_generator = generator
@@ -12,16 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from datetime import datetime
+from collections import deque
 from itertools import chain
 
 from opencensus.trace import attributes
 from opencensus.trace import link as link_module
+from opencensus.trace import span_limits
 from opencensus.trace import stack_trace
 from opencensus.trace import status
 from opencensus.trace import time_event as time_event_module
 from opencensus.trace.span_context import generate_span_id
 from opencensus.trace.tracers import base
+from opencensus.trace import utils
 from opencensus.trace.utils import _get_truncatable_str
 
 
@@ -31,6 +33,131 @@ class SpanKind(object):
     CLIENT = 2
 
 
+def _raise_read_only(*args, **kwargs):
+    raise TypeError('Span data of a span without attributes is read-only.')
+
+
+class _EmptyDict(dict):
+    """Read-only empty dict, shared by the span data of all spans without
+    attributes.
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _raise_read_only
+    clear = pop = popitem = setdefault = update = _raise_read_only
+
+
+# Shared by the span data of spans that never used a collection, so that
+# exporting them does not allocate one.
+_EMPTY_ATTRIBUTES = _EmptyDict()
+_EMPTY_LIST = ()
+
+
+class _TimeEvents(object):
+    """The time events of a span.
+
+    The events are kept in a single deque in the order they were added, and
+    the annotations and message events are counted separately against the
+    limits of the :class:`~opencensus.trace.span_limits.SpanLimits`. Once a
+    limit is reached, the oldest event of the same kind is evicted, which
+    is cheap as the events are bounded by the limits.
+
+    :type time_events: list
+    :param time_events: (Optional) Time events to add.
+    """
+
+    __slots__ = (
+        'events',
+        'num_annotations',
+        'dropped_annotations_count',
+        'dropped_message_events_count',
+    )
+
+    def __init__(self, time_events=()):
+        self.events = deque()
+        self.num_annotations = 0
+        self.dropped_annotations_count = 0
+        self.dropped_message_events_count = 0
+        self.extend(time_events)
+
+    def _evict_oldest(self, is_annotation):
+        """Remove the oldest event of the kind."""
+        events = self.events
+        if (events[0].annotation is not None) == is_annotation:
+            events.popleft()
+            return
+        for index, time_event in enumerate(events):
+            if (time_event.annotation is not None) == is_annotation:
+                del events[index]
+                return
+
+    def append(self, time_event):
+        """Add a time event, counting it or the event it evicts as dropped
+        once the limit for its kind is reached.
+
+        :type time_event: :class: `~opencensus.trace.time_event.TimeEvent`
+        :param time_event: A TimeEvent object.
+        """
+        limits = span_limits.get_span_limits()
+        is_annotation = time_event.annotation is not None
+
+        if is_annotation:
+            if self.num_annotations < limits.max_annotations:
+                self.num_annotations += 1
+                self.events.append(time_event)
+                return
+            self.dropped_annotations_count += 1
+            limit = limits.max_annotations
+        else:
+            num_message_events = len(self.events) - self.num_annotations
+            if num_message_events < limits.max_message_events:
+                self.events.append(time_event)
+                return
+            self.dropped_message_events_count += 1
+            limit = limits.max_message_events
+
+        if limit and limits.keep_latest_time_events:
+            self._evict_oldest(is_annotation)
+            self.events.append(time_event)
+
+    def extend(self, time_events):
+        """Add each of the time events.
+
+        :type time_events: list
+        :param time_events: TimeEvent objects.
+        """
+        for time_event in time_events:
+            self.append(time_event)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self.events)[index]
+        return self.events[index]
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class Span(object):
     """A span is an individual timed event which forms a node of the trace
     tree. Each span has its name, span id and parent id. The parent id
@@ -54,11 +181,14 @@ class Span(object):
     :type start_time: str
     :param start_time: (Optional) Start of the time interval (inclusive)
                        during which the trace data was collected from the
-                       application.
+                       application, in ISO 8601 format. Internally the span
+                       keeps integer nanoseconds in ``start_time_ns``.
 
     :type end_time: str
     :param end_time: (Optional) End of the time interval (inclusive) during
-                     which the trace data was collected from the application.
+                     which the trace data was collected from the application,
+                     in ISO 8601 format. Internally the span keeps integer
+                     nanoseconds in ``end_time_ns``.
 
     :type span_id: int
     :param span_id: Identifier for the span, unique within a trace.
@@ -67,12 +197,14 @@ class Span(object):
     :param stack_trace: (Optional) A call stack appearing in a trace
 
     :type time_events: list
-    :param time_events: (Optional) A set of time events. You can have up to 32
-                        annotations and 128 message events per span.
+    :param time_events: (Optional) A set of time events. By default
+                        :meth:`add_time_event` keeps up to 32 annotations and
+                        128 message events per span, see
+                        :class:`~opencensus.trace.span_limits.SpanLimits`.
 
     :type links: list
-    :param links: (Optional) Links associated with the span. You can have up
-                  to 128 links per Span.
+    :param links: (Optional) Links associated with the span. By default
+                  :meth:`add_link` keeps up to 128 links per Span.
 
     :type status: :class: `~opencensus.trace.status.Status`
     :param status: (Optional) An optional final status for this span.
@@ -98,6 +230,28 @@ class Span(object):
                         `opencensus.trace.span.SpanKind`)
     """
 
+    # Long running jobs keep many spans alive at once, so spans use slots
+    # and only allocate their collections when they are first used.
+    __slots__ = (
+        'name',
+        'parent_span',
+        'start_time_ns',
+        'end_time_ns',
+        '_start_perf_ns',
+        '_attributes',
+        'span_id',
+        'stack_trace',
+        '_time_events',
+        '_links',
+        'status',
+        'same_process_as_parent_span',
+        '_child_spans',
+        'context_tracer',
+        'span_kind',
+        'dropped_attributes_count',
+        'dropped_links_count',
+    )
+
     def __init__(
             self,
             name,
@@ -115,40 +269,108 @@ class Span(object):
             span_kind=SpanKind.UNSPECIFIED):
         self.name = name
         self.parent_span = parent_span
-        self.start_time = start_time
-        self.end_time = end_time
+        self.start_time_ns = utils.iso_str_to_timestamp_ns(start_time)
+        self.end_time_ns = utils.iso_str_to_timestamp_ns(end_time)
+        # Monotonic clock reading taken in start(), used to derive an exact
+        # end_time_ns from the wall-clock anchor in finish().
+        self._start_perf_ns = None
 
         if span_id is None:
             span_id = generate_span_id()
 
-        if attributes is None:
-            attributes = {}
-
         # Do not manipulate spans directly using the methods in Span Class,
         # make sure to use the Tracer.
         if parent_span is None:
             parent_span = base.NullContextManager()
 
-        if time_events is None:
-            time_events = []
-
-        if links is None:
-            links = []
-
-        self.attributes = attributes
+        # Collections left as None are created when first accessed.
+        self._attributes = attributes
         self.span_id = span_id
         self.stack_trace = stack_trace
-        self.time_events = time_events
-        self.links = links
+        self._time_events = time_events
+        self._links = links
         self.status = status
         self.same_process_as_parent_span = same_process_as_parent_span
-        self._child_spans = []
+        self._child_spans = None
         self.context_tracer = context_tracer
         self.span_kind = span_kind
+        # Number of items not kept because of the span limits.
+        self.dropped_attributes_count = 0
+        self.dropped_links_count = 0
+
+    @property
+    def start_time(self):
+        """The start time of the span as an ISO 8601 string."""
+        return utils.timestamp_ns_to_iso_str(self.start_time_ns)
+
+    @start_time.setter
+    def start_time(self, value):
+        self.start_time_ns = utils.iso_str_to_timestamp_ns(value)
+        self._start_perf_ns = None
+
+    @property
+    def end_time(self):
+        """The end time of the span as an ISO 8601 string."""
+        return utils.timestamp_ns_to_iso_str(self.end_time_ns)
+
+    @end_time.setter
+    def end_time(self, value):
+        self.end_time_ns = utils.iso_str_to_timestamp_ns(value)
+
+    @property
+    def attributes(self):
+        """The attributes of the span."""
+        if self._attributes is None:
+            self._attributes = {}
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, value):
+        self._attributes = value
+
+    @property
+    def time_events(self):
+        """The time events of the span."""
+        if self._time_events is None:
+            self._time_events = _TimeEvents()
+        return self._time_events
+
+    @time_events.setter
+    def time_events(self, value):
+        self._time_events = value
+
+    @property
+    def dropped_annotations_count(self):
+        """The number of annotations not kept because of the span limits."""
+        if isinstance(self._time_events, _TimeEvents):
+            return self._time_events.dropped_annotations_count
+        return 0
+
+    @property
+    def dropped_message_events_count(self):
+        """The number of message events not kept because of the span
+        limits.
+        """
+        if isinstance(self._time_events, _TimeEvents):
+            return self._time_events.dropped_message_events_count
+        return 0
+
+    @property
+    def links(self):
+        """The links of the span."""
+        if self._links is None:
+            self._links = []
+        return self._links
+
+    @links.setter
+    def links(self, value):
+        self._links = value
 
     @property
     def children(self):
         """The child spans of the current span."""
+        if self._child_spans is None:
+            self._child_spans = []
         return self._child_spans
 
     def span(self, name='child_span'):
@@ -162,7 +384,7 @@ class Span(object):
         :returns: A child Span to be added to the current span.
         """
         child_span = Span(name, parent_span=self)
-        self._child_spans.append(child_span)
+        self.children.append(child_span)
         return child_span
 
     def add_attribute(self, attribute_key, attribute_value):
@@ -174,7 +396,13 @@ class Span(object):
         :type attribute_value:str
         :param attribute_value: Attribute value.
         """
-        self.attributes[attribute_key] = attribute_value
+        attributes = self.attributes
+        if (attribute_key not in attributes and
+                len(attributes) >=
+                span_limits.get_span_limits().max_attributes):
+            self.dropped_attributes_count += 1
+            return
+        attributes[attribute_key] = attribute_value
 
     def add_annotation(self, description, **attrs):
         """Add an annotation to span.
@@ -187,21 +415,32 @@ class Span(object):
         :param attrs: keyworded arguments e.g. failed=True, name='Caching'
         """
         at = attributes.Attributes(attrs)
-        self.add_time_event(time_event_module.TimeEvent(datetime.utcnow(),
+        self.add_time_event(time_event_module.TimeEvent(utils.time_ns(),
                             time_event_module.Annotation(description, at)))
 
     def add_time_event(self, time_event):
         """Add a TimeEvent.
 
+        Once the span holds the maximum number of annotations or message
+        events, either the oldest event of the same kind is evicted or the
+        new one is dropped, depending on the
+        :class:`~opencensus.trace.span_limits.SpanLimits`. Either way the
+        dropped event is counted.
+
         :type time_event: :class: `~opencensus.trace.time_event.TimeEvent`
         :param time_event: A TimeEvent object.
         """
-        if isinstance(time_event, time_event_module.TimeEvent):
-            self.time_events.append(time_event)
-        else:
+        if not isinstance(time_event, time_event_module.TimeEvent):
             raise TypeError("Type Error: received {}, but requires TimeEvent.".
                             format(type(time_event).__name__))
 
+        time_events = self._time_events
+        if not isinstance(time_events, _TimeEvents):
+            # Time events passed to the constructor or assigned directly are
+            # only bounded once events are added.
+            time_events = self._time_events = _TimeEvents(time_events or ())
+        time_events.append(time_event)
+
     def add_link(self, link):
         """Add a Link.
 
@@ -209,22 +448,37 @@ class Span(object):
         :param link: A Link object.
         """
         if isinstance(link, link_module.Link):
-            self.links.append(link)
+            links = self.links
+            if len(links) >= span_limits.get_span_limits().max_links:
+                self.dropped_links_count += 1
+                return
+            links.append(link)
         else:
             raise TypeError("Type Error: received {}, but requires Link.".
                             format(type(link).__name__))
 
     def start(self):
-        """Set the start time for a span."""
-        self.start_time = datetime.utcnow().isoformat() + 'Z'
+        """Set the start time for a span.
+
+        Records a wall-clock anchor together with a monotonic clock reading,
+        so that the duration computed in :meth:`finish` is exact and not
+        affected by wall-clock adjustments.
+        """
+        self.start_time_ns = utils.time_ns()
+        self._start_perf_ns = utils.perf_counter_ns()
 
     def finish(self):
         """Set the end time for a span."""
-        self.end_time = datetime.utcnow().isoformat() + 'Z'
+        if self._start_perf_ns is None:
+            self.end_time_ns = utils.time_ns()
+            return
+
+        self.end_time_ns = self.start_time_ns + (
+            utils.perf_counter_ns() - self._start_perf_ns)
 
     def __iter__(self):
         """Iterate through the span tree."""
-        for span in chain(*(map(iter, self.children))):
+        for span in chain(*(map(iter, self._child_spans or ()))):
             yield span
         yield self
 
@@ -260,7 +514,7 @@ def format_span_json(span):
         'spanId': span.span_id,
         'startTime': span.start_time,
         'endTime': span.end_time,
-        'childSpanCount': len(span._child_spans)
+        'childSpanCount': len(span._child_spans or ())
     }
 
     parent_span_id = None
@@ -271,24 +525,37 @@ def format_span_json(span):
     if parent_span_id is not None:
         span_json['parentSpanId'] = parent_span_id
 
-    if span.attributes:
+    if span.attributes or span.dropped_attributes_count:
         span_json['attributes'] = attributes.Attributes(
             span.attributes).format_attributes_json()
+        if span.dropped_attributes_count:
+            span_json['attributes']['droppedAttributesCount'] = \
+                span.dropped_attributes_count
 
     if span.stack_trace is not None:
         span_json['stackTrace'] = span.stack_trace.format_stack_trace_json()
 
-    if span.time_events:
+    if (span.time_events or span.dropped_annotations_count or
+            span.dropped_message_events_count):
         span_json['timeEvents'] = {
             'timeEvent': [time_event.format_time_event_json()
                           for time_event in span.time_events]
         }
-
-    if span.links:
+        if span.dropped_annotations_count:
+            span_json['timeEvents']['droppedAnnotationsCount'] = \
+                span.dropped_annotations_count
+        if span.dropped_message_events_count:
+            span_json['timeEvents']['droppedMessageEventsCount'] = \
+                span.dropped_message_events_count
+
+    if span.links or span.dropped_links_count:
         span_json['links'] = {
             'link': [
                 link.format_link_json() for link in span.links]
         }
+        if span.dropped_links_count:
+            span_json['links']['droppedLinksCount'] = \
+                span.dropped_links_count
 
     if span.status is not None:
         span_json['status'] = span.status.format_status_json()
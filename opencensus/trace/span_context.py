@@ -16,8 +16,8 @@
 
 import logging
 import re
-import uuid
 
+from opencensus.trace import id_generator
 from opencensus.trace import trace_options
 
 _INVALID_TRACE_ID = '0' * 32
@@ -59,14 +59,18 @@ class SpanContext(object):
             span_id=None,
             trace_options=None,
             from_header=False):
-        if trace_id is None:
-            trace_id = generate_trace_id()
-
         if trace_options is None:
             trace_options = DEFAULT
 
         self.from_header = from_header
-        self.trace_id = self._check_trace_id(trace_id)
+
+        # Internally generated IDs are well formed by construction, only
+        # validate the IDs supplied by the caller.
+        if trace_id is None:
+            self.trace_id = generate_trace_id()
+        else:
+            self.trace_id = self._check_trace_id(trace_id)
+
         self.span_id = self._check_span_id(span_id)
         self.trace_options = trace_options
 
@@ -156,8 +160,7 @@ def generate_span_id():
     :rtype: str
     :returns: 16 digit randomly generated hex trace id.
     """
-    span_id = uuid.uuid4().hex[:16]
-    return span_id
+    return id_generator.get_id_generator().generate_span_id()
 
 
 def generate_trace_id():
@@ -167,5 +170,4 @@ def generate_trace_id():
     :rtype: str
     :returns: 32 digit randomly generated hex trace id.
     """
-    trace_id = uuid.uuid4().hex
-    return trace_id
+    return id_generator.get_id_generator().generate_trace_id()
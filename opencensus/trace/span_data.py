@@ -15,6 +15,12 @@
 import collections
 from opencensus.trace import utils
 from opencensus.trace import attributes
+from opencensus.trace import link as link_module
+from opencensus.trace import span_context as span_context_module
+from opencensus.trace import stack_trace as stack_trace_module
+from opencensus.trace import status as status_module
+from opencensus.trace import time_event as time_event_module
+from opencensus.trace import trace_options as trace_options_module
 
 _SpanData = collections.namedtuple(
     '_SpanData',
@@ -24,8 +30,8 @@ _SpanData = collections.namedtuple(
         'span_id',
         'parent_span_id',
         'attributes',
-        'start_time',
-        'end_time',
+        'start_time_ns',
+        'end_time_ns',
         'child_span_count',
         'stack_trace',
         'time_events',
@@ -33,8 +39,14 @@ _SpanData = collections.namedtuple(
         'status',
         'same_process_as_parent_span',
         'span_kind',
+        'dropped_attributes_count',
+        'dropped_annotations_count',
+        'dropped_message_events_count',
+        'dropped_links_count',
     ),
 )
+# The dropped counts default to zero.
+_SpanData.__new__.__defaults__ = (0, 0, 0, 0)
 
 
 class SpanData(_SpanData):
@@ -56,14 +68,19 @@ class SpanData(_SpanData):
     :type attributes: dict
     :param attributes: Collection of attributes associated with the span.
 
-    :type start_time: str
-    :param start_time: (Optional) Start of the time interval (inclusive)
-                       during which the trace data was collected from the
-                       application.
+    :type start_time_ns: int
+    :param start_time_ns: (Optional) Start of the time interval (inclusive)
+                          during which the trace data was collected from the
+                          application, in nanoseconds since the epoch. May
+                          also be given as an ISO 8601 string through the
+                          ``start_time`` keyword argument.
 
-    :type end_time: str
-    :param end_time: (Optional) End of the time interval (inclusive) during
-                     which the trace data was collected from the application.
+    :type end_time_ns: int
+    :param end_time_ns: (Optional) End of the time interval (inclusive)
+                        during which the trace data was collected from the
+                        application, in nanoseconds since the epoch. May also
+                        be given as an ISO 8601 string through the
+                        ``end_time`` keyword argument.
 
     :type child_span_count: int
     :param child_span_count: the number of child spans that were
@@ -73,12 +90,10 @@ class SpanData(_SpanData):
     :param stack_trace: (Optional) A call stack appearing in a trace
 
     :type time_events: list
-    :param time_events: (Optional) A set of time events. You can have up to 32
-                        annotations and 128 message events per span.
+    :param time_events: (Optional) A set of time events.
 
     :type links: list
-    :param links: (Optional) Links associated with the span. You can have up
-                  to 128 links per Span.
+    :param links: (Optional) Links associated with the span.
 
     :type status: :class: `~opencensus.trace.status.Status`
     :param status: (Optional) An optional final status for this span.
@@ -94,9 +109,44 @@ class SpanData(_SpanData):
                         of span (valid values defined by :class:
                         `opencensus.trace.span.SpanKind`)
 
+    :type dropped_attributes_count: int
+    :param dropped_attributes_count: (Optional) Number of attributes dropped
+                                     because of the span limits.
+
+    :type dropped_annotations_count: int
+    :param dropped_annotations_count: (Optional) Number of annotations
+                                      dropped because of the span limits.
+
+    :type dropped_message_events_count: int
+    :param dropped_message_events_count: (Optional) Number of message events
+                                         dropped because of the span limits.
+
+    :type dropped_links_count: int
+    :param dropped_links_count: (Optional) Number of links dropped because
+                                of the span limits.
+
     """
     __slots__ = ()
 
+    def __new__(cls, *args, **kwargs):
+        if 'start_time' in kwargs:
+            kwargs['start_time_ns'] = utils.iso_str_to_timestamp_ns(
+                kwargs.pop('start_time'))
+        if 'end_time' in kwargs:
+            kwargs['end_time_ns'] = utils.iso_str_to_timestamp_ns(
+                kwargs.pop('end_time'))
+        return super(SpanData, cls).__new__(cls, *args, **kwargs)
+
+    @property
+    def start_time(self):
+        """The start time as an ISO 8601 string, formatted on demand."""
+        return utils.timestamp_ns_to_iso_str(self.start_time_ns)
+
+    @property
+    def end_time(self):
+        """The end time as an ISO 8601 string, formatted on demand."""
+        return utils.timestamp_ns_to_iso_str(self.end_time_ns)
+
 
 def _format_legacy_span_json(span_data):
     """
@@ -116,25 +166,38 @@ def _format_legacy_span_json(span_data):
     if span_data.parent_span_id is not None:
         span_json['parentSpanId'] = span_data.parent_span_id
 
-    if span_data.attributes:
+    if span_data.attributes or span_data.dropped_attributes_count:
         span_json['attributes'] = attributes.Attributes(
-            span_data.attributes).format_attributes_json()
+            span_data.attributes or {}).format_attributes_json()
+        if span_data.dropped_attributes_count:
+            span_json['attributes']['droppedAttributesCount'] = \
+                span_data.dropped_attributes_count
 
     if span_data.stack_trace is not None:
         span_json['stackTrace'] = \
             span_data.stack_trace.format_stack_trace_json()
 
-    if span_data.time_events:
+    if (span_data.time_events or span_data.dropped_annotations_count or
+            span_data.dropped_message_events_count):
         span_json['timeEvents'] = {
             'timeEvent': [time_event.format_time_event_json()
-                          for time_event in span_data.time_events]
+                          for time_event in span_data.time_events or ()]
         }
+        if span_data.dropped_annotations_count:
+            span_json['timeEvents']['droppedAnnotationsCount'] = \
+                span_data.dropped_annotations_count
+        if span_data.dropped_message_events_count:
+            span_json['timeEvents']['droppedMessageEventsCount'] = \
+                span_data.dropped_message_events_count
 
-    if span_data.links:
+    if span_data.links or span_data.dropped_links_count:
         span_json['links'] = {
             'link': [
-                link.format_link_json() for link in span_data.links]
+                link.format_link_json() for link in span_data.links or ()]
         }
+        if span_data.dropped_links_count:
+            span_json['links']['droppedLinksCount'] = \
+                span_data.dropped_links_count
 
     if span_data.status is not None:
         span_json['status'] = span_data.status.format_status_json()
@@ -146,9 +209,63 @@ def _format_legacy_span_json(span_data):
     return span_json
 
 
+def _get_trace_id(span_data):
+    return span_data.context.trace_id if span_data.context is not None \
+        else None
+
+
+def group_by_trace(span_datas):
+    """Groups SpanData tuples by trace ID in a single pass, keeping the
+    order of the traces and of the spans within each trace.
+
+    :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+    :param list of opencensus.trace.span_data.SpanData span_datas:
+        SpanData tuples, possibly from several traces
+
+    :rtype: :class:`collections.OrderedDict`
+    :return: Map of trace ID to the list of SpanData tuples of the trace
+    """
+    traces = collections.OrderedDict()
+    for span_data in span_datas:
+        trace_id = _get_trace_id(span_data)
+        spans = traces.get(trace_id)
+        if spans is None:
+            spans = traces[trace_id] = []
+        spans.append(span_data)
+    return traces
+
+
+def format_legacy_trace_jsons(span_datas):
+    """Formats a list of SpanData tuples from any number of traces into a
+    list of legacy 'trace' dictionaries, one per trace
+
+    :type span_datas: list of :class:
+            `~opencensus.trace.span_data.SpanData`
+    :param list of opencensus.trace.span_data.SpanData span_datas:
+        SpanData tuples to emit
+    :rtype: list
+    :return: Legacy 'trace' dictionaries, in the order the traces first
+             appear in span_datas
+    """
+    trace_jsons = []
+    for trace_id, trace_span_datas in group_by_trace(span_datas).items():
+        assert trace_id is not None
+        trace_jsons.append({
+            'traceId': trace_id,
+            'spans': [_format_legacy_span_json(sd)
+                      for sd in trace_span_datas],
+        })
+    return trace_jsons
+
+
 def format_legacy_trace_json(span_datas):
     """Formats a list of SpanData tuples into the legacy 'trace' dictionary
     format for backwards compatibility
+
+    All the spans are put under the trace ID of the first one. Use
+    :func:`format_legacy_trace_jsons` for spans of several traces.
+
     :type span_datas: list of :class:
             `~opencensus.trace.span_data.SpanData`
     :param list of opencensus.trace.span_data.SpanData span_datas:
@@ -167,3 +284,169 @@ def format_legacy_trace_json(span_datas):
         'traceId': trace_id,
         'spans': [_format_legacy_span_json(sd) for sd in span_datas],
     }
+
+
+def _get_attributes_dict(attrs):
+    if isinstance(attrs, attributes.Attributes):
+        return attrs.attributes
+    return attrs
+
+
+def format_span_data_json(span_data):
+    """Converts a SpanData tuple to a dictionary of plain JSON types, from
+    which :func:`parse_span_data_json` rebuilds it. Used to pass spans to
+    another process or to store them on disk.
+
+    :type span_data: :class:`~opencensus.trace.span_data.SpanData`
+    :param span_data: SpanData tuple to convert
+
+    :rtype: dict
+    :return: Dictionary representing the SpanData tuple
+    """
+    context = span_data.context
+    if context is not None:
+        context = {
+            'trace_id': context.trace_id,
+            'span_id': context.span_id,
+            'trace_options': context.trace_options.trace_options_byte,
+            'from_header': context.from_header,
+        }
+
+    stack_trace = span_data.stack_trace
+    if stack_trace is not None:
+        stack_trace = {
+            'stack_frames': [
+                _format_stack_frame_json(frame)
+                for frame in stack_trace.stack_frames],
+            'stack_trace_hash_id': stack_trace.stack_trace_hash_id,
+            'dropped_frames_count': stack_trace.dropped_frames_count,
+        }
+
+    time_events = span_data.time_events
+    if time_events is not None:
+        time_events = [
+            _format_time_event_json(time_event)
+            for time_event in time_events]
+
+    links = span_data.links
+    if links is not None:
+        links = [
+            {
+                'trace_id': link.trace_id,
+                'span_id': link.span_id,
+                'type': link.type,
+                'attributes': _get_attributes_dict(link.attributes),
+            }
+            for link in links]
+
+    status = span_data.status
+    if status is not None:
+        status = {
+            'code': status.code,
+            'message': status.message,
+            'details': status.details,
+        }
+
+    span_data_json = span_data._asdict()
+    span_data_json.update(
+        context=context,
+        attributes=_get_attributes_dict(span_data.attributes),
+        stack_trace=stack_trace,
+        time_events=time_events,
+        links=links,
+        status=status,
+    )
+    return span_data_json
+
+
+def _format_stack_frame_json(frame):
+    # StackTrace.add_stack_frame stores frames in their JSON format, frames
+    # passed to the constructor may also be StackFrame objects.
+    if isinstance(frame, stack_trace_module.StackFrame):
+        return frame.format_stack_frame_json()
+    return frame
+
+
+def _format_time_event_json(time_event):
+    time_event_json = {'timestamp_ns': time_event.timestamp_ns}
+
+    annotation = time_event.annotation
+    if annotation is not None:
+        time_event_json['annotation'] = {
+            'description': annotation.description,
+            'attributes': _get_attributes_dict(annotation.attributes),
+        }
+
+    message_event = time_event.message_event
+    if message_event is not None:
+        time_event_json['message_event'] = {
+            'id': message_event.id,
+            'type': message_event.type,
+            'uncompressed_size_bytes': message_event.uncompressed_size_bytes,
+            'compressed_size_bytes': message_event.compressed_size_bytes,
+        }
+
+    return time_event_json
+
+
+def _parse_time_event_json(time_event_json):
+    annotation = time_event_json.get('annotation')
+    if annotation is not None:
+        attrs = annotation['attributes']
+        if attrs is not None:
+            attrs = attributes.Attributes(attrs)
+        annotation = time_event_module.Annotation(
+            annotation['description'], attrs)
+
+    message_event = time_event_json.get('message_event')
+    if message_event is not None:
+        message_event = time_event_module.MessageEvent(**message_event)
+
+    return time_event_module.TimeEvent(
+        time_event_json['timestamp_ns'], annotation, message_event)
+
+
+def parse_span_data_json(span_data_json):
+    """Rebuilds a SpanData tuple from the dictionary returned by
+    :func:`format_span_data_json`.
+
+    :type span_data_json: dict
+    :param span_data_json: Dictionary representing a SpanData tuple
+
+    :rtype: :class:`~opencensus.trace.span_data.SpanData`
+    :return: The SpanData tuple
+    """
+    fields = dict(span_data_json)
+
+    context = fields['context']
+    if context is not None:
+        fields['context'] = span_context_module.SpanContext(
+            trace_id=context['trace_id'],
+            span_id=context['span_id'],
+            trace_options=trace_options_module.TraceOptions(
+                context['trace_options']),
+            from_header=context['from_header'])
+
+    stack_trace = fields['stack_trace']
+    if stack_trace is not None:
+        # The frames are kept in the JSON format StackTrace stores them in.
+        fields['stack_trace'] = stack_trace_module.StackTrace(
+            list(stack_trace['stack_frames']),
+            stack_trace['stack_trace_hash_id'])
+        fields['stack_trace'].dropped_frames_count = \
+            stack_trace['dropped_frames_count']
+
+    if fields['time_events'] is not None:
+        fields['time_events'] = [
+            _parse_time_event_json(time_event)
+            for time_event in fields['time_events']]
+
+    if fields['links'] is not None:
+        fields['links'] = [
+            link_module.Link(**link) for link in fields['links']]
+
+    status = fields['status']
+    if status is not None:
+        fields['status'] = status_module.Status(**status)
+
+    return SpanData(**fields)
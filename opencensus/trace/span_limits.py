@@ -0,0 +1,84 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Limits on the number of attributes, time events and links per span."""
+
+DEFAULT_MAX_ATTRIBUTES = 32
+DEFAULT_MAX_ANNOTATIONS = 32
+DEFAULT_MAX_MESSAGE_EVENTS = 128
+DEFAULT_MAX_LINKS = 128
+
+
+class SpanLimits(object):
+    """Per-span limits applied by
+    :meth:`~opencensus.trace.span.Span.add_attribute`,
+    :meth:`~opencensus.trace.span.Span.add_time_event` and
+    :meth:`~opencensus.trace.span.Span.add_link`.
+
+    Anything over a limit is dropped and counted in the ``dropped_*_count``
+    fields of the span, which are exported with the span data.
+
+    :type max_attributes: int
+    :param max_attributes: (Optional) Maximum number of attributes per span.
+                           Values of existing keys can still be replaced
+                           once the limit is reached.
+
+    :type max_annotations: int
+    :param max_annotations: (Optional) Maximum number of annotations per span.
+
+    :type max_message_events: int
+    :param max_message_events: (Optional) Maximum number of message events
+                               per span.
+
+    :type max_links: int
+    :param max_links: (Optional) Maximum number of links per span.
+
+    :type keep_latest_time_events: bool
+    :param keep_latest_time_events: (Optional) If True (the default), a new
+                                    annotation or message event over the
+                                    limit evicts the oldest one of the same
+                                    kind, so the most recent events are kept.
+                                    If False, the first events are kept and
+                                    new ones are dropped.
+    """
+
+    def __init__(self,
+                 max_attributes=DEFAULT_MAX_ATTRIBUTES,
+                 max_annotations=DEFAULT_MAX_ANNOTATIONS,
+                 max_message_events=DEFAULT_MAX_MESSAGE_EVENTS,
+                 max_links=DEFAULT_MAX_LINKS,
+                 keep_latest_time_events=True):
+        self.max_attributes = max_attributes
+        self.max_annotations = max_annotations
+        self.max_message_events = max_message_events
+        self.max_links = max_links
+        self.keep_latest_time_events = keep_latest_time_events
+
+
+_span_limits = SpanLimits()
+
+
+def get_span_limits():
+    """Return the limits applied to all spans."""
+    return _span_limits
+
+
+def set_span_limits(span_limits):
+    """Replace the limits applied to all spans.
+
+    :type span_limits: :class:`SpanLimits`
+    :param span_limits: The new limits.
+    """
+    global _span_limits
+    _span_limits = span_limits
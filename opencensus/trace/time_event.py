@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+
+from opencensus.trace import utils
 from opencensus.trace.utils import _get_truncatable_str
 
 
@@ -115,8 +118,10 @@ class TimeEvent(object):
     Note: A TimeEvent can contain either an Annotation object or a MessageEvent
           object, but not both.
 
-    :type timestamp: :class:`~datetime.datetime`
-    :param timestamp: The timestamp indicating the time the event occurred.
+    :type timestamp: :class:`~datetime.datetime` or int
+    :param timestamp: The timestamp indicating the time the event occurred,
+                      either as a naive UTC datetime or as integer
+                      nanoseconds since the epoch.
 
     :type annotation: :class: `~opencensus.trace.time_event.Annotation`
     :param annotation: (Optional) Text annotation with a set of attributes.
@@ -126,7 +131,10 @@ class TimeEvent(object):
                           spans.
     """
     def __init__(self, timestamp, annotation=None, message_event=None):
-        self.timestamp = timestamp.isoformat() + 'Z'
+        if isinstance(timestamp, datetime.datetime):
+            timestamp = utils.datetime_to_timestamp_ns(timestamp)
+
+        self.timestamp_ns = timestamp
 
         if annotation is not None and message_event is not None:
             raise ValueError("A TimeEvent can contain either an Annotation"
@@ -135,6 +143,11 @@ class TimeEvent(object):
         self.annotation = annotation
         self.message_event = message_event
 
+    @property
+    def timestamp(self):
+        """The time the event occurred as an ISO 8601 string."""
+        return utils.timestamp_ns_to_iso_str(self.timestamp_ns)
+
     def format_time_event_json(self):
         """Convert a TimeEvent object to json format."""
         time_event = {}
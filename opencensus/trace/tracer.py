@@ -86,7 +86,13 @@ class Tracer(object):
                 exporter=self.exporter,
                 span_context=self.span_context)
         else:
-            return noop_tracer.NoopTracer()
+            return noop_tracer.NOOP_TRACER
+
+    @property
+    def is_recording(self):
+        """Whether spans started with this tracer are recorded and exported.
+        """
+        return self.tracer.is_recording
 
     def store_tracer(self):
         """Add the current tracer to thread_local"""
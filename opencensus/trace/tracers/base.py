@@ -18,6 +18,10 @@ class Tracer(object):
 
     Subclasses of :class:`Tracer` must implement the below methods.
     """
+    # Whether spans started with this tracer are recorded and exported.
+    # Integrations check it before building span names and attributes.
+    is_recording = True
+
     def finish(self):
         """End the spans and send to reporters."""
         raise NotImplementedError
@@ -22,6 +22,10 @@ from opencensus.trace import span_data as span_data_module
 from opencensus.trace.exporters import print_exporter
 from opencensus.trace.tracers import base
 
+# Same as the batch size of the background transport, so a long trace is
+# exported in full batches.
+DEFAULT_MAX_BUFFERED_SPANS = 512
+
 
 class ContextTracer(base.Tracer):
     """The interface for tracing a request context.
@@ -29,9 +33,19 @@ class ContextTracer(base.Tracer):
     :type span_context: :class:`~opencensus.trace.span_context.SpanContext`
     :param span_context: SpanContext encapsulates the current context within
                          the request's trace.
+
+    :type max_buffered_spans: int
+    :param max_buffered_spans: (Optional) Finished spans are buffered and
+                               exported in a single call once the last open
+                               span of the trace ends. The buffer is also
+                               exported as soon as it holds this many spans,
+                               so long running traces are exported in parts.
+                               Defaults to 512, None never exports the
+                               buffer before the trace ends.
     """
 
-    def __init__(self, exporter=None, span_context=None):
+    def __init__(self, exporter=None, span_context=None,
+                 max_buffered_spans=DEFAULT_MAX_BUFFERED_SPANS):
         if exporter is None:
             exporter = print_exporter.PrintExporter()
 
@@ -43,9 +57,14 @@ class ContextTracer(base.Tracer):
         self.trace_id = span_context.trace_id
         self.root_span_id = span_context.span_id
 
+        self.max_buffered_spans = max_buffered_spans
+
         self._spans_list_condition = threading.Condition()
         # List of spans to report
         self._spans_list = []
+        # SpanData of finished spans, exported together with the rest of
+        # the trace
+        self._span_datas_buffer = []
 
     def finish(self):
         """Finish all spans
@@ -118,10 +137,26 @@ class ContextTracer(base.Tracer):
             execution_context.set_current_span(None)
 
         with self._spans_list_condition:
-            if cur_span in self._spans_list:
-                span_datas = self.get_span_datas(cur_span)
-                self.exporter.export(span_datas)
+            # Spans are usually ended in the reverse order they were
+            # started, so the ended span is almost always the last one.
+            if self._spans_list and self._spans_list[-1] is cur_span:
+                self._spans_list.pop()
+            elif cur_span in self._spans_list:
                 self._spans_list.remove(cur_span)
+            else:
+                return cur_span
+
+            self._span_datas_buffer.extend(self.get_span_datas(cur_span))
+
+            if self._spans_list and (
+                    self.max_buffered_spans is None or
+                    len(self._span_datas_buffer) < self.max_buffered_spans):
+                return cur_span
+
+            span_datas = self._span_datas_buffer
+            self._span_datas_buffer = []
+
+        self.exporter.export(span_datas)
 
         return cur_span
 
@@ -147,7 +182,10 @@ class ContextTracer(base.Tracer):
         current_span.add_attribute(attribute_key, attribute_value)
 
     def get_span_datas(self, span):
-        """Extracts a list of SpanData tuples from a span
+        """Extracts a list of SpanData tuples from a span and the child spans
+        created with :meth:`~opencensus.trace.span.Span.span`. Spans started
+        through the tracer are never children of another span, so each of
+        them is converted exactly once, when it ends.
 
         :rtype: list of opencensus.trace.span_data.SpanData
         :return list of SpanData tuples
@@ -160,17 +198,24 @@ class ContextTracer(base.Tracer):
                 span_id=span.span_id,
                 parent_span_id=span.parent_span.span_id if
                 span.parent_span else None,
-                attributes=span.attributes,
-                start_time=span.start_time,
-                end_time=span.end_time,
-                child_span_count=len(span.children),
+                # The private fields are read, the properties would
+                # allocate the collections a span never used.
+                attributes=span._attributes or trace_span._EMPTY_ATTRIBUTES,
+                start_time_ns=span.start_time_ns,
+                end_time_ns=span.end_time_ns,
+                child_span_count=len(span._child_spans or ()),
                 stack_trace=span.stack_trace,
-                time_events=span.time_events,
-                links=span.links,
+                time_events=(list(span._time_events) if span._time_events
+                             else trace_span._EMPTY_LIST),
+                links=span._links or trace_span._EMPTY_LIST,
                 status=span.status,
                 same_process_as_parent_span=span.same_process_as_parent_span,
-                span_kind=span.span_kind
-
+                span_kind=span.span_kind,
+                dropped_attributes_count=span.dropped_attributes_count,
+                dropped_annotations_count=span.dropped_annotations_count,
+                dropped_message_events_count=(
+                    span.dropped_message_events_count),
+                dropped_links_count=span.dropped_links_count,
             )
             for span in span_tree
         ]
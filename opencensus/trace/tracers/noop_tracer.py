@@ -18,8 +18,15 @@ from opencensus.trace.tracers import base
 class NoopTracer(base.Tracer):
     """No-op implementation of the :class:`Tracer` interface, all methods are
     no-ops. Should be used when tracing is not enabled or not sampled.
+
+    All methods return the same span object, use the shared
+    :data:`NOOP_TRACER` instance to avoid allocations on the unsampled path.
     """
     span_context = None
+    is_recording = False
+
+    def __init__(self):
+        self._span = base.NullContextManager(context_tracer=self)
 
     def finish(self):
         """End spans and send to reporter."""
@@ -34,7 +41,7 @@ class NoopTracer(base.Tracer):
         :rtype: :class:`~opencensus.trace.trace_span.Span`
         :returns: The Span object.
         """
-        return base.NullContextManager(context_tracer=self)
+        return self._span
 
     def start_span(self, name='span'):
         """Start a span.
@@ -45,18 +52,18 @@ class NoopTracer(base.Tracer):
         :rtype: :class:`~opencensus.trace.trace_span.Span`
         :returns: The Span object.
         """
-        return base.NullContextManager(context_tracer=self)
+        return self._span
 
     def end_span(self):
         """End a span. Remove the span from the span stack, and update the
         span_id in TraceContext as the current span_id which is the peek
         element in the span stack.
         """
-        return base.NullContextManager(context_tracer=self)
+        return self._span
 
     def current_span(self):
         """Return the current span."""
-        return base.NullContextManager(context_tracer=self)
+        return self._span
 
     def add_attribute_to_current_span(self, attribute_key, attribute_value):
         """Add attribute to current span.
@@ -72,3 +79,7 @@ class NoopTracer(base.Tracer):
     def list_collected_spans(self):
         """List collected spans."""
         return None
+
+
+# Shared tracer for requests that are not traced.
+NOOP_TRACER = NoopTracer()
@@ -12,11 +12,42 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+import gzip
+import io
+import time
+
 UTF8 = 'utf-8'
 
 # Max length is 128 bytes for a truncatable string.
 MAX_LENGTH = 128
 
+NANOS_PER_SECOND = 1000000000
+NANOS_PER_MICROSECOND = 1000
+
+ISO_DATETIME_REGEX = '%Y-%m-%dT%H:%M:%S.%fZ'
+ISO_DATETIME_NO_FRACTION_REGEX = '%Y-%m-%dT%H:%M:%SZ'
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+try:
+    time_ns = time.time_ns
+except AttributeError:  # pragma: NO COVER
+    def time_ns():
+        """Return the current wall-clock time as integer nanoseconds since
+        the epoch, for Python versions without ``time.time_ns``."""
+        return int(time.time() * NANOS_PER_SECOND)
+
+try:
+    perf_counter_ns = time.perf_counter_ns
+except AttributeError:  # pragma: NO COVER
+    _perf_counter = getattr(time, 'perf_counter', time.time)
+
+    def perf_counter_ns():
+        """Return a monotonic clock reading as integer nanoseconds, for
+        Python versions without ``time.perf_counter_ns``."""
+        return int(_perf_counter() * NANOS_PER_SECOND)
+
 
 def _get_truncatable_str(str_to_convert):
     """Truncate a string if exceed limit and record the truncated bytes
@@ -56,3 +87,77 @@ def check_str_length(str_to_check, limit=MAX_LENGTH):
     result = str(str_bytes.decode(UTF8, errors='ignore'))
 
     return (result, truncated_byte_count)
+
+
+def datetime_to_timestamp_ns(dt):
+    """Convert a naive UTC datetime to integer nanoseconds since the epoch.
+
+    :type dt: :class:`~datetime.datetime`
+    :param dt: A naive datetime in UTC.
+
+    :rtype: int
+    :returns: Nanoseconds since the epoch.
+    """
+    delta = dt - _EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1000000 \
+        + delta.microseconds
+    return micros * NANOS_PER_MICROSECOND
+
+
+def timestamp_ns_to_iso_str(timestamp_ns):
+    """Format integer nanoseconds since the epoch as an ISO 8601 string in
+    the same format as ``datetime.utcnow().isoformat() + 'Z'``.
+
+    :type timestamp_ns: int
+    :param timestamp_ns: Nanoseconds since the epoch, or None.
+
+    :rtype: str
+    :returns: The ISO 8601 formatted timestamp, or None.
+    """
+    if timestamp_ns is None:
+        return None
+
+    dt = _EPOCH + datetime.timedelta(
+        microseconds=timestamp_ns // NANOS_PER_MICROSECOND)
+    return dt.isoformat() + 'Z'
+
+
+def iso_str_to_timestamp_ns(iso_str):
+    """Parse an ISO 8601 string produced by :func:`timestamp_ns_to_iso_str`
+    back to integer nanoseconds since the epoch.
+
+    This is only used for timestamps supplied as strings by callers, spans
+    recorded by the library carry integer timestamps from the start.
+
+    :type iso_str: str
+    :param iso_str: The ISO 8601 formatted timestamp, or None.
+
+    :rtype: int
+    :returns: Nanoseconds since the epoch, or None.
+    """
+    if iso_str is None:
+        return None
+
+    try:
+        dt = datetime.datetime.strptime(iso_str, ISO_DATETIME_REGEX)
+    except ValueError:
+        dt = datetime.datetime.strptime(
+            iso_str, ISO_DATETIME_NO_FRACTION_REGEX)
+
+    return datetime_to_timestamp_ns(dt)
+
+
+def gzip_compress(data):
+    """Compress data in the gzip format, like ``gzip.compress``, which
+    Python 2 does not have.
+
+    :type data: bytes
+    :param data: The data to compress.
+
+    :rtype: bytes
+    :returns: The compressed data.
+    """
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as gzip_file:
+        gzip_file.write(data)
+    return buf.getvalue()
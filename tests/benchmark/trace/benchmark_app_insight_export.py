@@ -0,0 +1,155 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for sending batches to Application Insights.
+
+Sends batches of spans to a local stand-in ingestion endpoint, which counts
+the requests and the bytes it receives:
+
+- with a request per span and a copy of the envelope per span, as ``emit``
+  did before batching,
+- with one gzip compressed request of newline delimited envelopes per
+  batch.
+
+Run with::
+
+    python tests/benchmark/trace/benchmark_app_insight_export.py
+"""
+
+from __future__ import print_function
+
+import copy
+import json
+import threading
+import timeit
+
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import app_insight_exporter
+
+NUM_BATCHES = 20
+BATCH_SIZE = 50
+
+
+class IngestionHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Accepts envelopes like the track endpoint, keeping connections
+    alive.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        self.rfile.read(length)
+        self.server.requests += 1
+        self.server.bytes_received += length
+        body = json.dumps({'itemsReceived': 1, 'itemsAccepted': 1,
+                           'errors': []}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class IngestionServer(socketserver.ThreadingMixIn,
+                      BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(
+            self, ('127.0.0.1', 0), IngestionHandler)
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.bytes_received = 0
+
+
+class LegacyAppInsightExporter(app_insight_exporter.AppInsightExporter):
+    """The exporter before batching: a request per span."""
+
+    def emit(self, span_datas):
+        envelope = app_insight_exporter.Envelope(self.instrumentation_key)
+        results = []
+        for item in self.convertToAppInsightFormat(span_datas):
+            copy.deepcopy(envelope)
+            r = self.http.request(
+                'POST', self.endpoint, body=json.dumps(item),
+                headers={'Content-Type': 'application/json'})
+            results.append(r.status < 300)
+        return all(results)
+
+
+def make_batch():
+    trace_id = '6e0c63257de34c92bf9efcd03927272e'
+    return [
+        span_data_module.SpanData(
+            name='span{}'.format(index),
+            context=span_context.SpanContext(trace_id=trace_id),
+            span_id='{:016x}'.format(index + 1),
+            parent_span_id='0000000000000001' if index else None,
+            attributes={'/http/method': 'GET', '/http/url': '/api/items',
+                        '/http/status_code': '200'},
+            start_time_ns=1502820146071158000,
+            end_time_ns=1502820146081158000,
+            child_span_count=0,
+            stack_trace=None,
+            time_events=None,
+            links=None,
+            status=None,
+            same_process_as_parent_span=None,
+            span_kind=1,
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+
+def run(label, exporter, server, batch):
+    server.reset()
+    elapsed = timeit.timeit(lambda: exporter.emit(batch), number=NUM_BATCHES)
+    print('{:<28} {:>8.2f} ms/batch {:>6} requests {:>10} bytes'.format(
+        label, elapsed / NUM_BATCHES * 1e3, server.requests,
+        server.bytes_received))
+
+
+def main():
+    server = IngestionServer()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    endpoint = 'http://127.0.0.1:{}/v2/track'.format(server.server_port)
+    batch = make_batch()
+
+    print('{} batches of {} spans'.format(NUM_BATCHES, BATCH_SIZE))
+    run('request per span',
+        LegacyAppInsightExporter('ikey', endpoint=endpoint), server, batch)
+    run('gzip batch per emit',
+        app_insight_exporter.AppInsightExporter('ikey', endpoint=endpoint),
+        server, batch)
+
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for writing batches of spans to a local file.
+
+Writes batches of spans to a temporary file:
+
+- opening the file for each batch, as ``emit`` did before the exporter kept
+  the file open (and overwrote the previous batch),
+- with the file kept open and the traces buffered,
+- with the file kept open, buffered, and rotated every megabyte.
+
+Run with::
+
+    python tests/benchmark/trace/benchmark_file_export.py
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+import timeit
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import file_exporter
+
+NUM_BATCHES = 2000
+BATCH_SIZE = 10
+
+
+class LegacyFileExporter(file_exporter.FileExporter):
+    """The exporter before it kept the file open: an open per batch."""
+
+    def emit(self, span_datas):
+        with open(self.file_name, 'a') as file:
+            file.write('\n'.join(
+                json.dumps(legacy_trace_json) for legacy_trace_json
+                in span_data_module.format_legacy_trace_jsons(span_datas)))
+
+
+def make_batch(batch_index):
+    trace_id = '{:032x}'.format(batch_index + 1)
+    return [
+        span_data_module.SpanData(
+            name='span{}'.format(index),
+            context=span_context.SpanContext(trace_id=trace_id),
+            span_id='{:016x}'.format(index + 1),
+            parent_span_id='0000000000000001' if index else None,
+            attributes={'http.method': 'GET', 'http.url': '/api/items'},
+            start_time_ns=1502820146071158000,
+            end_time_ns=1502820146081158000,
+            child_span_count=0,
+            stack_trace=None,
+            time_events=None,
+            links=None,
+            status=None,
+            same_process_as_parent_span=None,
+            span_kind=1,
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+
+def run(label, exporter_class, batches, **kwargs):
+    directory = tempfile.mkdtemp()
+    try:
+        file_name = os.path.join(directory, 'traces.json')
+        exporter = exporter_class(file_name=file_name, **kwargs)
+
+        def emit_all():
+            for batch in batches:
+                exporter.emit(batch)
+            exporter.close()
+
+        elapsed = timeit.timeit(emit_all, number=1)
+        print('{:<28} {:>8.1f} us/batch {:>4} files'.format(
+            label, elapsed / len(batches) * 1e6, len(os.listdir(directory))))
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    batches = [make_batch(index) for index in range(NUM_BATCHES)]
+
+    print('{} batches of {} spans'.format(NUM_BATCHES, BATCH_SIZE))
+    run('open per batch', LegacyFileExporter, batches)
+    run('kept open, buffered', file_exporter.FileExporter, batches)
+    run('kept open, rotated', file_exporter.FileExporter, batches,
+        max_bytes=1024 * 1024, backup_count=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for encoding batches of spans for Jaeger.
+
+Encodes a batch of 10,000 spans, in the compact protocol of the agent and
+the binary protocol of the collector:
+
+- with ``translate_to_jaeger`` and the generated Thrift code, as ``emit``
+  did before the exporter had encoders,
+- with :class:`~opencensus.trace.exporters.jaeger_encoder.CompactEncoder`
+  and :class:`~opencensus.trace.exporters.jaeger_encoder.BinaryEncoder`.
+
+Run with::
+
+    python tests/benchmark/trace/benchmark_jaeger_encoding.py
+"""
+
+from __future__ import print_function
+
+import timeit
+
+from thrift.protocol import TBinaryProtocol, TCompactProtocol
+from thrift.transport import TTransport
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace import status
+from opencensus.trace.exporters import jaeger_exporter
+from opencensus.trace.exporters.gen.jaeger import agent, jaeger
+
+BATCH_SIZE = 10000
+REPEAT = 5
+
+
+def make_batch():
+    trace_id = '6e0c63257de34c92bf9efcd03927272e'
+    return [
+        span_data_module.SpanData(
+            name='span{}'.format(index),
+            context=span_context.SpanContext(trace_id=trace_id),
+            span_id='{:016x}'.format(index + 1),
+            parent_span_id='0000000000000001' if index else None,
+            attributes={'http.method': 'GET', 'http.url': '/api/items',
+                        'http.status_code': 200},
+            start_time_ns=1502820146071158000,
+            end_time_ns=1502820146081158000,
+            child_span_count=0,
+            stack_trace=None,
+            time_events=None,
+            links=None,
+            status=status.Status(code=0, message='OK'),
+            same_process_as_parent_span=None,
+            span_kind=1,
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+
+def make_thrift_encoder(exporter, client_class, protocol_class, send):
+    """Encode as ``emit`` did with the generated code."""
+    def encode(span_datas):
+        batch = jaeger.Batch(
+            spans=exporter.translate_to_jaeger(span_datas),
+            process=jaeger.Process(serviceName=exporter.service_name))
+        buffer = TTransport.TMemoryBuffer()
+        send(client_class(iprot=protocol_class(trans=buffer)), batch)
+        return buffer.getvalue()
+    return encode
+
+
+def run(label, encode, batch):
+    body = encode(batch)
+    elapsed = min(timeit.repeat(
+        lambda: encode(batch), number=1, repeat=REPEAT))
+    print('{:<28} {:>10.0f} spans/s {:>10} bytes'.format(
+        label, BATCH_SIZE / elapsed, len(body)))
+
+
+def main():
+    batch = make_batch()
+    exporter = jaeger_exporter.JaegerExporter(service_name='benchmark')
+
+    print('Batches of {} spans'.format(BATCH_SIZE))
+    run('translate + TCompactProtocol',
+        make_thrift_encoder(
+            exporter, agent.Client, TCompactProtocol.TCompactProtocol,
+            lambda client, batch: client.emitBatch(batch)),
+        batch)
+    run('CompactEncoder', exporter.compact_encoder.encode, batch)
+    run('translate + TBinaryProtocol',
+        make_thrift_encoder(
+            exporter, jaeger.Client, TBinaryProtocol.TBinaryProtocol,
+            lambda client, batch: client.send_submitBatches([batch])),
+        batch)
+    run('BinaryEncoder', exporter.binary_encoder.encode, batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for sending batches to the Jaeger collector over HTTP.
+
+Times translating spans to Jaeger, then sends batches to a local stand-in
+Jaeger collector, which counts the TCP connections it accepts, and reports
+the CPU time the exporter spends per span. The stand-in runs in another
+process, so that its work is not counted.
+
+Run with::
+
+    python tests/benchmark/trace/benchmark_jaeger_export.py
+"""
+
+from __future__ import print_function
+
+import multiprocessing
+import time
+import timeit
+
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import jaeger_exporter
+
+NUM_BATCHES = 200
+BATCH_SIZE = 50
+NUM_TRACES = 5
+
+_process_time = time.process_time if hasattr(time, 'process_time') \
+    else time.clock
+
+
+class CollectorHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Accepts batches like the Jaeger collector, keeping connections
+    alive.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        with self.server.connections.get_lock():
+            self.server.connections.value += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(202)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CollectorServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, connections):
+        BaseHTTPServer.HTTPServer.__init__(
+            self, ('127.0.0.1', 0), CollectorHandler)
+        self.connections = connections
+
+
+def serve(connections, ports):
+    server = CollectorServer(connections)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+def make_batch():
+    return [
+        span_data_module.SpanData(
+            name='span{}'.format(index),
+            context=span_context.SpanContext(
+                trace_id='{:032x}'.format(index % NUM_TRACES + 1)),
+            span_id='{:016x}'.format(index + 1),
+            parent_span_id='{:016x}'.format(index) if index else None,
+            attributes={'http.method': 'GET', 'http.url': '/api/items',
+                        'http.status_code': 200},
+            start_time_ns=1502820146071158000,
+            end_time_ns=1502820146081158000,
+            child_span_count=0,
+            stack_trace=None,
+            time_events=None,
+            links=None,
+            status=None,
+            same_process_as_parent_span=None,
+            span_kind=1,
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+
+def main():
+    connections = multiprocessing.Value('i', 0)
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(connections, ports))
+    server.daemon = True
+    server.start()
+
+    exporter = jaeger_exporter.JaegerExporter(
+        host_name='127.0.0.1', port=ports.get())
+    batch = make_batch()
+
+    elapsed = min(timeit.repeat(
+        lambda: exporter.translate_to_jaeger(batch),
+        number=NUM_BATCHES, repeat=10))
+    print('translate_to_jaeger {:>8.2f} us/span'.format(
+        elapsed / NUM_BATCHES / BATCH_SIZE * 1e6))
+
+    jaeger_batch = jaeger_exporter.jaeger.Batch(
+        spans=exporter.translate_to_jaeger(batch),
+        process=jaeger_exporter.jaeger.Process(serviceName='benchmark'))
+
+    def emit_batches():
+        start = _process_time()
+        for _ in range(NUM_BATCHES):
+            exporter.collector.emit(jaeger_batch)
+        return _process_time() - start
+
+    cpu = min(emit_batches() for _ in range(5))
+    print('Collector.emit      {:>8.2f} us CPU/span {:>6} connections'.format(
+        cpu / NUM_BATCHES / BATCH_SIZE * 1e6, connections.value))
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark for span and trace ID generation.
+
+Compares span creation throughput using the pooled
+:class:`~opencensus.trace.id_generator.RandomIdGenerator` against the
+previous ``uuid.uuid4().hex`` based generator.
+
+Run with::
+
+    python tests/benchmark/trace/benchmark_span_creation.py
+"""
+
+from __future__ import print_function
+
+import timeit
+import uuid
+
+from opencensus.trace import id_generator
+from opencensus.trace import span as span_module
+from opencensus.trace import span_context
+
+NUMBER = 100000
+REPEAT = 5
+
+
+class UuidIdGenerator(object):
+    """The ID generator used before pooling was introduced."""
+
+    def generate_span_id(self):
+        return uuid.uuid4().hex[:16]
+
+    def generate_trace_id(self):
+        return uuid.uuid4().hex
+
+
+def create_span():
+    span_module.Span('span')
+
+
+def create_span_context():
+    span_context.SpanContext()
+
+
+def run(label, func):
+    best = min(timeit.repeat(func, number=NUMBER, repeat=REPEAT))
+    print('{:<40} {:>12,.0f} ops/s'.format(label, NUMBER / best))
+    return best
+
+
+def main():
+    pooled = id_generator.get_id_generator()
+    results = {}
+
+    for name, generator in (('uuid4', UuidIdGenerator()),
+                            ('pooled', pooled)):
+        id_generator.set_id_generator(generator)
+        try:
+            results[name] = (
+                run('Span() [{}]'.format(name), create_span),
+                run('SpanContext() [{}]'.format(name), create_span_context),
+            )
+        finally:
+            id_generator.set_id_generator(pooled)
+
+    print()
+    print('Span() speedup:        {:.2f}x'.format(
+        results['uuid4'][0] / results['pooled'][0]))
+    print('SpanContext() speedup: {:.2f}x'.format(
+        results['uuid4'][1] / results['pooled'][1]))
+
+
+if __name__ == '__main__':
+    main()
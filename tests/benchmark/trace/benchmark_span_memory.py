@@ -0,0 +1,94 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for the memory held by live spans.
+
+Measures the bytes allocated per :class:`~opencensus.trace.span.Span` with
+:mod:`tracemalloc`, and compares it with a span that eagerly allocates its
+collections in a per-instance ``__dict__``, as spans did before they used
+``__slots__``.
+
+Run with (Python 3 only)::
+
+    python tests/benchmark/trace/benchmark_span_memory.py
+"""
+
+from __future__ import print_function
+
+import gc
+import tracemalloc
+
+from opencensus.trace import span as span_module
+
+NUMBER = 100000
+
+
+class EagerSpan(object):
+    """Layout of a span before slots and lazily allocated collections."""
+
+    def __init__(self, name, span_id):
+        self.name = name
+        self.parent_span = None
+        self.start_time_ns = None
+        self.end_time_ns = None
+        self._start_perf_ns = None
+        self.attributes = {}
+        self.span_id = span_id
+        self.stack_trace = None
+        self.time_events = []
+        self.links = []
+        self.status = None
+        self.same_process_as_parent_span = None
+        self._child_spans = []
+        self.context_tracer = None
+        self.span_kind = 0
+
+    def add_attribute(self, attribute_key, attribute_value):
+        self.attributes[attribute_key] = attribute_value
+
+
+def make_span(name, span_id):
+    return span_module.Span(name, span_id=span_id)
+
+
+def measure(factory, num_attributes):
+    span_ids = ['{:016x}'.format(i) for i in range(NUMBER)]
+    keys = ['key{}'.format(i) for i in range(num_attributes)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    spans = []
+    for span_id in span_ids:
+        span = factory('span', span_id)
+        for key in keys:
+            span.add_attribute(key, 1)
+        spans.append(span)
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / float(NUMBER)
+
+
+def main():
+    for num_attributes in (0, 3):
+        eager = measure(EagerSpan, num_attributes)
+        compact = measure(make_span, num_attributes)
+        print('{} attribute(s): eager {:7.1f} B/span, '
+              'compact {:7.1f} B/span ({:.0%} smaller)'.format(
+                  num_attributes, eager, compact, 1 - compact / eager))
+
+
+if __name__ == '__main__':
+    main()
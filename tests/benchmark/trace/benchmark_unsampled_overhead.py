@@ -0,0 +1,98 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark for the overhead of integrations when tracing is off.
+
+Calls a trivial query function directly, through the dbapi integration
+with no tracer in the execution context, and through a copy of the
+integration as it was before the shared no-op tracer, which allocated a
+new ``NoopTracer`` and a new span on every call.
+
+Run with::
+
+    python tests/benchmark/trace/benchmark_unsampled_overhead.py
+"""
+
+from __future__ import print_function
+
+import timeit
+
+from opencensus.common import runtime_context
+from opencensus.trace import execution_context
+from opencensus.trace.ext.dbapi import trace as dbapi_trace
+from opencensus.trace.tracers import base
+
+NUMBER = 200000
+REPEAT = 5
+
+
+class LegacyNoopTracer(base.Tracer):
+    """The no-op tracer before it shared a single span."""
+
+    def start_span(self, name='span'):
+        return base.NullContextManager(context_tracer=self)
+
+    def end_span(self):
+        return base.NullContextManager(context_tracer=self)
+
+    def add_attribute_to_current_span(self, attribute_key, attribute_value):
+        return
+
+
+def legacy_trace_cursor_query(query_func):
+    def call(query, *args, **kwargs):
+        _tracer = runtime_context.get_runtime_context().get(
+            execution_context._TRACER_KEY, LegacyNoopTracer())
+        _span = _tracer.start_span()
+        _span.name = 'mysql.query'
+        _tracer.add_attribute_to_current_span('mysql/query', query)
+        _tracer.add_attribute_to_current_span(
+            'mysql/cursor/method/name',
+            query_func.__name__)
+
+        result = query_func(query, *args, **kwargs)
+
+        _tracer.end_span()
+        return result
+    return call
+
+
+def execute(query):
+    return None
+
+
+def run(label, func):
+    best = min(timeit.repeat(
+        lambda: func('SELECT 1'), number=NUMBER, repeat=REPEAT))
+    per_call_ns = best / NUMBER * 1e9
+    print('{:<40} {:>8.0f} ns/call'.format(label, per_call_ns))
+    return per_call_ns
+
+
+def main():
+    execution_context.clear()
+
+    direct = run('direct call', execute)
+    legacy = run('dbapi, per-call NoopTracer',
+                 legacy_trace_cursor_query(execute))
+    shared = run('dbapi, shared NoopTracer',
+                 dbapi_trace.trace_cursor_query(execute))
+
+    print()
+    print('Overhead per call: {:.0f} ns before, {:.0f} ns now'.format(
+        legacy - direct, shared - direct))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for encoding batches of spans for Zipkin.
+
+Encodes a batch of 10,000 spans:
+
+- with ``translate_to_zipkin`` and ``json.dumps``, as ``emit`` did before
+  the exporter had encoders,
+- with :class:`~opencensus.trace.exporters.zipkin_encoder.JsonEncoder`,
+- with :class:`~opencensus.trace.exporters.zipkin_encoder.ProtobufEncoder`.
+
+Run with::
+
+    python tests/benchmark/trace/benchmark_zipkin_encoding.py
+"""
+
+from __future__ import print_function
+
+import json
+import timeit
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import zipkin_exporter
+
+BATCH_SIZE = 10000
+REPEAT = 5
+
+
+def make_batch():
+    trace_id = '6e0c63257de34c92bf9efcd03927272e'
+    return [
+        span_data_module.SpanData(
+            name='span{}'.format(index),
+            context=span_context.SpanContext(trace_id=trace_id),
+            span_id='{:016x}'.format(index + 1),
+            parent_span_id='0000000000000001' if index else None,
+            attributes={'http.method': 'GET', 'http.url': '/api/items',
+                        'http.status_code': 200},
+            start_time_ns=1502820146071158000,
+            end_time_ns=1502820146081158000,
+            child_span_count=0,
+            stack_trace=None,
+            time_events=None,
+            links=None,
+            status=None,
+            same_process_as_parent_span=None,
+            span_kind=1,
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+
+def run(label, encode, batch):
+    body = encode(batch)
+    elapsed = min(timeit.repeat(
+        lambda: encode(batch), number=1, repeat=REPEAT))
+    print('{:<28} {:>10.0f} spans/s {:>10} bytes'.format(
+        label, BATCH_SIZE / elapsed, len(body)))
+
+
+def main():
+    batch = make_batch()
+    json_exporter = zipkin_exporter.ZipkinExporter(service_name='benchmark')
+    proto_exporter = zipkin_exporter.ZipkinExporter(
+        service_name='benchmark', encoding=zipkin_exporter.ENCODING_PROTO)
+
+    print('Batches of {} spans'.format(BATCH_SIZE))
+    run('translate_to_zipkin + json',
+        lambda span_datas: json.dumps(
+            json_exporter.translate_to_zipkin(span_datas)).encode('utf-8'),
+        batch)
+    run('JsonEncoder', json_exporter.encoder.encode, batch)
+    run('ProtobufEncoder', proto_exporter.encoder.encode, batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark for sending batches to Zipkin over keep-alive connections.
+
+Sends batches of spans to a local stand-in Zipkin server, which counts the
+TCP connections it accepts and the bytes it receives:
+
+- with a new connection per batch, as ``emit`` did with ``requests.post``
+  before the exporter kept a session,
+- with the exporter's keep-alive session,
+- with the session and gzip request bodies.
+
+Run with::
+
+    python tests/benchmark/trace/benchmark_zipkin_export.py
+"""
+
+from __future__ import print_function
+
+import json
+import threading
+import timeit
+
+import requests
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import zipkin_exporter
+
+NUM_BATCHES = 200
+BATCH_SIZE = 50
+
+
+class ZipkinHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Accepts spans like the Zipkin v2 API, keeping connections alive."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        self.rfile.read(length)
+        self.server.bytes_received += length
+        self.send_response(202)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ZipkinServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(
+            self, ('127.0.0.1', 0), ZipkinHandler)
+        self.reset()
+
+    def reset(self):
+        self.connections = 0
+        self.bytes_received = 0
+
+
+class LegacyZipkinExporter(zipkin_exporter.ZipkinExporter):
+    """The exporter before it kept a session: a connection per batch."""
+
+    def emit(self, span_datas):
+        zipkin_spans = self.translate_to_zipkin(span_datas)
+        result = requests.post(
+            url=self.url,
+            data=json.dumps(zipkin_spans),
+            headers=zipkin_exporter.ZIPKIN_HEADERS)
+        return result.status_code in zipkin_exporter.SUCCESS_STATUS_CODE
+
+
+def make_batch():
+    trace_id = '6e0c63257de34c92bf9efcd03927272e'
+    return [
+        span_data_module.SpanData(
+            name='span{}'.format(index),
+            context=span_context.SpanContext(trace_id=trace_id),
+            span_id='{:016x}'.format(index + 1),
+            parent_span_id='0000000000000001' if index else None,
+            attributes={'http.method': 'GET', 'http.url': '/api/items',
+                        'component': 'benchmark'},
+            start_time_ns=1502820146071158000,
+            end_time_ns=1502820146081158000,
+            child_span_count=0,
+            stack_trace=None,
+            time_events=None,
+            links=None,
+            status=None,
+            same_process_as_parent_span=None,
+            span_kind=1,
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+
+def run(label, exporter, server, batch):
+    server.reset()
+    elapsed = timeit.timeit(lambda: exporter.emit(batch), number=NUM_BATCHES)
+    print('{:<28} {:>8.2f} ms/batch {:>6} connections {:>10} bytes'.format(
+        label, elapsed / NUM_BATCHES * 1e3, server.connections,
+        server.bytes_received))
+
+
+def main():
+    server = ZipkinServer()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    kwargs = {'host_name': '127.0.0.1', 'port': server.server_port}
+    batch = make_batch()
+
+    print('{} batches of {} spans'.format(NUM_BATCHES, BATCH_SIZE))
+    run('connection per batch', LegacyZipkinExporter(**kwargs),
+        server, batch)
+    run('keep-alive session', zipkin_exporter.ZipkinExporter(**kwargs),
+        server, batch)
+    run('keep-alive session, gzip',
+        zipkin_exporter.ZipkinExporter(gzip=True, **kwargs), server, batch)
+
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -56,9 +56,11 @@ class TestBasicTrace(unittest.TestCase):
                 func_to_trace()
 
         tracer.finish()
+        exporter.close()
 
-        file = open(file_exporter.DEFAULT_FILENAME, 'r')
-        trace_json = json.loads(file.read())
+        # The exporter appends one trace per line.
+        with open(file_exporter.DEFAULT_FILENAME, 'r') as file:
+            trace_json = json.loads(file.readlines()[-1])
 
         spans = trace_json.get('spans')
 
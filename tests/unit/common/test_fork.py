@@ -0,0 +1,54 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+
+from opencensus.common import fork
+
+
+class Test_get_fork_marker(unittest.TestCase):
+
+    def test_stable_in_same_process(self):
+        self.assertEqual(fork.get_fork_marker(), fork.get_fork_marker())
+
+    def test__after_fork_in_child(self):
+        marker = fork.get_fork_marker()
+        generation = fork._fork_generation
+        fork._after_fork_in_child()
+
+        self.assertEqual(fork._fork_generation, generation + 1)
+        if hasattr(os, 'register_at_fork'):
+            self.assertNotEqual(fork.get_fork_marker(), marker)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+    def test_changes_in_child(self):
+        marker = fork.get_fork_marker()
+        read_fd, write_fd = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:  # pragma: NO COVER
+            try:
+                changed = fork.get_fork_marker() != marker
+                os.write(write_fd, b'1' if changed else b'0')
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        result = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(result, b'1')
+        self.assertEqual(fork.get_fork_marker(), marker)
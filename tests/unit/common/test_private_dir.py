@@ -0,0 +1,75 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import mock
+
+from opencensus.common import private_dir
+
+
+@unittest.skipUnless(hasattr(os, 'getuid'), 'requires POSIX permissions')
+class TestPrivateDir(unittest.TestCase):
+
+    def setUp(self):
+        self.parent = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.parent)
+        self.path = os.path.join(self.parent, 'nested', 'private')
+
+    def test_get_default_private_dir(self):
+        path = private_dir.get_default_private_dir('opencensus')
+
+        self.assertEqual(
+            path, os.path.join(tempfile.gettempdir(),
+                               'opencensus-{}'.format(os.getuid())))
+
+    def test_ensure_creates(self):
+        private_dir.ensure_private_dir(self.path)
+
+        mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        self.assertEqual(mode, 0o700)
+
+        # Existing private directories are accepted.
+        private_dir.ensure_private_dir(self.path)
+
+    def test_ensure_rejects_shared_mode(self):
+        os.makedirs(self.path)
+        os.chmod(self.path, 0o777)
+
+        with self.assertRaises(ValueError):
+            private_dir.ensure_private_dir(self.path)
+
+    def test_ensure_rejects_other_owner(self):
+        os.makedirs(self.path, 0o700)
+
+        with mock.patch('os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaises(ValueError):
+                private_dir.ensure_private_dir(self.path)
+
+    def test_ensure_rejects_symlink(self):
+        target = os.path.join(self.parent, 'target')
+        os.mkdir(target, 0o700)
+        os.makedirs(os.path.dirname(self.path))
+        os.symlink(target, self.path)
+
+        with self.assertRaises(ValueError):
+            private_dir.ensure_private_dir(self.path)
+
+    def test_check_missing(self):
+        with self.assertRaises(OSError):
+            private_dir.check_private_dir(self.path)
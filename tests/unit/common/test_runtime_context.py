@@ -0,0 +1,121 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+from opencensus.common import runtime_context
+
+try:
+    import contextvars
+except ImportError:  # pragma: NO COVER
+    contextvars = None
+
+
+class _RuntimeContextTests(object):
+
+    def _make_one(self):
+        raise NotImplementedError
+
+    def test_get_default(self):
+        context = self._make_one()
+
+        self.assertIsNone(context.get('key'))
+        self.assertEqual(context.get('key', 'default'), 'default')
+
+    def test_set_and_get(self):
+        context = self._make_one()
+        context.set('key', 'value')
+
+        self.assertEqual(context.get('key'), 'value')
+
+    def test_clear_prefix(self):
+        context = self._make_one()
+        context.set('a.key', 'value1')
+        context.set('b.key', 'value2')
+
+        context.clear('a.')
+
+        self.assertIsNone(context.get('a.key'))
+        self.assertEqual(context.get('b.key'), 'value2')
+
+        context.clear()
+
+        self.assertIsNone(context.get('b.key'))
+
+    def test_isolated_between_threads(self):
+        context = self._make_one()
+        context.set('key', 'main')
+        result = []
+
+        def target():
+            result.append(context.get('key'))
+            context.set('key', 'thread')
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(result, [None])
+        self.assertEqual(context.get('key'), 'main')
+
+
+class TestThreadLocalRuntimeContext(_RuntimeContextTests, unittest.TestCase):
+
+    def _make_one(self):
+        return runtime_context.ThreadLocalRuntimeContext()
+
+
+@unittest.skipIf(contextvars is None, 'contextvars is not available')
+class TestContextVarsRuntimeContext(_RuntimeContextTests, unittest.TestCase):
+
+    def _make_one(self):
+        return runtime_context.ContextVarsRuntimeContext()
+
+    def test_isolated_between_contexts(self):
+        context = self._make_one()
+        context.set('key', 'outer')
+
+        def set_inner():
+            self.assertEqual(context.get('key'), 'outer')
+            context.set('key', 'inner')
+            return context.get('key')
+
+        result = contextvars.copy_context().run(set_inner)
+
+        self.assertEqual(result, 'inner')
+        self.assertEqual(context.get('key'), 'outer')
+
+
+class TestGetSetRuntimeContext(unittest.TestCase):
+
+    def test_default(self):
+        context = runtime_context.get_runtime_context()
+
+        if contextvars is None:  # pragma: NO COVER
+            expected_class = runtime_context.ThreadLocalRuntimeContext
+        else:
+            expected_class = runtime_context.ContextVarsRuntimeContext
+
+        self.assertIsInstance(context, expected_class)
+
+    def test_set_runtime_context(self):
+        original = runtime_context.get_runtime_context()
+        context = runtime_context.ThreadLocalRuntimeContext()
+
+        try:
+            runtime_context.set_runtime_context(context)
+            self.assertIs(runtime_context.get_runtime_context(), context)
+        finally:
+            runtime_context.set_runtime_context(original)
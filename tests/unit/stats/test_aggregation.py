@@ -33,6 +33,12 @@ class TestBaseAggregation(unittest.TestCase):
         self.assertEqual(aggregation_module.Type.NONE, base_aggregation.aggregation_type)
         self.assertEqual(["test"], base_aggregation.buckets)
 
+    def test_new_aggregation_data(self):
+        base_aggregation = aggregation_module.BaseAggregation()
+
+        with self.assertRaises(NotImplementedError):
+            base_aggregation.new_aggregation_data()
+
 
 class TestSumAggregation(unittest.TestCase):
 
@@ -50,6 +56,15 @@ class TestSumAggregation(unittest.TestCase):
         self.assertEqual(1, sum_aggregation.sum.sum_data)
         self.assertEqual(aggregation_module.Type.SUM, sum_aggregation.aggregation_type)
 
+    def test_new_aggregation_data(self):
+        sum_aggregation = aggregation_module.SumAggregation(sum=1)
+
+        data = sum_aggregation.new_aggregation_data()
+        data.add_sample(2)
+
+        self.assertEqual(2, data.sum_data)
+        self.assertIsNot(data, sum_aggregation.new_aggregation_data())
+
 
 class TestCountAggregation(unittest.TestCase):
 
@@ -67,6 +82,14 @@ class TestCountAggregation(unittest.TestCase):
         self.assertEqual(4, count_aggregation.count.count_data)
         self.assertEqual(aggregation_module.Type.COUNT, count_aggregation.aggregation_type)
 
+    def test_new_aggregation_data(self):
+        count_aggregation = aggregation_module.CountAggregation(count=4)
+
+        data = count_aggregation.new_aggregation_data()
+        data.add_sample(10)
+
+        self.assertEqual(1, data.count_data)
+
 
 class TestDistributionAggregation(unittest.TestCase):
 
@@ -85,3 +108,27 @@ class TestDistributionAggregation(unittest.TestCase):
         self.assertEqual(["test"], distribution_aggregation.boundaries.boundaries)
         self.assertEqual({1: "test"}, distribution_aggregation.distribution)
         self.assertEqual(aggregation_module.Type.DISTRIBUTION, distribution_aggregation.aggregation_type)
+
+    def test_new_aggregation_data(self):
+        distribution_aggregation = aggregation_module.DistributionAggregation(
+            boundaries=[10, 100])
+
+        data = distribution_aggregation.new_aggregation_data()
+        data.add_sample(5)
+        data.add_sample(50)
+        data.add_sample(60)
+
+        self.assertEqual(3, data.count_data)
+        self.assertEqual(5, data.min)
+        self.assertEqual(60, data.max)
+        self.assertEqual(115, data.sum)
+        self.assertEqual([1, 2], data.counts_per_bucket)
+        self.assertEqual([10, 100], data.bounds)
+
+    def test_new_aggregation_data_no_boundaries(self):
+        distribution_aggregation = aggregation_module.DistributionAggregation()
+
+        data = distribution_aggregation.new_aggregation_data()
+        data.add_sample(5)
+
+        self.assertEqual([1], data.counts_per_bucket)
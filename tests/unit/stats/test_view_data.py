@@ -127,3 +127,22 @@ class TestViewData(unittest.TestCase):
                          view_data.view.aggregation)
         self.assertIsNotNone(view_data.tag_value_aggregation_map.get(
             'val2').add(value))
+
+    def test_record_aggregation_per_tag_value(self):
+        from opencensus.stats import aggregation as aggregation_module
+
+        view = mock.Mock()
+        view.columns = ['key1']
+        view.aggregation = aggregation_module.CountAggregation()
+        time = datetime.utcnow().isoformat() + 'Z'
+        view_data = view_data_module.ViewData(
+            view=view, start_time=time, end_time=time)
+
+        view_data.record(context={'key1': 'val1'}, value=1, timestamp=time)
+        view_data.record(context={'key1': 'val1'}, value=1, timestamp=time)
+        view_data.record(context={'key1': 'val2'}, value=1, timestamp=time)
+
+        aggregation_map = view_data.tag_value_aggregation_map
+        self.assertEqual(2, aggregation_map['val1'].count_data)
+        self.assertEqual(1, aggregation_map['val2'].count_data)
+        self.assertEqual(0, view.aggregation.count.count_data)
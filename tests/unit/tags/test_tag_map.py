@@ -61,6 +61,10 @@ class TestTagMap(unittest.TestCase):
         self.assertTrue(tag_map.tag_key_exists(key))
         self.assertFalse(tag_map.tag_key_exists('nokey'))
 
+    def test_items(self):
+        tag_map = tag_map_module.TagMap(tags=[{'key1': 'value1'}])
+        self.assertEqual(list(tag_map.items()), [('key1', 'value1')])
+
     def test_value(self):
         key = 'key1'
         value = 'value1'
@@ -0,0 +1,149 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import json
+import unittest
+
+import mock
+import six
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import app_insight_exporter
+
+TRACE_ID = '6e0c63257de34c92bf9efcd03927272e'
+
+
+def _make_span_data(index, attributes):
+    return span_data_module.SpanData(
+        name='span',
+        context=span_context.SpanContext(trace_id=TRACE_ID),
+        span_id='{:016x}'.format(index + 1),
+        parent_span_id='6e0c63257de34c92',
+        attributes=attributes,
+        start_time_ns=1502820146071158000,
+        end_time_ns=1502820146081158000,
+        child_span_count=None,
+        stack_trace=None,
+        time_events=None,
+        links=None,
+        status=None,
+        same_process_as_parent_span=None,
+        span_kind=0,
+    )
+
+
+def _make_span_datas():
+    return [
+        _make_span_data(0, {'/http/method': 'GET',
+                            '/http/status_code': '200'}),
+        _make_span_data(1, {'requests/status_code': '500',
+                            'requests/url': 'http://example.com'}),
+    ]
+
+
+def _decode(body):
+    return [json.loads(line) for line in
+            gzip.GzipFile(fileobj=six.BytesIO(body)).read()
+            .decode('utf-8').split('\n')]
+
+
+class TestAppInsightExporter(unittest.TestCase):
+
+    def _make_exporter(self, status=200):
+        exporter = app_insight_exporter.AppInsightExporter('ikey')
+        exporter.http = mock.Mock()
+        exporter.http.request.return_value.status = status
+        return exporter
+
+    def test_emit(self):
+        exporter = self._make_exporter()
+        span_datas = _make_span_datas()
+
+        self.assertTrue(exporter.emit(span_datas))
+
+        # One request for the whole batch.
+        [((method, url), kwargs)] = exporter.http.request.call_args_list
+        self.assertEqual(method, 'POST')
+        self.assertEqual(url, app_insight_exporter.DEFAULT_ENDPOINT)
+        self.assertEqual(kwargs['headers'], {
+            'Content-Type': 'application/x-json-stream',
+            'Content-Encoding': 'gzip',
+        })
+        self.assertEqual(
+            _decode(kwargs['body']),
+            exporter.convertToAppInsightFormat(span_datas))
+
+    def test_emit_envelopes(self):
+        exporter = self._make_exporter()
+
+        exporter.emit(_make_span_datas())
+
+        request, dependency = _decode(
+            exporter.http.request.call_args[1]['body'])
+        self.assertEqual(request['iKey'], 'ikey')
+        self.assertEqual(request['name'], 'RequestData')
+        self.assertEqual(request['tags'], {
+            'ai.operation.id': TRACE_ID,
+            'ai.operation.parentId': '6e0c63257de34c92',
+        })
+        self.assertEqual(request['data']['baseData']['duration'], '10000')
+        self.assertTrue(request['data']['baseData']['success'])
+        self.assertEqual(dependency['name'], 'RemoteDependencyData')
+        self.assertEqual(
+            dependency['data']['baseData']['target'], 'http://example.com')
+        self.assertFalse(dependency['data']['baseData']['success'])
+
+    def test_emit_empty(self):
+        exporter = self._make_exporter()
+
+        self.assertTrue(exporter.emit([]))
+
+        self.assertFalse(exporter.http.request.called)
+
+    def test_emit_failed(self):
+        exporter = self._make_exporter(status=500)
+
+        with mock.patch.object(app_insight_exporter.log, 'error') as mock_log:
+            self.assertFalse(exporter.emit(_make_span_datas()))
+
+        self.assertTrue(mock_log.called)
+
+    def test_emit_http_error(self):
+        exporter = self._make_exporter()
+        exporter.http.request.side_effect = \
+            app_insight_exporter.urllib3.exceptions.HTTPError('error')
+
+        with mock.patch.object(app_insight_exporter.log, 'error'):
+            self.assertFalse(exporter.emit(_make_span_datas()))
+
+    def test_emit_async(self):
+        exporter = self._make_exporter()
+        span_datas = _make_span_datas()
+
+        patch_post = mock.patch(
+            'opencensus.trace.exporters.transports.async_transport.post',
+            new_callable=mock.Mock)
+        with patch_post as mock_post:
+            result = exporter.emit_async(span_datas)
+            self.assertIsNone(exporter.emit_async([]))
+
+        self.assertIs(result, mock_post.return_value)
+        [((url, body), kwargs)] = mock_post.call_args_list
+        self.assertEqual(url, app_insight_exporter.DEFAULT_ENDPOINT)
+        self.assertEqual(
+            kwargs['headers'], app_insight_exporter.BATCH_HEADERS)
+        self.assertEqual(
+            _decode(body), exporter.convertToAppInsightFormat(span_datas))
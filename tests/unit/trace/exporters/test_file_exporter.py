@@ -12,9 +12,42 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gc
+import json
 import os
+import shutil
+import tempfile
+import threading
 import unittest
 
+import mock
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import file_exporter
+
+
+def _make_span_datas(trace_ids_and_span_ids):
+    return [
+        span_data_module.SpanData(
+            name='span',
+            context=span_context.SpanContext(trace_id=trace_id),
+            span_id=span_id,
+            parent_span_id=None,
+            attributes=None,
+            start_time=None,
+            end_time=None,
+            child_span_count=None,
+            stack_trace=None,
+            time_events=None,
+            links=None,
+            status=None,
+            same_process_as_parent_span=None,
+            span_kind=0,
+        )
+        for trace_id, span_id in trace_ids_and_span_ids
+    ]
+
 
 class TestFileExporter(unittest.TestCase):
 
@@ -40,9 +73,33 @@ class TestFileExporter(unittest.TestCase):
         exporter = self._make_one(file_name=file_name)
 
         exporter.emit(traces)
+        exporter.close()
         assert os.path.exists(file_name) == 1
         os.remove(file_name)
 
+    def test_emit_multiple_traces(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file_name = os.path.join(directory, 'traces.json')
+        exporter = self._make_one(file_name=file_name)
+        trace_id1 = '6e0c63257de34c92bf9efcd03927272e'
+        trace_id2 = '2dd43a1d6b2549c6bc2a1a54c2fc0b05'
+
+        span_datas = _make_span_datas([(trace_id1, '1111'),
+                                       (trace_id2, '2222'),
+                                       (trace_id1, '3333')])
+        exporter.emit(span_datas)
+        exporter.close()
+
+        with open(file_name) as file:
+            traces = [json.loads(line) for line in file]
+
+        # One line per trace.
+        self.assertEqual(
+            [(trace['traceId'], [span['spanId'] for span in trace['spans']])
+             for trace in traces],
+            [(trace_id1, ['1111', '3333']), (trace_id2, ['2222'])])
+
     def test_export(self):
         file_name = 'file_name'
         exporter = self._make_one(file_name=file_name, transport=MockTransport)
@@ -52,6 +109,211 @@ class TestFileExporter(unittest.TestCase):
         self.assertTrue(exporter.transport.export_called)
 
 
+TRACE_ID = '6e0c63257de34c92bf9efcd03927272e'
+
+
+class TestFileExporterStreaming(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.file_name = os.path.join(directory, 'traces.json')
+
+    def _make_exporter(self, **kwargs):
+        exporter = file_exporter.FileExporter(
+            file_name=self.file_name, **kwargs)
+        self.addCleanup(exporter.close)
+        return exporter
+
+    def _emit(self, exporter, span_id):
+        exporter.emit(_make_span_datas([(TRACE_ID, span_id)]))
+
+    def _read_span_ids(self, file_name=None):
+        with open(file_name or self.file_name) as file:
+            return [json.loads(line)['spans'][0]['spanId'] for line in file]
+
+    def test_emit_appends(self):
+        with open(self.file_name, 'w') as file:
+            file.write('{"spans": [{"spanId": "0000"}]}\n')
+        exporter = self._make_exporter()
+
+        self._emit(exporter, '1111')
+        self._emit(exporter, '2222')
+        exporter.close()
+        self._emit(exporter, '3333')
+        exporter.close()
+
+        self.assertEqual(
+            self._read_span_ids(), ['0000', '1111', '2222', '3333'])
+
+    def test_file_mode_w_truncates_once(self):
+        with open(self.file_name, 'w') as file:
+            file.write('{"spans": [{"spanId": "0000"}]}\n')
+        exporter = self._make_exporter(file_mode='w+')
+
+        self._emit(exporter, '1111')
+        exporter.close()
+        self._emit(exporter, '2222')
+        exporter.close()
+
+        self.assertEqual(self._read_span_ids(), ['1111', '2222'])
+
+    def test_emit_keeps_file_open(self):
+        exporter = self._make_exporter()
+
+        with mock.patch.object(
+                file_exporter, 'open', create=True,
+                side_effect=open) as mock_open:
+            for span_id in ('1111', '2222', '3333'):
+                self._emit(exporter, span_id)
+
+        mock_open.assert_called_once_with(self.file_name, 'ab')
+
+    def test_emit_buffers(self):
+        exporter = self._make_exporter()
+
+        self._emit(exporter, '1111')
+
+        self.assertEqual(self._read_span_ids(), [])
+        exporter.flush()
+        self.assertEqual(self._read_span_ids(), ['1111'])
+
+    def test_emit_flushes_on_size(self):
+        exporter = self._make_exporter(buffer_size=0)
+
+        self._emit(exporter, '1111')
+
+        self.assertEqual(self._read_span_ids(), ['1111'])
+
+    def test_emit_flushes_on_time(self):
+        exporter = self._make_exporter(flush_interval=5.0)
+        now = exporter._last_flush
+
+        with mock.patch.object(
+                file_exporter, '_monotonic', return_value=now + 1.0):
+            self._emit(exporter, '1111')
+        self.assertEqual(self._read_span_ids(), [])
+
+        with mock.patch.object(
+                file_exporter, '_monotonic', return_value=now + 5.0):
+            self._emit(exporter, '2222')
+        self.assertEqual(self._read_span_ids(), ['1111', '2222'])
+
+    def test_flush_timer(self):
+        exporter = self._make_exporter(flush_interval=0.01)
+
+        self._emit(exporter, '1111')
+
+        # Written without another batch arriving.
+        for _ in range(500):
+            if self._read_span_ids():
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(self._read_span_ids(), ['1111'])
+        self.assertIsNone(exporter._flush_timer)
+
+    def test_close_cancels_flush_timer(self):
+        exporter = self._make_exporter()
+
+        self._emit(exporter, '1111')
+        timer = exporter._flush_timer
+        exporter.close()
+
+        self.assertIsNone(exporter._flush_timer)
+        timer.join(1)
+        self.assertFalse(timer.is_alive())
+        self.assertEqual(self._read_span_ids(), ['1111'])
+
+    def test_close_at_exit_after_transport(self):
+        handlers = []
+
+        class _Transport(object):
+            def __init__(self, exporter):
+                # Like BackgroundThreadTransport, flushes at exit.
+                handlers.append(lambda: exporter.emit(_make_span_datas(
+                    [(TRACE_ID, '2222')])))
+
+        with mock.patch.object(
+                file_exporter.atexit, 'register',
+                side_effect=lambda func, *args: handlers.append(
+                    lambda: func(*args))):
+            exporter = self._make_exporter(transport=_Transport)
+
+        self._emit(exporter, '1111')
+        for handler in reversed(handlers):
+            handler()
+
+        self.assertEqual(self._read_span_ids(), ['1111', '2222'])
+
+        # Traces emitted after exit are written right away.
+        self._emit(exporter, '3333')
+        self.assertEqual(self._read_span_ids(), ['1111', '2222', '3333'])
+
+    def test_exit_handler_does_not_keep_exporter(self):
+        with mock.patch.object(file_exporter.atexit, 'register') as register:
+            exporter = file_exporter.FileExporter(file_name=self.file_name)
+        func, exporter_ref = register.call_args[0]
+        self._emit(exporter, '1111')
+        exporter.close()
+
+        del exporter
+        gc.collect()
+
+        self.assertIsNone(exporter_ref())
+        # A no-op once the exporter is gone.
+        func(exporter_ref)
+
+    def test_rotate(self):
+        exporter = self._make_exporter(
+            buffer_size=0, max_bytes=1, backup_count=2)
+
+        for span_id in ('1111', '2222', '3333', '4444'):
+            self._emit(exporter, span_id)
+        exporter.close()
+
+        self.assertEqual(self._read_span_ids(), ['4444'])
+        self.assertEqual(
+            self._read_span_ids(self.file_name + '.1'), ['3333'])
+        self.assertEqual(
+            self._read_span_ids(self.file_name + '.2'), ['2222'])
+        self.assertFalse(os.path.exists(self.file_name + '.3'))
+
+    def test_rotate_in_one_write(self):
+        exporter = self._make_exporter(max_bytes=1, backup_count=1)
+
+        self._emit(exporter, '1111')
+        self._emit(exporter, '2222')
+        exporter.close()
+
+        self.assertEqual(self._read_span_ids(), ['2222'])
+        self.assertEqual(
+            self._read_span_ids(self.file_name + '.1'), ['1111'])
+
+    def test_rotate_without_backups(self):
+        exporter = self._make_exporter(buffer_size=0, max_bytes=1)
+
+        self._emit(exporter, '1111')
+        self._emit(exporter, '2222')
+
+        self.assertEqual(self._read_span_ids(), ['2222'])
+        self.assertFalse(os.path.exists(self.file_name + '.1'))
+
+    def test_emit_after_fork(self):
+        exporter = self._make_exporter()
+        self._emit(exporter, '1111')
+        parent_file = exporter._file
+
+        with mock.patch.object(
+                file_exporter.fork, 'get_fork_marker', return_value=-1):
+            self._emit(exporter, '2222')
+            exporter.flush()
+
+        # The child does not write the traces buffered by its parent.
+        self.assertIsNot(exporter._file, parent_file)
+        self.assertEqual(self._read_span_ids(), ['2222'])
+        parent_file.close()
+
+
 class MockTransport(object):
 
     def __init__(self, exporter=None):
@@ -0,0 +1,269 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import unittest
+
+import mock
+from thrift.protocol import TBinaryProtocol, TCompactProtocol
+from thrift.transport import TTransport
+
+from opencensus.trace import (link, span_context, span_data, status,
+                              time_event)
+from opencensus.trace.exporters import jaeger_encoder, jaeger_exporter
+from opencensus.trace.exporters.gen.jaeger import agent, jaeger
+
+TRACE_ID = '6e0c63257de34c92bf9efcd03927272e'
+OTHER_TRACE_ID = 'ff0c63257de34c92bf9efcd03927272e'
+SPAN_ID = '6e0c63257de34c92'
+
+
+def _make_span_data(**kwargs):
+    fields = dict(
+        name='span',
+        context=span_context.SpanContext(trace_id=TRACE_ID),
+        span_id=SPAN_ID,
+        parent_span_id=None,
+        attributes=None,
+        start_time='2017-08-15T18:02:26.071158Z',
+        end_time='2017-08-15T18:02:36.071158Z',
+        child_span_count=None,
+        stack_trace=None,
+        time_events=None,
+        links=None,
+        status=None,
+        same_process_as_parent_span=None,
+        span_kind=0,
+    )
+    fields.update(kwargs)
+    return span_data.SpanData(**fields)
+
+
+def _make_span_datas():
+    """Spans with every field translate_to_jaeger writes."""
+    time = datetime.datetime(2017, 8, 15, 18, 2, 26, 71158)
+    links = [
+        link.Link(trace_id=TRACE_ID, span_id=SPAN_ID,
+                  type=link.Type.CHILD_LINKED_SPAN),
+        link.Link(trace_id=OTHER_TRACE_ID, span_id='ffffffffffffffff',
+                  type=link.Type.PARENT_LINKED_SPAN),
+        link.Link(trace_id=TRACE_ID, span_id=SPAN_ID,
+                  type=link.Type.TYPE_UNSPECIFIED),
+    ]
+    return [
+        _make_span_data(
+            name='first',
+            parent_span_id='1111111111111111',
+            attributes={
+                'key_bool': False,
+                'key_true': True,
+                'key_string': 'hello_world',
+                'key_int': 3,
+                'key_negative': -(1 << 40),
+            },
+            time_events=[
+                time_event.TimeEvent(
+                    timestamp=time,
+                    annotation=time_event.Annotation(
+                        description='First Annotation',
+                        attributes={'annotation_bool': True})),
+                time_event.TimeEvent(
+                    timestamp=time,
+                    annotation=time_event.Annotation(
+                        description=None, attributes={})),
+                time_event.TimeEvent(
+                    timestamp=time,
+                    message_event=time_event.MessageEvent(
+                        id=1, type=time_event.Type.SENT)),
+            ],
+            links=links,
+            status=status.Status(code=200, message='success'),
+        ),
+        # Kept in the trace of the span before it.
+        _make_span_data(name=u'中' * 20, context=None, links=[]),
+        _make_span_data(
+            context=span_context.SpanContext(trace_id=OTHER_TRACE_ID),
+            span_id='ffffffffffffffff',
+            attributes={}, time_events=[],
+            status=status.Status(code=-1, message=None)),
+    ] + [
+        # More than fit in the header of a compact list.
+        _make_span_data(
+            span_id='{:016x}'.format(index + 1),
+            attributes={'index': index, 'key_string': 'value'})
+        for index in range(20)
+    ]
+
+
+def _translate(span_datas):
+    exporter = jaeger_exporter.JaegerExporter(service_name=u'my_service')
+    return jaeger.Batch(
+        spans=exporter.translate_to_jaeger(span_datas),
+        process=jaeger.Process(serviceName=u'my_service'))
+
+
+def _write_emit_batch(batch):
+    buffer = TTransport.TMemoryBuffer()
+    agent.Client(
+        iprot=TCompactProtocol.TCompactProtocol(trans=buffer)
+    ).emitBatch(batch)
+    return buffer.getvalue()
+
+
+def _write_submit_batches(batch):
+    buffer = TTransport.TMemoryBuffer()
+    jaeger.Client(
+        iprot=TBinaryProtocol.TBinaryProtocol(trans=buffer)
+    ).send_submitBatches([batch])
+    return buffer.getvalue()
+
+
+def _read_emit_batch(packet):
+    protocol = TCompactProtocol.TCompactProtocol(
+        TTransport.TMemoryBuffer(packet))
+    protocol.readMessageBegin()
+    args = agent.emitBatch_args()
+    args.read(protocol)
+    return args.batch
+
+
+class TestConvertHexStrToInt(unittest.TestCase):
+
+    def test_convert(self):
+        self.assertEqual(
+            jaeger_encoder.convert_hex_str_to_int('ffffffffffffffff'), -1)
+        self.assertEqual(
+            jaeger_encoder.convert_hex_str_to_int('7fffffff'), 0x7fffffff)
+        self.assertIsNone(jaeger_encoder.convert_hex_str_to_int(None))
+
+    def test_get_trace_words(self):
+        trace_words = {}
+
+        words = jaeger_encoder.get_trace_words(TRACE_ID, trace_words)
+
+        self.assertEqual(words, (1846305573, 2112048274))
+        self.assertEqual(trace_words, {TRACE_ID: words})
+        self.assertIs(
+            jaeger_encoder.get_trace_words(TRACE_ID, trace_words), words)
+
+
+class TestCompactEncoder(unittest.TestCase):
+
+    def test_encode_matches_thrift(self):
+        encoder = jaeger_encoder.CompactEncoder(u'my_service')
+        span_datas = _make_span_datas()
+
+        self.assertEqual(
+            encoder.encode(span_datas),
+            _write_emit_batch(_translate(span_datas)))
+
+    def test_encode_empty(self):
+        encoder = jaeger_encoder.CompactEncoder('my_service')
+
+        self.assertEqual(
+            encoder.encode([]), _write_emit_batch(_translate([])))
+
+    def test_encode_caches_tags(self):
+        encoder = jaeger_encoder.CompactEncoder('my_service')
+        span_datas = [_make_span_data(attributes={'key': 'value'})]
+
+        first = encoder.encode(span_datas)
+        self.assertEqual(len(encoder._tag_prefixes), 1)
+        self.assertEqual(encoder.encode(span_datas), first)
+
+        with mock.patch.object(jaeger_encoder, '_MAX_CACHED_TAG_KEYS', 1):
+            encoder.encode([_make_span_data(attributes={'other': 1})])
+        self.assertEqual(len(encoder._tag_prefixes), 1)
+        self.assertEqual(encoder.encode(span_datas), first)
+
+    def test_encode_skips_unsupported_attributes(self):
+        encoder = jaeger_encoder.CompactEncoder('my_service')
+        span_datas = [_make_span_data(attributes={'key_float': .3})]
+
+        with mock.patch.object(jaeger_encoder.log, 'warning') as mock_log:
+            encoded = encoder.encode(span_datas)
+
+        self.assertTrue(mock_log.called)
+        self.assertEqual(_read_emit_batch(encoded).spans[0].tags, [])
+
+    def test_encode_log_timestamp_microseconds(self):
+        encoder = jaeger_encoder.CompactEncoder('my_service')
+        time = datetime.datetime(2017, 8, 15, 18, 2, 26, 71158)
+        span_datas = [_make_span_data(time_events=[
+            time_event.TimeEvent(
+                timestamp=time,
+                annotation=time_event.Annotation(description='annotation'))
+        ])]
+
+        log, = _read_emit_batch(encoder.encode(span_datas)).spans[0].logs
+
+        self.assertEqual(log.timestamp, 1502820146071158)
+
+    def test_encode_packets(self):
+        encoder = jaeger_encoder.CompactEncoder('my_service')
+        span_datas = _make_span_datas()
+
+        packets, dropped = encoder.encode_packets(span_datas, 65000)
+
+        self.assertEqual(packets, [encoder.encode(span_datas)])
+        self.assertEqual(dropped, 0)
+
+    def test_encode_packets_splits(self):
+        encoder = jaeger_encoder.CompactEncoder('my_service')
+        span_datas = [
+            _make_span_data(span_id='{:016x}'.format(index + 1))
+            for index in range(100)]
+
+        packets, dropped = encoder.encode_packets(span_datas, 500)
+
+        self.assertGreater(len(packets), 1)
+        self.assertEqual(dropped, 0)
+        received = []
+        for packet in packets:
+            self.assertLessEqual(len(packet), 500)
+            received.extend(_read_emit_batch(packet).spans)
+        self.assertEqual(received, _translate(span_datas).spans)
+
+    def test_encode_packets_drops_spans_too_large(self):
+        encoder = jaeger_encoder.CompactEncoder('my_service')
+        span_datas = [
+            _make_span_data(name='first'),
+            _make_span_data(name='x' * 200),
+            _make_span_data(name='last'),
+        ]
+
+        packets, dropped = encoder.encode_packets(span_datas, 200)
+
+        self.assertEqual(dropped, 1)
+        self.assertEqual(
+            [span.operationName for packet in packets
+             for span in _read_emit_batch(packet).spans],
+            ['first', 'last'])
+
+
+class TestBinaryEncoder(unittest.TestCase):
+
+    def test_encode_matches_thrift(self):
+        encoder = jaeger_encoder.BinaryEncoder(u'my_service')
+        span_datas = _make_span_datas()
+
+        self.assertEqual(
+            encoder.encode(span_datas),
+            _write_submit_batches(_translate(span_datas)))
+
+    def test_encode_empty(self):
+        encoder = jaeger_encoder.BinaryEncoder('my_service')
+
+        self.assertEqual(
+            encoder.encode([]), _write_submit_batches(_translate([])))
@@ -65,6 +65,71 @@ class TestLoggingExporter(unittest.TestCase):
             span_data_module.format_legacy_trace_json(span_datas)
         )
 
+    def test_emit_multiple_traces(self):
+        exporter = logging_exporter.LoggingExporter()
+        logger = mock.Mock()
+        exporter.logger = logger
+        trace_id1 = '6e0c63257de34c92bf9efcd03927272e'
+        trace_id2 = '2dd43a1d6b2549c6bc2a1a54c2fc0b05'
+
+        span_datas = [
+            span_data_module.SpanData(
+                name='span1',
+                context=span_context.SpanContext(trace_id=trace_id1),
+                span_id='1111',
+                parent_span_id=None,
+                attributes=None,
+                start_time=None,
+                end_time=None,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            ),
+            span_data_module.SpanData(
+                name='span2',
+                context=span_context.SpanContext(trace_id=trace_id2),
+                span_id='2222',
+                parent_span_id=None,
+                attributes=None,
+                start_time=None,
+                end_time=None,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            ),
+            span_data_module.SpanData(
+                name='span3',
+                context=span_context.SpanContext(trace_id=trace_id1),
+                span_id='3333',
+                parent_span_id=None,
+                attributes=None,
+                start_time=None,
+                end_time=None,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            ),
+        ]
+        exporter.emit(span_datas)
+
+        logged = [call[0][0] for call in logger.info.call_args_list]
+        self.assertEqual(
+            [(trace['traceId'], [span['spanId'] for span in trace['spans']])
+             for trace in logged],
+            [(trace_id1, ['1111', '3333']), (trace_id2, ['2222'])])
+
     def test_export(self):
         exporter = logging_exporter.LoggingExporter(transport=MockTransport)
         exporter.export({})
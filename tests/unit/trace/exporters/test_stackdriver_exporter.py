@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import threading
 import unittest
 
 import mock
@@ -29,6 +31,47 @@ class _Client(object):
         self.project = project
 
 
+class _FakeClient(object):
+    """Records the spans of each batch_write_spans request."""
+
+    def __init__(self, project='PROJECT', error=None):
+        self.project = project
+        self.error = error
+        self.requests = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def batch_write_spans(self, name, spans):
+        with self._lock:
+            self.requests.append((name, spans['spans']))
+            self.threads.add(threading.current_thread().ident)
+        if self.error is not None:
+            raise self.error
+
+
+def _make_span_datas(num_spans, name='span'):
+    trace_id = '6e0c63257de34c92bf9efcd03927272e'
+    return [
+        span_data_module.SpanData(
+            name=name,
+            context=span_context.SpanContext(trace_id=trace_id),
+            span_id='{:016x}'.format(index + 1),
+            parent_span_id=None,
+            attributes=None,
+            start_time=None,
+            end_time=None,
+            child_span_count=None,
+            stack_trace=None,
+            time_events=None,
+            links=None,
+            status=None,
+            same_process_as_parent_span=None,
+            span_kind=0,
+        )
+        for index in range(num_spans)
+    ]
+
+
 class TestStackdriverExporter(unittest.TestCase):
 
     def test_constructor_default(self):
@@ -140,6 +183,76 @@ class TestStackdriverExporter(unittest.TestCase):
         client.batch_write_spans.assert_called_with(name, stackdriver_spans)
         self.assertTrue(client.batch_write_spans.called)
 
+    def test_emit_multiple_traces(self):
+        trace_id1 = '6e0c63257de34c92bf9efcd03927272e'
+        trace_id2 = '2dd43a1d6b2549c6bc2a1a54c2fc0b05'
+        span_datas = [
+            span_data_module.SpanData(
+                name='span1',
+                context=span_context.SpanContext(trace_id=trace_id1),
+                span_id='1111',
+                parent_span_id=None,
+                attributes=None,
+                start_time=None,
+                end_time=None,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            ),
+            span_data_module.SpanData(
+                name='span2',
+                context=span_context.SpanContext(trace_id=trace_id2),
+                span_id='2222',
+                parent_span_id=None,
+                attributes=None,
+                start_time=None,
+                end_time=None,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            ),
+            span_data_module.SpanData(
+                name='span3',
+                context=span_context.SpanContext(trace_id=trace_id1),
+                span_id='3333',
+                parent_span_id=None,
+                attributes=None,
+                start_time=None,
+                end_time=None,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            ),
+        ]
+
+        client = mock.Mock()
+        client.project = 'PROJECT'
+        exporter = stackdriver_exporter.StackdriverExporter(client=client)
+
+        exporter.emit(span_datas)
+
+        # All the traces are sent in a single request.
+        client.batch_write_spans.assert_called_once()
+        name, stackdriver_spans = client.batch_write_spans.call_args[0]
+        self.assertEqual(name, 'projects/PROJECT')
+        self.assertEqual(
+            [span['name'] for span in stackdriver_spans['spans']],
+            ['projects/PROJECT/traces/{}/spans/1111'.format(trace_id1),
+             'projects/PROJECT/traces/{}/spans/3333'.format(trace_id1),
+             'projects/PROJECT/traces/{}/spans/2222'.format(trace_id2)])
+
     def test_translate_to_stackdriver(self):
         project_id = 'PROJECT'
         trace_id = '6e0c63257de34c92bf9efcd03927272e'
@@ -229,6 +342,129 @@ class TestStackdriverExporter(unittest.TestCase):
         self.assertEqual(spans, expected_traces)
 
 
+class TestStackdriverExporterSplit(unittest.TestCase):
+
+    def _make_exporter(self, client, **kwargs):
+        exporter = stackdriver_exporter.StackdriverExporter(
+            client=client, **kwargs)
+        self.addCleanup(exporter.close)
+        return exporter
+
+    def _sent_span_ids(self, client):
+        return sorted(span['spanId'] for _, spans in client.requests
+                      for span in spans)
+
+    def test_emit_single_request(self):
+        client = _FakeClient()
+        exporter = self._make_exporter(client)
+
+        exporter.emit(_make_span_datas(10))
+
+        self.assertEqual(len(client.requests), 1)
+        self.assertIsNone(exporter._pool)
+
+    def test_emit_splits_by_span_count(self):
+        client = _FakeClient()
+        exporter = self._make_exporter(client, max_spans_per_request=4)
+        span_datas = _make_span_datas(10)
+
+        exporter.emit(span_datas)
+
+        self.assertEqual(
+            sorted(len(spans) for _, spans in client.requests), [2, 4, 4])
+        self.assertEqual(
+            set(name for name, _ in client.requests), {'projects/PROJECT'})
+        self.assertEqual(
+            self._sent_span_ids(client),
+            sorted(span_data.span_id for span_data in span_datas))
+        # Sent by the threads of the pool.
+        self.assertNotIn(threading.current_thread().ident, client.threads)
+
+    def test_emit_splits_by_bytes(self):
+        client = _FakeClient()
+        exporter = self._make_exporter(client, max_request_bytes=2000)
+        span_datas = _make_span_datas(10, name='x' * 300)
+
+        exporter.emit(span_datas)
+
+        self.assertGreater(len(client.requests), 1)
+        for _, spans in client.requests:
+            self.assertLessEqual(
+                sum(len(json.dumps(span, separators=(',', ':')))
+                    for span in spans),
+                2000)
+        self.assertEqual(len(self._sent_span_ids(client)), 10)
+
+    def test_split_large_span_alone(self):
+        exporter = self._make_exporter(_FakeClient(), max_request_bytes=10)
+
+        chunks = exporter._split([{'spanId': '1'}, {'spanId': '2'}])
+
+        self.assertEqual(chunks, [[{'spanId': '1'}], [{'spanId': '2'}]])
+
+    def test_split_single_request(self):
+        exporter = self._make_exporter(_FakeClient())
+        spans = [{'spanId': str(index)} for index in range(3)]
+
+        self.assertEqual(exporter._split(spans), [spans])
+        self.assertEqual(exporter._split([]), [])
+
+    def test_estimate_json_size(self):
+        values = [
+            {'name': 'span', 'attributes': {'attributeMap': {
+                'int': {'int_value': 12345},
+                'bool': {'bool_value': True},
+                'str': {'string_value': {
+                    'value': 'x' * 100, 'truncated_byte_count': 0}},
+            }}, 'links': None, 'childSpanCount': 0},
+            [1.5, None, ['a', 'b'], ()],
+            {},
+            [],
+        ]
+
+        for value in values:
+            self.assertGreaterEqual(
+                stackdriver_exporter._estimate_json_size(value),
+                len(json.dumps(value, separators=(',', ':'))))
+
+        self.assertEqual(
+            stackdriver_exporter._estimate_json_size(object),
+            len(str(object)) + 2)
+
+    def test_emit_failed(self):
+        client = _FakeClient(error=ValueError('failed'))
+        exporter = self._make_exporter(client, max_spans_per_request=2)
+
+        with self.assertRaises(ValueError):
+            exporter.emit(_make_span_datas(6))
+
+    def test_pool_after_fork(self):
+        exporter = self._make_exporter(_FakeClient())
+        pool = exporter.pool
+        self.assertIs(exporter.pool, pool)
+
+        with mock.patch.object(
+                stackdriver_exporter.fork, 'get_fork_marker',
+                return_value=-1):
+            self.assertIsNot(exporter.pool, pool)
+        pool.close()
+
+    def test_default_attributes_computed_once(self):
+        client = _FakeClient()
+        with mock.patch.object(
+                stackdriver_exporter, 'is_gae_environment',
+                return_value=False) as mock_is_gae:
+            exporter = self._make_exporter(client)
+            exporter.emit(_make_span_datas(3))
+
+        mock_is_gae.assert_called_once_with()
+        [(_, spans)] = client.requests
+        for span in spans:
+            self.assertEqual(
+                span['attributes']['attributeMap'],
+                exporter.default_attributes)
+
+
 class Test_set_attributes_gae(unittest.TestCase):
 
     def test_set_attributes_gae(self):
@@ -0,0 +1,188 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+import mock
+
+from opencensus.stats import execution_context
+from opencensus.stats import measure_to_view_map as measure_to_view_map_module
+from opencensus.stats import stats as stats_module
+from opencensus.trace.exporters import telemetry
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(telemetry.unregister_views)
+        execution_context.set_measure_to_view_map(
+            measure_to_view_map_module.MeasureToViewMap())
+        self.addCleanup(execution_context.set_measure_to_view_map, {})
+        self.view_manager = stats_module.Stats().view_manager
+
+    def _get_data(self, view):
+        view_data = self.view_manager.get_view(view.name)
+        return {key: data.count_data for key, data
+                in view_data.tag_value_aggregation_map.items()}
+
+    def _get_sums(self, view):
+        view_data = self.view_manager.get_view(view.name)
+        return {key: data.sum_data for key, data
+                in view_data.tag_value_aggregation_map.items()}
+
+    def test_not_recording(self):
+        self.assertFalse(telemetry.is_recording())
+
+        # No-op without registered views.
+        telemetry.record(
+            {telemetry.EXPORT_RETRIES_MEASURE: 1},
+            {telemetry.EXPORTER_KEY: 'ZipkinExporter'})
+
+    def test_register_views(self):
+        telemetry.register_views(self.view_manager)
+
+        self.assertTrue(telemetry.is_recording())
+        for view in telemetry.VIEWS:
+            self.assertIsNotNone(self.view_manager.get_view(view.name))
+
+        telemetry.unregister_views()
+        self.assertFalse(telemetry.is_recording())
+
+    def test_record(self):
+        telemetry.register_views(self.view_manager)
+
+        tags = {telemetry.EXPORTER_KEY: 'ZipkinExporter'}
+        telemetry.record({telemetry.EXPORT_RETRIES_MEASURE: 1}, tags)
+        telemetry.record({telemetry.EXPORT_RETRIES_MEASURE: 1}, tags)
+
+        self.assertEqual(
+            self._get_data(telemetry.EXPORT_RETRIES_VIEW),
+            {'ZipkinExporter': 2})
+
+    def test_record_from_other_thread(self):
+        telemetry.register_views(self.view_manager)
+
+        thread = threading.Thread(target=telemetry.record, args=(
+            {telemetry.EXPORT_RETRIES_MEASURE: 1},
+            {telemetry.EXPORTER_KEY: 'JaegerExporter'}))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(
+            self._get_data(telemetry.EXPORT_RETRIES_VIEW),
+            {'JaegerExporter': 1})
+
+    def test_record_float(self):
+        telemetry.register_views(self.view_manager)
+
+        telemetry.record(
+            {telemetry.EXPORT_LATENCY_MEASURE: 12.5},
+            {telemetry.EXPORTER_KEY: 'ZipkinExporter'})
+
+        view_data = self.view_manager.get_view(
+            telemetry.EXPORT_LATENCY_VIEW.name)
+        data = view_data.tag_value_aggregation_map['ZipkinExporter']
+        self.assertEqual(data.count_data, 1)
+        self.assertEqual(data.mean_data, 12.5)
+
+    def test_get_exporter_name(self):
+        class MyExporter(object):
+            pass
+
+        exporter = MyExporter()
+        self.assertEqual(telemetry.get_exporter_name(exporter), 'MyExporter')
+
+        exporter.exporter_name = 'WrappedExporter'
+        self.assertEqual(
+            telemetry.get_exporter_name(exporter), 'WrappedExporter')
+
+    def test_emit(self):
+        telemetry.register_views(self.view_manager)
+        exporter = mock.Mock(spec=['emit'])
+        exporter.emit.side_effect = [None, False, ValueError]
+
+        with mock.patch.object(
+                telemetry, '_monotonic', side_effect=[0, 0.25, 1, 1, 2, 2]):
+            self.assertIsNone(telemetry.emit(exporter, ['a', 'b']))
+            self.assertFalse(telemetry.emit(exporter, ['c']))
+            with self.assertRaises(ValueError):
+                telemetry.emit(exporter, ['d'])
+
+        name = 'Mock'
+        self.assertEqual(self._get_sums(telemetry.SPANS_EXPORTED_VIEW),
+                         {name: 2})
+        self.assertEqual(self._get_sums(telemetry.SPANS_FAILED_VIEW),
+                         {name: 2})
+        latency = self.view_manager.get_view(
+            telemetry.EXPORT_LATENCY_VIEW.name).tag_value_aggregation_map
+        self.assertEqual(latency[name].count_data, 3)
+        self.assertEqual(latency[name].max, 250.0)
+        batch_size = self.view_manager.get_view(
+            telemetry.EXPORT_BATCH_SIZE_VIEW.name).tag_value_aggregation_map
+        self.assertEqual(batch_size[name].max, 2)
+
+    def test_emit_not_recording(self):
+        exporter = mock.Mock(spec=['emit'])
+
+        with mock.patch.object(telemetry, 'record') as mock_record:
+            result = telemetry.emit(exporter, ['a'])
+
+        self.assertIs(result, exporter.emit.return_value)
+        self.assertFalse(mock_record.called)
+
+    def test_record_dropped(self):
+        telemetry.register_views(self.view_manager)
+        exporter = mock.Mock(spec=['emit'])
+
+        telemetry.record_dropped(exporter, 0)
+        telemetry.record_dropped(exporter, 3)
+
+        self.assertEqual(self._get_sums(telemetry.SPANS_DROPPED_VIEW),
+                         {'Mock': 3})
+
+    def test_record_emit(self):
+        telemetry.register_views(self.view_manager)
+        exporter = mock.Mock(spec=['emit_async'])
+
+        telemetry.record_emit(exporter, 2, True, 0.5)
+        telemetry.record_emit(exporter, 3, False, 1)
+
+        self.assertEqual(self._get_sums(telemetry.SPANS_EXPORTED_VIEW),
+                         {'Mock': 2})
+        self.assertEqual(self._get_sums(telemetry.SPANS_FAILED_VIEW),
+                         {'Mock': 3})
+        latency = self.view_manager.get_view(
+            telemetry.EXPORT_LATENCY_VIEW.name).tag_value_aggregation_map
+        self.assertEqual(latency['Mock'].min, 500.0)
+        self.assertEqual(latency['Mock'].max, 1000.0)
+
+    def test_record_emit_not_recording(self):
+        with mock.patch.object(telemetry, 'record') as mock_record:
+            telemetry.record_emit(mock.Mock(), 1, True, 0.5)
+
+        self.assertFalse(mock_record.called)
+
+    def test_record_queue_depth(self):
+        telemetry.register_views(self.view_manager)
+        exporter = mock.Mock(spec=['emit'])
+
+        telemetry.record_queue_depth(exporter, 0)
+        telemetry.record_queue_depth(exporter, 100)
+
+        view_data = self.view_manager.get_view(
+            telemetry.QUEUE_DEPTH_VIEW.name)
+        data = view_data.tag_value_aggregation_map['Mock']
+        self.assertEqual(data.count_data, 2)
+        self.assertEqual(data.max, 100)
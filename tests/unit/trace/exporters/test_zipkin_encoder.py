@@ -0,0 +1,248 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import unittest
+
+import mock
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import zipkin_encoder
+
+TRACE_ID = '6e0c63257de34c92bf9efcd03927272e'
+LOCAL_ENDPOINT = {'serviceName': 'my_service', 'port': 9411}
+
+
+def _make_span_data(**kwargs):
+    fields = dict(
+        name='span',
+        context=span_context.SpanContext(trace_id=TRACE_ID),
+        span_id='6e0c63257de34c92',
+        parent_span_id=None,
+        attributes=None,
+        start_time_ns=1502820146071158000,
+        end_time_ns=1502820146081158000,
+        child_span_count=None,
+        stack_trace=None,
+        time_events=None,
+        links=None,
+        status=None,
+        same_process_as_parent_span=None,
+        span_kind=0,
+    )
+    fields.update(kwargs)
+    return span_data_module.SpanData(**fields)
+
+
+def _make_zipkin_proto_classes():
+    """Build the ListOfSpans message of zipkin.proto3 with the protobuf
+    package, to check the encoder against.
+    """
+    from google.protobuf import descriptor_pb2
+    from google.protobuf import descriptor_pool
+    from google.protobuf import message_factory
+
+    field = descriptor_pb2.FieldDescriptorProto
+    file_proto = descriptor_pb2.FileDescriptorProto(
+        name='test_zipkin.proto', package='test_zipkin.proto3',
+        syntax='proto3')
+
+    def add_message(name, fields, parent=file_proto):
+        message = parent.message_type.add(name=name) \
+            if parent is file_proto else parent.nested_type.add(name=name)
+        for number, (field_name, field_type, label, type_name) in \
+                enumerate(fields, 1):
+            if field_name is None:
+                continue
+            message.field.add(
+                name=field_name, number=number, type=field_type,
+                label=label or field.LABEL_OPTIONAL, type_name=type_name)
+        return message
+
+    add_message('Endpoint', [
+        ('service_name', field.TYPE_STRING, None, None),
+        ('ipv4', field.TYPE_BYTES, None, None),
+        ('ipv6', field.TYPE_BYTES, None, None),
+        ('port', field.TYPE_INT32, None, None),
+    ])
+    span = add_message('Span', [
+        ('trace_id', field.TYPE_BYTES, None, None),
+        ('parent_id', field.TYPE_BYTES, None, None),
+        ('id', field.TYPE_BYTES, None, None),
+        ('kind', field.TYPE_INT32, None, None),
+        ('name', field.TYPE_STRING, None, None),
+        ('timestamp', field.TYPE_FIXED64, None, None),
+        ('duration', field.TYPE_UINT64, None, None),
+        ('local_endpoint', field.TYPE_MESSAGE, None,
+         '.test_zipkin.proto3.Endpoint'),
+        (None, None, None, None),
+        (None, None, None, None),
+        ('tags', field.TYPE_MESSAGE, field.LABEL_REPEATED,
+         '.test_zipkin.proto3.Span.TagsEntry'),
+    ])
+    tags_entry = add_message('TagsEntry', [
+        ('key', field.TYPE_STRING, None, None),
+        ('value', field.TYPE_STRING, None, None),
+    ], parent=span)
+    tags_entry.options.map_entry = True
+    add_message('ListOfSpans', [
+        ('spans', field.TYPE_MESSAGE, field.LABEL_REPEATED,
+         '.test_zipkin.proto3.Span'),
+    ])
+
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    return message_factory.MessageFactory(pool).GetPrototype(
+        pool.FindMessageTypeByName('test_zipkin.proto3.ListOfSpans'))
+
+
+class TestJsonEncoder(unittest.TestCase):
+
+    def test_encode(self):
+        encoder = zipkin_encoder.JsonEncoder(LOCAL_ENDPOINT)
+        span_datas = [
+            _make_span_data(span_kind=1, attributes={'key': 'value'}),
+            _make_span_data(
+                context=None, parent_span_id='6e0c63257de34c93',
+                span_kind=2),
+        ]
+
+        encoded = json.loads(encoder.encode(span_datas).decode('utf-8'))
+
+        self.assertEqual(encoded, [
+            {
+                'traceId': TRACE_ID,
+                'id': '6e0c63257de34c92',
+                'name': 'span',
+                'timestamp': 1502820146071158,
+                'duration': 10000,
+                'localEndpoint': LOCAL_ENDPOINT,
+                'tags': {'key': 'value'},
+                'kind': 'SERVER',
+            },
+            {
+                'traceId': None,
+                'id': '6e0c63257de34c92',
+                'name': 'span',
+                'timestamp': 1502820146071158,
+                'duration': 10000,
+                'localEndpoint': LOCAL_ENDPOINT,
+                'tags': {},
+                'kind': 'CLIENT',
+                'parentId': '6e0c63257de34c93',
+            },
+        ])
+
+    def test_encode_empty(self):
+        encoder = zipkin_encoder.JsonEncoder(LOCAL_ENDPOINT)
+
+        self.assertEqual(encoder.encode([]), b'[]')
+
+    def test_encode_escapes_and_truncates(self):
+        encoder = zipkin_encoder.JsonEncoder(LOCAL_ENDPOINT)
+        name = u'"quoted"\né' + u'x' * 200
+
+        with mock.patch.object(zipkin_encoder.log, 'warning') as mock_log:
+            encoded = json.loads(encoder.encode([_make_span_data(
+                name=name, attributes={'float': 1.5, 'int': 3})]).decode(
+                    'utf-8'))
+
+        self.assertEqual(encoded[0]['name'], name[:127])
+        self.assertEqual(encoded[0]['tags'], {'int': '3'})
+        self.assertTrue(mock_log.called)
+
+
+class TestProtobufEncoder(unittest.TestCase):
+
+    def test_encode_bytes(self):
+        encoder = zipkin_encoder.ProtobufEncoder({'serviceName': 'a'})
+        span = _make_span_data(
+            name='b', span_kind=2, start_time_ns=2000, end_time_ns=5000,
+            attributes={'k': 'v'})
+
+        self.assertEqual(encoder.encode([span]), (
+            b'\x0a\x39'  # ListOfSpans.spans
+            b'\x0a\x10' + bytes(bytearray.fromhex(TRACE_ID)) +
+            b'\x1a\x08' + bytes(bytearray.fromhex('6e0c63257de34c92')) +
+            b'\x20\x01'  # kind CLIENT
+            b'\x2a\x01b'  # name
+            b'\x31\x02\x00\x00\x00\x00\x00\x00\x00'  # timestamp
+            b'\x38\x03'  # duration
+            b'\x42\x03\x0a\x01a'  # local_endpoint
+            b'\x5a\x06\x0a\x01k\x12\x01v'))  # tags
+
+    def test_encode_negative_duration(self):
+        encoder = zipkin_encoder.ProtobufEncoder({'serviceName': 'a'})
+        span = _make_span_data(
+            name='b', start_time_ns=5000, end_time_ns=2000)
+
+        self.assertEqual(encoder.encode_span(span), (
+            b'\x0a\x10' + bytes(bytearray.fromhex(TRACE_ID)) +
+            b'\x1a\x08' + bytes(bytearray.fromhex('6e0c63257de34c92')) +
+            b'\x2a\x01b'  # name
+            b'\x31\x05\x00\x00\x00\x00\x00\x00\x00'  # timestamp
+            b'\x42\x03\x0a\x01a'))  # local_endpoint, no duration
+
+    def test_encode_empty(self):
+        encoder = zipkin_encoder.ProtobufEncoder(LOCAL_ENDPOINT)
+
+        self.assertEqual(encoder.encode([]), b'')
+
+    def test_matches_protobuf(self):
+        try:
+            list_of_spans_class = _make_zipkin_proto_classes()
+        except ImportError:  # pragma: NO COVER
+            self.skipTest('requires protobuf')
+
+        local_endpoint = dict(LOCAL_ENDPOINT, ipv4='10.1.2.3', ipv6='::1')
+        encoder = zipkin_encoder.ProtobufEncoder(local_endpoint)
+        span_datas = [
+            _make_span_data(
+                span_kind=1, parent_span_id='6e0c63257de34c93',
+                attributes={'key': 'value', 'count': 3,
+                            'unicode': u'é'}),
+            _make_span_data(name=u'中' * 100, span_kind=0),
+        ]
+
+        list_of_spans = list_of_spans_class()
+        list_of_spans.ParseFromString(encoder.encode(span_datas))
+
+        first, second = list_of_spans.spans
+        self.assertEqual(first.trace_id, bytes(bytearray.fromhex(TRACE_ID)))
+        self.assertEqual(
+            first.parent_id, bytes(bytearray.fromhex('6e0c63257de34c93')))
+        self.assertEqual(
+            first.id, bytes(bytearray.fromhex('6e0c63257de34c92')))
+        self.assertEqual(first.kind, 2)
+        self.assertEqual(first.name, 'span')
+        self.assertEqual(first.timestamp, 1502820146071158)
+        self.assertEqual(first.duration, 10000)
+        self.assertEqual(first.local_endpoint.service_name, 'my_service')
+        self.assertEqual(first.local_endpoint.ipv4, b'\x0a\x01\x02\x03')
+        self.assertEqual(
+            first.local_endpoint.ipv6, b'\x00' * 15 + b'\x01')
+        self.assertEqual(first.local_endpoint.port, 9411)
+        self.assertEqual(
+            dict(first.tags),
+            {'key': 'value', 'count': '3', 'unicode': u'é'})
+
+        self.assertEqual(second.kind, 0)
+        self.assertEqual(second.parent_id, b'')
+        # Truncated to 128 bytes, on a character boundary.
+        self.assertEqual(second.name, u'中' * 42)
+
+        # Byte for byte what protobuf serializes.
+        self.assertEqual(
+            list_of_spans.SerializeToString(), encoder.encode(span_datas))
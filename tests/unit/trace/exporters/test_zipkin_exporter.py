@@ -12,15 +12,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
 import unittest
 
 import mock
+import six
 
 from opencensus.trace import span_context
 from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters import zipkin_encoder
 from opencensus.trace.exporters import zipkin_exporter
 
 
+def _make_span_data(trace_id='6e0c63257de34c92bf9efcd03927272e',
+                    parent_span_id=None, span_kind=1, attributes=None):
+    return span_data_module.SpanData(
+        name='span',
+        context=span_context.SpanContext(trace_id=trace_id),
+        span_id='6e0c63257de34c92',
+        parent_span_id=parent_span_id,
+        attributes=attributes,
+        start_time_ns=1502820146071158000,
+        end_time_ns=1502820146081158000,
+        child_span_count=None,
+        stack_trace=None,
+        time_events=None,
+        links=None,
+        status=None,
+        same_process_as_parent_span=None,
+        span_kind=span_kind,
+    )
+
+
 class TestZipkinExporter(unittest.TestCase):
     def test_constructor(self):
         service_name = 'my_service'
@@ -44,6 +67,9 @@ class TestZipkinExporter(unittest.TestCase):
         self.assertEqual(exporter.endpoint, endpoint)
         self.assertEqual(exporter.url, expected_url)
         self.assertEqual(exporter.ipv4, ipv4)
+        self.assertEqual(exporter.pool_size, zipkin_exporter.DEFAULT_POOL_SIZE)
+        self.assertEqual(exporter.timeout, zipkin_exporter.DEFAULT_TIMEOUT)
+        self.assertFalse(exporter.gzip)
 
     def test_export(self):
         exporter = zipkin_exporter.ZipkinExporter(
@@ -52,45 +78,122 @@ class TestZipkinExporter(unittest.TestCase):
 
         self.assertTrue(exporter.transport.export_called)
 
-    @mock.patch('requests.post')
-    @mock.patch.object(zipkin_exporter.ZipkinExporter,
-                       'translate_to_zipkin')
-    def test_emit_succeeded(self, translate_mock, requests_mock):
-        import json
-
-        trace = {'test': 'this_is_for_test'}
-
+    @mock.patch('requests.Session.post')
+    def test_emit_succeeded(self, requests_mock):
         exporter = zipkin_exporter.ZipkinExporter(service_name='my_service')
         response = mock.Mock()
         response.status_code = 202
         requests_mock.return_value = response
-        translate_mock.return_value = trace
-        exporter.emit([])
+        self.assertTrue(exporter.emit([]))
 
         requests_mock.assert_called_once_with(
             url=exporter.url,
-            data=json.dumps(trace),
-            headers=zipkin_exporter.ZIPKIN_HEADERS)
-
-    @mock.patch('requests.post')
-    @mock.patch.object(zipkin_exporter.ZipkinExporter,
-                       'translate_to_zipkin')
-    def test_emit_failed(self, translate_mock, requests_mock):
-        import json
-
-        trace = {'test': 'this_is_for_test'}
+            data=b'[]',
+            headers=zipkin_exporter.ZIPKIN_HEADERS,
+            timeout=zipkin_exporter.DEFAULT_TIMEOUT)
 
+    @mock.patch('requests.Session.post')
+    def test_emit_failed(self, requests_mock):
         exporter = zipkin_exporter.ZipkinExporter(service_name='my_service')
         response = mock.Mock()
         response.status_code = 400
         requests_mock.return_value = response
-        translate_mock.return_value = trace
-        exporter.emit([])
+        self.assertFalse(exporter.emit([]))
 
         requests_mock.assert_called_once_with(
             url=exporter.url,
-            data=json.dumps(trace),
-            headers=zipkin_exporter.ZIPKIN_HEADERS)
+            data=b'[]',
+            headers=zipkin_exporter.ZIPKIN_HEADERS,
+            timeout=zipkin_exporter.DEFAULT_TIMEOUT)
+
+    @mock.patch('requests.Session.post')
+    def test_emit_gzip(self, requests_mock):
+        import gzip
+
+        exporter = zipkin_exporter.ZipkinExporter(
+            service_name='my_service', gzip=True)
+        requests_mock.return_value.status_code = 202
+        self.assertTrue(exporter.emit([]))
+
+        kwargs = requests_mock.call_args[1]
+        self.assertEqual(kwargs['headers'], {
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+        })
+        body = gzip.GzipFile(fileobj=six.BytesIO(kwargs['data'])).read()
+        self.assertEqual(body, b'[]')
+
+    @mock.patch('requests.Session.post')
+    def test_emit_proto(self, requests_mock):
+        exporter = zipkin_exporter.ZipkinExporter(
+            service_name='my_service',
+            encoding=zipkin_exporter.ENCODING_PROTO)
+        requests_mock.return_value.status_code = 202
+        span_datas = [_make_span_data()]
+
+        self.assertTrue(exporter.emit(span_datas))
+
+        kwargs = requests_mock.call_args[1]
+        self.assertEqual(
+            kwargs['headers'], {'Content-Type': 'application/x-protobuf'})
+        self.assertEqual(
+            kwargs['data'], exporter.encoder.encode(span_datas))
+
+    def test_encoder_matches_translate_to_zipkin(self):
+        import json
+
+        exporter = zipkin_exporter.ZipkinExporter(
+            service_name='my_service', ipv4='127.0.0.1', ipv6='::1')
+        span_datas = [
+            _make_span_data(),
+            _make_span_data(
+                trace_id='2dd43a1d6b2549c6bc2a1a54c2fc0b05',
+                parent_span_id='6e0c63257de34c93', span_kind=2,
+                attributes={'key': 'v' * 200, 'k' * 200: 1, 'bool': True,
+                            'unicode': u'\u00e9\u4e2d', 'float': 0.5}),
+        ]
+
+        with mock.patch('opencensus.trace.exporters.zipkin_exporter'
+                        '.logging.warn'), \
+                mock.patch.object(zipkin_encoder.log, 'warning'):
+            encoded = json.loads(
+                exporter.encoder.encode(span_datas).decode('utf-8'))
+            translated = exporter.translate_to_zipkin(span_datas)
+
+        self.assertEqual(encoded, translated)
+
+    def test_session(self):
+        exporter = zipkin_exporter.ZipkinExporter(
+            service_name='my_service', pool_size=3)
+
+        session = exporter.session
+
+        # The connections are kept between batches.
+        self.assertIs(exporter.session, session)
+        adapter = session.get_adapter(exporter.url)
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+        # A forked child gets its own session.
+        with mock.patch(
+                'opencensus.common.fork.get_fork_marker', return_value=-1):
+            self.assertIsNot(exporter.session, session)
+
+    @unittest.skipIf(sys.version_info < (3, 5), 'requires Python 3.5')
+    def test_emit_async(self):
+        exporter = zipkin_exporter.ZipkinExporter(service_name='my_service')
+
+        patch_post = mock.patch(
+            'opencensus.trace.exporters.transports.async_transport.post',
+            new_callable=mock.Mock)
+        with patch_post as mock_post:
+            result = exporter.emit_async([])
+
+        self.assertIs(result, mock_post.return_value)
+        mock_post.assert_called_once_with(
+            exporter.url,
+            b'[]',
+            headers=zipkin_exporter.ZIPKIN_HEADERS,
+            success_status_codes=zipkin_exporter.SUCCESS_STATUS_CODE)
 
     def test_translate_to_zipkin_span_kind_none(self):
         trace_id = '6e0c63257de34c92bf9efcd03927272e'
@@ -208,45 +311,108 @@ class TestZipkinExporter(unittest.TestCase):
         # Test ipv4 local endpoint
         exporter_ipv4 = zipkin_exporter.ZipkinExporter(
             service_name='my_service', ipv4=ipv4)
-        ipv4_trace = span_data_module.format_legacy_trace_json(spans_ipv4)
-        zipkin_spans_ipv4 = exporter_ipv4.translate_to_zipkin(
-            trace_id=trace_id,
-            spans=ipv4_trace.get('spans'))
+        zipkin_spans_ipv4 = exporter_ipv4.translate_to_zipkin(spans_ipv4)
 
         self.assertEqual(zipkin_spans_ipv4, expected_zipkin_spans_ipv4)
 
         # Test ipv6 local endpoint
         exporter_ipv6 = zipkin_exporter.ZipkinExporter(
             service_name='my_service', ipv6=ipv6)
-        ipv6_trace = span_data_module.format_legacy_trace_json(spans_ipv6)
-        zipkin_spans_ipv6 = exporter_ipv6.translate_to_zipkin(
-            trace_id=trace_id,
-            spans=ipv6_trace.get('spans')
-        )
+        zipkin_spans_ipv6 = exporter_ipv6.translate_to_zipkin(spans_ipv6)
 
         self.assertEqual(zipkin_spans_ipv6, expected_zipkin_spans_ipv6)
 
+    def test_translate_to_zipkin_exact_duration(self):
+        trace_id = '6e0c63257de34c92bf9efcd03927272e'
+        span_datas = [
+            span_data_module.SpanData(
+                name='child_span',
+                context=span_context.SpanContext(trace_id=trace_id),
+                span_id='6e0c63257de34c92',
+                parent_span_id=None,
+                attributes=None,
+                start_time_ns=1502820146071158123,
+                end_time_ns=1502820146071159999,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=None,
+            ),
+        ]
+
+        exporter = zipkin_exporter.ZipkinExporter(service_name='my_service')
+        zipkin_spans = exporter.translate_to_zipkin(span_datas)
+
+        self.assertEqual(zipkin_spans[0]['timestamp'], 1502820146071158)
+        self.assertEqual(zipkin_spans[0]['duration'], 1)
+        self.assertEqual(zipkin_spans[0]['tags'], {})
+
+    def test_translate_to_zipkin_multiple_traces(self):
+        trace_id1 = '6e0c63257de34c92bf9efcd03927272e'
+        trace_id2 = '2dd43a1d6b2549c6bc2a1a54c2fc0b05'
+        span_datas = [
+            span_data_module.SpanData(
+                name='span1',
+                context=span_context.SpanContext(trace_id=trace_id1),
+                span_id='1111',
+                parent_span_id=None,
+                attributes=None,
+                start_time_ns=0,
+                end_time_ns=0,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            ),
+            span_data_module.SpanData(
+                name='span2',
+                context=span_context.SpanContext(trace_id=trace_id2),
+                span_id='2222',
+                parent_span_id=None,
+                attributes=None,
+                start_time_ns=0,
+                end_time_ns=0,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            ),
+        ]
+
+        exporter = zipkin_exporter.ZipkinExporter(service_name='my_service')
+        zipkin_spans = exporter.translate_to_zipkin(span_datas)
+
+        self.assertEqual(
+            [(span['traceId'], span['id']) for span in zipkin_spans],
+            [(trace_id1, '1111'), (trace_id2, '2222')])
+
+    def test_translate_to_zipkin_empty(self):
+        exporter = zipkin_exporter.ZipkinExporter(service_name='my_service')
+        self.assertEqual(exporter.translate_to_zipkin([]), [])
+
     def test_ignore_incorrect_spans(self):
-        span1 = {
-            'attributes': {
-                'attributeMap': {
-                    'float_value': {
-                        'value': 0.1
-                    }
-                }
-            }
+        attributes1 = {
+            'float_value': 0.1,
         }
-        self.assertEqual(zipkin_exporter._extract_tags_from_span(span1), {})
+        self.assertEqual(
+            zipkin_exporter._extract_tags_from_span(attributes1), {})
 
-        span2 = {
-            'attributes': {
-                'attributeMap': {
-                    'bool_value': False
-                }
-
-            }
+        attributes2 = {
+            'dict_value': {'bool_value': False},
         }
-        self.assertEqual(zipkin_exporter._extract_tags_from_span(span2), {})
+        self.assertEqual(
+            zipkin_exporter._extract_tags_from_span(attributes2), {})
+
+        self.assertEqual(zipkin_exporter._extract_tags_from_span(None), {})
 
 
 class MockTransport(object):
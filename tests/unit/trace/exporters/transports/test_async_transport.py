@@ -0,0 +1,354 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import threading
+import unittest
+
+import mock
+
+if sys.version_info < (3, 5):  # pragma: NO COVER
+    raise unittest.SkipTest('asyncio transport requires Python 3.5')
+
+import asyncio  # noqa: E402
+
+from six.moves import BaseHTTPServer  # noqa: E402
+
+from opencensus.trace.exporters.transports import async_transport  # noqa
+
+
+class _Exporter(object):
+
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, span_datas):
+        raise AssertionError('emit_async must be used')
+
+    def emit_async(self, span_datas):
+        self.emitted.append(list(span_datas))
+        return asyncio.sleep(0)
+
+
+class _LoopTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.addCleanup(asyncio.set_event_loop, None)
+
+    def _export_soon(self, transport, span_datas):
+        self.loop.call_soon(transport.export, span_datas)
+
+    def _run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+
+class Test_SpanQueue(_LoopTestCase):
+
+    def test_counts_spans(self):
+        queue = async_transport._SpanQueue(max_spans=3)
+
+        queue.put_nowait(['a', 'b'])
+        self.assertEqual(queue.num_spans, 2)
+        self.assertFalse(queue.full())
+        self.assertTrue(queue.fits(1))
+        self.assertFalse(queue.fits(2))
+
+        queue.put_nowait(['c'])
+        self.assertTrue(queue.full())
+        queue.put_marker(async_transport._FLUSH)
+        self.assertEqual(queue.qsize(), 3)
+
+        self.assertEqual(queue.get_nowait(), ['a', 'b'])
+        self.assertEqual(queue.num_spans, 1)
+        self.assertFalse(queue.full())
+
+    def test_unbounded(self):
+        queue = async_transport._SpanQueue()
+
+        queue.put_nowait(['a'] * 100)
+
+        self.assertFalse(queue.full())
+        self.assertTrue(queue.fits(1000))
+
+
+class TestAsyncTransport(_LoopTestCase):
+
+    def test_export_without_running_loop(self):
+        exporter = mock.Mock()
+        transport = async_transport.AsyncTransport(exporter)
+
+        transport.export(['a'])
+
+        exporter.emit.assert_called_once_with(['a'])
+        self.assertEqual(transport.queue_depth, 0)
+
+    def test_export_batches(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(exporter, max_latency=60)
+
+        self._export_soon(transport, ['a', 'b'])
+        self._export_soon(transport, ['c'])
+        self.loop.call_soon(
+            lambda: self.assertEqual(transport.queue_depth, 3))
+        self._run(transport.flush_async())
+
+        self.assertEqual(exporter.emitted, [['a', 'b', 'c']])
+        self.assertEqual(transport.queue_depth, 0)
+        self._run(transport.close())
+
+    def test_max_batch_size(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(
+            exporter, max_batch_size=2, max_latency=60)
+
+        for name in 'abcde':
+            self._export_soon(transport, [name])
+        self._run(transport.flush_async())
+
+        self.assertEqual(exporter.emitted, [['a', 'b'], ['c', 'd'], ['e']])
+        self._run(transport.close())
+
+    def test_max_latency(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(
+            exporter, max_latency=0.01)
+
+        self._export_soon(transport, ['a'])
+        self._run(asyncio.sleep(0.1))
+
+        # Exported by the deadline, without a flush.
+        self.assertEqual(exporter.emitted, [['a']])
+        self._run(transport.close())
+
+    def test_export_drops_when_full(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(
+            exporter, max_queue_size=2, max_latency=60)
+
+        self._export_soon(transport, ['a', 'b'])
+        self._export_soon(transport, ['c'])
+        self._run(transport.flush_async())
+
+        self.assertEqual(exporter.emitted, [['a', 'b']])
+        self.assertEqual(transport.dropped_spans, 1)
+        self._run(transport.close())
+
+    def test_export_async_waits_for_room(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(
+            exporter, max_queue_size=1, max_latency=60)
+
+        self._run(asyncio.gather(
+            transport.export_async(['a']),
+            transport.export_async(['b']),
+            transport.export_async(['c'])))
+        self._run(transport.flush_async())
+
+        self.assertEqual(exporter.emitted, [['a', 'b', 'c']])
+        self.assertEqual(transport.dropped_spans, 0)
+        self._run(transport.close())
+
+    def test_emit_in_executor(self):
+        exporter = mock.Mock(spec=['emit'])
+        transport = async_transport.AsyncTransport(exporter)
+
+        self._export_soon(transport, ['a'])
+        self._run(transport.flush_async())
+
+        exporter.emit.assert_called_once_with(['a'])
+        self._run(transport.close())
+
+    def test_emit_async_returns_none(self):
+        exporter = mock.Mock(spec=['emit_async'])
+        exporter.emit_async.return_value = None
+        transport = async_transport.AsyncTransport(exporter)
+
+        self._export_soon(transport, ['a'])
+        self._run(transport.flush_async())
+
+        exporter.emit_async.assert_called_once_with(['a'])
+        self._run(transport.close())
+
+    def test_emit_error_logged(self):
+        exporter = mock.Mock(spec=['emit_async'])
+        exporter.emit_async.side_effect = ValueError
+        transport = async_transport.AsyncTransport(exporter)
+
+        with mock.patch.object(async_transport.log, 'exception') as mock_log:
+            self._export_soon(transport, ['a'])
+            self._run(transport.flush_async())
+            self._export_soon(transport, ['b'])
+            self._run(transport.flush_async())
+
+        # The export task keeps running after an error.
+        self.assertEqual(exporter.emit_async.call_count, 2)
+        self.assertEqual(mock_log.call_count, 2)
+        self._run(transport.close())
+
+    def test_emit_async_recorded(self):
+        exporter = mock.Mock(spec=['emit_async'])
+        exporter.emit_async.side_effect = [
+            asyncio.sleep(0, result=None), asyncio.sleep(0, result=False),
+            ValueError]
+        transport = async_transport.AsyncTransport(exporter)
+
+        with mock.patch.object(async_transport.log, 'exception'):
+            with mock.patch.object(
+                    async_transport.telemetry, 'record_emit') as mock_record:
+                for span_datas in (['a', 'b'], ['c'], ['d']):
+                    self._export_soon(transport, span_datas)
+                    self._run(transport.flush_async())
+
+        self.assertEqual(
+            [call[0][:3] for call in mock_record.call_args_list],
+            [(exporter, 2, True), (exporter, 1, False),
+             (exporter, 1, False)])
+        self._run(transport.close())
+
+    def test_queue_depth_recorded(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(exporter)
+
+        with mock.patch.object(
+                async_transport.telemetry,
+                'record_queue_depth') as mock_record:
+            self._export_soon(transport, ['a'])
+            self._run(transport.flush_async())
+
+        mock_record.assert_called_once_with(exporter, 0)
+        self._run(transport.close())
+
+    def test_flush_without_running_loop(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(exporter, max_latency=60)
+
+        # No spans exported yet.
+        transport.flush()
+
+        self._export_soon(transport, ['a'])
+        self._run(asyncio.sleep(0))
+        transport.flush()
+
+        self.assertEqual(exporter.emitted, [['a']])
+        self._run(transport.close())
+
+    def test_flush_in_running_loop(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(exporter, max_latency=60)
+
+        self._export_soon(transport, ['a'])
+        self.loop.call_soon(transport.flush)
+        self._run(asyncio.sleep(0.01))
+
+        self.assertEqual(exporter.emitted, [['a']])
+        self._run(transport.close())
+
+    def test_close(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(exporter, max_latency=60)
+
+        # Closing before any export is a no-op.
+        self._run(transport.close())
+
+        self._export_soon(transport, ['a'])
+        self._run(asyncio.sleep(0))
+        task = transport._task
+        self._run(transport.close())
+
+        self.assertEqual(exporter.emitted, [['a']])
+        self.assertTrue(task.cancelled())
+        self.assertIsNone(transport._task)
+
+    def test_new_loop(self):
+        exporter = _Exporter()
+        transport = async_transport.AsyncTransport(exporter, max_latency=60)
+        self._export_soon(transport, ['a'])
+        self._run(transport.flush_async())
+        self._run(transport.close())
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        loop.call_soon(transport.export, ['b'])
+        loop.run_until_complete(transport.flush_async())
+
+        self.assertIs(transport._loop, loop)
+        self.assertEqual(exporter.emitted, [['a'], ['b']])
+        loop.run_until_complete(transport.close())
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        self.server.requests.append(
+            (self.path, dict(self.headers), self.rfile.read(length)))
+        self.send_response(self.server.status_code)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Test_post(_LoopTestCase):
+
+    def _start_server(self, status_code):
+        server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _Handler)
+        server.requests = []
+        server.status_code = status_code
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def _url(self, server, path):
+        return 'http://127.0.0.1:{}{}'.format(server.server_port, path)
+
+    def test_post(self):
+        server = self._start_server(202)
+
+        sent = self._run(async_transport.post(
+            self._url(server, '/api/v2/spans?format=json'), '[]',
+            headers={'Content-Type': 'application/json'}))
+
+        self.assertTrue(sent)
+        path, headers, body = server.requests[0]
+        self.assertEqual(path, '/api/v2/spans?format=json')
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        self.assertEqual(body, b'[]')
+
+    def test_post_failure_status(self):
+        server = self._start_server(500)
+
+        with mock.patch.object(async_transport.log, 'error') as mock_log:
+            sent = self._run(async_transport.post(
+                self._url(server, '/'), b'body'))
+
+        self.assertFalse(sent)
+        self.assertTrue(mock_log.called)
+
+    def test_post_connection_error(self):
+        server = self._start_server(200)
+        url = self._url(server, '/')
+        server.server_close()
+
+        with mock.patch.object(async_transport.log, 'error') as mock_log:
+            sent = self._run(async_transport.post(url, b'body'))
+
+        self.assertFalse(sent)
+        self.assertTrue(mock_log.called)
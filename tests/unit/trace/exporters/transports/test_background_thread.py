@@ -12,12 +12,122 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import threading
+import time
 import unittest
 
 import mock
 
 from opencensus.trace.exporters.transports import background_thread
 
+
+class Test_SpanQueue(unittest.TestCase):
+
+    def test_counts_spans(self):
+        span_queue = background_thread._SpanQueue(max_spans=10)
+
+        span_queue.put_spans([1, 2, 3])
+        span_queue.put_spans([4])
+        span_queue.put_nowait(background_thread._WORKER_TERMINATOR)
+
+        self.assertEqual(span_queue.num_spans, 4)
+        self.assertEqual(span_queue.qsize(), 3)
+
+        self.assertEqual(span_queue.get(), [1, 2, 3])
+        self.assertEqual(span_queue.num_spans, 1)
+
+    def test_unbounded(self):
+        span_queue = background_thread._SpanQueue(max_spans=0)
+
+        for _ in range(100):
+            self.assertEqual(span_queue.put_spans([1] * 100), 0)
+
+        self.assertEqual(span_queue.num_spans, 10000)
+        self.assertEqual(span_queue.dropped_spans, 0)
+
+    def test_drop_newest(self):
+        span_queue = background_thread._SpanQueue(max_spans=4)
+
+        self.assertEqual(span_queue.put_spans([1, 2, 3]), 0)
+        self.assertEqual(span_queue.put_spans([4, 5]), 2)
+        self.assertEqual(span_queue.put_spans([6]), 0)
+
+        self.assertEqual(span_queue.num_spans, 4)
+        self.assertEqual(span_queue.dropped_spans, 2)
+        self.assertEqual(list(span_queue.queue), [[1, 2, 3], [6]])
+
+    def test_drop_oldest(self):
+        policy = background_thread.OverflowPolicy.DROP_OLDEST
+        span_queue = background_thread._SpanQueue(max_spans=4)
+
+        span_queue.put_spans([1, 2], policy)
+        span_queue.put_nowait(background_thread._WORKER_TERMINATOR)
+        span_queue.put_spans([3], policy)
+
+        self.assertEqual(span_queue.put_spans([4, 5, 6], policy), 2)
+        self.assertEqual(span_queue.num_spans, 4)
+        self.assertEqual(span_queue.dropped_spans, 2)
+        self.assertEqual(
+            list(span_queue.queue),
+            [background_thread._WORKER_TERMINATOR, [3], [4, 5, 6]])
+
+        # Dropped items count as done, so join() does not wait for them.
+        for _ in range(3):
+            span_queue.get()
+            span_queue.task_done()
+        span_queue.join()
+
+    def test_batch_larger_than_queue(self):
+        for policy in (background_thread.OverflowPolicy.DROP_NEWEST,
+                       background_thread.OverflowPolicy.BLOCK):
+            span_queue = background_thread._SpanQueue(max_spans=2)
+            span_queue.put_spans([1], policy)
+
+            self.assertEqual(
+                span_queue.put_spans([2, 3, 4], policy, timeout=0.01), 3)
+            self.assertEqual(list(span_queue.queue), [[1]])
+
+            # Accepted once no other spans are queued.
+            span_queue.get()
+            self.assertEqual(span_queue.put_spans([2, 3, 4], policy), 0)
+            self.assertEqual(list(span_queue.queue), [[2, 3, 4]])
+
+    def test_batch_larger_than_queue_drop_oldest(self):
+        policy = background_thread.OverflowPolicy.DROP_OLDEST
+        span_queue = background_thread._SpanQueue(max_spans=2)
+        span_queue.put_spans([1], policy)
+
+        self.assertEqual(span_queue.put_spans([2, 3, 4], policy), 1)
+        self.assertEqual(list(span_queue.queue), [[2, 3, 4]])
+
+    def test_block_timeout(self):
+        policy = background_thread.OverflowPolicy.BLOCK
+        span_queue = background_thread._SpanQueue(max_spans=2)
+        span_queue.put_spans([1, 2], policy)
+
+        self.assertEqual(span_queue.put_spans([3], policy, timeout=0.01), 1)
+        self.assertEqual(span_queue.dropped_spans, 1)
+        self.assertEqual(span_queue.num_spans, 2)
+
+    def test_block_until_room(self):
+        policy = background_thread.OverflowPolicy.BLOCK
+        span_queue = background_thread._SpanQueue(max_spans=2)
+        span_queue.put_spans([1, 2], policy)
+        results = []
+
+        def put():
+            results.append(span_queue.put_spans([3], policy, timeout=10))
+
+        thread = threading.Thread(target=put)
+        thread.start()
+        self.assertEqual(span_queue.get(), [1, 2])
+        thread.join()
+
+        self.assertEqual(results, [0])
+        self.assertEqual(list(span_queue.queue), [[3]])
+
+
 class Test_Worker(unittest.TestCase):
 
     def _start_worker(self, worker):
@@ -40,9 +150,47 @@ class Test_Worker(unittest.TestCase):
         self.assertEqual(worker.exporter, exporter)
         self.assertEqual(worker._grace_period, grace_period)
         self.assertEqual(worker._max_batch_size, max_batch_size)
+        self.assertEqual(
+            worker._queue.max_spans, background_thread._DEFAULT_MAX_QUEUE_SIZE)
+        self.assertEqual(
+            worker._overflow_policy,
+            background_thread.OverflowPolicy.DROP_NEWEST)
         self.assertFalse(worker.is_alive)
         self.assertIsNone(worker._thread)
 
+    def test_enqueue_counters(self):
+        exporter = mock.Mock()
+        worker = background_thread._Worker(
+            exporter, max_queue_size=3,
+            overflow_policy=background_thread.OverflowPolicy.DROP_OLDEST)
+
+        worker.enqueue([mock.Mock(), mock.Mock()])
+        self.assertEqual(worker.queue_depth, 2)
+        self.assertEqual(worker.dropped_spans, 0)
+
+        with mock.patch.object(
+                background_thread.telemetry, 'record_dropped') as mock_record:
+            worker.enqueue([mock.Mock(), mock.Mock()])
+        self.assertEqual(worker.queue_depth, 2)
+        self.assertEqual(worker.dropped_spans, 2)
+        mock_record.assert_called_once_with(exporter, 2)
+
+    def test_export_batch_telemetry(self):
+        exporter = mock.Mock()
+        worker = background_thread._Worker(exporter)
+        batch = background_thread._Batch()
+        batch.span_datas = ['a', 'b']
+
+        with mock.patch.object(
+                background_thread.telemetry, 'emit') as mock_emit:
+            with mock.patch.object(
+                    background_thread.telemetry,
+                    'record_queue_depth') as mock_record:
+                worker._export_batch(batch)
+
+        mock_emit.assert_called_once_with(exporter, ['a', 'b'])
+        mock_record.assert_called_once_with(exporter, 0)
+
     def test_start(self):
         exporter = mock.Mock()
         worker = background_thread._Worker(exporter)
@@ -96,7 +244,7 @@ class Test_Worker(unittest.TestCase):
         worker = background_thread._Worker(exporter)
 
         self._start_worker(worker)
-        worker.enqueue(mock.Mock())
+        worker.enqueue([mock.Mock()])
         worker._export_pending_spans()
 
         self.assertFalse(worker.is_alive)
@@ -107,7 +255,7 @@ class Test_Worker(unittest.TestCase):
 
         self._start_worker(worker)
         worker._thread._terminate_on_join = False
-        worker.enqueue(mock.Mock())
+        worker.enqueue([mock.Mock()])
         worker._export_pending_spans()
 
         self.assertFalse(worker.is_alive)
@@ -169,36 +317,110 @@ class Test_Worker(unittest.TestCase):
         self.assertEqual(worker._queue.qsize(), 0)
 
     def test__thread_main_terminate_before_finish(self):
+        exporter = _Exporter()
+        worker = background_thread._Worker(exporter, max_batch_size=2)
 
-        class Exporter(object):
-            def __init__(self):
-                self.exported = []
+        # Spans queued after the termination signal are not exported.
+        worker._queue.put_nowait(background_thread._WORKER_TERMINATOR)
 
-            def emit(self, span):
-                self.exported.append(span)
+        span_data1 = [mock.Mock()]
+        span_data2 = [mock.Mock()]
 
-        exporter = Exporter()
-        worker = background_thread._Worker(exporter, max_batch_size=2)
+        worker.enqueue(span_data1)
+        worker.enqueue(span_data2)
 
-        # Enqueue three records and the termination signal. This should be
-        # enough to perform two separate batches and a third loop with just
-        # the exit.
+        worker._thread_main()
+
+        self.assertEqual(exporter.exported, [])
+        self.assertEqual(worker._queue.qsize(), 2)
+
+    def test__thread_main_batch_size_counts_spans(self):
+        exporter = _Exporter()
+        worker = background_thread._Worker(exporter, max_batch_size=3)
+        spans = [mock.Mock() for _ in range(5)]
+
+        worker.enqueue(spans[:2])
+        worker.enqueue(spans[2:4])
+        worker.enqueue(spans[4:])
+        worker._queue.put_nowait(background_thread._WORKER_TERMINATOR)
+
+        worker._thread_main()
+
+        # The first batch is full once it holds at least three spans, the
+        # rest is exported on termination.
+        self.assertEqual(exporter.exported, [spans[:4], spans[4:]])
+        self.assertEqual(worker._queue.unfinished_tasks, 0)
+
+    def test__thread_main_batch_bytes(self):
+        exporter = _Exporter()
+        worker = background_thread._Worker(
+            exporter, max_batch_bytes=1000)
+        spans = [_make_span_data('a' * 300) for _ in range(3)]
+
+        for span in spans:
+            worker.enqueue([span])
         worker._queue.put_nowait(background_thread._WORKER_TERMINATOR)
 
-        # Worker should be terminated after sending span_data1, and
-        # span_data2 won't be exported.
+        worker._thread_main()
+
+        # Each span is estimated at a little over 500 bytes.
+        self.assertEqual(exporter.exported, [spans[:2], spans[2:]])
+
+    def test__thread_main_flush_marker(self):
+        exporter = _Exporter()
+        worker = background_thread._Worker(exporter)
         span_data1 = [mock.Mock()]
         span_data2 = [mock.Mock()]
 
         worker.enqueue(span_data1)
+        worker._queue.put_nowait(background_thread._WORKER_FLUSH)
         worker.enqueue(span_data2)
+        worker._queue.put_nowait(background_thread._WORKER_TERMINATOR)
 
         worker._thread_main()
 
-        self.assertEqual(exporter.exported, [span_data1])
+        self.assertEqual(exporter.exported, [span_data1, span_data2])
+        self.assertEqual(worker._queue.unfinished_tasks, 0)
 
-        # trace2 should be left in the queue because worker is terminated.
-        self.assertEqual(worker._queue.qsize(), 1)
+    def test__get_item_deadline(self):
+        worker = background_thread._Worker(mock.Mock())
+        batch = background_thread._Batch()
+
+        worker.enqueue([mock.Mock()])
+        self.assertIsNotNone(worker._get_item(batch))
+
+        batch.deadline = background_thread._monotonic() - 1
+        worker.enqueue([mock.Mock()])
+        self.assertIsNone(worker._get_item(batch))
+
+        batch.deadline = background_thread._monotonic() + 0.01
+        self.assertIsNotNone(worker._get_item(batch))
+        self.assertIsNone(worker._get_item(batch))
+
+    def test_max_latency(self):
+        exporter = _Exporter()
+        worker = background_thread._Worker(exporter, max_latency=0.01)
+        span_data = [mock.Mock()]
+        worker.start()
+        self.addCleanup(worker.stop)
+
+        worker.enqueue(span_data)
+
+        # Exported by the deadline, without a flush.
+        self.assertTrue(exporter.emitted.wait(5))
+        self.assertEqual(exporter.exported, [span_data])
+
+    def test_flush_exports_immediately(self):
+        exporter = _Exporter()
+        worker = background_thread._Worker(exporter, max_latency=60)
+        span_data = [mock.Mock()]
+        worker.start()
+        self.addCleanup(worker.stop)
+
+        worker.enqueue(span_data)
+        worker.flush()
+
+        self.assertEqual(exporter.exported, [span_data])
 
     def test_flush(self):
         from six.moves import queue
@@ -211,9 +433,115 @@ class Test_Worker(unittest.TestCase):
         worker.flush()
         worker._queue.join.assert_called()
 
+    def test_rebuild_after_fork(self):
+        worker = background_thread._Worker(mock.Mock())
+        self._start_worker(worker)
+        parent_queue = worker._queue
+        parent_lock = worker._lock
+        worker.enqueue([mock.Mock()])
+
+        # Threads other than the forking one do not exist in the child.
+        worker._thread.stop()
+        fork_marker_patch = mock.patch(
+            'opencensus.common.fork.get_fork_marker', return_value=object())
+        patch_thread = mock.patch('threading.Thread', new=_Thread)
+        patch_atexit = mock.patch('atexit.register')
+
+        with fork_marker_patch, patch_thread, patch_atexit as mock_atexit:
+            span_data = [mock.Mock()]
+            worker.enqueue(span_data)
+
+            self.assertIsNot(worker._queue, parent_queue)
+            self.assertIsNot(worker._lock, parent_lock)
+            self.assertTrue(worker.is_alive)
+            self.assertFalse(mock_atexit.called)
+
+            # Spans queued in the parent are not exported again.
+            self.assertEqual(worker.queue_depth, 1)
+            self.assertIs(worker._queue.get(), span_data)
+
+            worker.enqueue([mock.Mock()])
+            self.assertEqual(worker.queue_depth, 1)
+
+    def test_rebuild_after_fork_export_threads(self):
+        worker = background_thread._Worker(
+            mock.Mock(), num_export_threads=2)
+        self._start_worker(worker)
+        parent_batches = worker._batches
+        parent_threads = worker._export_threads
+
+        fork_marker_patch = mock.patch(
+            'opencensus.common.fork.get_fork_marker', return_value=object())
+        patch_thread = mock.patch('threading.Thread', new=_Thread)
+
+        with fork_marker_patch, patch_thread:
+            worker.enqueue([mock.Mock()])
+
+        self.assertIsNot(worker._batches, parent_batches)
+        self.assertEqual(len(worker._export_threads), 2)
+        for thread, batches in zip(worker._export_threads, worker._batches):
+            self.assertNotIn(thread, parent_threads)
+            self.assertEqual(thread._args, (batches,))
+            self.assertTrue(thread.is_alive())
+
+    def test_rebuild_after_fork_not_started(self):
+        worker = background_thread._Worker(mock.Mock())
+        fork_marker_patch = mock.patch(
+            'opencensus.common.fork.get_fork_marker', return_value=object())
+
+        with fork_marker_patch:
+            worker.flush()
+
+        self.assertIsNone(worker._thread)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+    def test_export_after_fork(self):
+        exporter = _Exporter()
+        worker = background_thread._Worker(exporter, max_latency=60)
+        worker.start()
+        self.addCleanup(worker.stop)
+        worker.enqueue([_make_span_data('parent')])
+        read_fd, write_fd = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:  # pragma: NO COVER
+            try:
+                worker.enqueue([_make_span_data('child')])
+                worker.flush()
+                names = [span_data.name
+                         for span_datas in exporter.exported
+                         for span_data in span_datas]
+                os.write(write_fd, ','.join(names).encode('ascii'))
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        child_names = os.read(read_fd, 1024)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        worker.flush()
+
+        self.assertEqual(child_names, b'child')
+        self.assertEqual(
+            [span_data.name for span_data in exporter.exported[0]],
+            ['parent'])
+
 
 class TestBackgroundThreadTransport(unittest.TestCase):
 
+    def test_export_trace_larger_than_queue(self):
+        exporter = _Exporter()
+        transport = background_thread.BackgroundThreadTransport(
+            exporter, max_queue_size=20)
+        self.addCleanup(transport.worker.stop)
+        span_datas = [_make_span_data(str(index)) for index in range(30)]
+
+        transport.export(span_datas)
+        transport.flush()
+
+        self.assertEqual(transport.dropped_spans, 0)
+        self.assertEqual(exporter.exported, [span_datas])
+
     def test_constructor(self):
         patch_worker = mock.patch(
             'opencensus.trace.exporters.transports.background_thread._Worker',
@@ -244,6 +572,145 @@ class TestBackgroundThreadTransport(unittest.TestCase):
 
         self.assertTrue(transport.worker.enqueue.called)
 
+    def test_counters(self):
+        patch_thread = mock.patch('threading.Thread', new=_Thread)
+        patch_atexit = mock.patch('atexit.register')
+        exporter = mock.Mock()
+
+        with patch_thread, patch_atexit:
+            transport = background_thread.BackgroundThreadTransport(
+                exporter, max_queue_size=1)
+
+        transport.export([mock.Mock()])
+        transport.export([mock.Mock()])
+
+        self.assertEqual(transport.queue_depth, 1)
+        self.assertEqual(transport.dropped_spans, 1)
+
+    def _make_pool(self, exporter, **kwargs):
+        patch_thread = mock.patch('threading.Thread', new=_Thread)
+        patch_atexit = mock.patch('atexit.register')
+
+        with patch_thread, patch_atexit:
+            return background_thread.BackgroundThreadTransport(
+                exporter, num_workers=3, **kwargs)
+
+    def test_constructor_num_workers(self):
+        transport = self._make_pool(mock.Mock(), max_queue_size=10)
+        worker = transport.worker
+
+        self.assertEqual(worker._thread._name, 'opencensus.trace.Worker')
+        self.assertEqual(
+            [thread._name for thread in worker._export_threads],
+            ['opencensus.trace.Worker-0', 'opencensus.trace.Worker-1',
+             'opencensus.trace.Worker-2'])
+        # The workers share the queue and its limit.
+        self.assertEqual(worker._queue.max_spans, 10)
+        self.assertTrue(worker.is_alive)
+        for thread in worker._export_threads:
+            self.assertTrue(thread.is_alive())
+
+    def test_counters_shared_queue(self):
+        transport = self._make_pool(mock.Mock(), max_queue_size=3)
+
+        for index in range(10):
+            transport.export(
+                [_make_span_data('span', '{:032x}'.format(index + 1))])
+
+        self.assertEqual(transport.queue_depth, 3)
+        self.assertEqual(transport.dropped_spans, 7)
+
+    def test_parallel_export(self):
+        barrier_size = 2
+        in_flight = []
+        both_in_flight = threading.Event()
+        lock = threading.Lock()
+        exported = []
+
+        class Exporter(object):
+            def emit(self, span_datas):
+                with lock:
+                    in_flight.append(span_datas)
+                    if len(in_flight) == barrier_size:
+                        both_in_flight.set()
+                # Blocks until the other worker is emitting as well.
+                both_in_flight.wait(5)
+                exported.append(span_datas)
+
+        transport = background_thread.BackgroundThreadTransport(
+            Exporter(), num_workers=2, max_batch_size=2)
+        self.addCleanup(transport.worker.stop)
+        trace1 = [_make_span_data(str(index), '{:032x}'.format(1))
+                  for index in range(2)]
+        trace2 = [_make_span_data(str(index), '{:032x}'.format(2))
+                  for index in range(2)]
+
+        transport.export(trace1)
+        transport.export(trace2)
+        transport.flush()
+
+        self.assertTrue(both_in_flight.is_set())
+        exported.sort(key=lambda span_datas: span_datas[0].context.trace_id)
+        self.assertEqual(exported, [trace1, trace2])
+
+    def test_multi_part_trace_exported_in_order(self):
+        lock = threading.Lock()
+        exported = []
+
+        class Exporter(object):
+            def emit(self, span_datas):
+                # Later parts would overtake a slow first part on another
+                # export thread.
+                if span_datas[0].name == '0':
+                    time.sleep(0.05)
+                with lock:
+                    exported.extend(span_datas)
+
+        transport = background_thread.BackgroundThreadTransport(
+            Exporter(), num_workers=3, max_batch_size=1)
+        self.addCleanup(transport.worker.stop)
+        trace_id = '{:032x}'.format(1)
+        parts = [[_make_span_data(str(index), trace_id)]
+                 for index in range(6)]
+
+        for part in parts:
+            transport.export(part)
+        transport.flush()
+
+        self.assertEqual(exported, [part[0] for part in parts])
+
+    def test_export_batch_split_by_trace(self):
+        worker = background_thread._Worker(
+            mock.Mock(), num_export_threads=2)
+        batch = background_thread._Batch()
+        trace1 = [_make_span_data('a', '{:032x}'.format(1))]
+        trace2 = [_make_span_data('b', '{:032x}'.format(2))]
+        no_context = [_make_span_data('c')]
+        for span_datas in (trace1, trace2, trace1, no_context):
+            worker._add_to_batch(batch, span_datas)
+
+        worker._export_batch(batch)
+
+        part0 = worker._batches[0].get_nowait()
+        part1 = worker._batches[1].get_nowait()
+        self.assertEqual(part0.span_datas, trace2 + no_context)
+        self.assertEqual(part0.num_items, 2)
+        self.assertEqual(part1.span_datas, trace1 + trace1)
+        self.assertEqual(part1.num_items, 2)
+
+    def test_stop_num_workers(self):
+        exporter = _Exporter()
+        transport = background_thread.BackgroundThreadTransport(
+            exporter, num_workers=2)
+        span_datas = [_make_span_data('span')]
+
+        transport.export(span_datas)
+
+        self.assertTrue(transport.worker.stop())
+        self.assertEqual(exporter.exported, [span_datas])
+        for thread in transport.worker._export_threads:
+            self.assertFalse(thread.is_alive())
+
     def test_flush(self):
         patch_worker = mock.patch(
             'opencensus.trace.exporters.transports.background_thread._Worker',
@@ -258,10 +725,47 @@ class TestBackgroundThreadTransport(unittest.TestCase):
             self.assertTrue(transport.worker.flush.called)
 
 
+def _make_span_data(name, trace_id=None):
+    from opencensus.trace import span_context
+    from opencensus.trace import span_data as span_data_module
+
+    context = None
+    if trace_id is not None:
+        context = span_context.SpanContext(trace_id=trace_id)
+
+    return span_data_module.SpanData(
+        name=name,
+        context=context,
+        span_id='6e0c63257de34c92',
+        parent_span_id=None,
+        attributes=None,
+        start_time_ns=None,
+        end_time_ns=None,
+        child_span_count=0,
+        stack_trace=None,
+        time_events=None,
+        links=None,
+        status=None,
+        same_process_as_parent_span=None,
+        span_kind=0)
+
+
+class _Exporter(object):
+
+    def __init__(self):
+        self.exported = []
+        self.emitted = threading.Event()
+
+    def emit(self, span_datas):
+        self.exported.append(span_datas)
+        self.emitted.set()
+
+
 class _Thread(object):
 
-    def __init__(self, target, name):
+    def __init__(self, target, name, args=()):
         self._target = target
+        self._args = args
         self._name = name
         self._timeout = None
         self._terminate_on_join = True
@@ -0,0 +1,305 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import socket
+import unittest
+
+import mock
+
+from opencensus.trace.exporters import telemetry
+from opencensus.trace.exporters.transports import retry
+
+
+class _Clock(object):
+    """Fake monotonic clock advanced by the patched sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class _ClockTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+        patcher = mock.patch.multiple(
+            retry, _monotonic=self.clock.monotonic, _sleep=self.clock.sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_constructor_default(self):
+        policy = retry.RetryPolicy()
+
+        self.assertEqual(policy.budget, retry._DEFAULT_RETRY_BUDGET)
+        self.assertEqual(
+            policy.retryable_exceptions, retry.DEFAULT_RETRYABLE_EXCEPTIONS)
+
+    def test_backoffs(self):
+        policy = retry.RetryPolicy(
+            initial_backoff=1.0, max_backoff=4.0, multiplier=2.0)
+
+        with mock.patch.object(retry.random, 'uniform') as mock_uniform:
+            mock_uniform.side_effect = lambda low, high: high
+            backoffs = policy.backoffs()
+            bounds = [next(backoffs) for _ in range(5)]
+
+        self.assertEqual(bounds, [1.0, 2.0, 4.0, 4.0, 4.0])
+
+    def test_backoffs_jitter(self):
+        policy = retry.RetryPolicy(initial_backoff=1.0)
+        backoffs = policy.backoffs()
+
+        for _ in range(100):
+            self.assertTrue(0 <= next(backoffs) <= policy.max_backoff)
+
+
+class TestCircuitBreaker(_ClockTestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = retry.CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, retry.CircuitState.CLOSED)
+        self.assertTrue(breaker.allow_request())
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, retry.CircuitState.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_success_resets_failures(self):
+        breaker = retry.CircuitBreaker(failure_threshold=2)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, retry.CircuitState.CLOSED)
+
+    def test_half_open(self):
+        breaker = retry.CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+
+        self.clock.now = 9
+        self.assertFalse(breaker.allow_request())
+
+        self.clock.now = 10
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, retry.CircuitState.HALF_OPEN)
+        # Only a single probe is let through.
+        self.assertFalse(breaker.allow_request())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, retry.CircuitState.CLOSED)
+
+    def test_half_open_failure_reopens(self):
+        breaker = retry.CircuitBreaker(failure_threshold=3, reset_timeout=10)
+        for _ in range(3):
+            breaker.record_failure()
+
+        self.clock.now = 10
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, retry.CircuitState.OPEN)
+        self.clock.now = 19
+        self.assertFalse(breaker.allow_request())
+
+    def test_transitions_recorded(self):
+        breaker = retry.CircuitBreaker(
+            failure_threshold=1, reset_timeout=10, name='MyExporter')
+
+        with mock.patch.object(telemetry, 'record') as mock_record:
+            breaker.record_failure()
+            self.clock.now = 10
+            breaker.allow_request()
+            breaker.record_success()
+            # No change of state.
+            breaker.record_success()
+
+        states = [call[0][1][telemetry.CIRCUIT_STATE_KEY]
+                  for call in mock_record.call_args_list]
+        self.assertEqual(states, [
+            retry.CircuitState.OPEN,
+            retry.CircuitState.HALF_OPEN,
+            retry.CircuitState.CLOSED])
+        measurements, tags = mock_record.call_args[0]
+        self.assertEqual(
+            measurements, {telemetry.CIRCUIT_BREAKER_TRANSITIONS_MEASURE: 1})
+        self.assertEqual(tags[telemetry.EXPORTER_KEY], 'MyExporter')
+
+
+class MyExporter(object):
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.emitted = []
+
+    def emit(self, span_datas):
+        self.emitted.append(span_datas)
+        result = self.results.pop(0) if self.results else True
+        if isinstance(result, type) and issubclass(result, Exception):
+            raise result
+        return result
+
+
+class TestRetryingExporter(_ClockTestCase):
+
+    def _make_exporter(self, results, **kwargs):
+        kwargs.setdefault('retry_policy', retry.RetryPolicy(
+            budget=10, initial_backoff=1.0, max_backoff=1.0))
+        exporter = MyExporter(results)
+        return exporter, retry.RetryingExporter(exporter, **kwargs)
+
+    def test_constructor_default(self):
+        exporter = MyExporter()
+        retrying_exporter = retry.RetryingExporter(exporter)
+
+        self.assertIs(retrying_exporter.exporter, exporter)
+        self.assertEqual(retrying_exporter.exporter_name, 'MyExporter')
+        self.assertEqual(retrying_exporter.circuit_breaker.name, 'MyExporter')
+        self.assertIsInstance(
+            retrying_exporter.retry_policy, retry.RetryPolicy)
+
+    def test_emit_succeeded(self):
+        exporter, retrying_exporter = self._make_exporter([None])
+
+        self.assertTrue(retrying_exporter.emit(['a']))
+        self.assertEqual(exporter.emitted, [['a']])
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_retry_until_sent(self):
+        exporter, retrying_exporter = self._make_exporter(
+            [False, socket.error, True])
+
+        with mock.patch.object(retry.random, 'uniform', return_value=1.0), \
+                mock.patch.object(retry.log, 'warning'):
+            self.assertTrue(retrying_exporter.emit(['a']))
+
+        self.assertEqual(len(exporter.emitted), 3)
+        self.assertEqual(self.clock.sleeps, [1.0, 1.0])
+        self.assertEqual(retrying_exporter.dropped_spans, 0)
+
+    def test_retry_budget(self):
+        exporter, retrying_exporter = self._make_exporter(
+            [False] * 100,
+            circuit_breaker=retry.CircuitBreaker(failure_threshold=2))
+
+        with mock.patch.object(retry.random, 'uniform', return_value=1.0):
+            self.assertFalse(retrying_exporter.emit(['a', 'b']))
+
+        # Ten seconds of budget, one second between attempts.
+        self.assertEqual(len(exporter.emitted), 11)
+        self.assertEqual(retrying_exporter.dropped_spans, 2)
+        self.assertEqual(
+            retrying_exporter.circuit_breaker.state, retry.CircuitState.CLOSED)
+
+    def test_non_retryable_exception(self):
+        exporter, retrying_exporter = self._make_exporter([ValueError])
+
+        with mock.patch.object(retry.log, 'exception') as mock_log:
+            self.assertFalse(retrying_exporter.emit(['a']))
+
+        self.assertTrue(mock_log.called)
+        self.assertEqual(len(exporter.emitted), 1)
+        self.assertEqual(retrying_exporter.dropped_spans, 1)
+        self.assertEqual(retrying_exporter.circuit_breaker._failures, 0)
+
+    def test_open_circuit_drops(self):
+        breaker = retry.CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        exporter, retrying_exporter = self._make_exporter(
+            [False] * 100, circuit_breaker=breaker)
+
+        self.assertFalse(retrying_exporter.emit(['a']))
+        attempts = len(exporter.emitted)
+        self.assertEqual(breaker.state, retry.CircuitState.OPEN)
+
+        self.assertFalse(retrying_exporter.emit(['b', 'c']))
+
+        # The exporter is not called while the circuit is open.
+        self.assertEqual(len(exporter.emitted), attempts)
+        self.assertEqual(retrying_exporter.dropped_spans, 3)
+
+    def test_retries_recorded(self):
+        exporter, retrying_exporter = self._make_exporter([False, True])
+
+        with mock.patch.object(telemetry, 'record') as mock_record:
+            retrying_exporter.emit(['a'])
+
+        mock_record.assert_called_once_with(
+            {telemetry.EXPORT_RETRIES_MEASURE: 1},
+            {telemetry.EXPORTER_KEY: 'MyExporter'})
+
+    def test_export(self):
+        exporter = mock.Mock()
+        retrying_exporter = retry.RetryingExporter(exporter)
+
+        retrying_exporter.export(['a'])
+
+        exporter.export.assert_called_once_with(['a'])
+
+
+class TestRetryTransport(_ClockTestCase):
+
+    def _make_transport(self, exporter):
+        transport = retry.RetryTransport(exporter)
+        self.addCleanup(transport.transport.worker.stop)
+        return transport
+
+    def test_constructor_default(self):
+        from opencensus.trace.exporters.transports import background_thread
+
+        exporter = MyExporter()
+        transport = self._make_transport(exporter)
+
+        self.assertIs(transport.exporter, exporter)
+        self.assertIsInstance(
+            transport.transport, background_thread.BackgroundThreadTransport)
+        self.assertIsInstance(
+            transport.retrying_exporter, retry.RetryingExporter)
+        self.assertIs(transport.transport.exporter,
+                      transport.retrying_exporter)
+        self.assertIs(transport.circuit_breaker,
+                      transport.retrying_exporter.circuit_breaker)
+
+    def test_export(self):
+        exporter = MyExporter([False, True])
+        transport = self._make_transport(exporter)
+
+        transport.export(['a'])
+        transport.flush()
+
+        self.assertEqual(exporter.emitted, [['a'], ['a']])
+        self.assertEqual(transport.dropped_spans, 0)
+
+    def test_wrapped_transport(self):
+        inner = mock.Mock()
+        exporter = MyExporter()
+
+        transport = retry.RetryTransport(exporter, transport=inner)
+        transport.export(['a'])
+        transport.flush()
+
+        inner.assert_called_once_with(transport.retrying_exporter)
+        inner.return_value.export.assert_called_once_with(['a'])
+        inner.return_value.flush.assert_called_once_with()
@@ -0,0 +1,306 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import errno
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import mock
+from six.moves import cPickle as pickle
+
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace.exporters.transports import spool
+
+
+def _make_span_data(name):
+    return span_data_module.SpanData(
+        name=name,
+        context=span_context.SpanContext(
+            trace_id='6e0c63257de34c92bf9efcd03927272e'),
+        span_id='6e0c63257de34c92',
+        parent_span_id=None,
+        attributes={'key': 'value'},
+        start_time_ns=1502820146071158000,
+        end_time_ns=1502820156071158000,
+        child_span_count=0,
+        stack_trace=None,
+        time_events=None,
+        links=None,
+        status=None,
+        same_process_as_parent_span=None,
+        span_kind=0)
+
+
+class _Exporter(object):
+    """Stand-in for a collector that can be taken down."""
+
+    def __init__(self, available=True):
+        self.available = available
+        self.emitted = []
+        self.attempts = 0
+
+    def emit(self, span_datas):
+        self.attempts += 1
+        if not self.available:
+            return False
+        self.emitted.append([span_data.name for span_data in span_datas])
+        return True
+
+
+class TestSpoolTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def _make_transport(self, exporter, **kwargs):
+        kwargs.setdefault('retry_interval', 60)
+        transport = spool.SpoolTransport(
+            exporter, directory=self.directory, **kwargs)
+        self.addCleanup(transport.close)
+        return transport
+
+    def _segment_files(self):
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.endswith(spool._SEGMENT_SUFFIX))
+
+    def test_constructor(self):
+        exporter = _Exporter()
+        directory = os.path.join(self.directory, 'spool')
+
+        transport = spool.SpoolTransport(exporter, directory=directory)
+        self.addCleanup(transport.close)
+
+        self.assertIs(transport.exporter, exporter)
+        self.assertEqual(transport.directory, directory)
+        self.assertEqual(transport.dropped_spans, 0)
+        self.assertEqual(transport.disk_bytes, 0)
+        self.assertTrue(os.path.exists(
+            os.path.join(directory, spool._INDEX_FILE_NAME)))
+
+    def test_export(self):
+        exporter = _Exporter()
+        transport = self._make_transport(exporter)
+
+        transport.export([_make_span_data('a'), _make_span_data('b')])
+        transport.export([_make_span_data('c')])
+        transport.flush()
+
+        self.assertEqual(exporter.emitted, [['a', 'b'], ['c']])
+        self.assertGreater(transport.disk_bytes, 0)
+
+    def test_replay_in_order_after_outage(self):
+        exporter = _Exporter(available=False)
+        transport = self._make_transport(exporter, max_segment_bytes=1)
+
+        for name in 'abc':
+            transport.export([_make_span_data(name)])
+        transport.flush()
+
+        self.assertEqual(exporter.emitted, [])
+        self.assertEqual(len(self._segment_files()), 3)
+
+        exporter.available = True
+        transport.flush()
+
+        self.assertEqual(exporter.emitted, [['a'], ['b'], ['c']])
+        # Sent segments are deleted, except the one being written.
+        self.assertEqual(len(self._segment_files()), 1)
+
+    def test_retry_interval(self):
+        exporter = _Exporter(available=False)
+        transport = self._make_transport(exporter, retry_interval=0.01)
+
+        transport.export([_make_span_data('a')])
+        transport.flush()
+        exporter.available = True
+
+        for _ in range(500):
+            if exporter.emitted:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertEqual(exporter.emitted, [['a']])
+
+    def test_emit_exception(self):
+        exporter = mock.Mock()
+        exporter.emit.side_effect = [ValueError, None]
+        transport = self._make_transport(exporter)
+
+        with mock.patch.object(spool.log, 'exception') as mock_log:
+            transport.export([_make_span_data('a')])
+            transport.flush()
+
+            self.assertTrue(mock_log.called)
+            self.assertEqual(exporter.emit.call_count, 1)
+
+            transport.flush()
+
+        # A None result counts as sent.
+        self.assertEqual(exporter.emit.call_count, 2)
+        transport.flush()
+        self.assertEqual(exporter.emit.call_count, 2)
+
+    def test_evict_oldest(self):
+        exporter = _Exporter(available=False)
+        record_size = len(spool._encode_record([_make_span_data('a')]))
+        transport = self._make_transport(
+            exporter, max_segment_bytes=record_size,
+            max_disk_bytes=3 * record_size)
+
+        for name in 'abcde':
+            transport.export([_make_span_data(name)])
+
+        self.assertEqual(transport.dropped_spans, 2)
+        self.assertEqual(transport.disk_bytes, 3 * record_size)
+        self.assertEqual(len(self._segment_files()), 3)
+
+        exporter.available = True
+        transport.flush()
+
+        self.assertEqual(exporter.emitted, [['c'], ['d'], ['e']])
+
+    def test_resume_after_restart(self):
+        exporter = _Exporter()
+        transport = self._make_transport(exporter)
+        transport.export([_make_span_data('a')])
+        transport.flush()
+
+        exporter.available = False
+        transport.export([_make_span_data('b')])
+        transport.export([_make_span_data('c')])
+        transport.flush()
+        transport.close()
+
+        exporter = _Exporter()
+        transport = self._make_transport(exporter)
+        transport.export([_make_span_data('d')])
+        transport.flush()
+
+        # Only the spans that were not sent are replayed, in order.
+        self.assertEqual(exporter.emitted, [['b'], ['c'], ['d']])
+
+    def test_truncated_and_corrupt_records(self):
+        record = spool._encode_record([_make_span_data('a')])
+        corrupt = spool._HEADER.pack(3, 2) + b'bad'
+        path = os.path.join(self.directory, '{:020d}{}'.format(
+            1, spool._SEGMENT_SUFFIX))
+        with open(path, 'wb') as segment_file:
+            segment_file.write(corrupt + record + record[:-1])
+
+        exporter = _Exporter()
+        with mock.patch.object(spool.log, 'exception'):
+            transport = self._make_transport(exporter)
+            transport.export([_make_span_data('b')])
+            transport.flush()
+
+        self.assertEqual(exporter.emitted, [['a'], ['b']])
+        self.assertEqual(transport.dropped_spans, 2)
+        self.assertFalse(os.path.exists(path))
+
+    def test_pickled_record_not_loaded(self):
+        payload = pickle.dumps([_make_span_data('a')], 2)
+        path = os.path.join(self.directory, '{:020d}{}'.format(
+            1, spool._SEGMENT_SUFFIX))
+        with open(path, 'wb') as segment_file:
+            segment_file.write(spool._HEADER.pack(len(payload), 1) + payload)
+
+        exporter = _Exporter()
+        with mock.patch.object(spool.log, 'exception'):
+            transport = self._make_transport(exporter)
+            transport.flush()
+
+        self.assertEqual(exporter.emitted, [])
+        self.assertEqual(transport.dropped_spans, 1)
+
+    @unittest.skipUnless(hasattr(os, 'getuid'), 'requires POSIX permissions')
+    def test_shared_directory_refused(self):
+        os.chmod(self.directory, 0o777)
+
+        with self.assertRaises(ValueError):
+            spool.SpoolTransport(_Exporter(), directory=self.directory)
+
+    @unittest.skipIf(spool.fcntl is None, 'requires fcntl')
+    def test_directory_locked(self):
+        transport = self._make_transport(_Exporter())
+
+        with self.assertRaises(ValueError):
+            spool.SpoolTransport(_Exporter(), directory=self.directory)
+
+        # Closing releases the lock.
+        transport.close()
+        self._make_transport(_Exporter())
+
+    def test_export_span_with_exception(self):
+        from opencensus.trace.exporters import base
+        from opencensus.trace.tracers import context_tracer
+
+        exporter = _Exporter()
+
+        class _SpoolExporter(base.Exporter):
+            def export(inner_self, span_datas):
+                transport.export(span_datas)
+
+        transport = self._make_transport(exporter)
+        tracer = context_tracer.ContextTracer(exporter=_SpoolExporter())
+
+        # The application sees its own exception.
+        with self.assertRaises(KeyError):
+            with tracer.span('root'):
+                raise KeyError('key')
+        transport.flush()
+
+        self.assertEqual(exporter.emitted, [['root']])
+
+    def test_encode_error_dropped(self):
+        exporter = _Exporter()
+        transport = self._make_transport(exporter)
+
+        patch_encode = mock.patch.object(
+            spool, '_encode_record', side_effect=TypeError)
+        with patch_encode, mock.patch.object(spool.log, 'exception'):
+            transport.export([_make_span_data('a')])
+
+        self.assertEqual(transport.dropped_spans, 1)
+
+    def test_write_error_dropped(self):
+        exporter = _Exporter()
+        transport = self._make_transport(exporter)
+        write_file = transport._write_file
+
+        with mock.patch.object(
+                transport, '_write_file', wraps=write_file) as mock_file:
+            mock_file.write.side_effect = IOError(errno.ENOSPC, 'full')
+            with mock.patch.object(spool.log, 'exception'):
+                transport.export([_make_span_data('a')])
+
+        self.assertEqual(transport.dropped_spans, 1)
+
+        # The next batch goes to a new segment.
+        transport.export([_make_span_data('b')])
+        transport.flush()
+        self.assertEqual(exporter.emitted, [['b']])
+
+    def test_close(self):
+        transport = self._make_transport(_Exporter())
+
+        transport.close()
+
+        self.assertFalse(transport._thread.is_alive())
+        # Closing twice is a no-op.
+        transport.close()
@@ -0,0 +1,365 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import unittest
+
+import mock
+from six.moves import cPickle as pickle
+
+from opencensus.trace import link
+from opencensus.trace import span_context
+from opencensus.trace import span_data as span_data_module
+from opencensus.trace import stack_trace
+from opencensus.trace import time_event
+from opencensus.trace.exporters.transports import sync
+from opencensus.trace.exporters.transports import unix_socket
+
+
+def _make_span_data(name, trace_id='6e0c63257de34c92bf9efcd03927272e'):
+    return span_data_module.SpanData(
+        name=name,
+        context=span_context.SpanContext(trace_id=trace_id),
+        span_id='6e0c63257de34c92',
+        parent_span_id=None,
+        attributes={},
+        start_time_ns=1502820146071158000,
+        end_time_ns=1502820156071158000,
+        child_span_count=0,
+        stack_trace=None,
+        time_events=[time_event.TimeEvent(
+            1502820146071158000,
+            annotation=time_event.Annotation('annotation'))],
+        links=[link.Link(trace_id, '6e0c63257de34c93')],
+        status=None,
+        same_process_as_parent_span=None,
+        span_kind=0,
+        dropped_links_count=1)
+
+
+class _Exporter(object):
+    """Stand-in for a collector, records what the aggregator emits."""
+
+    def __init__(self, expected_spans=1):
+        self.expected_spans = expected_spans
+        self.span_datas = []
+        self.received = threading.Event()
+        self._lock = threading.Lock()
+
+    def emit(self, span_datas):
+        with self._lock:
+            self.span_datas.extend(span_datas)
+            if len(self.span_datas) >= self.expected_spans:
+                self.received.set()
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'requires Unix sockets')
+class TestUnixSocketTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'spans.sock')
+
+    def _start_aggregator(self, exporter):
+        aggregator = unix_socket.SpanAggregator(
+            exporter, path=self.path, transport=sync.SyncTransport)
+        aggregator.start()
+        self.addCleanup(aggregator.stop)
+        return aggregator
+
+    def _make_transport(self):
+        transport = unix_socket.UnixSocketTransport(
+            mock.Mock(), path=self.path, timeout=5)
+        self.addCleanup(transport.close)
+        return transport
+
+    def test_constructor_default(self):
+        exporter = mock.Mock()
+        transport = unix_socket.UnixSocketTransport(exporter)
+
+        self.assertIs(transport.exporter, exporter)
+        self.assertEqual(transport.path, unix_socket.DEFAULT_SOCKET_PATH)
+        self.assertEqual(transport.dropped_spans, 0)
+
+    def test_export_to_aggregator(self):
+        exporter = _Exporter(expected_spans=3)
+        self._start_aggregator(exporter)
+        transport = self._make_transport()
+        span_datas = [_make_span_data(str(index)) for index in range(3)]
+
+        transport.export(span_datas[:2])
+        transport.export(span_datas[2:])
+
+        self.assertTrue(exporter.received.wait(5))
+        self.assertEqual(
+            [span_data.name for span_data in exporter.span_datas],
+            ['0', '1', '2'])
+        received = exporter.span_datas[0]
+        self.assertEqual(received.start_time_ns, 1502820146071158000)
+        self.assertEqual(
+            received.context.trace_id, span_datas[0].context.trace_id)
+        self.assertEqual(
+            received.time_events[0].annotation.description, 'annotation')
+        self.assertEqual(received.dropped_links_count, 1)
+        self.assertEqual(received.attributes, {})
+        self.assertEqual(transport.dropped_spans, 0)
+
+    def test_export_stack_trace(self):
+        exporter = _Exporter()
+        self._start_aggregator(exporter)
+        transport = self._make_transport()
+        try:
+            raise KeyError('key')
+        except KeyError:
+            trace = stack_trace.StackTrace.from_traceback(sys.exc_info()[2])
+        span_data = _make_span_data('span')._replace(stack_trace=trace)
+
+        transport.export([span_data])
+
+        self.assertTrue(exporter.received.wait(5))
+        self.assertEqual(
+            exporter.span_datas[0].stack_trace.format_stack_trace_json(),
+            trace.format_stack_trace_json())
+
+    def test_encode_error_dropped(self):
+        transport = self._make_transport()
+
+        patch_encode = mock.patch.object(
+            unix_socket, 'encode_span_datas', side_effect=TypeError)
+        with patch_encode, mock.patch.object(unix_socket.log, 'exception'):
+            transport.export([_make_span_data('span')])
+
+        self.assertEqual(transport.dropped_spans, 1)
+
+    def test_socket_directory_created_private(self):
+        self.path = os.path.join(self.tmpdir, 'sockets', 'spans.sock')
+
+        self._start_aggregator(_Exporter())
+
+        self.assertTrue(stat.S_ISSOCK(os.stat(self.path).st_mode))
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.dirname(self.path)).st_mode), 0o700)
+
+    def test_shared_socket_directory_refused(self):
+        os.chmod(self.tmpdir, 0o777)
+        aggregator = unix_socket.SpanAggregator(
+            _Exporter(), path=self.path, transport=sync.SyncTransport)
+
+        with self.assertRaises(ValueError):
+            aggregator.start()
+
+        # Nor do the workers connect to a socket there.
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(self.path)
+        server.listen(1)
+        transport = self._make_transport()
+
+        with mock.patch.object(unix_socket.log, 'warning'):
+            transport.export([_make_span_data('span')])
+
+        self.assertEqual(transport.dropped_spans, 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+    def test_export_from_forked_processes(self):
+        num_children = 4
+        exporter = _Exporter(expected_spans=num_children + 1)
+        self._start_aggregator(exporter)
+        transport = self._make_transport()
+
+        # Connect in the parent first, children must not reuse the socket.
+        transport.export([_make_span_data('parent')])
+
+        pids = []
+        for index in range(num_children):
+            pid = os.fork()
+            if pid == 0:  # pragma: NO COVER
+                try:
+                    transport.export([_make_span_data('child')])
+                    transport.close()
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+        self.assertTrue(exporter.received.wait(5))
+        self.assertEqual(
+            sorted(span_data.name for span_data in exporter.span_datas),
+            ['child'] * num_children + ['parent'])
+
+    def test_reconnect_after_fork(self):
+        exporter = _Exporter()
+        self._start_aggregator(exporter)
+        transport = self._make_transport()
+
+        transport.export([_make_span_data('span')])
+        parent_socket = transport._socket
+        parent_lock = transport._lock
+
+        fork_marker_patch = mock.patch(
+            'opencensus.common.fork.get_fork_marker', return_value=object())
+
+        with fork_marker_patch:
+            transport.export([_make_span_data('span')])
+
+        self.assertIsNot(transport._socket, parent_socket)
+        self.assertIsNot(transport._lock, parent_lock)
+
+    def test_no_aggregator(self):
+        transport = self._make_transport()
+
+        with mock.patch.object(unix_socket.log, 'warning') as mock_warning:
+            transport.export([_make_span_data('span')] * 2)
+            transport.export([_make_span_data('span')])
+
+        self.assertEqual(transport.dropped_spans, 3)
+        self.assertIsNone(transport._socket)
+        # Warn once until a connection succeeds again.
+        self.assertEqual(mock_warning.call_count, 1)
+
+    def test_aggregator_restarted(self):
+        exporter = _Exporter()
+        aggregator = self._start_aggregator(exporter)
+        transport = self._make_transport()
+        transport.export([_make_span_data('span')])
+        self.assertTrue(exporter.received.wait(5))
+        aggregator.stop()
+
+        exporter = _Exporter()
+        self._start_aggregator(exporter)
+
+        # The first send may still succeed on the dead connection, the
+        # broken stream is detected and the transport reconnects.
+        for _ in range(3):
+            transport.export([_make_span_data('span')])
+
+        self.assertTrue(exporter.received.wait(5))
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'requires Unix sockets')
+class TestSpanAggregator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'spans.sock')
+
+    def test_constructor(self):
+        exporter = mock.Mock()
+        transport = mock.Mock()
+
+        aggregator = unix_socket.SpanAggregator(
+            exporter, path=self.path, transport=transport)
+
+        self.assertIs(aggregator.exporter, exporter)
+        self.assertIs(aggregator.transport, transport.return_value)
+        transport.assert_called_once_with(exporter)
+
+    def test_stop_flushes_and_removes_socket(self):
+        transport = mock.Mock()
+        aggregator = unix_socket.SpanAggregator(
+            mock.Mock(), path=self.path, transport=transport)
+
+        aggregator.start()
+        aggregator.stop()
+
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(transport.return_value.flush.called)
+
+        # Stopping twice is a no-op.
+        aggregator.stop()
+
+    def test_stale_socket_removed(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        sock.close()
+
+        aggregator = unix_socket.SpanAggregator(
+            mock.Mock(), path=self.path, transport=mock.Mock())
+        aggregator.start()
+        self.addCleanup(aggregator.stop)
+
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_already_running(self):
+        aggregator = unix_socket.SpanAggregator(
+            mock.Mock(), path=self.path, transport=mock.Mock())
+        aggregator.start()
+        self.addCleanup(aggregator.stop)
+
+        other = unix_socket.SpanAggregator(
+            mock.Mock(), path=self.path, transport=mock.Mock())
+
+        with self.assertRaises(ValueError):
+            other.start()
+
+    def test_serve_forever(self):
+        exporter = _Exporter()
+        aggregator = unix_socket.SpanAggregator(
+            exporter, path=self.path, transport=sync.SyncTransport)
+        thread = threading.Thread(target=aggregator.serve_forever)
+        thread.start()
+
+        transport = unix_socket.UnixSocketTransport(
+            mock.Mock(), path=self.path, timeout=5)
+        while not os.path.exists(self.path):
+            pass
+        transport.export([_make_span_data('span')])
+        self.assertTrue(exporter.received.wait(5))
+        transport.close()
+
+        aggregator.stop()
+        thread.join()
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_invalid_frames(self):
+        exporter = _Exporter()
+        transport = mock.Mock()
+        aggregator = unix_socket.SpanAggregator(
+            exporter, path=self.path, transport=transport)
+        aggregator.start()
+        self.addCleanup(aggregator.stop)
+
+        frames = [
+            unix_socket._HEADER.pack(unix_socket._MAX_FRAME_SIZE + 1),
+            unix_socket._HEADER.pack(3) + b'bad',
+            # Only JSON is decoded, never pickles.
+            unix_socket._HEADER.pack(len(pickle.dumps([]))) +
+            pickle.dumps([]),
+            unix_socket._HEADER.pack(10) + b'short',
+            b'\x00',
+        ]
+
+        patch_log = mock.patch.object(unix_socket, 'log')
+        with patch_log:
+            for frame in frames:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.path)
+                sock.sendall(frame)
+                sock.shutdown(socket.SHUT_WR)
+                # The aggregator closes the connection on a bad frame.
+                self.assertEqual(sock.recv(1), b'')
+                sock.close()
+
+        self.assertFalse(transport.return_value.export.called)
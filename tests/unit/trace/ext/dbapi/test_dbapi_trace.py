@@ -103,3 +103,28 @@ class TestDBAPITrace(unittest.TestCase):
         self.assertTrue(mock_tracer.start_span.called)
         self.assertTrue(mock_tracer.add_attribute_to_current_span.called)
         self.assertTrue(mock_tracer.end_span.called)
+
+    def test_trace_cursor_query_not_recording(self):
+        return_value = 'trace test'
+        query = 'SELECT 1'
+        mock_func = mock.Mock()
+        mock_func.__name__ = 'execute'
+        mock_func.return_value = return_value
+        mock_tracer = mock.Mock(is_recording=False)
+        mock_cursor = mock.Mock()
+
+        patch = mock.patch(
+            'opencensus.trace.ext.dbapi.trace.execution_context.'
+            'get_opencensus_tracer',
+            return_value=mock_tracer)
+
+        wrapped = trace.trace_cursor_query(mock_func)
+
+        with patch:
+            result = wrapped(mock_cursor, query)
+
+        self.assertEqual(result, return_value)
+        mock_func.assert_called_once_with(mock_cursor, query)
+        self.assertFalse(mock_tracer.start_span.called)
+        self.assertFalse(mock_tracer.add_attribute_to_current_span.called)
+        self.assertFalse(mock_tracer.end_span.called)
@@ -165,7 +165,7 @@ class MockTracer(object):
         return
 
     def add_attribute_to_current_span(self, attribute_key, attribute_value):
-        self._current_span.attributes[attribute_key] = attribute_value
+        self._current_span.add_attribute(attribute_key, attribute_value)
 
     def current_span(self):
         return self._current_span
@@ -160,7 +160,39 @@ class Test_httplib_trace(unittest.TestCase):
                          mock_tracer.span.attributes)
 
 
+    def test_wrap_httplib_not_recording(self):
+        mock_tracer = mock.Mock(is_recording=False)
+        mock_request_func = mock.Mock()
+        mock_request_func.__name__ = 'request'
+        mock_response_func = mock.Mock()
+
+        patch = mock.patch(
+            'opencensus.trace.ext.httplib.trace.execution_context.'
+            'get_opencensus_tracer',
+            return_value=mock_tracer)
+
+        wrapped_request = trace.wrap_httplib_request(mock_request_func)
+        wrapped_response = trace.wrap_httplib_response(mock_response_func)
+
+        mock_self = mock.Mock()
+        url = 'http://localhost:8080'
+        headers = {}
+
+        with patch:
+            wrapped_request(mock_self, 'GET', url, None, headers)
+            result = wrapped_response(mock_self)
+
+        # Headers are passed through untouched, without trace context.
+        mock_request_func.assert_called_once_with(
+            mock_self, 'GET', url, None, headers)
+        self.assertEqual(headers, {})
+        self.assertIs(result, mock_response_func.return_value)
+        self.assertFalse(mock_tracer.start_span.called)
+        self.assertFalse(mock_tracer.end_span.called)
+
 class MockTracer(object):
+    is_recording = True
+
     def __init__(self, span=None):
         self.span = span
         self.propagator = (
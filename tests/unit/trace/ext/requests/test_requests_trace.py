@@ -102,7 +102,50 @@ class Test_requests_trace(unittest.TestCase):
         self.assertEqual(expected_name, mock_tracer.current_span.name)
 
 
+    def test_wrap_requests_not_recording(self):
+        mock_func = mock.Mock()
+        mock_func.__name__ = 'get'
+        mock_tracer = mock.Mock(is_recording=False)
+
+        patch = mock.patch(
+            'opencensus.trace.ext.requests.trace.execution_context.'
+            'get_opencensus_tracer',
+            return_value=mock_tracer)
+
+        wrapped = trace.wrap_requests(mock_func)
+
+        url = 'http://localhost:8080'
+
+        with patch:
+            result = wrapped(url, timeout=1)
+
+        self.assertIs(result, mock_func.return_value)
+        mock_func.assert_called_once_with(url, timeout=1)
+        self.assertFalse(mock_tracer.start_span.called)
+
+    def test_wrap_session_request_not_recording(self):
+        wrapped = mock.Mock()
+        mock_tracer = mock.Mock(is_recording=False)
+
+        patch = mock.patch(
+            'opencensus.trace.ext.requests.trace.execution_context.'
+            'get_opencensus_tracer',
+            return_value=mock_tracer)
+
+        url = 'http://localhost:8080'
+        request_method = 'POST'
+
+        with patch:
+            result = trace.wrap_session_request(
+                wrapped, 'Session.request', (request_method, url), {})
+
+        self.assertIs(result, wrapped.return_value)
+        wrapped.assert_called_once_with(request_method, url)
+        self.assertFalse(mock_tracer.start_span.called)
+
 class MockTracer(object):
+    is_recording = True
+
     def __init__(self):
         self.current_span = None
 
@@ -120,7 +120,27 @@ class Test_sqlalchemy_trace(unittest.TestCase):
         self.assertTrue(mock_tracer.end_span.called)
 
 
+    def test_not_recording(self):
+        mock_tracer = mock.Mock(is_recording=False)
+
+        patch = mock.patch(
+            'opencensus.trace.ext.sqlalchemy.trace.execution_context.'
+            'get_opencensus_tracer',
+            return_value=mock_tracer)
+
+        with patch:
+            trace._before_cursor_execute(None, None, 'SELECT 1',
+                                         'test', None, False)
+            trace._after_cursor_execute(None, None, 'SELECT 1',
+                                        'test', None, False)
+
+        self.assertFalse(mock_tracer.start_span.called)
+        self.assertFalse(mock_tracer.add_attribute_to_current_span.called)
+        self.assertFalse(mock_tracer.end_span.called)
+
 class MockTracer(object):
+    is_recording = True
+
     def __init__(self):
         self.current_span = None
 
@@ -14,8 +14,38 @@
 
 import unittest
 
+import mock
+
 from opencensus.trace import execution_context
 
+try:
+    import contextvars
+except ImportError:  # pragma: NO COVER
+    contextvars = None
+
+
+class Test_get_opencensus_tracer(unittest.TestCase):
+
+    def tearDown(self):
+        execution_context.clear()
+
+    def test_default_shared_noop_tracer(self):
+        from opencensus.trace.tracers import noop_tracer
+
+        tracer = execution_context.get_opencensus_tracer()
+
+        self.assertIs(tracer, noop_tracer.NOOP_TRACER)
+        self.assertIs(execution_context.get_opencensus_tracer(), tracer)
+
+    def test_tracer_set_to_none(self):
+        from opencensus.trace.tracers import noop_tracer
+
+        execution_context.set_opencensus_tracer(None)
+
+        self.assertIs(
+            execution_context.get_opencensus_tracer(),
+            noop_tracer.NOOP_TRACER)
+
 
 class Test__get_opencensus_attr(unittest.TestCase):
 
@@ -38,3 +68,68 @@ class Test__get_opencensus_attr(unittest.TestCase):
         result = execution_context.get_opencensus_attr(key)
 
         self.assertEqual(result, value)
+
+
+class Test_set_opencensus_attr(unittest.TestCase):
+
+    def tearDown(self):
+        execution_context.clear()
+
+    def test_does_not_mutate_shared_attrs(self):
+        execution_context.set_opencensus_attr('key1', 'value1')
+        attrs = execution_context.runtime_context.get_runtime_context().get(
+            execution_context._ATTRS_KEY)
+
+        execution_context.set_opencensus_attr('key2', 'value2')
+
+        self.assertEqual(attrs, {'key1': 'value1'})
+        self.assertEqual(execution_context.get_opencensus_attr('key2'),
+                         'value2')
+
+
+@unittest.skipIf(contextvars is None, 'contextvars is not available')
+class TestConcurrentContexts(unittest.TestCase):
+
+    def tearDown(self):
+        execution_context.clear()
+
+    def test_interleaved_tracers(self):
+        from opencensus.trace import tracer as tracer_module
+
+        exporter = mock.Mock()
+        num_tasks = 1000
+
+        # Run each step of every "task" in its own copied context, switching
+        # between them the way an event loop switches between coroutines.
+        contexts = [contextvars.copy_context() for _ in range(num_tasks)]
+
+        def start(index):
+            tracer = tracer_module.Tracer(exporter=exporter)
+            tracer.start_span('root-{}'.format(index))
+            tracer.start_span('child-{}'.format(index))
+
+        def check_and_end(index):
+            tracer = execution_context.get_opencensus_tracer()
+            self.assertEqual(
+                tracer.current_span().name, 'child-{}'.format(index))
+            tracer.end_span()
+            self.assertEqual(
+                tracer.current_span().name, 'root-{}'.format(index))
+            tracer.end_span()
+            self.assertIsNone(tracer.current_span())
+
+        for index, context in enumerate(contexts):
+            context.run(start, index)
+
+        for index, context in reversed(list(enumerate(contexts))):
+            context.run(check_and_end, index)
+
+        # Each trace is exported once, with both of its spans.
+        self.assertEqual(exporter.export.call_count, num_tasks)
+        for call in exporter.export.call_args_list:
+            span_datas = call[0][0]
+            self.assertEqual(len(span_datas), 2)
+            self.assertEqual(
+                span_datas[0].name.split('-')[1],
+                span_datas[1].name.split('-')[1])
+        self.assertIsNone(execution_context.get_current_span())
@@ -0,0 +1,135 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+import mock
+
+from opencensus.trace import id_generator
+from opencensus.trace import span_context
+
+
+class TestRandomIdGenerator(unittest.TestCase):
+
+    def test_constructor_default(self):
+        generator = id_generator.RandomIdGenerator()
+
+        self.assertEqual(
+            generator.block_size, id_generator.DEFAULT_BLOCK_SIZE)
+
+    def test_generate_span_id(self):
+        generator = id_generator.RandomIdGenerator()
+        span_id = generator.generate_span_id()
+
+        self.assertIsInstance(span_id, str)
+        self.assertTrue(span_context.SPAN_ID_PATTERN.match(span_id))
+        self.assertEqual(len(span_id), id_generator.SPAN_ID_LENGTH)
+
+    def test_generate_trace_id(self):
+        generator = id_generator.RandomIdGenerator()
+        trace_id = generator.generate_trace_id()
+
+        self.assertIsInstance(trace_id, str)
+        self.assertTrue(span_context.TRACE_ID_PATTERN.match(trace_id))
+        self.assertEqual(len(trace_id), id_generator.TRACE_ID_LENGTH)
+
+    def test_ids_unique(self):
+        generator = id_generator.RandomIdGenerator(block_size=64)
+        span_ids = set(generator.generate_span_id() for _ in range(1000))
+
+        self.assertEqual(len(span_ids), 1000)
+
+    def test_refill_in_blocks(self):
+        generator = id_generator.RandomIdGenerator(block_size=16)
+
+        with mock.patch('os.urandom', return_value=b'\x01' * 16) \
+                as mock_urandom:
+            span_ids = [generator.generate_span_id() for _ in range(4)]
+
+        # 16 bytes are 32 hex digits, enough for two span IDs per refill.
+        self.assertEqual(mock_urandom.call_count, 2)
+        self.assertEqual(span_ids, ['01' * 8] * 4)
+
+    def test_skip_invalid_ids(self):
+        generator = id_generator.RandomIdGenerator(block_size=16)
+        blocks = [b'\x00' * 16, b'\x02' * 16]
+
+        with mock.patch('os.urandom', side_effect=blocks):
+            trace_id = generator.generate_trace_id()
+
+        self.assertEqual(trace_id, '02' * 16)
+
+        generator = id_generator.RandomIdGenerator(block_size=16)
+        blocks = [b'\x00' * 8 + b'\x03' * 8]
+
+        with mock.patch('os.urandom', side_effect=blocks):
+            span_id = generator.generate_span_id()
+
+        self.assertEqual(span_id, '03' * 8)
+
+    def test_refill_after_fork(self):
+        generator = id_generator.RandomIdGenerator()
+
+        with mock.patch('os.urandom', return_value=b'\x01' * 4096) \
+                as mock_urandom:
+            generator.generate_span_id()
+            generator.generate_span_id()
+            self.assertEqual(mock_urandom.call_count, 1)
+
+            fork_marker_patch = mock.patch(
+                'opencensus.trace.id_generator._get_fork_marker',
+                return_value=object())
+
+            with fork_marker_patch:
+                generator.generate_span_id()
+
+            self.assertEqual(mock_urandom.call_count, 2)
+
+    def test_per_thread_buffers(self):
+        generator = id_generator.RandomIdGenerator()
+        generator.generate_span_id()
+        main_buffer = generator._local.buffer
+        thread_buffers = []
+
+        def target():
+            generator.generate_span_id()
+            thread_buffers.append(generator._local.buffer)
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(thread_buffers), 1)
+        self.assertNotEqual(thread_buffers[0], main_buffer)
+        self.assertIs(generator._local.buffer, main_buffer)
+
+
+class TestDefaultIdGenerator(unittest.TestCase):
+
+    def test_set_id_generator(self):
+        original = id_generator.get_id_generator()
+        generator = mock.Mock()
+        generator.generate_span_id.return_value = '1' * 16
+        generator.generate_trace_id.return_value = '2' * 32
+
+        try:
+            id_generator.set_id_generator(generator)
+            self.assertIs(id_generator.get_id_generator(), generator)
+            self.assertEqual(span_context.generate_span_id(), '1' * 16)
+            self.assertEqual(span_context.generate_trace_id(), '2' * 32)
+        finally:
+            id_generator.set_id_generator(original)
+
+        self.assertIs(id_generator.get_id_generator(), original)
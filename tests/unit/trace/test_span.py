@@ -136,6 +136,53 @@ class TestSpan(unittest.TestCase):
         self.assertEqual(span.attributes[attribute_key], attribute_value)
         span.attributes.pop(attribute_key, None)
 
+    def test_collections_allocated_on_first_use(self):
+        from opencensus.trace.link import Link
+
+        span = self._make_one('span1')
+
+        self.assertIsNone(span._attributes)
+        self.assertIsNone(span._time_events)
+        self.assertIsNone(span._links)
+        self.assertIsNone(span._child_spans)
+
+        span.add_attribute('key', 'value')
+        span.add_link(Link(span_id='1234', trace_id='4567'))
+        span.span('child')
+
+        self.assertEqual(span.attributes, {'key': 'value'})
+        self.assertEqual(len(span.links), 1)
+        self.assertEqual(len(span.children), 1)
+
+    def test_collections_mutable_in_place(self):
+        import datetime
+
+        span = self._make_one('span1')
+        other_span = self._make_one('span2')
+        time_event = TimeEvent(datetime.datetime.now())
+
+        span.attributes['key'] = 'value'
+        span.time_events.append(time_event)
+        span.links.extend(['link'])
+        span.children.append(other_span)
+
+        self.assertEqual(span.attributes, {'key': 'value'})
+        self.assertEqual(span.time_events, [time_event])
+        self.assertEqual(span.links, ['link'])
+        self.assertEqual(span.children, [other_span])
+        self.assertEqual(other_span.attributes, {})
+        self.assertEqual(other_span.time_events, [])
+        self.assertEqual(other_span.links, [])
+        self.assertEqual(other_span.children, [])
+
+    def test_slots(self):
+        span = self._make_one('span')
+
+        self.assertFalse(hasattr(span, '__dict__'))
+
+        with self.assertRaises(AttributeError):
+            span.unknown_attribute = 'value'
+
     def test_add_time_event(self):
         from opencensus.trace.time_event import TimeEvent
         import datetime
@@ -178,6 +225,151 @@ class TestSpan(unittest.TestCase):
 
         self.assertEqual(len(span.links), 1)
 
+    def _set_span_limits(self, **kwargs):
+        from opencensus.trace import span_limits
+
+        original = span_limits.get_span_limits()
+        span_limits.set_span_limits(span_limits.SpanLimits(**kwargs))
+        self.addCleanup(span_limits.set_span_limits, original)
+
+    def test_add_attribute_over_limit(self):
+        self._set_span_limits(max_attributes=2)
+        span = self._make_one('test_span_name')
+
+        span.add_attribute('key1', 'value1')
+        span.add_attribute('key2', 'value2')
+        span.add_attribute('key3', 'value3')
+        # Existing keys can still be updated.
+        span.add_attribute('key1', 'value4')
+
+        self.assertEqual(span.attributes, {'key1': 'value4', 'key2': 'value2'})
+        self.assertEqual(span.dropped_attributes_count, 1)
+
+    def test_add_time_event_keep_latest(self):
+        from opencensus.trace import time_event as time_event_module
+
+        self._set_span_limits(max_annotations=2, max_message_events=3)
+        span = self._make_one('test_span_name')
+        annotations = [
+            time_event_module.TimeEvent(
+                index, annotation=time_event_module.Annotation(str(index)))
+            for index in range(3)]
+        message_events = [
+            time_event_module.TimeEvent(
+                index, message_event=time_event_module.MessageEvent(index))
+            for index in range(5)]
+
+        for time_event in annotations + message_events:
+            span.add_time_event(time_event)
+
+        self.assertEqual(
+            span.time_events, annotations[1:] + message_events[2:])
+        self.assertEqual(span.dropped_annotations_count, 1)
+        self.assertEqual(span.dropped_message_events_count, 2)
+
+    def test_add_time_event_keeps_order(self):
+        from opencensus.trace import time_event as time_event_module
+
+        self._set_span_limits(max_annotations=2, max_message_events=2)
+        span = self._make_one('test_span_name')
+        time_events = []
+        for index in range(4):
+            time_events.append(time_event_module.TimeEvent(
+                index, annotation=time_event_module.Annotation(str(index))))
+            time_events.append(time_event_module.TimeEvent(
+                index, message_event=time_event_module.MessageEvent(index)))
+
+        for time_event in time_events[:5]:
+            span.add_time_event(time_event)
+
+        # The oldest annotation is evicted, the message events stay.
+        self.assertEqual(
+            span.time_events,
+            [time_events[1], time_events[2], time_events[3], time_events[4]])
+
+        for time_event in time_events[5:]:
+            span.add_time_event(time_event)
+
+        self.assertEqual(span.time_events, time_events[4:])
+        self.assertEqual(span.time_events[1], time_events[5])
+        self.assertEqual(span.time_events[-1], time_events[-1])
+        self.assertEqual(span.time_events[1:3], time_events[5:7])
+        self.assertEqual(span.dropped_annotations_count, 2)
+        self.assertEqual(span.dropped_message_events_count, 2)
+
+    def test_add_time_event_keep_first(self):
+        from opencensus.trace import time_event as time_event_module
+
+        self._set_span_limits(
+            max_message_events=2, keep_latest_time_events=False)
+        span = self._make_one('test_span_name')
+        message_events = [
+            time_event_module.TimeEvent(
+                index, message_event=time_event_module.MessageEvent(index))
+            for index in range(4)]
+
+        for time_event in message_events:
+            span.add_time_event(time_event)
+
+        self.assertEqual(span.time_events, message_events[:2])
+        self.assertEqual(span.dropped_message_events_count, 2)
+        self.assertEqual(span.dropped_annotations_count, 0)
+
+    def test_add_time_event_to_assigned_list(self):
+        from opencensus.trace import time_event as time_event_module
+
+        self._set_span_limits(max_message_events=2)
+        span = self._make_one('test_span_name')
+        message_events = [
+            time_event_module.TimeEvent(
+                index, message_event=time_event_module.MessageEvent(index))
+            for index in range(3)]
+        span.time_events = message_events[:2]
+
+        span.add_time_event(message_events[2])
+
+        self.assertEqual(span.time_events, message_events[1:])
+        self.assertEqual(span.dropped_message_events_count, 1)
+
+    def test_time_events_append_over_limit(self):
+        from opencensus.trace import time_event as time_event_module
+
+        self._set_span_limits(max_annotations=1)
+        span = self._make_one('test_span_name')
+        annotations = [
+            time_event_module.TimeEvent(
+                index, annotation=time_event_module.Annotation(str(index)))
+            for index in range(3)]
+
+        span.time_events.extend(annotations)
+
+        self.assertEqual(len(span.time_events), 1)
+        self.assertEqual(span.time_events[0], annotations[-1])
+        self.assertEqual(span.dropped_annotations_count, 2)
+
+    def test_add_time_event_zero_limit(self):
+        self._set_span_limits(max_annotations=0)
+        span = self._make_one('test_span_name')
+
+        span.add_annotation('description')
+
+        self.assertEqual(span.time_events, [])
+        self.assertEqual(span.dropped_annotations_count, 1)
+
+    def test_add_link_over_limit(self):
+        from opencensus.trace.link import Link
+
+        self._set_span_limits(max_links=1)
+        span = self._make_one('test_span_name')
+        link1 = Link(span_id='1234', trace_id='4567')
+        link2 = Link(span_id='5678', trace_id='4567')
+
+        span.add_link(link1)
+        span.add_link(link2)
+
+        self.assertEqual(span.links, [link1])
+        self.assertEqual(span.dropped_links_count, 1)
+
     def test_start(self):
         span_name = 'root_span'
         span = self._make_one(span_name)
@@ -194,6 +386,34 @@ class TestSpan(unittest.TestCase):
         span.finish()
         self.assertIsNotNone(span.end_time)
 
+    def test_finish_uses_monotonic_offset(self):
+        span = self._make_one('root_span')
+
+        time_patch = mock.patch(
+            'opencensus.trace.utils.time_ns', return_value=1000000000000)
+        perf_patch = mock.patch(
+            'opencensus.trace.utils.perf_counter_ns',
+            side_effect=[500, 2001500])
+
+        with time_patch, perf_patch:
+            span.start()
+            span.finish()
+
+        self.assertEqual(span.start_time_ns, 1000000000000)
+        self.assertEqual(span.end_time_ns, 1000002001000)
+        self.assertEqual(span.start_time, '1970-01-01T00:16:40Z')
+        self.assertEqual(span.end_time, '1970-01-01T00:16:40.002001Z')
+
+    def test_start_time_setter(self):
+        span = self._make_one('root_span')
+        span.start()
+        span.start_time = '2017-08-15T18:02:26.071158Z'
+        span.end_time = '2017-08-15T18:02:36.071158Z'
+
+        self.assertEqual(span.start_time_ns, 1502820146071158000)
+        self.assertEqual(span.end_time_ns, 1502820156071158000)
+        self.assertEqual(span.start_time, '2017-08-15T18:02:26.071158Z')
+
     def test_finish_with_context_tracer(self):
         context_tracer = mock.Mock()
         span_name = 'root_span'
@@ -223,8 +443,8 @@ class TestSpan(unittest.TestCase):
         child2_span = self._make_one(child2_span_name)
         child1_child1_span = self._make_one(child1_child1_span_name)
 
-        child1_span._child_spans.append(child1_child1_span)
-        root_span._child_spans.extend([child1_span, child2_span])
+        child1_span._child_spans = [child1_child1_span]
+        root_span._child_spans = [child1_span, child2_span]
 
         span_iter_list = list(iter(root_span))
 
@@ -289,6 +509,10 @@ class Test_format_span_json(unittest.TestCase):
         span.time_events = []
         span.links = []
         span.same_process_as_parent_span = None
+        span.dropped_attributes_count = 0
+        span.dropped_annotations_count = 0
+        span.dropped_message_events_count = 0
+        span.dropped_links_count = 0
 
         expected_span_json = {
             'spanId': span_id,
@@ -351,6 +575,10 @@ class Test_format_span_json(unittest.TestCase):
         span.status = Status(code='200', message='test')
         span.links = [Link(trace_id, span_id)]
         span.same_process_as_parent_span = True
+        span.dropped_attributes_count = 0
+        span.dropped_annotations_count = 0
+        span.dropped_message_events_count = 0
+        span.dropped_links_count = 0
 
         mock_stack_trace = 'stack trace'
         mock_status = 'status'
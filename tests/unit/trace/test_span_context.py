@@ -38,6 +38,20 @@ class TestSpanContext(unittest.TestCase):
         self.assertEqual(span_context.trace_id, self.trace_id)
         self.assertEqual(span_context.span_id, self.span_id)
 
+    def test_constructor_generated_trace_id_not_validated(self):
+        import mock
+
+        patch_check = mock.patch.object(
+            self._get_target_class(), '_check_trace_id')
+
+        with patch_check as mock_check:
+            span_context = self._make_one()
+
+        self.assertFalse(mock_check.called)
+        self.assertTrue(
+            span_context_module.TRACE_ID_PATTERN.match(
+                span_context.trace_id))
+
     def test__str__(self):
         span_context = self._make_one(
             trace_id=self.trace_id,
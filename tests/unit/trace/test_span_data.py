@@ -13,6 +13,8 @@
 # limitations under the License.
 
 import datetime
+import json
+import sys
 import unittest
 
 from opencensus.trace import link
@@ -42,6 +44,49 @@ class TestSpanData(unittest.TestCase):
             span_kind=0,
         )
 
+    def test_span_data_time_ns(self):
+        span_data = span_data_module.SpanData(
+            name='root',
+            context=None,
+            span_id='6e0c63257de34c92',
+            parent_span_id='6e0c63257de34c93',
+            attributes={'key1': 'value1'},
+            start_time_ns=1502820146071158000,
+            end_time_ns=1502820156071158000,
+            stack_trace=None,
+            links=None,
+            status=None,
+            time_events=None,
+            same_process_as_parent_span=None,
+            child_span_count=None,
+            span_kind=0,
+        )
+
+        self.assertEqual(span_data.start_time, '2017-08-15T18:02:26.071158Z')
+        self.assertEqual(span_data.end_time, '2017-08-15T18:02:36.071158Z')
+
+    def test_span_data_time_iso_str(self):
+        span_data = span_data_module.SpanData(
+            name='root',
+            context=None,
+            span_id='6e0c63257de34c92',
+            parent_span_id='6e0c63257de34c93',
+            attributes={'key1': 'value1'},
+            start_time='2017-08-15T18:02:26.071158Z',
+            end_time=None,
+            stack_trace=None,
+            links=None,
+            status=None,
+            time_events=None,
+            same_process_as_parent_span=None,
+            child_span_count=None,
+            span_kind=0,
+        )
+
+        self.assertEqual(span_data.start_time_ns, 1502820146071158000)
+        self.assertIsNone(span_data.end_time_ns)
+        self.assertIsNone(span_data.end_time)
+
     def test_span_data_immutable(self):
         span_data = span_data_module.SpanData(
             name='root',
@@ -93,3 +138,210 @@ class TestSpanData(unittest.TestCase):
         trace_json = span_data_module.format_legacy_trace_json([span_data])
         self.assertEqual(trace_json.get('traceId'), trace_id)
         self.assertEqual(len(trace_json.get('spans')), 1)
+
+    def _make_span_datas(self, trace_ids):
+        return [
+            span_data_module.SpanData(
+                name='span{}'.format(index),
+                context=span_context.SpanContext(trace_id=trace_id),
+                span_id='{:016x}'.format(index + 1),
+                parent_span_id=None,
+                attributes=None,
+                start_time=None,
+                end_time=None,
+                child_span_count=None,
+                stack_trace=None,
+                time_events=None,
+                links=None,
+                status=None,
+                same_process_as_parent_span=None,
+                span_kind=0,
+            )
+            for index, trace_id in enumerate(trace_ids)
+        ]
+
+    def test_group_by_trace(self):
+        trace_id1 = '2dd43a1d6b2549c6bc2a1a54c2fc0b05'
+        trace_id2 = '6e0c63257de34c92bf9efcd03927272e'
+        span_datas = self._make_span_datas(
+            [trace_id1, trace_id2, trace_id1, trace_id2, trace_id1])
+
+        traces = span_data_module.group_by_trace(span_datas)
+
+        self.assertEqual(list(traces), [trace_id1, trace_id2])
+        self.assertEqual(
+            traces[trace_id1],
+            [span_datas[0], span_datas[2], span_datas[4]])
+        self.assertEqual(traces[trace_id2], [span_datas[1], span_datas[3]])
+
+    def test_format_legacy_trace_jsons(self):
+        trace_id1 = '2dd43a1d6b2549c6bc2a1a54c2fc0b05'
+        trace_id2 = '6e0c63257de34c92bf9efcd03927272e'
+        span_datas = self._make_span_datas([trace_id1, trace_id2, trace_id1])
+
+        trace_jsons = span_data_module.format_legacy_trace_jsons(span_datas)
+
+        self.assertEqual(
+            [trace_json['traceId'] for trace_json in trace_jsons],
+            [trace_id1, trace_id2])
+        self.assertEqual(
+            [span['spanId'] for span in trace_jsons[0]['spans']],
+            ['0000000000000001', '0000000000000003'])
+        self.assertEqual(
+            [span['spanId'] for span in trace_jsons[1]['spans']],
+            ['0000000000000002'])
+        self.assertEqual(span_data_module.format_legacy_trace_jsons([]), [])
+
+    def test_format_legacy_trace_json_dropped_counts(self):
+        trace_id = '2dd43a1d6b2549c6bc2a1a54c2fc0b05'
+        span_data = span_data_module.SpanData(
+            name='root',
+            context=span_context.SpanContext(
+                trace_id=trace_id,
+                span_id='6e0c63257de34c92'
+            ),
+            span_id='6e0c63257de34c92',
+            parent_span_id=None,
+            attributes={},
+            start_time_ns=None,
+            end_time_ns=None,
+            stack_trace=None,
+            links=[],
+            status=None,
+            time_events=[],
+            same_process_as_parent_span=None,
+            child_span_count=0,
+            span_kind=0,
+            dropped_attributes_count=1,
+            dropped_annotations_count=2,
+            dropped_message_events_count=3,
+            dropped_links_count=4,
+        )
+        span_json = span_data_module.format_legacy_trace_json(
+            [span_data])['spans'][0]
+
+        self.assertEqual(span_json['attributes'], {
+            'attributeMap': {},
+            'droppedAttributesCount': 1,
+        })
+        self.assertEqual(span_json['timeEvents'], {
+            'timeEvent': [],
+            'droppedAnnotationsCount': 2,
+            'droppedMessageEventsCount': 3,
+        })
+        self.assertEqual(span_json['links'], {
+            'link': [],
+            'droppedLinksCount': 4,
+        })
+
+    def test_dropped_counts_default(self):
+        span_data = span_data_module.SpanData(
+            name='root',
+            context=None,
+            span_id='6e0c63257de34c92',
+            parent_span_id=None,
+            attributes=None,
+            start_time_ns=None,
+            end_time_ns=None,
+            stack_trace=None,
+            links=None,
+            status=None,
+            time_events=None,
+            same_process_as_parent_span=None,
+            child_span_count=0,
+            span_kind=0,
+        )
+
+        self.assertEqual(span_data.dropped_attributes_count, 0)
+        self.assertEqual(span_data.dropped_annotations_count, 0)
+        self.assertEqual(span_data.dropped_message_events_count, 0)
+        self.assertEqual(span_data.dropped_links_count, 0)
+
+    def test_span_data_json_round_trip(self):
+        span_data = span_data_module.SpanData(
+            name='root',
+            context=span_context.SpanContext(
+                trace_id='2dd43a1d6b2549c6bc2a1a54c2fc0b05',
+                span_id='6e0c63257de34c92'),
+            span_id='6e0c63257de34c92',
+            parent_span_id='6e0c63257de34c93',
+            attributes={'key1': 'value1'},
+            start_time_ns=1502820146071158000,
+            end_time_ns=1502820156071158000,
+            stack_trace=stack_trace.StackTrace(
+                [stack_trace.StackFrame(
+                    'f', 'f', 'file.py', 10, 1, 'module', 'build', 'v1')],
+                stack_trace_hash_id='111'),
+            links=[link.Link('1111', span_id='6e0c63257de34c92',
+                             attributes={'key2': 2})],
+            status=status.Status(code=5, message='not found'),
+            time_events=[
+                time_event.TimeEvent(
+                    1502820146071158000,
+                    annotation=time_event.Annotation('annotation')),
+                time_event.TimeEvent(
+                    1502820146071159000,
+                    message_event=time_event.MessageEvent(
+                        1, uncompressed_size_bytes=10)),
+            ],
+            same_process_as_parent_span=False,
+            child_span_count=1,
+            span_kind=1,
+            dropped_links_count=2,
+        )
+
+        # Only plain JSON types, no objects, go on the wire.
+        span_data_json = json.loads(json.dumps(
+            span_data_module.format_span_data_json(span_data)))
+        parsed = span_data_module.parse_span_data_json(span_data_json)
+
+        self.assertEqual(
+            span_data_module.format_span_data_json(parsed), span_data_json)
+        self.assertEqual(parsed.name, 'root')
+        self.assertEqual(parsed.context.trace_id, span_data.context.trace_id)
+        self.assertTrue(parsed.context.trace_options.enabled)
+        self.assertEqual(parsed.attributes, {'key1': 'value1'})
+        self.assertEqual(parsed.start_time_ns, 1502820146071158000)
+        self.assertEqual(
+            parsed.stack_trace.stack_frames[0]['file_name']['value'],
+            'file.py')
+        self.assertEqual(parsed.links[0].attributes, {'key2': 2})
+        self.assertEqual(parsed.status.message, 'not found')
+        self.assertEqual(
+            parsed.time_events[0].annotation.description, 'annotation')
+        self.assertEqual(
+            parsed.time_events[1].message_event.uncompressed_size_bytes, 10)
+        self.assertEqual(parsed.dropped_links_count, 2)
+
+    def test_span_data_json_round_trip_traceback(self):
+        try:
+            raise KeyError('key')
+        except KeyError:
+            trace = stack_trace.StackTrace.from_traceback(sys.exc_info()[2])
+        trace.dropped_frames_count = 1
+        span_data = span_data_module.SpanData(
+            name='root',
+            context=None,
+            span_id='6e0c63257de34c92',
+            parent_span_id=None,
+            attributes=None,
+            start_time_ns=None,
+            end_time_ns=None,
+            stack_trace=trace,
+            links=None,
+            status=None,
+            time_events=None,
+            same_process_as_parent_span=None,
+            child_span_count=0,
+            span_kind=0,
+        )
+
+        span_data_json = json.loads(json.dumps(
+            span_data_module.format_span_data_json(span_data)))
+        parsed = span_data_module.parse_span_data_json(span_data_json)
+
+        self.assertEqual(
+            parsed.stack_trace.format_stack_trace_json(),
+            trace.format_stack_trace_json())
+        self.assertEqual(
+            parsed.stack_trace.stack_trace_hash_id, trace.stack_trace_hash_id)
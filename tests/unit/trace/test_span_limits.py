@@ -0,0 +1,41 @@
+# Copyright 2018, OpenCensus Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from opencensus.trace import span_limits
+
+
+class TestSpanLimits(unittest.TestCase):
+
+    def test_constructor_default(self):
+        limits = span_limits.SpanLimits()
+
+        self.assertEqual(limits.max_attributes, 32)
+        self.assertEqual(limits.max_annotations, 32)
+        self.assertEqual(limits.max_message_events, 128)
+        self.assertEqual(limits.max_links, 128)
+        self.assertTrue(limits.keep_latest_time_events)
+
+    def test_set_span_limits(self):
+        original = span_limits.get_span_limits()
+        limits = span_limits.SpanLimits(max_attributes=1)
+
+        try:
+            span_limits.set_span_limits(limits)
+            self.assertIs(span_limits.get_span_limits(), limits)
+        finally:
+            span_limits.set_span_limits(original)
+
+        self.assertIs(span_limits.get_span_limits(), original)
@@ -143,6 +143,16 @@ class TestTimeEvent(unittest.TestCase):
         self.assertEqual(time_event.timestamp, timestamp.isoformat() + 'Z')
         self.assertEqual(time_event.message_event, message_event)
 
+    def test_constructor_timestamp_ns(self):
+        message_event = mock.Mock()
+
+        time_event = time_event_module.TimeEvent(
+            timestamp=1502820146071158000,
+            message_event=message_event)
+
+        self.assertEqual(time_event.timestamp_ns, 1502820146071158000)
+        self.assertEqual(time_event.timestamp, '2017-08-15T18:02:26.071158Z')
+
     def test_constructor_value_error(self):
         import datetime
 
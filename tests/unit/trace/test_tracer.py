@@ -116,6 +116,26 @@ class TestTracer(unittest.TestCase):
         assert isinstance(result, context_tracer.ContextTracer)
         self.assertTrue(tracer.span_context.trace_options.enabled)
 
+    def test_get_tracer_not_sampled_shared(self):
+        from opencensus.trace.tracers import noop_tracer
+
+        sampler = mock.Mock()
+        sampler.should_sample.return_value = False
+        span_context = mock.Mock()
+        span_context.trace_options.enabled = False
+        tracer = tracer_module.Tracer(
+            span_context=span_context, sampler=sampler)
+
+        self.assertIs(tracer.tracer, noop_tracer.NOOP_TRACER)
+        self.assertFalse(tracer.is_recording)
+
+    def test_is_recording_sampled(self):
+        sampler = mock.Mock()
+        sampler.should_sample.return_value = True
+        tracer = tracer_module.Tracer(sampler=sampler)
+
+        self.assertTrue(tracer.is_recording)
+
     def test_finish_not_sampled(self):
         from opencensus.trace.tracers import noop_tracer
 
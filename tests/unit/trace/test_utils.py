@@ -63,3 +63,52 @@ class TestUtils(unittest.TestCase):
         # truncated in the middle of a character.
         self.assertEqual(expected_result, result)
         self.assertEqual(truncated_byte_count, 5)
+
+    def test_timestamp_ns_to_iso_str(self):
+        self.assertIsNone(utils.timestamp_ns_to_iso_str(None))
+        self.assertEqual(
+            utils.timestamp_ns_to_iso_str(1502820146071158999),
+            '2017-08-15T18:02:26.071158Z')
+        self.assertEqual(
+            utils.timestamp_ns_to_iso_str(1502820146000000000),
+            '2017-08-15T18:02:26Z')
+
+    def test_iso_str_to_timestamp_ns(self):
+        self.assertIsNone(utils.iso_str_to_timestamp_ns(None))
+        self.assertEqual(
+            utils.iso_str_to_timestamp_ns('2017-08-15T18:02:26.071158Z'),
+            1502820146071158000)
+        self.assertEqual(
+            utils.iso_str_to_timestamp_ns('2017-08-15T18:02:26Z'),
+            1502820146000000000)
+
+        with self.assertRaises(ValueError):
+            utils.iso_str_to_timestamp_ns('2017-08-15')
+
+    def test_datetime_to_timestamp_ns(self):
+        import datetime
+
+        dt = datetime.datetime(2017, 8, 15, 18, 2, 26, 71158)
+        timestamp_ns = utils.datetime_to_timestamp_ns(dt)
+
+        self.assertEqual(timestamp_ns, 1502820146071158000)
+        self.assertEqual(
+            utils.timestamp_ns_to_iso_str(timestamp_ns),
+            dt.isoformat() + 'Z')
+
+    def test_clocks(self):
+        self.assertIsInstance(utils.time_ns(), int)
+        before = utils.perf_counter_ns()
+        self.assertLessEqual(before, utils.perf_counter_ns())
+
+    def test_gzip_compress(self):
+        import gzip
+
+        import six
+
+        data = b'spans' * 100
+        compressed = utils.gzip_compress(data)
+
+        self.assertLess(len(compressed), len(data))
+        self.assertEqual(
+            gzip.GzipFile(fileobj=six.BytesIO(compressed)).read(), data)
@@ -174,13 +174,146 @@ class TestContextTracer(unittest.TestCase):
         span = tracer.start_span('test')
         parent_span_id = '6e0c63257de34c92'
         span.parent_span.span_id = parent_span_id
-        span.finish = mock.Mock()
-        tracer.end_span()
 
-        self.assertTrue(span.finish.called)
+        with mock.patch.object(span.__class__, 'finish') as mock_finish:
+            tracer.end_span()
+
+        self.assertTrue(mock_finish.called)
         self.assertEqual(tracer.span_context.span_id, parent_span_id)
         self.assertTrue(tracer.exporter.export.called)
 
+    def test_end_span_exports_trace_once(self):
+        exporter = mock.Mock()
+        tracer = context_tracer.ContextTracer(exporter=exporter)
+        tracer.start_span('root')
+        child = tracer.start_span('child')
+        child.span('grandchild').finish()
+        tracer.end_span()
+
+        self.assertFalse(exporter.export.called)
+
+        tracer.end_span()
+
+        exporter.export.assert_called_once_with(mock.ANY)
+        span_datas = exporter.export.call_args[0][0]
+        self.assertEqual(
+            [span_data.name for span_data in span_datas],
+            ['grandchild', 'child', 'root'])
+        self.assertEqual(tracer._span_datas_buffer, [])
+
+    def test_end_span_does_not_allocate_collections(self):
+        exporter = mock.Mock()
+        tracer = context_tracer.ContextTracer(exporter=exporter)
+
+        with tracer.span('a') as current_span:
+            pass
+
+        self.assertIsNone(current_span._attributes)
+        self.assertIsNone(current_span._time_events)
+        self.assertIsNone(current_span._links)
+        self.assertIsNone(current_span._child_spans)
+        span_data, = exporter.export.call_args[0][0]
+        self.assertIs(span_data.attributes, span._EMPTY_ATTRIBUTES)
+        self.assertIs(span_data.time_events, span._EMPTY_LIST)
+        self.assertIs(span_data.links, span._EMPTY_LIST)
+        self.assertEqual(span_data.child_span_count, 0)
+
+        with self.assertRaises(TypeError):
+            span_data.attributes['key'] = 'value'
+
+    def test_end_span_copies_collections(self):
+        exporter = mock.Mock()
+        tracer = context_tracer.ContextTracer(exporter=exporter)
+
+        with tracer.span('a') as current_span:
+            current_span.add_attribute('key', 'value')
+            current_span.add_annotation('annotation')
+
+        span_data, = exporter.export.call_args[0][0]
+        self.assertEqual(span_data.attributes, {'key': 'value'})
+        self.assertEqual(len(span_data.time_events), 1)
+        self.assertEqual(span_data.links, ())
+
+    def test_end_span_out_of_order(self):
+        from opencensus.trace import execution_context
+
+        exporter = mock.Mock()
+        tracer = context_tracer.ContextTracer(exporter=exporter)
+        root = tracer.start_span('root')
+        tracer.start_span('child')
+        execution_context.set_current_span(root)
+        tracer.end_span()
+
+        self.assertFalse(exporter.export.called)
+        self.assertEqual(len(tracer._spans_list), 1)
+
+        # Ending an already ended span does not export it again.
+        execution_context.set_current_span(root)
+        tracer.end_span()
+        self.assertFalse(exporter.export.called)
+
+        tracer.finish()
+
+        exporter.export.assert_called_once_with(mock.ANY)
+        span_datas = exporter.export.call_args[0][0]
+        self.assertEqual(
+            [span_data.name for span_data in span_datas], ['root', 'child'])
+
+    def test_end_span_dropped_counts(self):
+        from opencensus.trace import span_limits
+
+        original = span_limits.get_span_limits()
+        span_limits.set_span_limits(span_limits.SpanLimits(max_attributes=0))
+        self.addCleanup(span_limits.set_span_limits, original)
+
+        exporter = mock.Mock()
+        tracer = context_tracer.ContextTracer(exporter=exporter)
+        tracer.start_span('root')
+        tracer.add_attribute_to_current_span('key', 'value')
+        tracer.end_span()
+
+        span_data, = exporter.export.call_args[0][0]
+        self.assertEqual(span_data.attributes, {})
+        self.assertEqual(span_data.dropped_attributes_count, 1)
+
+    def test_end_span_max_buffered_spans(self):
+        exporter = mock.Mock()
+        tracer = context_tracer.ContextTracer(
+            exporter=exporter, max_buffered_spans=2)
+        tracer.start_span('root')
+
+        for index in range(3):
+            tracer.start_span('child-{}'.format(index))
+            tracer.end_span()
+
+        exporter.export.assert_called_once_with(mock.ANY)
+        self.assertEqual(len(exporter.export.call_args[0][0]), 2)
+        self.assertEqual(len(tracer._span_datas_buffer), 1)
+
+        tracer.end_span()
+
+        self.assertEqual(exporter.export.call_count, 2)
+        span_datas = exporter.export.call_args[0][0]
+        self.assertEqual(
+            [span_data.name for span_data in span_datas],
+            ['child-2', 'root'])
+
+    def test_end_span_max_buffered_spans_default(self):
+        exporter = mock.Mock()
+        tracer = context_tracer.ContextTracer(exporter=exporter)
+        tracer.start_span('root')
+
+        for index in range(context_tracer.DEFAULT_MAX_BUFFERED_SPANS):
+            tracer.start_span('child-{}'.format(index))
+            tracer.end_span()
+
+        # The root span never ends, its children are still exported.
+        exporter.export.assert_called_once_with(mock.ANY)
+        self.assertEqual(
+            len(exporter.export.call_args[0][0]),
+            context_tracer.DEFAULT_MAX_BUFFERED_SPANS)
+        self.assertEqual(tracer._span_datas_buffer, [])
+
     def test_list_collected_spans(self):
         tracer = context_tracer.ContextTracer()
         span1 = mock.Mock()
@@ -25,3 +25,19 @@ class TestNoopTracer(unittest.TestCase):
         spans = tracer.list_collected_spans()
 
         self.assertIsNone(spans)
+
+    def test_spans_shared(self):
+        from opencensus.trace.tracers import base
+
+        tracer = noop_tracer.NoopTracer()
+        span = tracer.start_span('span')
+
+        self.assertIsInstance(span, base.NullContextManager)
+        self.assertIs(span.context_tracer, tracer)
+        self.assertIs(tracer.span('span'), span)
+        self.assertIs(tracer.current_span(), span)
+        self.assertIs(tracer.end_span(), span)
+
+    def test_is_recording(self):
+        self.assertFalse(noop_tracer.NoopTracer().is_recording)
+        self.assertFalse(noop_tracer.NOOP_TRACER.is_recording)